@@ -3,8 +3,17 @@
 
 import argparse
 import os
-from src.map_generator import draw_china_map, draw_8000km_range_map, draw_world_map, draw_world_map_with_range
-from src.data_handler.json_loader import download_china_map_data
+# 渲染器（及其依赖的matplotlib）在首次访问绘图函数时才导入，不绘图的命令启动更快
+import src.map_generator as map_generator
+from src.map_generator import parse_radii
+from src.map_generator.figure_output import parse_formats, set_compact_svg
+from src.data_handler.json_loader import load_china_map_data, update_china_map_data, get_local_json_path
+from src.data_handler.downloader import NOT_MODIFIED
+from src.data_handler.geometry_cache import set_cache_enabled
+from src.data_handler.dataset_registry import dataset_registry
+from src.utils.border_distance import BorderDistanceEngine
+from src.utils.distance_field import build_distance_field
+from src.utils.projection import parse_projection
 from src.utils.config_loader import ConfigLoader  # 导入类而不是实例
 import logging
 
@@ -17,6 +26,36 @@ LOG_LEVELS = {
     'critical': logging.CRITICAL
 }
 
+def _output_formats(parser, merged_args):
+    """
+    解析合并后参数中的输出格式，格式无效时退出并显示错误
+    """
+    try:
+        return parse_formats(merged_args.get('formats'))
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def _projection(parser, merged_args):
+    """
+    解析合并后参数中的投影，投影无效时退出并显示错误
+    """
+    try:
+        return parse_projection(merged_args.get('projection'))
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def _radii(parser, merged_args):
+    """
+    解析合并后参数中的半径列表，半径无效时退出并显示错误
+    """
+    try:
+        return parse_radii(merged_args.get('radius', 8000))
+    except ValueError as e:
+        parser.error(str(e))
+
+
 def main():
     """
     地图生成器主程序入口
@@ -29,6 +68,9 @@ def main():
     parser.add_argument('--log-level', type=str, default=None, choices=LOG_LEVELS.keys(),
                         help='设置日志级别: debug, info, warning, error, critical')
     parser.add_argument('--generate-config', action='store_true', help='生成默认配置文件')
+    parser.add_argument('--no-cache', action='store_true', help='不使用几何二进制缓存，直接解析JSON地图数据')
+    parser.add_argument('--compact-svg', action='store_true',
+                        help='输出紧凑SVG：按输出尺寸量化坐标、使用相对路径命令、合并同样式的图形')
     
     # 添加子命令
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
@@ -38,18 +80,32 @@ def main():
     china_parser.add_argument('--output-dir', type=str, default=None, help='输出文件目录')
     china_parser.add_argument('--filename', type=str, default=None, help='输出文件名前缀')
     china_parser.add_argument('--no-show', action='store_true', help='不显示地图，仅保存文件')
+    china_parser.add_argument('--formats', type=str, default=None,
+                              help='输出格式，逗号分隔（如 png 或 svg,png），默认为svg,png')
     china_parser.add_argument('--data-path', type=str, default=None, help='自定义地图数据文件路径')
     
     # 8000公里范围地图命令
     range_parser = subparsers.add_parser('range', help='生成8000公里范围地图')
-    range_parser.add_argument('--radius', type=int, default=None, help='范围半径（公里）')
+    range_parser.add_argument('--radius', type=str, default=None,
+                              help='范围半径（公里），可以是单个值、逗号分隔的列表（2000,4000）或 起点:终点:步长（2000:8000:2000）；多个半径时一次运行输出全部地图和区间汇总表')
     range_parser.add_argument('--output-dir', type=str, default=None, help='输出文件目录')
     range_parser.add_argument('--filename', type=str, default=None, help='输出文件名前缀')
     range_parser.add_argument('--no-show', action='store_true', help='不显示地图，仅保存文件')
+    range_parser.add_argument('--formats', type=str, default=None,
+                              help='输出格式，逗号分隔（如 png 或 svg,png），默认为svg,png')
+    range_parser.add_argument('--projection', type=str, default=None,
+                              help='方位投影（aeqd、laea、ortho或stere），可用 名称:经度,纬度 指定投影中心，默认按经纬度绘制')
+    
+    # 距离场构建命令
+    field_parser = subparsers.add_parser('distance-field', help='预先计算到中国边界的距离场，之后任意半径的范围只需取阈值')
+    field_parser.add_argument('--resolution', type=float, default=None, help='网格分辨率（度）')
+    field_parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为CPU核数')
+    field_parser.add_argument('--output-path', type=str, default=None, help='距离场文件保存路径')
+    field_parser.add_argument('--data-path', type=str, default=None, help='自定义中国地图数据文件路径')
     
     # 下载数据命令
     download_parser = subparsers.add_parser('download', help='从GitHub下载中国地图数据')
-    download_parser.add_argument('--force', action='store_true', help='强制重新下载数据，即使本地已有')
+    download_parser.add_argument('--force', action='store_true', help='无条件重新下载数据，不检查本地数据是否已是最新')
     download_parser.add_argument('--output-path', type=str, default=None, help='数据保存路径')
     
     # 世界地图命令
@@ -57,15 +113,47 @@ def main():
     world_parser.add_argument('--output-dir', type=str, default=None, help='输出文件目录')
     world_parser.add_argument('--filename', type=str, default=None, help='输出文件名前缀')
     world_parser.add_argument('--no-show', action='store_true', help='不显示地图，仅保存文件')
+    world_parser.add_argument('--formats', type=str, default=None,
+                              help='输出格式，逗号分隔（如 png 或 svg,png），默认为svg,png')
     world_parser.add_argument('--data-path', type=str, default=None, help='自定义世界地图数据文件路径')
     
     # 添加世界地图与范围结合的命令
     world_range_parser = subparsers.add_parser('world-range', help='生成带8000公里范围的世界地图')
-    world_range_parser.add_argument('--radius', type=int, default=None, help='范围半径（公里）')
+    world_range_parser.add_argument('--radius', type=str, default=None,
+                                    help='范围半径（公里），可以是单个值、逗号分隔的列表（2000,4000）或 起点:终点:步长（2000:8000:2000）；多个半径时一次运行输出全部地图和区间汇总表')
     world_range_parser.add_argument('--output-dir', type=str, default=None, help='输出文件目录')
     world_range_parser.add_argument('--filename', type=str, default=None, help='输出文件名前缀')
     world_range_parser.add_argument('--no-show', action='store_true', help='不显示地图，仅保存文件')
+    world_range_parser.add_argument('--formats', type=str, default=None,
+                                    help='输出格式，逗号分隔（如 png 或 svg,png），默认为svg,png')
     world_range_parser.add_argument('--data-path', type=str, default=None, help='自定义世界地图数据文件路径')
+    world_range_parser.add_argument('--projection', type=str, default=None,
+                                    help='方位投影（aeqd、laea、ortho或stere），可用 名称:经度,纬度 指定投影中心，默认按经纬度绘制')
+    
+    # XYZ瓦片金字塔命令
+    tiles_parser = subparsers.add_parser('tiles', help='生成世界、中国和范围图层的Web墨卡托XYZ瓦片金字塔')
+    tiles_parser.add_argument('--output-path', type=str, default=None,
+                              help='输出路径，.mbtiles后缀时写入MBTiles文件，否则写入{z}/{x}/{y}.png目录')
+    tiles_parser.add_argument('--min-zoom', type=int, default=None, help='最小缩放级别')
+    tiles_parser.add_argument('--max-zoom', type=int, default=None, help='最大缩放级别')
+    tiles_parser.add_argument('--radius', type=int, default=None, help='范围图层的半径（公里）')
+    tiles_parser.add_argument('--layers', type=str, default=None, help='图层，逗号分隔（world,china,range），默认全部')
+    tiles_parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为CPU核数')
+    tiles_parser.add_argument('--data-path', type=str, default=None, help='自定义世界地图数据文件路径')
+    tiles_parser.add_argument('--force', action='store_true', help='全部重新渲染，不跳过内容未变化的瓦片')
+    
+    # 批量渲染命令
+    batch_parser = subparsers.add_parser('batch', help='从JSON作业列表批量生成地图，由进程池并行执行')
+    batch_parser.add_argument('jobs', type=str, help='作业列表JSON文件（作业对象列表，command为命令名，其余键与命令行参数同名）')
+    batch_parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为CPU核数')
+    batch_parser.add_argument('--timeout', type=float, default=None, help='单个作业的超时（秒）')
+
+    # 本地渲染服务命令
+    serve_parser = subparsers.add_parser('serve', help='启动本地HTTP渲染服务，按请求渲染地图并缓存结果')
+    serve_parser.add_argument('--host', type=str, default=None, help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=None, help='监听端口')
+    serve_parser.add_argument('--cache-mb', type=float, default=None, help='渲染结果缓存的容量（MB）')
+    serve_parser.add_argument('--data-path', type=str, default=None, help='自定义世界地图数据文件路径')
     
     # 解析命令行参数
     args = parser.parse_args()
@@ -85,6 +173,20 @@ def main():
     
     logger.info("程序启动")
     
+    # 几何二进制缓存开关
+    if args.no_cache or not config_loader.get('global', {}).get('geometry_cache', True):
+        set_cache_enabled(False)
+        logger.info("已关闭几何二进制缓存")
+    
+    # 紧凑SVG输出开关
+    global_config = config_loader.get('global', {})
+    if args.compact_svg or global_config.get('compact_svg', False):
+        set_compact_svg(True, global_config.get('svg_quantization'))
+        logger.info("已开启紧凑SVG输出")
+    
+    # 进程内数据集缓存容量
+    dataset_registry.resize(config_loader.get('global', {}).get('dataset_registry_size', dataset_registry.max_entries))
+    
     # 处理生成配置文件命令
     if args.generate_config:
         config_loader.generate_default_config()
@@ -95,12 +197,14 @@ def main():
     if args.command == 'china':
         # 合并配置和命令行参数
         merged_args = config_loader.merge_with_args(args, 'china')
+        formats = _output_formats(parser, merged_args)
         # 生成中国地图
-        files = draw_china_map(
+        files = map_generator.draw_china_map(
             output_dir=merged_args.get('output_dir', 'outputs'),
             filename_prefix=merged_args.get('filename', 'china_map'),
             show_map=merged_args.get('show_map', True),
-            data_path=merged_args.get('data_path')
+            data_path=merged_args.get('data_path'),
+            formats=formats
         )
         logger.info(f"中国地图已生成并保存到以下文件：")
         for file in files:
@@ -108,16 +212,51 @@ def main():
     elif args.command == 'range':
         # 合并配置和命令行参数
         merged_args = config_loader.merge_with_args(args, 'range')
+        formats = _output_formats(parser, merged_args)
+        projection = _projection(parser, merged_args)
+        radii = _radii(parser, merged_args)
+        if len(radii) > 1:
+            # 多半径扫描：一次计算，输出每个半径的地图和区间汇总表
+            files = map_generator.draw_range_sweep(
+                radii,
+                output_dir=merged_args.get('output_dir', 'outputs'),
+                filename_prefix=merged_args.get('filename', 'china_8000km_range'),
+                distance_field_path=merged_args.get('distance_field_path'),
+                formats=formats,
+                projection=projection
+            )
+            print(f"{len(radii)}个半径的范围地图已生成并保存到以下文件：")
+            for file in files:
+                print(f"- {os.path.abspath(file)}")
+            return
         # 生成8000公里范围地图
-        files = draw_8000km_range_map(
-            radius_km=merged_args.get('radius', 8000),
+        files = map_generator.draw_8000km_range_map(
+            radius_km=radii[0],
             output_dir=merged_args.get('output_dir', 'outputs'),
             filename_prefix=merged_args.get('filename', 'china_8000km_range'),
-            show_map=merged_args.get('show_map', True)
+            show_map=merged_args.get('show_map', True),
+            distance_field_path=merged_args.get('distance_field_path'),
+            formats=formats,
+            projection=projection
         )
-        print(f"{merged_args.get('radius', 8000)}公里范围地图已生成并保存到以下文件：")
+        print(f"{radii[0]}公里范围地图已生成并保存到以下文件：")
         for file in files:
             print(f"- {os.path.abspath(file)}")
+    elif args.command == 'distance-field':
+        # 合并配置和命令行参数
+        merged_args = config_loader.merge_with_args(args, 'distance-field')
+        data_path = merged_args.get('data_path') or get_local_json_path()
+        output_path = merged_args.get('output_path') or merged_args.get('distance_field_path')
+        # 构建边界距离引擎并计算距离场
+        engine = BorderDistanceEngine(load_china_map_data(data_path))
+        metadata = build_distance_field(
+            engine,
+            output_path,
+            source_path=data_path,
+            resolution=merged_args.get('resolution', 0.1),
+            workers=merged_args.get('workers')
+        )
+        print(f"距离场已生成（{metadata['shape'][0]}x{metadata['shape'][1]}）并保存到: {os.path.abspath(output_path)}")
     elif args.command == 'download':
         # 合并配置和命令行参数
         merged_args = config_loader.merge_with_args(args, 'download')
@@ -129,16 +268,12 @@ def main():
                     os.makedirs('data')
                 output_path = os.path.join('data', 'china.json')
             
-            # 检查文件是否已存在
-            if os.path.exists(output_path) and not merged_args.get('force', False):
-                print(f"文件已存在，如需重新下载，请使用 --force 参数")
+            # 本地已有文件时发送条件请求，服务器数据未改变时不重新下载；--force时无条件重新下载
+            status = update_china_map_data(output_path=output_path, force=merged_args.get('force', False))
+            if status == NOT_MODIFIED:
+                print(f"本地数据已是最新: {os.path.abspath(output_path)}")
                 return
-            elif os.path.exists(output_path):
-                os.remove(output_path)
-                print(f"已删除原有文件: {output_path}")
-            
-            # 下载数据
-            data = download_china_map_data(output_path=output_path)
+            data = load_china_map_data(data_path=output_path)
             print(f"中国地图数据已成功下载并保存到: {os.path.abspath(output_path)}")
             print(f"数据包含 {len(data.get('features', []))} 个地理特征")
         except Exception as e:
@@ -148,12 +283,14 @@ def main():
     elif args.command == 'world':
         # 合并配置和命令行参数
         merged_args = config_loader.merge_with_args(args, 'world')
+        formats = _output_formats(parser, merged_args)
         # 生成世界地图
-        files = draw_world_map(
+        files = map_generator.draw_world_map(
             output_dir=merged_args.get('output_dir', 'outputs'),
             filename_prefix=merged_args.get('filename', 'world_map'),
             show_map=merged_args.get('show_map', True),
-            data_path=merged_args.get('data_path')
+            data_path=merged_args.get('data_path'),
+            formats=formats
         )
         print(f"世界地图已生成并保存到以下文件：")
         for file in files:
@@ -161,17 +298,94 @@ def main():
     elif args.command == 'world-range':
         # 合并配置和命令行参数
         merged_args = config_loader.merge_with_args(args, 'world-range')
+        formats = _output_formats(parser, merged_args)
+        projection = _projection(parser, merged_args)
+        radii = _radii(parser, merged_args)
+        if len(radii) > 1:
+            # 多半径扫描：世界底图只绘制一次，输出每个半径的地图和区间汇总表
+            files = map_generator.draw_world_range_sweep(
+                radii,
+                output_dir=merged_args.get('output_dir', 'outputs'),
+                filename_prefix=merged_args.get('filename', 'world_with_8000km_range'),
+                data_path=merged_args.get('data_path'),
+                distance_field_path=merged_args.get('distance_field_path'),
+                formats=formats,
+                projection=projection
+            )
+            print(f"{len(radii)}个半径的世界范围地图已生成并保存到以下文件：")
+            for file in files:
+                print(f"- {os.path.abspath(file)}")
+            return
         # 生成带8000公里范围的世界地图
-        files = draw_world_map_with_range(
-            radius_km=merged_args.get('radius', 8000),
+        files = map_generator.draw_world_map_with_range(
+            radius_km=radii[0],
             output_dir=merged_args.get('output_dir', 'outputs'),
             filename_prefix=merged_args.get('filename', 'world_with_8000km_range'),
             show_map=merged_args.get('show_map', True),
-            data_path=merged_args.get('data_path')
+            data_path=merged_args.get('data_path'),
+            distance_field_path=merged_args.get('distance_field_path'),
+            formats=formats,
+            projection=projection
         )
-        print(f"带{merged_args.get('radius', 8000)}公里范围的世界地图已生成并保存到以下文件：")
+        print(f"带{radii[0]}公里范围的世界地图已生成并保存到以下文件：")
         for file in files:
             print(f"- {os.path.abspath(file)}")
+    elif args.command == 'tiles':
+        from src.map_generator.tile_pyramid import parse_layers
+        # 合并配置和命令行参数
+        merged_args = config_loader.merge_with_args(args, 'tiles')
+        try:
+            layers = parse_layers(merged_args.get('layers'))
+        except ValueError as e:
+            parser.error(str(e))
+        output_path = merged_args.get('output_path') or os.path.join(merged_args.get('output_dir', 'outputs'), 'tiles.mbtiles')
+        stats = map_generator.generate_tiles(
+            output_path,
+            min_zoom=merged_args.get('min_zoom', 0),
+            max_zoom=merged_args.get('max_zoom', 7),
+            radius_km=merged_args.get('radius', 8000),
+            layers=layers,
+            data_path=merged_args.get('data_path'),
+            workers=merged_args.get('workers'),
+            force=merged_args.get('force', False)
+        )
+        print(f"瓦片已保存到: {os.path.abspath(output_path)}")
+        print(f"渲染 {stats['rendered']} 个，未变化 {stats['unchanged']} 个，空瓦片 {stats['empty']} 个，删除 {stats['deleted']} 个")
+    elif args.command == 'batch':
+        from src.map_generator.batch import load_jobs, run_batch, JOB_OK
+        # 合并配置和命令行参数
+        merged_args = config_loader.merge_with_args(args, 'batch')
+        try:
+            jobs = load_jobs(args.jobs)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法读取作业列表: {e}")
+        results, summary = run_batch(
+            jobs,
+            config_loader.config,
+            workers=merged_args.get('workers'),
+            timeout=merged_args.get('timeout', 600),
+            log_level=log_level
+        )
+        for i, result in enumerate(results, 1):
+            status = '成功' if result['status'] == JOB_OK else f"失败（{result['error']}）"
+            print(f"[{i}] {result['command']}: {status}，{result['maps']}张地图，{result['seconds']:.1f}秒")
+            for file in result['files']:
+                print(f"    - {os.path.abspath(file)}")
+        print(f"共{summary['jobs']}个作业，成功{summary['ok']}个，失败{summary['failed']}个；"
+              f"{summary['maps']}张地图，耗时{summary['seconds']:.1f}秒，吞吐量{summary['maps_per_second']:.2f}张/秒")
+        if summary['failed']:
+            raise SystemExit(1)
+    elif args.command == 'serve':
+        from src.map_generator.render_service import serve
+        # 合并配置和命令行参数
+        merged_args = config_loader.merge_with_args(args, 'serve')
+        serve(
+            host=merged_args.get('host', '127.0.0.1'),
+            port=merged_args.get('port', 8765),
+            cache_mb=merged_args.get('cache_mb', 256),
+            world_data_path=merged_args.get('data_path'),
+            distance_field_path=merged_args.get('distance_field_path')
+        )
     else:
         # 未指定命令，显示帮助信息
         parser.print_help()
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# 确保我们可以导入项目模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timeit(func, repeat=3):
+    """
+    多次运行函数，返回最短耗时（秒）和最后一次的返回值
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_vincenty(n=20000):
+    """
+    对比标量版Vincenty与数组版vincenty_inverse的耗时和结果
+    """
+    from src.utils.distance_calculator import (
+        _vincenty_scalar, vincenty_inverse, great_circle_distance
+    )
+
+    print(f"===== Vincenty距离基准测试（{n}个点对）=====")
+    rng = np.random.default_rng(0)
+    lat1 = rng.uniform(-89, 89, n)
+    lon1 = rng.uniform(-180, 180, n)
+    lat2 = rng.uniform(-89, 89, n)
+    lon2 = rng.uniform(-180, 180, n)
+
+    scalar_time, scalar = _timeit(
+        lambda: np.array([_vincenty_scalar(*p) for p in zip(lat1, lon1, lat2, lon2)]), repeat=1)
+    array_time, (array, fallback) = _timeit(
+        lambda: vincenty_inverse(lat1, lon1, lat2, lon2, return_status=True))
+    haversine_time, _ = _timeit(lambda: great_circle_distance(lat1, lon1, lat2, lon2))
+
+    # 标量版最多迭代20次后回退，使用相同的迭代上限比较结果
+    same_limit, same_fallback = vincenty_inverse(lat1, lon1, lat2, lon2, max_iter=20, return_status=True)
+    ok = ~same_fallback
+    print(f"标量版Vincenty: {scalar_time * 1000:.1f} ms")
+    print(f"数组版Vincenty: {array_time * 1000:.1f} ms（加速 {scalar_time / array_time:.0f} 倍）")
+    print(f"数组版哈维正弦: {haversine_time * 1000:.1f} ms")
+    print(f"回退到哈维正弦的点对数: {int(fallback.sum())}")
+    print(f"与标量版的最大差异: {np.abs(same_limit[ok] - scalar[ok]).max():.3e} 公里")
+
+
+def bench_border(n=50000):
+    """
+    测试真实边界距离引擎在大量查询点下的耗时
+    """
+    from src.data_handler.json_loader import load_china_map_data
+    from src.utils.border_distance import BorderDistanceEngine
+
+    print(f"===== 边界距离基准测试（{n}个查询点）=====")
+    china_data = load_china_map_data()
+    build_time, engine = _timeit(lambda: BorderDistanceEngine(china_data), repeat=1)
+    rng = np.random.default_rng(0)
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    lons = rng.uniform(-180, 180, n)
+
+    query_time, _ = _timeit(lambda: engine.distance_to_border(lats, lons), repeat=1)
+    region_time, _ = _timeit(lambda: engine.distance_to_region(lats, lons), repeat=1)
+    print(f"边界线段数: {len(engine.segment_starts)}")
+    print(f"构建引擎: {build_time * 1000:.1f} ms")
+    print(f"到边界距离: {query_time * 1000:.1f} ms（{n / query_time:.0f} 点/秒）")
+    print(f"到区域距离（含点在区域内判断）: {region_time * 1000:.1f} ms")
+
+
+def bench_buffer(radii=(2000, 4000, 6000, 8000)):
+    """
+    测试不同半径下测地缓冲区的生成耗时
+    """
+    from src.data_handler.json_loader import load_china_map_data
+    from src.utils.border_distance import BorderDistanceEngine
+    from src.utils.geodesic_buffer import build_geodesic_buffer, _buffer_cache
+
+    print("===== 测地缓冲区基准测试 =====")
+    engine = BorderDistanceEngine(load_china_map_data())
+    for radius in radii:
+        _buffer_cache.clear()
+        cold_time, polygons = _timeit(lambda: build_geodesic_buffer(engine, radius), repeat=1)
+        warm_time, _ = _timeit(lambda: build_geodesic_buffer(engine, radius))
+        n_vertices = sum(len(ring) for polygon in polygons for ring in polygon)
+        print(f"{radius}公里: 生成 {cold_time * 1000:.1f} ms, 缓存命中 {warm_time * 1000:.3f} ms, "
+              f"{len(polygons)}个多边形/{n_vertices}个顶点")
+
+
+def bench_field(resolution=0.5, radii=(2000, 4000, 6000, 8000)):
+    """
+    测试距离场的并行构建、内存映射加载和阈值查询耗时
+    """
+    import tempfile
+    from src.data_handler.json_loader import load_china_map_data
+    from src.utils.border_distance import BorderDistanceEngine
+    from src.utils.distance_field import build_distance_field, load_distance_field
+
+    print(f"===== 距离场基准测试（分辨率{resolution}度）=====")
+    engine = BorderDistanceEngine(load_china_map_data())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        field_path = os.path.join(tmp_dir, 'field.npy')
+        build_time, metadata = _timeit(lambda: build_distance_field(engine, field_path, resolution=resolution),
+                                       repeat=1)
+        load_time, field = _timeit(lambda: load_distance_field(field_path))
+        print(f"构建 {metadata['shape'][0]}x{metadata['shape'][1]} 网格: {build_time:.2f} s"
+              f"（{os.cpu_count()}个进程）")
+        print(f"内存映射加载: {load_time * 1000:.3f} ms")
+        for radius in radii:
+            threshold_time, mask = _timeit(lambda: field.within(radius))
+            print(f"{radius}公里阈值: {threshold_time * 1000:.2f} ms, 覆盖{mask.mean() * 100:.1f}%格点")
+        del field
+
+
+def bench_geocache(data_path='data/china.json', repeat=5):
+    """
+    对比直接解析JSON（冷加载）与内存映射几何缓存（热加载）的加载和遍历耗时
+    """
+    import json
+    import shutil
+    import tempfile
+    from src.data_handler.geometry_cache import load_geojson, cache_path_for
+
+    def walk(data):
+        # 与渲染器相同的方式遍历所有环
+        n_points = 0
+        for feature in data['features']:
+            geometry = feature['geometry']
+            polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+            for polygon_coords in polygons:
+                for ring in polygon_coords:
+                    n_points += len(np.asarray(ring))
+        return n_points
+
+    def cold():
+        with open(source_path, 'r', encoding='utf-8') as f:
+            return walk(json.load(f))
+
+    def warm():
+        return walk(load_geojson(source_path))
+
+    print(f"===== 几何缓存基准测试（{data_path}, {os.path.getsize(data_path) / 1e6:.1f} MB）=====")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, os.path.basename(data_path))
+        shutil.copyfile(data_path, source_path)
+        build_time, _ = _timeit(lambda: load_geojson(source_path), repeat=1)
+        cold_time, n_points = _timeit(cold, repeat)
+        warm_time, _ = _timeit(warm, repeat)
+        print(f"坐标点数: {n_points}, 缓存文件: {os.path.getsize(cache_path_for(source_path)) / 1e6:.1f} MB")
+        print(f"首次加载并写入缓存: {build_time * 1000:.1f} ms")
+        print(f"冷加载（json.load）: {cold_time * 1000:.1f} ms")
+        print(f"热加载（内存映射缓存）: {warm_time * 1000:.1f} ms（加速 {cold_time / warm_time:.0f} 倍）")
+
+
+def bench_stream(n_features=2000, points_per_ring=500):
+    """
+    对比json.load与流式读取在大型GeoJSON文件上的耗时和峰值内存
+    """
+    import json
+    import tempfile
+    import tracemalloc
+    from src.data_handler.geojson_stream import iter_geojson_features
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'large.geojson')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "FeatureCollection", "features": [')
+            for i in range(n_features):
+                ring = np.round(rng.uniform(-90, 90, (points_per_ring, 2)), 6).tolist()
+                feature = {"type": "Feature", "properties": {"name": f"Country_{i}"},
+                           "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]}}
+                f.write((',' if i else '') + json.dumps(feature))
+            f.write(']}')
+        print(f"===== 流式GeoJSON基准测试（{os.path.getsize(path) / 1e6:.1f} MB, {n_features}个特征）=====")
+
+        def full_load():
+            with open(path, 'r', encoding='utf-8') as f:
+                return len(json.load(f)['features'])
+
+        def streamed():
+            return sum(1 for _ in iter_geojson_features(path))
+
+        for label, func in (('json.load', full_load), ('流式读取', streamed)):
+            tracemalloc.start()
+            elapsed, count = _timeit(func, repeat=1)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{label}: {elapsed * 1000:.0f} ms, 峰值内存 {peak / 1e6:.1f} MB, {count}个特征")
+
+
+def bench_topojson(data_path='data/china.json', quantization=100000, repeat=5):
+    """
+    对比GeoJSON直接解析与等价的量化TopoJSON解码的耗时和文件大小
+    """
+    import json
+    from src.data_handler.topojson import topology_to_geojson
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        geojson_text = f.read()
+    geojson = json.loads(geojson_text)
+
+    # 由GeoJSON构造等价的量化拓扑：每个环作为一条弧段
+    rings = []
+    geometries = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        arcs = []
+        for polygon_coords in polygons:
+            arcs.append([[len(rings) + k] for k in range(len(polygon_coords))])
+            rings.extend(np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon_coords)
+        geometries.append({"type": "MultiPolygon", "arcs": arcs, "properties": feature['properties']})
+    points = np.vstack(rings)
+    translate = points.min(axis=0)
+    scale = (points.max(axis=0) - translate) / (quantization - 1)
+    quantized_arcs = []
+    for ring in rings:
+        q = np.round((ring - translate) / scale).astype(np.int64)
+        quantized_arcs.append(np.vstack((q[:1], np.diff(q, axis=0))).tolist())
+    topology_text = json.dumps({
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {"provinces": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": quantized_arcs,
+    }, ensure_ascii=False)
+
+    print(f"===== TopoJSON解码基准测试（{len(rings)}条弧段, {len(points)}个坐标点）=====")
+    geojson_time, _ = _timeit(lambda: json.loads(geojson_text), repeat)
+    topo_time, _ = _timeit(lambda: topology_to_geojson(json.loads(topology_text)), repeat)
+    print(f"GeoJSON: {len(geojson_text.encode('utf-8')) / 1e6:.2f} MB, 解析 {geojson_time * 1000:.1f} ms")
+    print(f"TopoJSON: {len(topology_text.encode('utf-8')) / 1e6:.2f} MB, 解析并解码 {topo_time * 1000:.1f} ms")
+
+
+def bench_lod(data_path='data/china.json', extents=((70, 140, 15, 55), (-76, 284, -49, 121)), figsize=(12, 10)):
+    """
+    统计各LOD级别保留的顶点数，以及按显示范围自动选择级别后绘制多边形的耗时
+    """
+    import json
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Polygon
+    from src.utils.geometry_lod import LODGeometry, select_lod_tolerance, DEFAULT_LOD_TOLERANCES
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    build_time, lod = _timeit(lambda: LODGeometry(data), 1)
+    print(f"===== LOD简化基准测试（{len(lod.arc_offsets) - 1}条弧段, {len(lod.arc_coords)}个弧段顶点）=====")
+    print(f"拓扑拆分和重要度计算: {build_time * 1000:.1f} ms")
+
+    def count_vertices(collection):
+        return sum(len(ring) for feature in collection['features']
+                   for polygon_coords in ([feature['geometry']['coordinates']]
+                                          if feature['geometry']['type'] == 'Polygon'
+                                          else feature['geometry']['coordinates'])
+                   for ring in polygon_coords)
+
+    for tolerance in DEFAULT_LOD_TOLERANCES:
+        level_time, simplified = _timeit(lambda: lod.simplified(tolerance), 1)
+        print(f"容差 {tolerance:<6}度: {count_vertices(simplified):>7}个顶点, 生成 {level_time * 1000:.1f} ms")
+
+    def render(collection, extent):
+        fig = plt.figure(figsize=figsize, dpi=100)
+        ax = plt.axes()
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+        patches = [Polygon(ring, closed=True) for feature in collection['features']
+                   for polygon_coords in ([feature['geometry']['coordinates']]
+                                          if feature['geometry']['type'] == 'Polygon'
+                                          else feature['geometry']['coordinates'])
+                   for ring in polygon_coords]
+        ax.add_collection(PatchCollection(patches))
+        fig.canvas.draw()
+        plt.close(fig)
+
+    for extent in extents:
+        tolerance = select_lod_tolerance(extent, figsize, 300)
+        full_time, _ = _timeit(lambda: render(data, extent))
+        lod_time, _ = _timeit(lambda: render(lod.simplified(tolerance), extent))
+        print(f"显示范围 {extent}: 自动选择容差 {tolerance}度, "
+              f"绘制 完整 {full_time * 1000:.1f} ms / 简化 {lod_time * 1000:.1f} ms")
+
+
+def bench_paths(data_path='data/china.json', n_features=2000, rings_per_feature=4, points_per_ring=200):
+    """
+    对比每个环一个Polygon补丁（PatchCollection）与每个特征一个复合Path（PathCollection）的构建和绘制耗时
+    """
+    import json
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Polygon
+    from src.map_generator.geometry_paths import add_geojson_collection
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        china_data = json.load(f)
+
+    # 合成数据集：大量小多边形，每个特征由多个环组成
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, points_per_ring, endpoint=False)
+    features = []
+    for i in range(n_features):
+        polygons = []
+        for _ in range(rings_per_feature):
+            center = rng.uniform([-170, -80], [170, 80])
+            radius = rng.uniform(0.2, 2.0) * (1 + 0.1 * np.sin(7 * angles))
+            ring = np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+            polygons.append([np.vstack((ring, ring[:1])).tolist()])
+        features.append({"type": "Feature", "properties": {"name": f"F{i}"},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    synthetic = {"type": "FeatureCollection", "features": features}
+
+    colors = plt.cm.tab20(np.linspace(0, 1, 20))
+
+    def render_patches(collection):
+        fig = plt.figure(figsize=(12, 10), dpi=100)
+        ax = plt.axes()
+        ax.set_xlim(-180, 180)
+        ax.set_ylim(-90, 90)
+        patches = []
+        for feature in collection['features']:
+            geometry = feature['geometry']
+            polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+            for polygon_coords in polygons:
+                for ring in polygon_coords:
+                    x, y = zip(*ring)
+                    patches.append(Polygon(np.column_stack((x, y)), closed=True))
+        p = PatchCollection(patches, alpha=0.7)
+        p.set_color([colors[i % len(colors)] for i in range(len(patches))])
+        ax.add_collection(p)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def render_paths(collection):
+        fig = plt.figure(figsize=(12, 10), dpi=100)
+        ax = plt.axes()
+        ax.set_xlim(-180, 180)
+        ax.set_ylim(-90, 90)
+        p, names = add_geojson_collection(ax, collection, alpha=0.7)
+        p.set_color([colors[i % len(colors)] for i in range(len(names))])
+        fig.canvas.draw()
+        plt.close(fig)
+
+    print("===== 复合Path绘制基准测试 =====")
+    for label, collection in ((data_path, china_data),
+                              (f"合成数据 {n_features}个特征x{rings_per_feature}个环", synthetic)):
+        patch_time, _ = _timeit(lambda: render_patches(collection))
+        path_time, _ = _timeit(lambda: render_paths(collection))
+        print(f"{label}: Polygon补丁 {patch_time * 1000:.1f} ms, 复合Path {path_time * 1000:.1f} ms, "
+              f"加速 {patch_time / path_time:.1f}x")
+
+
+def bench_render(n=1000, figsize=(4, 3)):
+    """
+    连续渲染n次：每次通过pyplot新建图形 与 无界面渲染上下文复用底图、只替换叠加层，比较耗时和内存增长
+    """
+    import tempfile
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src.map_generator.figure_output import save_figure
+    from src.map_generator.render_context import RenderContext, current_rss_kb
+
+    rng = np.random.default_rng(0)
+    base_points = rng.uniform(0, 10, (500, 2))
+
+    def build_base(fig):
+        ax = fig.add_subplot()
+        ax.grid(True, linestyle='--', alpha=0.5)
+        ax.plot(base_points[:, 0], base_points[:, 1], 'ro', markersize=2)
+        return ax
+
+    def draw_overlay(ax, i):
+        radius = 1 + i % 8
+        angles = np.linspace(0, 2 * np.pi, 200)
+        ax.plot(5 + radius * np.cos(angles), 5 + radius * np.sin(angles), color='orange', label=f'{radius}')
+        ax.legend(loc='lower right')
+        ax.set_title(f'radius {radius}')
+
+    print(f"===== 连续渲染基准测试（{n}次, {figsize[0]}x{figsize[1]}英寸, PNG）=====")
+    with tempfile.TemporaryDirectory() as output_dir:
+        start_rss = current_rss_kb()
+        start = time.perf_counter()
+        for i in range(n):
+            fig = plt.figure(figsize=figsize, dpi=100)
+            draw_overlay(build_base(fig), i)
+            fig.tight_layout()
+            save_figure(fig, output_dir, 'pyplot', formats='png', dpi=100)
+            plt.close(fig)
+        elapsed = time.perf_counter() - start
+        print(f"pyplot每次新建图形: {elapsed / n * 1000:.1f} ms/次, 内存增长 {current_rss_kb() - start_rss} KB")
+
+        context = RenderContext()
+        start = time.perf_counter()
+        for i in range(n):
+            context.render('bench', figsize, 100, build_base, lambda ax: draw_overlay(ax, i),
+                           output_dir=output_dir, filename_prefix='context', formats='png', output_dpi=100)
+            if i == 9:
+                warm_rss = current_rss_kb()
+        elapsed = time.perf_counter() - start
+        stats = context.stats()
+        print(f"渲染上下文复用底图: {elapsed / n * 1000:.1f} ms/次, 底图绘制 {stats['base_builds']} 次, "
+              f"第10次之后内存增长 {stats['last_rss_kb'] - warm_rss} KB, 峰值 {stats['peak_rss_kb']} KB")
+
+
+def bench_basemap(radii=(2000, 4000, 6000, 8000), n_features=250, rings_per_feature=8, points_per_ring=400,
+                  figsize=(25, 10), dpi=300):
+    """
+    逐个半径渲染PNG：每次绘制全部国家多边形 与 使用缓存的底图栅格、只绘制叠加层，比较每个半径的耗时
+    """
+    import tempfile
+    from src.map_generator.basemap_cache import BasemapLayer, basemap_cache_stats, clear_basemap_cache, dataset_fingerprint
+    from src.map_generator.geometry_paths import add_geojson_collection
+    from src.map_generator.render_context import RenderContext
+
+    # 合成世界数据集：每个国家由多个细节丰富的环组成
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, points_per_ring, endpoint=False)
+    features = []
+    for i in range(n_features):
+        polygons = []
+        for _ in range(rings_per_feature):
+            center = rng.uniform([-170, -80], [170, 80])
+            radius = rng.uniform(0.5, 4.0) * (1 + 0.2 * np.sin(13 * angles + i))
+            ring = np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+            polygons.append([np.vstack((ring, ring[:1])).tolist()])
+        features.append({"type": "Feature", "properties": {"name": f"F{i}"},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    world = {"type": "FeatureCollection", "features": features}
+
+    def draw_layers(ax):
+        p, names = add_geojson_collection(ax, world, alpha=0.7, edgecolor='k', linewidth=0.5)
+        return [p]
+
+    def build_base(fig, cached):
+        ax = fig.add_subplot()
+        ax.set_xlim(-76, 284)
+        ax.set_ylim(-49, 121)
+        ax.grid(True, linestyle='--', alpha=0.5)
+        layers = draw_layers(ax)
+        if cached:
+            BasemapLayer(ax, layers, draw_layers, key=('bench', dataset_fingerprint(world)))
+        return ax
+
+    def draw_overlay(ax, radius):
+        angles = np.linspace(0, 2 * np.pi, 720)
+        ax.plot(104 + radius / 100 * np.cos(angles), 36 + radius / 100 * np.sin(angles), color='orange')
+        ax.set_title(f'{radius} km')
+
+    print(f"===== 底图栅格缓存基准测试（{n_features}个国家x{rings_per_feature}个环, {figsize[0]}x{figsize[1]}英寸, "
+          f"{dpi}dpi PNG）=====")
+    clear_basemap_cache()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for label, cached in (("每次绘制国家多边形", False), ("缓存的底图栅格", True)):
+            context = RenderContext()
+            times = []
+            for radius in radii:
+                start = time.perf_counter()
+                context.render(('bench', cached), figsize, 100, lambda fig: build_base(fig, cached),
+                               lambda ax: draw_overlay(ax, radius), output_dir=output_dir,
+                               filename_prefix='basemap', formats='png', output_dpi=dpi)
+                times.append(time.perf_counter() - start)
+            print(f"{label}: 第一个半径 {times[0] * 1000:.0f} ms, "
+                  f"之后每个半径 {np.mean(times[1:]) * 1000:.0f} ms")
+    print(f"底图栅格缓存: {basemap_cache_stats()}")
+
+
+def bench_projection(projections=('aeqd', 'ortho'), n_features=250, rings_per_feature=8, points_per_ring=400):
+    """
+    投影整个世界数据集：首次投影（加密+坐标变换）、内存缓存命中、磁盘缓存命中（模拟新进程）的耗时
+    """
+    import tempfile
+    from src.map_generator.projected_geometry import clear_projected_cache, project_dataset, projected_cache_stats
+    from src.utils.projection import parse_projection
+
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, points_per_ring, endpoint=False)
+    features = []
+    for i in range(n_features):
+        polygons = []
+        for _ in range(rings_per_feature):
+            center = rng.uniform([-170, -80], [170, 80])
+            radius = rng.uniform(0.5, 4.0) * (1 + 0.2 * np.sin(13 * angles + i))
+            ring = np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+            polygons.append([np.vstack((ring, ring[:1])).tolist()])
+        features.append({"type": "Feature", "properties": {"name": f"F{i}"},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    world = {"type": "FeatureCollection", "features": features}
+
+    print(f"===== 投影几何缓存基准测试（{n_features}个国家x{rings_per_feature}个环x{points_per_ring}个点）=====")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in projections:
+            projection = parse_projection(name)
+            clear_projected_cache()
+            start = time.perf_counter()
+            projected = project_dataset(world, projection, cache_dir=cache_dir)
+            cold = time.perf_counter() - start
+            memory, _ = _timeit(lambda: project_dataset(world, projection, cache_dir=cache_dir), repeat=5)
+
+            def from_disk():
+                clear_projected_cache()
+                return project_dataset(world, projection, cache_dir=cache_dir)
+
+            disk, _ = _timeit(from_disk)
+            print(f"{name}: 首次投影 {cold * 1000:.1f} ms（{len(projected.coords)}个顶点）, "
+                  f"内存缓存 {memory * 1e6:.1f} µs, 磁盘缓存 {disk * 1000:.1f} ms（快{cold / disk:.1f}倍）")
+    print(f"投影几何缓存: {projected_cache_stats()}")
+    clear_projected_cache()
+
+
+def bench_svg(data_path='data/china.json', n_features=1000, rings_per_feature=4, points_per_ring=200):
+    """
+    对比标准SVG与紧凑SVG（量化的相对坐标、同样式路径合并）的文件大小和写出耗时，包括SVGZ
+    """
+    import json
+    import tempfile
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src.map_generator.compact_svg import DEFAULT_QUANTIZATION
+    from src.map_generator.figure_output import save_figure, set_compact_svg
+    from src.map_generator.geometry_paths import add_geojson_collection
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        china_data = json.load(f)
+
+    # 合成数据集：大量特征使用20种颜色，同样式的特征可以合并
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, points_per_ring, endpoint=False)
+    features = []
+    for i in range(n_features):
+        polygons = []
+        for _ in range(rings_per_feature):
+            center = rng.uniform([-170, -80], [170, 80])
+            radius = rng.uniform(0.2, 2.0) * (1 + 0.1 * np.sin(7 * angles))
+            ring = np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+            polygons.append([np.vstack((ring, ring[:1])).tolist()])
+        features.append({"type": "Feature", "properties": {"name": f"F{i}"},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    synthetic = {"type": "FeatureCollection", "features": features}
+
+    colors = plt.cm.tab20(np.linspace(0, 1, 20))
+
+    def build(collection, extent):
+        fig = plt.figure(figsize=(12, 10), dpi=100)
+        ax = plt.axes()
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+        p, names = add_geojson_collection(ax, collection, alpha=0.7, edgecolor='k', linewidth=0.3)
+        p.set_facecolor([colors[i % len(colors)] for i in range(len(names))])
+        return fig
+
+    print(f"===== 紧凑SVG基准测试（量化份数{DEFAULT_QUANTIZATION}）=====")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for label, collection, extent in ((data_path, china_data, (73, 136, 3, 54)),
+                                          (f"合成数据 {n_features}个特征x{rings_per_feature}个环", synthetic,
+                                           (-180, 180, -90, 90))):
+            fig = build(collection, extent)
+            for fmt in ('svg', 'svgz'):
+                results = {}
+                for mode in ('standard', 'compact'):
+                    set_compact_svg(mode == 'compact')
+                    elapsed, (path,) = _timeit(lambda: save_figure(fig, output_dir, mode, formats=fmt))
+                    results[mode] = (elapsed, os.path.getsize(path))
+                set_compact_svg(False)
+                (standard_time, standard_size), (compact_time, compact_size) = results['standard'], results['compact']
+                print(f"{label} {fmt}: 标准 {standard_size / 1024:.0f} KB / {standard_time * 1000:.0f} ms, "
+                      f"紧凑 {compact_size / 1024:.0f} KB / {compact_time * 1000:.0f} ms "
+                      f"（{compact_size / standard_size:.0%}）")
+            plt.close(fig)
+
+
+BENCHMARKS = {
+    'vincenty': bench_vincenty,
+    'border': bench_border,
+    'buffer': bench_buffer,
+    'field': bench_field,
+    'geocache': bench_geocache,
+    'stream': bench_stream,
+    'topojson': bench_topojson,
+    'lod': bench_lod,
+    'paths': bench_paths,
+    'render': bench_render,
+    'basemap': bench_basemap,
+    'projection': bench_projection,
+    'svg': bench_svg,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='性能基准测试')
+    parser.add_argument('names', nargs='*', help=f"要运行的基准测试（{', '.join(BENCHMARKS)}），默认全部运行")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的基准测试: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS.keys():
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
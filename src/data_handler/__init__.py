@@ -4,6 +4,12 @@
 """
 
 from .json_loader import load_china_map_data
-from .country_data import get_countries_data
+from .country_data import get_countries_data, get_countries_index
+from .spatial_index import SphericalGridIndex, load_points_csv
+from .geometry_cache import PackedFeatureCollection, load_geojson, set_cache_enabled
+from .dataset_registry import DatasetRegistry, dataset_registry, load_dataset
 
-__all__ = ['load_china_map_data', 'get_countries_data']
\ No newline at end of file
+__all__ = ['load_china_map_data', 'get_countries_data', 'get_countries_index',
+           'SphericalGridIndex', 'load_points_csv',
+           'PackedFeatureCollection', 'load_geojson', 'set_cache_enabled',
+           'DatasetRegistry', 'dataset_registry', 'load_dataset']
\ No newline at end of file
@@ -3,6 +3,12 @@
 提供世界主要国家和地区的地理坐标数据
 """
 
+import numpy as np
+from src.data_handler.spatial_index import SphericalGridIndex
+
+# 国家坐标的空间索引（延迟构建）
+_countries_index = None
+
 # 主要国家和地区的坐标数据（纬度，经度）
 COUNTRIES_DATA = {
     '中国': (35, 105),
@@ -133,7 +139,31 @@ def get_country_boundary(country_name):
     """
     return COUNTRIES_BOUNDARIES.get(country_name)
 
-def get_countries_within_range(center_lat, center_lon, radius_km, distance_func):
+def get_countries_index():
+    """
+    获取国家坐标数据的球面空间索引（首次调用时构建）
+    
+    返回:
+        SphericalGridIndex实例
+    """
+    global _countries_index
+    if _countries_index is None:
+        _countries_index = SphericalGridIndex.from_points(COUNTRIES_DATA)
+    return _countries_index
+
+def _call_distance_func(distance_func, center_lat, center_lon, lats, lons):
+    """
+    用数组参数调用距离函数；函数只接受标量（调用出错或没有返回逐个国家的结果）时逐个国家调用
+    """
+    try:
+        distances = np.asarray(distance_func(center_lat, center_lon, lats, lons), dtype=np.float64)
+        if distances.shape == lats.shape:
+            return distances
+    except (TypeError, ValueError):
+        pass
+    return np.vectorize(distance_func, otypes=[np.float64])(center_lat, center_lon, lats, lons)
+
+def get_countries_within_range(center_lat, center_lon, radius_km, distance_func=None):
     """
     获取在指定范围内的国家
     
@@ -141,16 +171,22 @@ def get_countries_within_range(center_lat, center_lon, radius_km, distance_func)
         center_lat: 中心点纬度
         center_lon: 中心点经度
         radius_km: 范围半径（公里）
-        distance_func: 距离计算函数
+        distance_func: 距离计算函数，参数为 (中心纬度, 中心经度, 纬度, 经度)；支持numpy数组参数时
+                       一次调用计算所有国家，只接受标量的函数逐个国家调用；
+                       默认为None，使用球面空间索引查询
     
     返回:
         包含范围内国家名称和距离的字典
     """
-    within_range = {}
+    if distance_func is None:
+        index = get_countries_index()
+        indices, distances = index.query_radius(center_lat, center_lon, radius_km)
+        return {index.names[i]: float(d) for i, d in zip(indices, distances)}
     
-    for country, (lat, lon) in COUNTRIES_DATA.items():
-        distance = distance_func(center_lat, center_lon, lat, lon)
-        if distance <= radius_km:
-            within_range[country] = distance
+    names = list(COUNTRIES_DATA.keys())
+    lats = np.array([COUNTRIES_DATA[name][0] for name in names], dtype=np.float64)
+    lons = np.array([COUNTRIES_DATA[name][1] for name in names], dtype=np.float64)
+    distances = _call_distance_func(distance_func, center_lat, center_lon, lats, lons)
     
-    return within_range
\ No newline at end of file
+    mask = distances <= radius_km
+    return {names[i]: float(distances[i]) for i in np.flatnonzero(mask)}
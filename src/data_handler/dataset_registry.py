@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据集注册表模块
+
+进程内共享的已解析地图数据LRU缓存：同一个进程中多次绘图（测试、notebook、服务）
+对同一个文件只解析一次。缓存键为文件的绝对路径和加载函数，
+文件的修改时间或大小变化时对应的缓存项自动失效。
+
+缓存的数据集是只读视图（字典为MappingProxyType，列表为元组，坐标为只读numpy数组），
+调用方无法修改共享的副本；需要修改时应先复制。
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import numpy as np
+
+from src.data_handler.geometry_cache import PackedFeatureCollection
+
+logger = logging.getLogger(__name__)
+
+# 默认最多缓存的数据集数量
+DEFAULT_MAX_ENTRIES = 8
+
+
+def _file_signature(path):
+    """
+    文件签名：(修改时间纳秒, 大小)
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _is_coordinate_sequence(value):
+    """
+    判断列表是否为坐标序列（每项为数值列表）
+    """
+    return bool(value) and isinstance(value[0], (list, tuple)) and bool(value[0]) \
+        and isinstance(value[0][0], (int, float))
+
+
+def freeze(value):
+    """
+    返回数据的只读视图
+
+    字典转换为MappingProxyType，列表转换为元组，坐标序列和numpy数组转换为只读数组
+    （numpy数组只创建视图，不复制数据）；PackedFeatureCollection原地转为只读后原样返回，
+    调用方仍可直接使用coords、ring_offsets等打包数组
+
+    参数:
+        value: 解析后的JSON数据
+
+    返回:
+        只读数据
+    """
+    if isinstance(value, np.ndarray):
+        if not value.flags.writeable:
+            return value
+        view = value.view()
+        view.setflags(write=False)
+        return view
+    if isinstance(value, PackedFeatureCollection):
+        return value.set_read_only(freeze)
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        if _is_coordinate_sequence(value):
+            try:
+                return freeze(np.asarray(value, dtype=np.float64))
+            except ValueError:
+                pass  # 各点维度不一致时逐项转换
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class DatasetRegistry:
+    """
+    已解析数据集的LRU缓存，线程安全
+
+    hits / misses / evictions 分别统计命中、未命中（包括文件变化导致的失效）和淘汰次数
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        参数:
+            max_entries: 最多缓存的数据集数量
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, path, loader):
+        """
+        返回文件解析后的只读数据集，缓存有效时不再读取文件
+
+        参数:
+            path: 数据文件路径
+            loader: 解析函数 loader(path)，返回解析后的数据
+
+        返回:
+            只读数据集
+
+        异常:
+            OSError: 文件不存在；loader抛出的异常原样抛出，此时不缓存
+        """
+        key = (os.path.abspath(path), loader.__module__, loader.__qualname__)
+        signature = _file_signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        data = freeze(loader(path))
+        logger.debug(f"数据集已加载到注册表: {path}")
+
+        with self._lock:
+            self._entries[key] = (signature, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self.max_entries, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return data
+
+    def invalidate(self, path=None):
+        """
+        移除指定文件的缓存项，path为None时清空全部缓存项（计数器不变）
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(path)
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def resize(self, max_entries):
+        """
+        修改最多缓存的数据集数量，超出的缓存项按最近最少使用的顺序淘汰
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > max(max_entries, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """
+        返回缓存统计 {"hits", "misses", "evictions", "size", "max_entries"}
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries), "max_entries": self.max_entries}
+
+    def clear(self):
+        """
+        清空缓存项并重置计数器
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# 进程内共享的注册表
+dataset_registry = DatasetRegistry()
+
+
+def load_dataset(path, loader):
+    """
+    通过进程内共享的注册表加载数据集，参数和返回值同DatasetRegistry.load
+    """
+    return dataset_registry.load(path, loader)
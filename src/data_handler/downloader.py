@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据文件下载模块
+
+下载时按块把响应写入临时文件（<目标文件>.part），同时计算SHA256；
+校验内容（可选的验证函数和校验和）通过后才原子地替换目标文件，
+下载或校验失败时原有文件保持不变。
+
+每次成功下载后在目标文件旁保存元数据（<目标文件>.meta.json：URL、ETag、Last-Modified、SHA256、大小），
+再次下载时发送 If-None-Match / If-Modified-Since 条件请求，
+服务器返回304时只需一次往返，不读取也不解析任何数据。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import urllib.error
+import urllib.request
+
+from src.data_handler.geojson_stream import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 下载结果
+DOWNLOADED = 'downloaded'
+NOT_MODIFIED = 'not_modified'
+
+# 元数据文件扩展名
+META_SUFFIX = '.meta.json'
+
+
+class DownloadCancelled(Exception):
+    """
+    下载被取消（cancel_event被设置）
+    """
+
+
+def metadata_path_for(dest_path):
+    """
+    返回目标文件对应的下载元数据文件路径
+    """
+    return dest_path + META_SUFFIX
+
+
+def read_download_metadata(dest_path):
+    """
+    读取目标文件的下载元数据，不存在或损坏时返回None
+    """
+    try:
+        with open(metadata_path_for(dest_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_download_metadata(dest_path, metadata):
+    """
+    原子地写入下载元数据
+    """
+    meta_path = metadata_path_for(dest_path)
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _parse_checksum(checksum):
+    """
+    解析校验和字符串，"算法:十六进制摘要" 或只有摘要（默认为sha256）
+
+    返回:
+        (算法名, 小写摘要)
+    """
+    algorithm, _, digest = checksum.strip().rpartition(':')
+    return (algorithm.lower() or 'sha256'), digest.lower()
+
+
+def _conditional_headers(url, dest_path, checksum):
+    """
+    根据已保存的元数据构造条件请求头；本地文件与元数据不一致时不发送条件请求
+    """
+    metadata = read_download_metadata(dest_path)
+    if not metadata or metadata.get('url') != url:
+        return {}
+    try:
+        if os.path.getsize(dest_path) != metadata.get('size'):
+            return {}
+    except OSError:
+        return {}
+    if checksum is not None:
+        algorithm, digest = _parse_checksum(checksum)
+        if algorithm != 'sha256' or metadata.get('sha256') != digest:
+            return {}
+    headers = {}
+    if metadata.get('etag'):
+        headers['If-None-Match'] = metadata['etag']
+    if metadata.get('last_modified'):
+        headers['If-Modified-Since'] = metadata['last_modified']
+    return headers
+
+
+def download_file(url, dest_path, validate=None, checksum=None, conditional=True, backup=False,
+                  timeout=30, chunk_size=DEFAULT_CHUNK_SIZE, cancel_event=None):
+    """
+    下载文件：条件请求、流式写入临时文件、校验后原子替换
+
+    参数:
+        url: 下载地址
+        dest_path: 目标文件路径
+        validate: 验证函数 validate(临时文件路径)，返回False或抛出异常表示内容无效
+        checksum: 期望的校验和，"sha256:<摘要>" 或其他hashlib支持的算法，只有摘要时按sha256
+        conditional: 是否根据已保存的元数据发送条件请求
+        backup: 替换前是否把原有文件复制为 <目标文件>.bak
+        timeout: 请求超时（秒）
+        chunk_size: 每次读取和写入的字节数
+        cancel_event: threading.Event，被设置时在下一块数据读取前取消下载
+
+    返回:
+        DOWNLOADED（已下载并替换）或 NOT_MODIFIED（服务器返回304，本地文件未改变）
+
+    异常:
+        urllib.error.URLError: 网络请求失败
+        ValueError: 校验和不匹配或内容验证失败
+        DownloadCancelled: 下载被取消，原有文件保持不变
+    """
+    headers = _conditional_headers(url, dest_path, checksum) if conditional else {}
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and headers:
+            e.close()
+            logger.info(f"服务器返回304，本地文件已是最新: {dest_path}")
+            return NOT_MODIFIED
+        raise
+
+    directory = os.path.dirname(dest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = dest_path + '.part'
+    sha256 = hashlib.sha256()
+    extra_hash = None
+    if checksum is not None:
+        algorithm, expected = _parse_checksum(checksum)
+        if algorithm != 'sha256':
+            extra_hash = hashlib.new(algorithm)
+
+    try:
+        size = 0
+        with response, open(tmp_path, 'wb') as f:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise DownloadCancelled(url)
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                sha256.update(chunk)
+                if extra_hash is not None:
+                    extra_hash.update(chunk)
+                size += len(chunk)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        if checksum is not None:
+            actual = (extra_hash or sha256).hexdigest()
+            if actual != expected:
+                raise ValueError(f"校验和不匹配: 期望{expected}，实际{actual}")
+        if validate is not None and not validate(tmp_path):
+            raise ValueError(f"下载的内容验证失败: {url}")
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled(url)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if backup and os.path.exists(dest_path):
+        shutil.copy2(dest_path, f"{dest_path}.bak")
+    os.replace(tmp_path, dest_path)
+    _write_download_metadata(dest_path, {
+        "url": url, "etag": etag, "last_modified": last_modified, "sha256": sha256.hexdigest(), "size": size,
+    })
+    logger.info(f"已下载 {size} 字节到: {dest_path}")
+    return DOWNLOADED
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GeoJSON流式读取模块
+
+按块读取文件、HTTP响应或套接字，逐个解析features数组中的特征并立即产出，
+不构建完整的文档树，峰值内存只与单个特征的大小有关。
+范围框和名称过滤在解析过程中进行，不匹配的特征解析后立即丢弃。
+"""
+
+import codecs
+import json
+import os
+import re
+
+import numpy as np
+
+# 每次读取的字节数
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# 名称过滤时依次查找的属性字段
+DEFAULT_NAME_FIELDS = ('name', 'name_en', 'NAME', 'ADMIN')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _TextStream:
+    """
+    对二进制流做增量UTF-8解码的文本缓冲区，支持从当前位置解析一个完整的JSON值
+    """
+
+    def __init__(self, stream, chunk_size):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """
+        再读取一块数据追加到缓冲区，同时丢弃已经解析过的部分
+        """
+        if self.pos > len(self.text) // 2:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        chunk = self._stream.read(size or self._chunk_size)
+        if not chunk:
+            self.eof = True
+            self.text += self._utf8.decode(b'', final=True)
+            return
+        if isinstance(chunk, str):
+            self.text += chunk
+        else:
+            self.text += self._utf8.decode(chunk)
+
+    def peek(self):
+        """
+        跳过空白并返回下一个字符，流已结束时返回空字符串
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char):
+        """
+        读取下一个非空白字符并检查是否为char
+        """
+        actual = self.peek()
+        if actual != char:
+            raise ValueError(f"GeoJSON格式错误: 期望'{char}'，实际为'{actual}'（位置{self.pos}）")
+        self.pos += 1
+
+    def decode_value(self):
+        """
+        解析从当前位置开始的一个完整JSON值
+
+        缓冲区中的数据不完整时继续读取，连续失败时每次读取量加倍，避免大特征被反复从头解析
+        """
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.text, self.pos)
+                # 数值可能恰好在缓冲区末尾被截断，需要读到后续字符才能确定
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(size)
+            size *= 2
+
+
+def geometry_bounds(geometry):
+    """
+    计算几何对象的范围框
+
+    参数:
+        geometry: GeoJSON几何对象
+
+    返回:
+        (最小经度, 最小纬度, 最大经度, 最大纬度)，空几何返回None
+    """
+    if not geometry:
+        return None
+    if geometry.get('type') == 'GeometryCollection':
+        parts = [geometry_bounds(g) for g in geometry.get('geometries', [])]
+    else:
+        parts = list(_coordinate_bounds(geometry.get('coordinates')))
+    parts = [b for b in parts if b is not None]
+    if not parts:
+        return None
+    parts = np.asarray(parts, dtype=np.float64)
+    return (parts[:, 0].min(), parts[:, 1].min(), parts[:, 2].max(), parts[:, 3].max())
+
+
+def _coordinate_bounds(coordinates):
+    """
+    逐个坐标序列产出范围框（嵌套的坐标列表按坐标序列整体向量化计算）
+    """
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (int, float)):
+        yield (coordinates[0], coordinates[1], coordinates[0], coordinates[1])
+    elif coordinates[0] and isinstance(coordinates[0][0], (int, float)):
+        points = np.asarray(coordinates, dtype=np.float64)[:, :2]
+        yield (*points.min(axis=0), *points.max(axis=0))
+    else:
+        for child in coordinates:
+            yield from _coordinate_bounds(child)
+
+
+def _bbox_intersects(bounds, bbox):
+    """
+    判断两个 (最小经度, 最小纬度, 最大经度, 最大纬度) 范围框是否相交
+    """
+    return not (bounds[2] < bbox[0] or bounds[0] > bbox[2] or bounds[3] < bbox[1] or bounds[1] > bbox[3])
+
+
+def feature_matches(feature, bbox=None, names=None, name_fields=DEFAULT_NAME_FIELDS):
+    """
+    判断特征是否满足范围框和名称过滤条件
+
+    参数:
+        feature: GeoJSON特征
+        bbox: (最小经度, 最小纬度, 最大经度, 最大纬度)，与特征范围相交即匹配
+        names: 名称集合，特征属性中任一名称字段在集合中即匹配
+        name_fields: 名称字段列表
+    """
+    if names is not None:
+        properties = feature.get('properties') or {}
+        if not any(properties.get(field) in names for field in name_fields):
+            return False
+    if bbox is not None:
+        bounds = feature.get('bbox') or geometry_bounds(feature.get('geometry'))
+        if bounds is None or not _bbox_intersects(bounds, bbox):
+            return False
+    return True
+
+
+def iter_geojson_features(source, bbox=None, names=None, name_fields=DEFAULT_NAME_FIELDS,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式读取GeoJSON FeatureCollection，逐个产出特征
+
+    参数:
+        source: 文件路径，或任何带read方法的对象（打开的文件、urllib的HTTP响应、socket.makefile('rb')等）
+        bbox: 范围框过滤 (最小经度, 最小纬度, 最大经度, 最大纬度)
+        names: 名称过滤，可迭代的名称集合
+        name_fields: 名称过滤时查找的属性字段
+        chunk_size: 每次读取的字节数
+
+    返回:
+        特征字典的生成器
+
+    异常:
+        ValueError: 数据不是包含features数组的JSON对象
+        json.JSONDecodeError: JSON格式错误
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_geojson_features(f, bbox, names, name_fields, chunk_size)
+        return
+
+    names = set(names) if names is not None else None
+    stream = _TextStream(source, chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        raise ValueError("GeoJSON中缺少features数组")
+
+    while True:
+        key = stream.decode_value()
+        stream.expect(':')
+        if key != 'features':
+            # 跳过其他顶层字段
+            stream.decode_value()
+        else:
+            stream.expect('[')
+            if stream.peek() == ']':
+                return
+            while True:
+                feature = stream.decode_value()
+                if feature_matches(feature, bbox, names, name_fields):
+                    yield feature
+                separator = stream.peek()
+                stream.pos += 1
+                if separator == ']':
+                    return
+                if separator != ',':
+                    raise ValueError(f"GeoJSON格式错误: features数组中出现'{separator}'")
+
+        separator = stream.peek()
+        stream.pos += 1
+        if separator == '}':
+            raise ValueError("GeoJSON中缺少features数组")
+        if separator != ',':
+            raise ValueError(f"GeoJSON格式错误: 顶层对象中出现'{separator}'")
+
+
+def read_feature_collection(source, bbox=None, names=None, name_fields=DEFAULT_NAME_FIELDS):
+    """
+    流式读取并只保留满足过滤条件的特征，组装为FeatureCollection
+
+    参数与iter_geojson_features相同
+
+    返回:
+        GeoJSON FeatureCollection字典
+    """
+    return {"type": "FeatureCollection",
+            "features": list(iter_geojson_features(source, bbox, names, name_fields))}
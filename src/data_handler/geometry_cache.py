@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+几何二进制缓存模块
+
+把GeoJSON（FeatureCollection）编译为紧凑的二进制缓存文件，保存在源文件旁边（<源文件>.geocache）：
+坐标打包为连续的float64数组，环、多边形和特征之间的层级关系用偏移数组表示，
+属性表和其余字段保存在文件头的JSON中。
+
+再次加载时按源文件的大小和修改时间（不一致时再比较内容哈希）校验缓存，
+通过内存映射零拷贝读取，返回与GeoJSON结构相同的只读映射对象，
+调用方仍然可以用 data['features'][i]['geometry']['coordinates'] 访问。
+
+文件布局：
+    8字节魔数 | 8字节小端无符号整数（文件头长度） | 文件头JSON | 按64字节对齐的各数组数据
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件魔数和格式版本，格式变化时旧缓存自动失效
+CACHE_MAGIC = b'C8KGEO01'
+CACHE_FORMAT_VERSION = 1
+
+# 缓存文件扩展名
+CACHE_SUFFIX = '.geocache'
+
+# 数组数据的对齐字节数
+_ALIGNMENT = 64
+
+# 可以打包的几何类型
+_PACKABLE_TYPES = ('Polygon', 'MultiPolygon')
+
+# 全局开关，命令行 --no-cache 时关闭
+_cache_enabled = True
+
+
+def set_cache_enabled(enabled):
+    """
+    打开或关闭几何缓存（关闭时加载函数直接解析JSON，不读写缓存文件）
+    """
+    global _cache_enabled
+    _cache_enabled = bool(enabled)
+
+
+def is_cache_enabled():
+    """
+    返回几何缓存是否开启
+    """
+    return _cache_enabled
+
+
+def cache_path_for(source_path):
+    """
+    返回源文件对应的缓存文件路径
+    """
+    return source_path + CACHE_SUFFIX
+
+
+def _source_signature(source_path, content=None):
+    """
+    源文件签名：大小、修改时间和内容的SHA1
+    """
+    stat = os.stat(source_path)
+    if content is None:
+        with open(source_path, 'rb') as f:
+            content = f.read()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": hashlib.sha1(content).hexdigest()}
+
+
+class PackedFeatureCollection(Mapping):
+    """
+    打包后的FeatureCollection，只读
+
+    除了与GeoJSON相同的映射访问方式外，还直接暴露打包数组，方便向量化处理：
+        coords: 形状为(N, 2)的(经度, 纬度)坐标数组
+        ring_offsets: 各环在coords中的起止偏移，长度为环数+1
+        part_offsets: 各多边形在环序列中的起止偏移，长度为多边形数+1
+        geometry_offsets: 各特征在多边形序列中的起止偏移，长度为特征数+1
+    """
+
+    def __init__(self, coords, ring_offsets, part_offsets, geometry_offsets, feature_table, collection=None):
+        """
+        参数:
+            coords, ring_offsets, part_offsets, geometry_offsets: 打包数组
+            feature_table: 每个特征的 {"geometry_type", "properties", "extra"} 字典列表
+            collection: FeatureCollection中除features外的其余字段
+        """
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.part_offsets = part_offsets
+        self.geometry_offsets = geometry_offsets
+        self.feature_table = feature_table
+        self.collection = dict(collection or {"type": "FeatureCollection"})
+        self._features = None
+
+    def set_read_only(self, freeze):
+        """
+        把打包数组设为只读，特征表、其余字段和组装后的特征列表转换为只读结构
+
+        参数:
+            freeze: 转换函数（dataset_registry.freeze），打包数组的视图原样保留
+        """
+        for array in (self.coords, self.ring_offsets, self.part_offsets, self.geometry_offsets):
+            if array.flags.writeable:
+                array.setflags(write=False)
+        self.feature_table = freeze(self.feature_table)
+        self.collection = freeze(self.collection)
+        self._features = freeze(self.features)
+        return self
+
+    @property
+    def properties(self):
+        """
+        各特征的属性字典列表
+        """
+        return [entry['properties'] for entry in self.feature_table]
+
+    def ring(self, ring_index):
+        """
+        返回第ring_index个环的坐标视图（零拷贝）
+        """
+        return self.coords[self.ring_offsets[ring_index]:self.ring_offsets[ring_index + 1]]
+
+    def _polygon(self, part_index):
+        """
+        返回第part_index个多边形的环列表
+        """
+        return [self.ring(r) for r in range(self.part_offsets[part_index], self.part_offsets[part_index + 1])]
+
+    def _build_feature(self, index):
+        """
+        按GeoJSON结构组装第index个特征，坐标为打包数组的视图
+        """
+        entry = self.feature_table[index]
+        geometry_type = entry['geometry_type']
+        if geometry_type is None:
+            geometry = None
+        else:
+            parts = [self._polygon(p) for p in range(self.geometry_offsets[index], self.geometry_offsets[index + 1])]
+            coordinates = parts[0] if geometry_type == 'Polygon' else parts
+            geometry = {"type": geometry_type, "coordinates": coordinates}
+        feature = {"type": "Feature", "geometry": geometry, "properties": entry['properties']}
+        feature.update(entry.get('extra') or {})
+        return feature
+
+    @property
+    def features(self):
+        """
+        GeoJSON结构的特征列表（首次访问时组装）
+        """
+        if self._features is None:
+            self._features = [self._build_feature(i) for i in range(len(self.feature_table))]
+        return self._features
+
+    def __getitem__(self, key):
+        if key == 'features':
+            return self.features
+        return self.collection[key]
+
+    def __iter__(self):
+        yield from self.collection
+        if 'features' not in self.collection:
+            yield 'features'
+
+    def __len__(self):
+        return len(self.collection) + ('features' not in self.collection)
+
+
+def pack_feature_collection(data):
+    """
+    把GeoJSON FeatureCollection打包为PackedFeatureCollection
+
+    参数:
+        data: GeoJSON字典
+
+    返回:
+        PackedFeatureCollection；包含多边形以外的几何类型时返回None
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('features'), list):
+        return None
+
+    rings = []
+    ring_offsets = [0]
+    part_offsets = [0]
+    geometry_offsets = [0]
+    feature_table = []
+    for feature in data['features']:
+        geometry = feature.get('geometry')
+        geometry_type = geometry.get('type') if geometry else None
+        if geometry_type is not None and geometry_type not in _PACKABLE_TYPES:
+            return None
+        if geometry_type == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry_type == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            polygons = []
+        for polygon_coords in polygons:
+            for ring in polygon_coords:
+                ring = np.asarray(ring, dtype=np.float64)
+                if ring.ndim != 2:
+                    ring = ring.reshape(-1, 2)
+                rings.append(ring[:, :2])
+                ring_offsets.append(ring_offsets[-1] + len(ring))
+            part_offsets.append(len(ring_offsets) - 1)
+        geometry_offsets.append(len(part_offsets) - 1)
+        feature_table.append({
+            "geometry_type": geometry_type,
+            "properties": feature.get('properties') or {},
+            "extra": {k: v for k, v in feature.items() if k not in ('type', 'geometry', 'properties')},
+        })
+
+    coords = np.concatenate(rings) if rings else np.empty((0, 2), dtype=np.float64)
+    arrays = [np.ascontiguousarray(coords, dtype=np.float64),
+              np.asarray(ring_offsets, dtype=np.int64),
+              np.asarray(part_offsets, dtype=np.int64),
+              np.asarray(geometry_offsets, dtype=np.int64)]
+    # 与内存映射读取的结果保持一致，均为只读
+    for array in arrays:
+        array.setflags(write=False)
+    return PackedFeatureCollection(*arrays, feature_table, {k: v for k, v in data.items() if k != 'features'})
+
+
+def write_geometry_cache(cache_path, packed, signature):
+    """
+    把打包数据写入缓存文件（先写临时文件再原子替换）
+
+    参数:
+        cache_path: 缓存文件路径
+        packed: PackedFeatureCollection
+        signature: 源文件签名
+    """
+    arrays = {
+        "coords": packed.coords,
+        "ring_offsets": packed.ring_offsets,
+        "part_offsets": packed.part_offsets,
+        "geometry_offsets": packed.geometry_offsets,
+    }
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    header = json.dumps({
+        "version": CACHE_FORMAT_VERSION,
+        "source": signature,
+        "arrays": layout,
+        "collection": packed.collection,
+        "features": packed.feature_table,
+    }, ensure_ascii=False).encode('utf-8')
+    # 文件头补齐到对齐边界，使数组数据从对齐的位置开始
+    prefix_size = len(CACHE_MAGIC) + 8
+    header += b' ' * (-(prefix_size + len(header)) % _ALIGNMENT)
+
+    # 批量渲染和瓦片的工作进程可能同时写同一个缓存，每个进程使用自己的临时文件
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b'\0' * (-array.nbytes % _ALIGNMENT))
+    os.replace(tmp_path, cache_path)
+
+
+def _read_header(cache_path):
+    """
+    读取缓存文件头，返回 (文件头字典, 数据起始偏移)；不是有效的缓存文件时返回 (None, None)
+    """
+    with open(cache_path, 'rb') as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            return None, None
+        (header_size,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    if header.get('version') != CACHE_FORMAT_VERSION:
+        return None, None
+    return header, len(CACHE_MAGIC) + 8 + header_size
+
+
+def read_geometry_cache(cache_path, source_path):
+    """
+    校验并以内存映射方式读取缓存文件
+
+    大小和修改时间与源文件一致时直接使用；不一致但大小相同时比较内容哈希，
+    以免仅修改时间变化（如重新检出）就重建缓存
+
+    参数:
+        cache_path: 缓存文件路径
+        source_path: 源文件路径
+
+    返回:
+        PackedFeatureCollection；缓存不存在、格式不符或已过期时返回None
+    """
+    if not os.path.exists(cache_path):
+        return None
+    header, data_start = _read_header(cache_path)
+    if header is None:
+        logger.info(f"几何缓存格式不符，将重建: {cache_path}")
+        return None
+
+    cached = header['source']
+    stat = os.stat(source_path)
+    if stat.st_size != cached['size']:
+        return None
+    if stat.st_mtime_ns != cached['mtime_ns'] and _source_signature(source_path)['sha1'] != cached['sha1']:
+        return None
+
+    buffer = np.memmap(cache_path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return PackedFeatureCollection(arrays['coords'], arrays['ring_offsets'], arrays['part_offsets'],
+                                   arrays['geometry_offsets'], header['features'], header['collection'])
+
+
+def load_geojson(source_path, use_cache=None):
+    """
+    加载GeoJSON文件，优先使用几何二进制缓存
+
+    缓存有效时内存映射读取；否则解析JSON，打包后写入缓存（写入失败只记录警告）
+
+    参数:
+        source_path: GeoJSON文件路径
+        use_cache: 是否使用缓存，默认为None（跟随全局开关）
+
+    返回:
+        PackedFeatureCollection；关闭缓存或数据无法打包（如TopoJSON、包含点线几何）时返回解析得到的字典
+
+    异常:
+        json.JSONDecodeError: 文件不是有效的JSON
+    """
+    if use_cache is None:
+        use_cache = _cache_enabled
+    if not use_cache:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    cache_path = cache_path_for(source_path)
+    try:
+        packed = read_geometry_cache(cache_path, source_path)
+    except Exception as e:
+        logger.warning(f"读取几何缓存失败，将重建: {e}")
+        packed = None
+    if packed is not None:
+        logger.debug(f"使用几何缓存: {cache_path}")
+        return packed
+
+    with open(source_path, 'rb') as f:
+        content = f.read()
+    data = json.loads(content.decode('utf-8'))
+    packed = pack_feature_collection(data)
+    if packed is None:
+        return data
+
+    try:
+        write_geometry_cache(cache_path, packed, _source_signature(source_path, content))
+        logger.debug(f"几何缓存已写入: {cache_path}")
+    except OSError as e:
+        logger.warning(f"写入几何缓存失败: {e}")
+    return packed
@@ -3,23 +3,44 @@
 
 import logging
 import json
-import urllib.request
 import os
-from src.utils.config_loader import config_loader  # 导入配置加载器
+from src.utils.config_loader import get_config_loader  # 导入配置加载器
+from src.data_handler.geometry_cache import load_geojson
+from src.data_handler.dataset_registry import load_dataset
+from src.data_handler.downloader import download_file, DOWNLOADED
+from src.data_handler.geojson_stream import iter_geojson_features
 
-# 初始化日志配置
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志格式和级别由入口程序（main.py）配置，导入本模块不修改全局日志设置
 logger = logging.getLogger(__name__)
 
-# 从配置中加载路径和URL设置
-download_config = config_loader.get('download', {})
-LOCAL_JSON_PATH = download_config.get('china_data_path', 'data/china.json')
 # 中国地图JSON数据的GitHub URL
 CHINA_JSON_URL = "https://raw.githubusercontent.com/echarts-maps/echarts-china-provinces-js/master/echarts-china-provinces-js/data/china.json"
 
+
+def _download_config():
+    """
+    配置文件中的download部分（首次使用时才读取配置文件）
+    """
+    return get_config_loader().get('download', {})
+
+
+def get_local_json_path():
+    """
+    返回配置的中国地图数据本地路径
+    """
+    return _download_config().get('china_data_path', 'data/china.json')
+
+
+def __getattr__(name):
+    # 兼容旧的模块属性（PEP 562）：LOCAL_JSON_PATH 为配置的本地路径，
+    # CHINA_JSON_CHECKSUM 为下载文件的校验和（可选，格式为 "sha256:<摘要>"）
+    if name == 'LOCAL_JSON_PATH':
+        return get_local_json_path()
+    if name == 'CHINA_JSON_CHECKSUM':
+        return _download_config().get('china_data_checksum')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def load_china_map_data(data_path=None):
     """
     加载中国地图的JSON数据
@@ -28,27 +49,28 @@ def load_china_map_data(data_path=None):
     如果下载失败，返回简化的中国边界数据
     
     参数:
-        data_path: 数据文件路径，默认为LOCAL_JSON_PATH
+        data_path: 数据文件路径，默认为配置的本地路径
     
     返回:
-        JSON格式的地图数据
+        JSON格式的地图数据（从本地文件加载时为进程内共享的只读视图）
     """
     # 使用传入的路径或默认路径
-    load_path = data_path if data_path else LOCAL_JSON_PATH
+    load_path = data_path if data_path else get_local_json_path()
     
     # 首先尝试从本地加载
     if os.path.exists(load_path):
         logger.info(f"从本地加载中国地图数据: {load_path}")
         try:
-            with open(load_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug("中国各省份名称列表:")
-                    for idx, feature in enumerate(data['features'], 1):
-                        province_name = feature['properties'].get('name')
-                        if province_name:
-                            logger.debug(f"{idx}. {province_name}")
-                return data
+            # 进程内已解析且文件未变化时直接复用（只读视图）；
+            # 否则优先使用几何二进制缓存，缓存无效时解析JSON并重建缓存
+            data = load_dataset(load_path, load_geojson)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("中国各省份名称列表:")
+                for idx, feature in enumerate(data['features'], 1):
+                    province_name = feature['properties'].get('name')
+                    if province_name:
+                        logger.debug(f"{idx}. {province_name}")
+            return data
         except Exception as e:
             logger.error(f"本地加载失败: {e}", exc_info=True)
             return download_china_map_data(output_path=load_path)
@@ -57,40 +79,67 @@ def load_china_map_data(data_path=None):
         logger.warning(f"本地文件不存在: {load_path}")
         return download_china_map_data(output_path=load_path)
 
+def _is_valid_china_file(path):
+    """
+    流式解析下载的文件，验证是包含省份特征的GeoJSON FeatureCollection
+    """
+    try:
+        return any(True for _ in iter_geojson_features(path))
+    except (ValueError, json.JSONDecodeError):
+        return False
+
+def update_china_map_data(output_path=None, force=False):
+    """
+    从GitHub下载或更新中国地图JSON数据，不解析数据
+
+    本地已有之前下载的文件时发送条件请求，服务器返回304时直接使用本地文件；
+    响应流式写入临时文件，验证通过后原子替换，失败时原有文件保持不变
+
+    参数:
+        output_path: 数据保存路径，默认为配置的本地路径
+        force: 是否忽略已保存的元数据，无条件重新下载
+
+    返回:
+        DOWNLOADED 或 NOT_MODIFIED
+
+    异常:
+        urllib.error.URLError: 网络请求失败
+        ValueError: 校验和不匹配或数据格式错误
+    """
+    save_path = output_path if output_path else get_local_json_path()
+    logger.info(f"正在从GitHub下载中国地图数据到: {save_path}...")
+    return download_file(CHINA_JSON_URL, save_path, validate=_is_valid_china_file,
+                         checksum=_download_config().get('china_data_checksum'), conditional=not force)
+
 def download_china_map_data(output_path=None):
     """
     从GitHub下载中国地图JSON数据
     
     参数:
-        output_path: 数据保存路径，默认为LOCAL_JSON_PATH
+        output_path: 数据保存路径，默认为配置的本地路径
     
     返回:
         JSON格式的地图数据
     """
     # 使用传入的路径或默认路径
-    save_path = output_path if output_path else LOCAL_JSON_PATH
-    logger.info(f"正在从GitHub下载中国地图数据到: {save_path}...")
+    save_path = output_path if output_path else get_local_json_path()
     try:
-        # 确保保存目录存在
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        # 下载JSON文件（本地文件仍是最新时不重复下载）
+        if update_china_map_data(save_path) == DOWNLOADED:
+            logger.info(f"中国地图数据下载完成，已保存到: {save_path}")
         
-        # 下载JSON文件
-        urllib.request.urlretrieve(CHINA_JSON_URL, save_path)
-        logger.info(f"中国地图数据下载完成，已保存到: {save_path}")
+        # 读取下载的JSON数据（同时重建几何缓存）
+        data = load_dataset(save_path, load_geojson)
         
-        # 读取下载的JSON数据
-        with open(save_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # 打印省份名称列表（仅在DEBUG级别）
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug("中国各省份名称列表:")
-                for idx, feature in enumerate(data['features'], 1):
-                    province_name = feature['properties'].get('name')
-                    if province_name:
-                        logger.debug(f"{idx}. {province_name}")
-            
-            return data
+        # 打印省份名称列表（仅在DEBUG级别）
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("中国各省份名称列表:")
+            for idx, feature in enumerate(data['features'], 1):
+                province_name = feature['properties'].get('name')
+                if province_name:
+                    logger.debug(f"{idx}. {province_name}")
+        
+        return data
     except Exception as e:
         logger.error(f"下载中国地图数据时出错: {e}", exc_info=True)
         # 如果下载失败，返回简化的中国边界数据
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+镜像竞速下载模块
+
+同时向所有配置的镜像发起下载，每个镜像写入各自的暂存文件；
+第一个下载完成且通过校验的镜像胜出，其结果原子地替换目标文件，其余下载立即取消。
+整个过程受一个总截止时间约束，不再对单个镜像重试和等待。
+
+每个镜像的延迟（指数加权平均）和成功/失败次数保存在目标文件旁（<目标文件>.mirrors.json），
+下次下载时按健康状况排序镜像：健康的镜像先发起请求，结果相同时优先采用。
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.data_handler.downloader import (
+    download_file, metadata_path_for, DownloadCancelled
+)
+
+logger = logging.getLogger(__name__)
+
+# 镜像统计文件扩展名
+STATS_SUFFIX = '.mirrors.json'
+
+# 延迟指数加权平均的权重
+_LATENCY_ALPHA = 0.3
+
+
+class MirrorStats:
+    """
+    各镜像的延迟和健康统计
+
+    每个镜像记录 {"successes", "failures", "latency", "last_error"}，latency为成功下载耗时（秒）的指数加权平均
+    """
+
+    def __init__(self, path=None):
+        """
+        参数:
+            path: 统计文件路径，为None时只保存在内存中
+        """
+        self.path = path
+        self.mirrors = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.mirrors = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"镜像统计文件无法读取，重新统计: {e}")
+
+    def _entry(self, url):
+        return self.mirrors.setdefault(url, {"successes": 0, "failures": 0, "latency": None, "last_error": None})
+
+    def record_success(self, url, latency):
+        """
+        记录一次成功的下载及其耗时（秒）
+        """
+        with self._lock:
+            entry = self._entry(url)
+            entry['successes'] += 1
+            previous = entry['latency']
+            entry['latency'] = latency if previous is None else \
+                _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * previous
+
+    def record_failure(self, url, error):
+        """
+        记录一次失败的下载
+        """
+        with self._lock:
+            entry = self._entry(url)
+            entry['failures'] += 1
+            entry['last_error'] = str(error)
+
+    def order(self, urls):
+        """
+        按健康状况排序镜像：失败率低的在前，失败率相同时平均延迟低的在前，没有记录的镜像保持配置顺序
+
+        参数:
+            urls: 镜像地址列表
+
+        返回:
+            排序后的地址列表
+        """
+        def key(item):
+            index, url = item
+            entry = self.mirrors.get(url)
+            if not entry:
+                return (0.0, float('inf'), index)
+            total = entry['successes'] + entry['failures']
+            failure_rate = round(entry['failures'] / total, 1) if total else 0.0
+            latency = entry['latency'] if entry['latency'] is not None else float('inf')
+            return (failure_rate, latency, index)
+        return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def save(self):
+        """
+        原子地写入统计文件
+        """
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.mirrors, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _remove_staging(staging_path):
+    """
+    删除暂存文件及其元数据
+    """
+    for path in (staging_path, metadata_path_for(staging_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def race_mirrors(urls, dest_path, validate=None, checksums=None, deadline=60, stats=None, backup=False):
+    """
+    同时从所有镜像下载，采用第一个通过校验的结果
+
+    参数:
+        urls: 镜像地址列表
+        dest_path: 目标文件路径
+        validate: 验证函数 validate(文件路径)，返回False或抛出异常表示内容无效
+        checksums: {地址: 校验和}，没有列出的镜像不校验
+        deadline: 总截止时间（秒），超时后取消所有下载
+        stats: MirrorStats，默认使用目标文件旁的统计文件
+        backup: 替换前是否把原有文件复制为 <目标文件>.bak
+
+    返回:
+        胜出的镜像地址；所有镜像都失败或超时时返回None，此时原有文件保持不变
+    """
+    if not urls:
+        return None
+    checksums = checksums or {}
+    if stats is None:
+        stats = MirrorStats(dest_path + STATS_SUFFIX)
+    urls = stats.order(list(dict.fromkeys(urls)))
+    directory = os.path.dirname(dest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    cancel_event = threading.Event()
+    start = time.monotonic()
+    end_time = start + deadline
+
+    def fetch(index, url):
+        staging_path = f"{dest_path}.mirror{index}"
+        request_start = time.monotonic()
+        try:
+            # 单个请求的超时不超过剩余的总时间
+            timeout = max(end_time - time.monotonic(), 0.1)
+            download_file(url, staging_path, validate=validate, checksum=checksums.get(url),
+                          conditional=False, timeout=timeout, cancel_event=cancel_event)
+        except DownloadCancelled:
+            _remove_staging(staging_path)
+            raise
+        except Exception as e:
+            stats.record_failure(url, e)
+            raise
+        latency = time.monotonic() - request_start
+        stats.record_success(url, latency)
+        if cancel_event.is_set():
+            _remove_staging(staging_path)
+            raise DownloadCancelled(url)
+        return staging_path, latency
+
+    winner = None
+    executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix='mirror')
+    try:
+        futures = {executor.submit(fetch, index, url): url for index, url in enumerate(urls)}
+        pending = set(futures)
+        while pending and winner is None:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"镜像下载超过总截止时间{deadline}秒，取消所有下载")
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            # 同时完成的多个镜像按排序顺序选择
+            for future in sorted(done, key=lambda f: urls.index(futures[f])):
+                url = futures[future]
+                try:
+                    staging_path, latency = future.result()
+                except Exception as e:
+                    logger.info(f"镜像下载失败: {url}: {e}")
+                    continue
+                if winner is None:
+                    winner = url
+                    if backup and os.path.exists(dest_path):
+                        shutil.copy2(dest_path, f"{dest_path}.bak")
+                    os.replace(staging_path, dest_path)
+                    os.replace(metadata_path_for(staging_path), metadata_path_for(dest_path))
+                    logger.info(f"镜像 {url} 胜出，耗时 {latency:.2f} 秒")
+                else:
+                    _remove_staging(staging_path)
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        stats.save()
+    return winner
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+球面空间索引模块
+
+将点按近似等面积的经纬网格单元分桶（每个纬度带内的经度单元数与该纬度的余弦成正比），
+支持"半径R公里内的所有点"和"最近的k个点"查询及其批量版本。
+索引可以保存为.npz文件，每个数据集只需构建一次。
+"""
+
+import csv
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from src.utils.distance_calculator import EARTH_RADIUS, great_circle_distance
+
+logger = logging.getLogger(__name__)
+
+# 平均每个网格单元期望包含的点数，用于自动选择网格大小
+_TARGET_POINTS_PER_CELL = 4
+
+# 网格单元大小的上下限（度）
+_MIN_CELL_DEGREES = 0.25
+_MAX_CELL_DEGREES = 30.0
+
+# 批量查询时每块的查询点数，限制候选点对数组的大小
+_BATCH_CHUNK_QUERIES = 1024
+
+
+def _normalize_point_table(points):
+    """
+    将各种形式的点表转换为 (名称列表, 纬度数组, 经度数组)
+
+    支持的形式:
+        - 字典 {名称: (纬度, 经度)}，例如COUNTRIES_DATA
+        - 字典列表 [{"name": ..., "lat": ..., "lon": ...}]，例如MAJOR_CITIES
+        - (纬度, 经度) 或 (名称, 纬度, 经度) 元组列表
+    """
+    names, lats, lons = [], [], []
+    if isinstance(points, dict):
+        for name, (lat, lon) in points.items():
+            names.append(name)
+            lats.append(lat)
+            lons.append(lon)
+    else:
+        for i, item in enumerate(points):
+            if isinstance(item, dict):
+                names.append(item.get('name', str(i)))
+                lats.append(item['lat'])
+                lons.append(item['lon'])
+            elif len(item) == 3:
+                names.append(item[0])
+                lats.append(item[1])
+                lons.append(item[2])
+            else:
+                names.append(str(i))
+                lats.append(item[0])
+                lons.append(item[1])
+    return names, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+
+def load_points_csv(csv_path, name_field='name', lat_field='lat', lon_field='lon'):
+    """
+    从CSV文件加载点表
+
+    参数:
+        csv_path: CSV文件路径，第一行为表头
+        name_field: 名称列名
+        lat_field: 纬度列名（也接受latitude）
+        lon_field: 经度列名（也接受longitude）
+
+    返回:
+        字典列表，每项包含name、lat、lon
+    """
+    points = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for i, row in enumerate(reader):
+            lat = row.get(lat_field, row.get('latitude'))
+            lon = row.get(lon_field, row.get('longitude'))
+            if lat in (None, '') or lon in (None, ''):
+                logger.warning(f"CSV第{i + 2}行缺少坐标，已跳过")
+                continue
+            points.append({"name": row.get(name_field, str(i)), "lat": float(lat), "lon": float(lon)})
+    return points
+
+
+class SphericalGridIndex:
+    """
+    基于近似等面积经纬网格的球面点索引
+
+    点按所在网格单元排序后以CSR形式存储（单元偏移数组 + 点序号数组），
+    查询时只检查与查询球冠外接范围相交的单元，再对候选点计算精确的大圆距离。
+    """
+
+    def __init__(self, lats, lons, names=None, cell_degrees=None, radius=EARTH_RADIUS):
+        """
+        构建索引
+
+        参数:
+            lats, lons: 点的纬度和经度数组（度）
+            names: 点的名称列表，默认为序号
+            cell_degrees: 网格单元大小（度），默认根据点数自动选择
+            radius: 地球半径（公里）
+        """
+        self.lats = np.asarray(lats, dtype=np.float64).ravel()
+        self.lons = np.asarray(lons, dtype=np.float64).ravel()
+        if self.lats.shape != self.lons.shape:
+            raise ValueError(f"纬度和经度数组长度不一致: {self.lats.shape} != {self.lons.shape}")
+        self.names = list(names) if names is not None else [str(i) for i in range(self.lats.size)]
+        if len(self.names) != self.lats.size:
+            raise ValueError("名称数量与点数不一致")
+        self.radius = radius
+
+        if cell_degrees is None:
+            # 让平均每个单元约有_TARGET_POINTS_PER_CELL个点
+            area_per_cell = 41253.0 * _TARGET_POINTS_PER_CELL / max(1, self.lats.size)
+            cell_degrees = float(np.clip(np.sqrt(area_per_cell), _MIN_CELL_DEGREES, _MAX_CELL_DEGREES))
+        self.cell_degrees = cell_degrees
+        self._build_grid()
+
+    @classmethod
+    def from_points(cls, points, cell_degrees=None):
+        """
+        从点表构建索引
+
+        参数:
+            points: 点表（字典、字典列表或元组列表，见_normalize_point_table）
+            cell_degrees: 网格单元大小（度）
+
+        返回:
+            SphericalGridIndex实例
+        """
+        names, lats, lons = _normalize_point_table(points)
+        return cls(lats, lons, names=names, cell_degrees=cell_degrees)
+
+    @classmethod
+    def from_csv(cls, csv_path, cell_degrees=None, **fields):
+        """
+        从CSV文件构建索引，fields为load_points_csv的列名参数
+        """
+        return cls.from_points(load_points_csv(csv_path, **fields), cell_degrees=cell_degrees)
+
+    def _build_grid(self):
+        """
+        划分纬度带和经度单元，并按单元对点排序
+        """
+        self._build_bands()
+        cell_ids = self._cell_ids(self.lats, self.lons)
+        self._order = np.argsort(cell_ids, kind='stable')
+        counts = np.bincount(cell_ids, minlength=int(self._band_offsets[-1]))
+        self._cell_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _build_bands(self):
+        """
+        根据单元大小计算每个纬度带的经度单元数和单元编号偏移
+        """
+        h = self.cell_degrees
+        self._n_bands = int(np.ceil(180.0 / h))
+        band_mid = -90.0 + (np.arange(self._n_bands) + 0.5) * h
+        # 每个纬度带的经度单元数与纬度余弦成正比，使单元面积近似相等
+        self._band_cells = np.maximum(1, np.round(360.0 * np.cos(np.radians(band_mid)) / h)).astype(np.intp)
+        self._band_offsets = np.concatenate(([0], np.cumsum(self._band_cells)))
+
+    def _band_of(self, lats):
+        return np.clip(((np.asarray(lats) + 90.0) / self.cell_degrees).astype(np.intp), 0, self._n_bands - 1)
+
+    def _cell_ids(self, lats, lons):
+        bands = self._band_of(lats)
+        n_cells = self._band_cells[bands]
+        cols = np.floor((np.mod(np.asarray(lons) + 180.0, 360.0)) / 360.0 * n_cells).astype(np.intp)
+        return self._band_offsets[bands] + np.minimum(cols, n_cells - 1)
+
+    def __len__(self):
+        return self.lats.size
+
+    @property
+    def dataset_hash(self):
+        """
+        点坐标和名称的哈希值，用于判断缓存的索引是否仍然有效
+        """
+        return _points_hash(self.names, self.lats, self.lons)
+
+    def _candidates(self, lat, lon, angular_radius):
+        """
+        返回与查询球冠外接范围相交的所有单元中的点序号
+        """
+        radius_deg = np.degrees(angular_radius)
+        lat_lo = lat - radius_deg
+        lat_hi = lat + radius_deg
+        if lat_lo <= -90.0 or lat_hi >= 90.0 or radius_deg >= 90.0:
+            # 球冠包含极点时，相交纬度带内所有经度都可能命中
+            half_width = None
+        else:
+            ratio = np.sin(angular_radius) / np.cos(np.radians(lat))
+            half_width = None if ratio >= 1.0 else np.degrees(np.arcsin(ratio))
+
+        ranges = []
+        for band in range(int(self._band_of(max(lat_lo, -90.0))), int(self._band_of(min(lat_hi, 90.0))) + 1):
+            first_cell = self._band_offsets[band]
+            n_cells = self._band_cells[band]
+            if half_width is None or 2 * half_width >= 360.0 - 360.0 / n_cells:
+                ranges.append((self._cell_offsets[first_cell], self._cell_offsets[first_cell + n_cells]))
+                continue
+            start_col = int(np.floor(((lon - half_width + 180.0) % 360.0) / 360.0 * n_cells))
+            end_col = int(np.floor(((lon + half_width + 180.0) % 360.0) / 360.0 * n_cells))
+            if start_col <= end_col:
+                col_ranges = [(start_col, end_col)]
+            else:
+                # 跨越180度经线
+                col_ranges = [(start_col, n_cells - 1), (0, end_col)]
+            for c0, c1 in col_ranges:
+                ranges.append((self._cell_offsets[first_cell + c0], self._cell_offsets[first_cell + c1 + 1]))
+
+        if not ranges:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self._order[start:end] for start, end in ranges])
+
+    def _candidate_ranges_batch(self, lats, lons, angular_radii):
+        """
+        _candidates的批量版本：一次计算所有查询点与球冠外接范围相交的单元区间
+
+        返回:
+            (查询序号, 区间起点, 区间终点)，区间为_order中的位置；同一查询点的区间顺序与_candidates相同
+        """
+        radius_deg = np.degrees(angular_radii)
+        lat_lo = lats - radius_deg
+        lat_hi = lats + radius_deg
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.sin(angular_radii) / np.cos(np.radians(lats))
+            half_width = np.degrees(np.arcsin(np.minimum(ratio, 1.0)))
+        # 球冠包含极点或覆盖所有经度时，相交纬度带内所有经度都可能命中
+        full_query = (lat_lo <= -90.0) | (lat_hi >= 90.0) | (radius_deg >= 90.0) | ~(ratio < 1.0)
+
+        # 展开为 (查询点, 纬度带) 对
+        band_lo = self._band_of(np.maximum(lat_lo, -90.0))
+        band_hi = self._band_of(np.minimum(lat_hi, 90.0))
+        n_bands = band_hi - band_lo + 1
+        query = np.repeat(np.arange(lats.size), n_bands)
+        band = band_lo[query] + np.arange(query.size) - np.repeat(np.cumsum(n_bands) - n_bands, n_bands)
+        first_cell = self._band_offsets[band]
+        n_cells = self._band_cells[band]
+        hw = np.where(full_query[query], 0.0, half_width[query])
+        full = full_query[query] | (2 * hw >= 360.0 - 360.0 / n_cells)
+        lon = lons[query]
+        start_col = np.floor(((lon - hw + 180.0) % 360.0) / 360.0 * n_cells).astype(np.intp)
+        end_col = np.floor(((lon + hw + 180.0) % 360.0) / 360.0 * n_cells).astype(np.intp)
+        start_col[full] = 0
+        end_col[full] = n_cells[full] - 1
+        # 跨越180度经线的带拆成两个区间：start_col到最后一列，第0列到end_col
+        wrap = start_col > end_col
+        c0 = np.stack((start_col, np.zeros_like(start_col)), axis=1)
+        c1 = np.stack((np.where(wrap, n_cells - 1, end_col), end_col), axis=1)
+        used = np.stack((np.ones_like(wrap), wrap), axis=1)
+        cell = first_cell[:, None]
+        starts = self._cell_offsets[cell + c0][used]
+        ends = self._cell_offsets[cell + c1 + 1][used]
+        return np.repeat(query, used.sum(axis=1)), starts, ends
+
+    def _query_radius_flat(self, lats, lons, radii):
+        """
+        批量半径查询的平坦结果
+
+        返回:
+            (查询序号, 点序号, 距离)，按查询序号、距离升序排列（同距离时与query_radius的顺序相同）
+        """
+        angular_radii = np.minimum(radii / self.radius, np.pi)
+        query, starts, ends = self._candidate_ranges_batch(lats, lons, angular_radii)
+        # 从CSR数组中收集所有区间的点，一次计算所有候选点对的距离
+        lengths = ends - starts
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        query = np.repeat(query, lengths)
+        candidates = self._order[positions]
+        distances = great_circle_distance(lats[query], lons[query], self.lats[candidates], self.lons[candidates],
+                                          self.radius)
+        mask = distances <= radii[query]
+        query, candidates, distances = query[mask], candidates[mask], distances[mask]
+        order = np.lexsort((distances, query))
+        return query[order], candidates[order], distances[order]
+
+    def _query_radius_chunks(self, lats, lons, radii):
+        """
+        按_BATCH_CHUNK_QUERIES分块执行_query_radius_flat，返回每个查询点的结果数和拼接后的点序号、距离
+        """
+        counts = np.zeros(lats.size, dtype=np.intp)
+        indices, distances = [], []
+        for start in range(0, lats.size, _BATCH_CHUNK_QUERIES):
+            chunk = slice(start, start + _BATCH_CHUNK_QUERIES)
+            query, chunk_indices, chunk_distances = self._query_radius_flat(lats[chunk], lons[chunk], radii[chunk])
+            counts[chunk] = np.bincount(query, minlength=lats[chunk].size)
+            indices.append(chunk_indices)
+            distances.append(chunk_distances)
+        if not indices:
+            return counts, np.empty(0, dtype=np.intp), np.empty(0)
+        return counts, np.concatenate(indices), np.concatenate(distances)
+
+    def query_radius(self, lat, lon, radius_km):
+        """
+        查询距离(lat, lon)不超过radius_km的所有点
+
+        参数:
+            lat, lon: 查询点的纬度和经度（度）
+            radius_km: 查询半径（公里）
+
+        返回:
+            (点序号数组, 距离数组)，按距离升序排列
+        """
+        angular_radius = min(radius_km / self.radius, np.pi)
+        candidates = self._candidates(lat, lon, angular_radius)
+        distances = great_circle_distance(lat, lon, self.lats[candidates], self.lons[candidates], self.radius)
+        mask = distances <= radius_km
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def query_radius_batch(self, lats, lons, radius_km):
+        """
+        批量半径查询
+
+        参数:
+            lats, lons: 查询点的纬度和经度数组（度）
+            radius_km: 查询半径（公里），标量或与查询点等长的数组
+
+        返回:
+            列表，每项为对应查询点的 (点序号数组, 距离数组)
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64)).ravel()
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64)).ravel()
+        radii = np.broadcast_to(np.asarray(radius_km, dtype=np.float64), lats.shape)
+        counts, indices, distances = self._query_radius_chunks(lats, lons, radii)
+        bounds = np.cumsum(counts)[:-1]
+        return list(zip(np.split(indices, bounds), np.split(distances, bounds)))
+
+    def query_knn(self, lat, lon, k=1):
+        """
+        查询距离(lat, lon)最近的k个点
+
+        先按点密度估计包含约k个点的球冠半径，结果不足k个时半径加倍重查；
+        半径内已有k个点时，它们一定就是最近的k个点
+
+        参数:
+            lat, lon: 查询点的纬度和经度（度）
+            k: 返回的点数
+
+        返回:
+            (点序号数组, 距离数组)，按距离升序排列，长度为min(k, 点总数)
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        # 球冠面积约为 pi*r^2，按平均密度估计初始半径
+        angular_radius = min(np.pi, 1.5 * np.sqrt(4.0 * k / len(self)))
+        while True:
+            indices, distances = self.query_radius(lat, lon, angular_radius * self.radius)
+            if len(indices) >= k or angular_radius >= np.pi:
+                return indices[:k], distances[:k]
+            angular_radius = min(np.pi, angular_radius * 2)
+
+    def query_knn_batch(self, lats, lons, k=1):
+        """
+        批量k近邻查询
+
+        参数:
+            lats, lons: 查询点的纬度和经度数组（度）
+            k: 每个查询点返回的点数
+
+        返回:
+            (点序号矩阵, 距离矩阵)，形状为(N, min(k, 点总数))
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64)).ravel()
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64)).ravel()
+        k = max(0, min(k, len(self)))
+        indices = np.empty((lats.size, k), dtype=np.intp)
+        distances = np.empty((lats.size, k), dtype=np.float64)
+        if k == 0:
+            return indices, distances
+        # 与query_knn相同的半径估计，所有查询点同时查询，结果不足k个的查询点半径加倍后再查
+        active = np.arange(lats.size)
+        angular_radius = min(np.pi, 1.5 * np.sqrt(4.0 * k / len(self)))
+        while active.size:
+            radii = np.full(active.size, angular_radius * self.radius)
+            counts, found, found_distances = self._query_radius_chunks(lats[active], lons[active], radii)
+            done = (counts >= k) | (angular_radius >= np.pi)
+            # 每个完成的查询点取结果中的前k个
+            first = (np.cumsum(counts) - counts)[done]
+            take = first[:, None] + np.arange(k)
+            indices[active[done]] = found[take]
+            distances[active[done]] = found_distances[take]
+            active = active[~done]
+            angular_radius = min(np.pi, angular_radius * 2)
+        return indices, distances
+
+    def save(self, path):
+        """
+        将索引保存为.npz文件
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, lats=self.lats, lons=self.lons, names=np.array(self.names, dtype=str),
+                 cell_degrees=self.cell_degrees, radius=self.radius, order=self._order,
+                 cell_offsets=self._cell_offsets, dataset_hash=self.dataset_hash)
+        logger.info(f"空间索引已保存到: {path}")
+
+    @classmethod
+    def load(cls, path):
+        """
+        从.npz文件加载索引，不重新排序
+        """
+        with np.load(path, allow_pickle=False) as data:
+            index = cls.__new__(cls)
+            index.lats = data['lats']
+            index.lons = data['lons']
+            index.names = data['names'].tolist()
+            index.cell_degrees = float(data['cell_degrees'])
+            index.radius = float(data['radius'])
+            index._build_bands()
+            index._order = data['order']
+            index._cell_offsets = data['cell_offsets']
+        return index
+
+    @classmethod
+    def load_or_build(cls, path, points, cell_degrees=None):
+        """
+        如果缓存文件存在且与点表一致则加载，否则构建并保存
+
+        参数:
+            path: 索引缓存文件路径
+            points: 点表
+            cell_degrees: 网格单元大小（度）
+
+        返回:
+            SphericalGridIndex实例
+        """
+        names, lats, lons = _normalize_point_table(points)
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    cached_hash = str(data['dataset_hash'])
+                if cached_hash == _points_hash(names, lats, lons):
+                    return cls.load(path)
+                logger.info(f"空间索引缓存已过期: {path}")
+            except Exception as e:
+                logger.warning(f"读取空间索引缓存失败: {e}")
+        index = cls(lats, lons, names=names, cell_degrees=cell_degrees)
+        index.save(path)
+        return index
+
+
+def _points_hash(names, lats, lons):
+    """
+    计算点表的哈希值
+    """
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(lats, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(lons, dtype=np.float64).tobytes())
+    digest.update('\n'.join(names).encode('utf-8'))
+    return digest.hexdigest()
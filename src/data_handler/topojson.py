@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TopoJSON解码模块
+
+把TopoJSON拓扑转换为GeoJSON FeatureCollection：
+所有弧段拼接为一个数组，一次累加和完成量化弧段的差分解码，再统一做 scale/translate 变换；
+每条弧段只解码一次，几何引用弧段时使用同一份数据（负索引 ~i 表示反向使用第i条弧段），
+相邻国家共享的边界不会被重复解码。
+"""
+
+from itertools import chain
+
+import numpy as np
+
+
+def decode_arcs(topology):
+    """
+    解码拓扑中的全部弧段
+
+    参数:
+        topology: TopoJSON字典
+
+    返回:
+        弧段坐标数组列表，每项为形状(K, 2)的(经度, 纬度)数组（同一个大数组的视图）
+    """
+    arcs = topology.get('arcs') or []
+    if not arcs:
+        return []
+    lengths = np.fromiter((len(arc) for arc in arcs), dtype=np.int64, count=len(arcs))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    flat = list(chain.from_iterable(arcs))
+    try:
+        positions = np.array(flat, dtype=np.float64).reshape(len(flat), -1)[:, :2]
+    except ValueError:
+        # 部分位置带有额外维度（如高程）时逐个截取经纬度
+        positions = np.array([position[:2] for position in flat], dtype=np.float64).reshape(-1, 2)
+
+    transform = topology.get('transform')
+    if transform:
+        # 量化弧段按差分编码：整体累加后减去每条弧段起点之前的累加值，得到各弧段内的累加和
+        # 量化坐标为整数，用int64累加保证结果精确
+        totals = np.cumsum(positions.astype(np.int64), axis=0)
+        before = np.vstack(([0, 0], totals))[offsets[:-1]]
+        positions = totals - np.repeat(before, lengths, axis=0)
+        positions = positions * np.asarray(transform['scale'], dtype=np.float64) \
+            + np.asarray(transform['translate'], dtype=np.float64)
+
+    return [positions[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _transform_point(topology, position):
+    """
+    对点坐标做 scale/translate 变换（点坐标不做差分编码）
+    """
+    transform = topology.get('transform')
+    if not transform:
+        return [float(position[0]), float(position[1])]
+    scale, translate = transform['scale'], transform['translate']
+    return [position[0] * scale[0] + translate[0], position[1] * scale[1] + translate[1]]
+
+
+def _arc_line(arcs, arc_indices):
+    """
+    按弧段索引拼接一条线或一个环，负索引 ~i 表示反向的第i条弧段；
+    后续弧段的第一个点与前一条弧段的最后一个点重合，拼接时去掉
+    """
+    pieces = []
+    for k, index in enumerate(arc_indices):
+        arc = arcs[index] if index >= 0 else arcs[~index][::-1]
+        pieces.append(arc if k == 0 else arc[1:])
+    if not pieces:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.concatenate(pieces)
+
+
+def _decode_geometry(topology, arcs, geometry):
+    """
+    把TopoJSON几何对象转换为GeoJSON几何对象
+    """
+    geometry_type = geometry.get('type')
+    if geometry_type is None:
+        return None
+    if geometry_type == 'GeometryCollection':
+        return {"type": geometry_type,
+                "geometries": [_decode_geometry(topology, arcs, g) for g in geometry.get('geometries', [])]}
+    if geometry_type == 'Point':
+        coordinates = _transform_point(topology, geometry['coordinates'])
+    elif geometry_type == 'MultiPoint':
+        coordinates = [_transform_point(topology, p) for p in geometry['coordinates']]
+    elif geometry_type == 'LineString':
+        coordinates = _arc_line(arcs, geometry['arcs'])
+    elif geometry_type in ('MultiLineString', 'Polygon'):
+        coordinates = [_arc_line(arcs, line) for line in geometry['arcs']]
+    elif geometry_type == 'MultiPolygon':
+        coordinates = [[_arc_line(arcs, ring) for ring in polygon] for polygon in geometry['arcs']]
+    else:
+        raise ValueError(f"不支持的TopoJSON几何类型: {geometry_type}")
+    return {"type": geometry_type, "coordinates": coordinates}
+
+
+def topology_to_geojson(topology, object_name=None):
+    """
+    把TopoJSON拓扑中的一个对象转换为GeoJSON FeatureCollection
+
+    参数:
+        topology: TopoJSON字典（type为Topology）
+        object_name: 要转换的对象名称，默认为第一个对象
+
+    返回:
+        GeoJSON FeatureCollection字典，坐标为numpy数组
+
+    异常:
+        ValueError: 不是TopoJSON拓扑或对象不存在
+    """
+    if topology.get('type') != 'Topology' or not topology.get('objects'):
+        raise ValueError("数据不是TopoJSON拓扑")
+    if object_name is None:
+        object_name = next(iter(topology['objects']))
+    if object_name not in topology['objects']:
+        raise ValueError(f"TopoJSON中不存在对象: {object_name}")
+
+    arcs = decode_arcs(topology)
+    obj = topology['objects'][object_name]
+    geometries = obj.get('geometries', []) if obj.get('type') == 'GeometryCollection' else [obj]
+
+    features = []
+    for geometry in geometries:
+        feature = {"type": "Feature",
+                   "geometry": _decode_geometry(topology, arcs, geometry),
+                   "properties": dict(geometry.get('properties') or {})}
+        if 'id' in geometry:
+            feature['id'] = geometry['id']
+        features.append(feature)
+    return {"type": "FeatureCollection", "features": features}
@@ -2,33 +2,40 @@
 # -*- coding: utf-8 -*-
 
 import json
-import urllib.request
 import os
-import time
-from src.utils.config_loader import config_loader
+from src.utils.config_loader import get_config_loader
+from src.data_handler.geometry_cache import load_geojson
+from src.data_handler.dataset_registry import load_dataset
+from src.data_handler.mirror_race import race_mirrors
+from src.data_handler.topojson import topology_to_geojson
+from src.data_handler.geojson_stream import feature_matches, iter_geojson_features, read_feature_collection
 
 
-def load_world_map_data(data_path=None, force_download=False):
+def load_world_map_data(data_path=None, force_download=False, bbox=None, names=None):
     """
     加载世界地图的JSON数据
     
-    首先尝试从本地加载，如果不存在或格式错误则从网络下载
+    首先尝试从本地加载，如果不存在或格式错误则同时从所有配置的数据源下载
     如果下载失败，返回增强的简化世界边界数据
     
     参数:
         data_path: 数据文件路径
         force_download: 是否强制下载数据，即使本地文件已存在
+        bbox: 只保留与范围框 (最小经度, 最小纬度, 最大经度, 最大纬度) 相交的国家
+        names: 只保留名称在该集合中的国家
     
     返回:
-        JSON格式的地图数据
+        JSON格式的地图数据（从本地文件完整加载时为进程内共享的只读视图）
     """
     # 从配置文件获取设置
-    world_config = config_loader.get('world', {})
+    world_config = get_config_loader().get('world', {})
     WORLD_JSON_URL = world_config.get('json_urls', {}).get('primary', 
         'https://raw.githubusercontent.com/datasets/geo-countries/master/data/countries.geojson')
     ALTERNATIVE_WORLD_JSON_URL = world_config.get('json_urls', {}).get('alternative', 
         'https://cdn.jsdelivr.net/npm/world-atlas@2/countries-110m.json')
     LOCAL_JSON_PATH = world_config.get('local_path', 'data/world.json')
+    # 各数据源文件的校验和（可选）
+    checksums = world_config.get('json_checksums') or {}
     
     # 使用传入的路径或配置文件中的路径或默认路径
     load_path = data_path if data_path else LOCAL_JSON_PATH
@@ -37,15 +44,20 @@ def load_world_map_data(data_path=None, force_download=False):
     if os.path.exists(load_path) and not force_download:
         print(f"正在从本地加载世界地图数据: {load_path}...")
         try:
-            with open(load_path, 'r', encoding='utf-8') as f:
-                # 验证JSON格式是否正确
-                data = json.load(f)
-                if 'features' in data:
-                    return data
-                elif 'objects' in data and 'countries' in data['objects']:  # 处理备用数据源格式
-                    return transform_alt_data_format(data)
-                else:
-                    print(f"本地JSON文件格式不完整，缺少必要字段")
+            if bbox is not None or names is not None:
+                # 有过滤条件时流式读取，只保留匹配的特征，不构建完整的文档树
+                try:
+                    return read_feature_collection(load_path, bbox=bbox, names=names)
+                except json.JSONDecodeError:
+                    raise
+                except ValueError:
+                    pass  # 不是GeoJSON FeatureCollection（如TopoJSON），按完整文件加载后过滤
+            # 验证JSON格式是否正确（进程内已解析且文件未变化时直接复用）
+            data = load_dataset(load_path, _parse_world_file)
+            if 'features' in data:
+                return _filter_features(data, bbox, names)
+            else:
+                print(f"本地JSON文件格式不完整，缺少必要字段")
         except json.JSONDecodeError as e:
             print(f"本地加载世界地图数据失败: 格式错误 - {e}")
             # 删除损坏的文件
@@ -62,95 +74,76 @@ def load_world_map_data(data_path=None, force_download=False):
         else:
             print(f"本地文件不存在: {load_path}")
     
-    # 尝试从两个不同的数据源下载数据
-    for url in [WORLD_JSON_URL, ALTERNATIVE_WORLD_JSON_URL]:
-        print(f"尝试从数据源: {url}")
-        if download_and_verify_data(url, load_path):
-            try:
-                with open(load_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'objects' in data and 'countries' in data['objects']:
-                        return transform_alt_data_format(data)
-                    return data
-            except Exception as e:
-                print(f"读取下载的文件时出错: {e}")
-                continue
+    # 同时从所有数据源下载，采用第一个通过验证的结果，整个过程受总截止时间约束
+    mirrors = {'primary': WORLD_JSON_URL, 'alternative': ALTERNATIVE_WORLD_JSON_URL}
+    mirrors.update(world_config.get('json_urls') or {})
+    print(f"同时尝试{len(mirrors)}个数据源: {', '.join(mirrors.values())}")
+    winner = race_mirrors(list(mirrors.values()), load_path, validate=_is_valid_map_file,
+                          checksums={url: checksums.get(source) for source, url in mirrors.items()
+                                     if checksums.get(source)},
+                          deadline=world_config.get('download_deadline', 60), backup=True)
+    if winner:
+        print(f"世界地图数据已从 {winner} 下载，保存到: {load_path}")
+        try:
+            return _filter_features(load_dataset(load_path, _parse_world_file), bbox, names)
+        except Exception as e:
+            print(f"读取下载的文件时出错: {e}")
     
     # 所有尝试都失败，返回增强的简化世界边界数据
     print("所有数据源都失败，使用增强的简化世界边界数据")
     return get_enhanced_simplified_world_boundary()
 
 
-def download_and_verify_data(url, save_path):
+def _parse_world_file(path):
     """
-    下载并验证世界地图数据
-    如果文件已存在，先创建备份
+    解析本地世界地图文件：GeoJSON优先使用几何二进制缓存，备用数据源的TopoJSON转换为GeoJSON
     """
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            print(f"正在从网络下载世界地图数据（尝试 {attempt+1}/{max_retries}）到: {save_path}...")
-            # 确保保存目录存在
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            
-            # 检查文件是否已存在，如果存在则创建备份
-            if os.path.exists(save_path):
-                backup_path = f"{save_path}.bak"
-                # 如果备份文件已存在，删除它
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
-                # 创建新的备份文件
-                os.rename(save_path, backup_path)
-                print(f"已将已存在的文件备份为: {backup_path}")
-            
-            # 设置超时时间为30秒
-            response = urllib.request.urlopen(url, timeout=30)
-            data = response.read().decode('utf-8')
-            
-            # 简单验证JSON数据格式
-            json_data = json.loads(data)
-            if 'features' in json_data or ('objects' in json_data and 'countries' in json_data['objects']):
-                # 保存到本地
-                with open(save_path, 'w', encoding='utf-8') as f:
-                    f.write(data)
-                print(f"世界地图数据下载完成，已保存到: {save_path}")
-                return True
-            else:
-                print("下载的JSON数据格式不完整，缺少必要字段")
-        except urllib.error.URLError as e:
-            print(f"网络请求错误: {e}")
-        except json.JSONDecodeError as e:
-            print(f"下载的文件格式错误: {e}")
-        except Exception as e:
-            print(f"下载过程中发生错误: {e}")
-        
-        # 如果不是最后一次尝试，等待一段时间后重试
-        if attempt < max_retries - 1:
-            wait_time = 2 ** attempt  # 指数退避策略
-            print(f"{wait_time}秒后重试...")
-            time.sleep(wait_time)
-    
-    return False
+    data = load_geojson(path)
+    if 'features' not in data and 'objects' in data and 'countries' in data['objects']:
+        data = transform_alt_data_format(data)
+    return data
+
+
+def _filter_features(data, bbox=None, names=None):
+    """
+    按范围框和名称过滤已加载的地图数据，没有过滤条件时原样返回
+    """
+    if bbox is None and names is None:
+        return data
+    names = set(names) if names is not None else None
+    return {"type": "FeatureCollection",
+            "features": [f for f in data['features'] if feature_matches(f, bbox=bbox, names=names)]}
+
+
+def _is_valid_map_file(path):
+    """
+    验证下载的文件是GeoJSON FeatureCollection或包含countries对象的TopoJSON
+
+    GeoJSON通过流式读取逐个解析特征，不把整个文件读入内存
+    """
+    try:
+        for _ in iter_geojson_features(path):
+            pass
+        return True
+    except json.JSONDecodeError:
+        raise
+    except ValueError:
+        # 不是FeatureCollection，检查是否为TopoJSON
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return 'objects' in data and 'countries' in data['objects']
 
 
 def transform_alt_data_format(alt_data):
     """
-    转换备用数据源的格式为标准格式
+    转换备用数据源（world-atlas的TopoJSON）的格式为标准GeoJSON格式
     """
     try:
-        from pyproj import Proj, transform
-        # 提取国家数据并转换格式
-        features = []
-        countries = alt_data['objects']['countries']
-        for i, geom in enumerate(countries['geometries']):
-            feature = {
-                "type": "Feature",
-                "geometry": geom['coordinates'],
-                "properties": {"name": f"Country_{i}", "name_en": f"Country_{i}"}
-            }
-            features.append(feature)
-        
-        return {"type": "FeatureCollection", "features": features}
+        data = topology_to_geojson(alt_data, 'countries')
+        # 缺少名称的国家使用编号命名，与渲染器的默认命名一致
+        for i, feature in enumerate(data['features']):
+            feature['properties'].setdefault('name', f"Country_{i}")
+        return data
     except Exception as e:
         print(f"转换数据格式时出错: {e}")
         # 如果转换失败，返回简化数据
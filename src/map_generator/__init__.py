@@ -1,11 +1,35 @@
 # 地图生成器模块
 """
 地图生成器模块负责生成各类地图，包括中国地图和8000公里范围地图。
+
+各渲染器依赖matplotlib，按需导入（PEP 562）：只有首次访问对应的绘图函数时才加载渲染器模块，
+不绘图的命令（如download、--generate-config）不会加载matplotlib。
 """
 
-from .china_map import draw_china_map
-from .range_map import draw_8000km_range_map
-from .world_map import draw_world_map
-from .world_range_map import draw_world_map_with_range
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'draw_china_map': 'china_map',
+    'draw_8000km_range_map': 'range_map',
+    'draw_range_sweep': 'range_map',
+    'draw_world_map': 'world_map',
+    'draw_world_map_with_range': 'world_range_map',
+    'draw_world_range_sweep': 'world_range_map',
+    'parse_radii': 'range_sweep',
+    'generate_tiles': 'tile_pyramid',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['draw_china_map', 'draw_8000km_range_map', 'draw_world_map', 'draw_world_map_with_range']
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+底图栅格缓存模块
+
+世界各国和中国的多边形图层与范围半径无关，却占了每次保存PNG时绘制时间的大部分。
+底图图层可以预先按输出分辨率绘制成一张RGBA栅格并缓存（键为数据集哈希、显示范围、像素尺寸、分辨率和样式），
+保存栅格格式时坐标轴上只显示这张栅格，再绘制叠加层；保存矢量格式时仍然绘制原来的多边形，矢量输出不受影响。
+"""
+
+import hashlib
+import logging
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 最多缓存的底图栅格数量（300dpi的世界底图约90MB）
+DEFAULT_MAX_ENTRIES = 2
+
+# 底图样式版本，图层的颜色、线宽等样式变化时修改，使旧的缓存失效
+STYLE_VERSION = 1
+
+# 已缓存的底图栅格 {键: RGBA数组}
+_raster_cache = OrderedDict()
+
+# 各图形上的底图图层 {图形: [BasemapLayer, ...]}
+_figure_layers = weakref.WeakKeyDictionary()
+
+# 数据集哈希缓存 {id(数据集): (数据集, 哈希)}
+_fingerprints = {}
+
+# 缓存统计
+_stats = {"hits": 0, "misses": 0}
+
+
+def dataset_fingerprint(data):
+    """
+    计算GeoJSON数据集的内容哈希（特征名称、几何类型和全部坐标）
+
+    同一个数据集对象只计算一次
+
+    参数:
+        data: GeoJSON FeatureCollection
+
+    返回:
+        十六进制哈希字符串
+    """
+    from src.map_generator.geometry_paths import geometry_polygons
+
+    entry = _fingerprints.get(id(data))
+    if entry is not None and entry[0] is data:
+        return entry[1]
+    digest = hashlib.blake2b(digest_size=16)
+    for feature in data['features']:
+        geometry = feature.get('geometry') or {}
+        digest.update(str((feature.get('properties') or {}).get('name')).encode('utf-8'))
+        digest.update(str(geometry.get('type')).encode('utf-8'))
+        for polygon_coords in geometry_polygons(geometry):
+            for ring in polygon_coords:
+                digest.update(np.ascontiguousarray(ring, dtype=np.float64).tobytes())
+                digest.update(b'|')
+    if len(_fingerprints) >= 16:
+        _fingerprints.clear()
+    _fingerprints[id(data)] = (data, digest.hexdigest())
+    return _fingerprints[id(data)][1]
+
+
+def render_layers_raster(draw_layers, xlim, ylim, width, height, dpi):
+    """
+    把底图图层单独绘制成透明背景的RGBA栅格
+
+    参数:
+        draw_layers: 绘制函数 draw_layers(坐标轴)
+        xlim, ylim: 坐标轴的显示范围
+        width, height: 栅格像素尺寸（与输出图像中坐标轴区域的像素尺寸相同）
+        dpi: 分辨率
+
+    返回:
+        形状为(height, width, 4)的uint8数组，第一行为栅格的底部（与渲染器draw_image的行顺序相同）
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi, facecolor='none')
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    draw_layers(ax)
+    canvas.draw()
+    return np.ascontiguousarray(np.asarray(canvas.buffer_rgba())[::-1])
+
+
+def _raster_artist_class():
+    """
+    返回把栅格按像素直接绘制到坐标轴区域的图形元素类（延迟导入matplotlib）
+    """
+    global _RasterArtist
+    if _RasterArtist is None:
+        from matplotlib.artist import Artist
+
+        class RasterArtist(Artist):
+            """
+            把与坐标轴区域像素尺寸相同的RGBA栅格直接交给渲染器，不经过AxesImage的重采样
+            """
+
+            def __init__(self):
+                super().__init__()
+                self.rgba = None
+                # 不参与紧凑边界框和布局计算
+                self.set_in_layout(False)
+
+            def draw(self, renderer):
+                if not self.get_visible() or self.rgba is None:
+                    return
+                bbox = self.axes.bbox
+                gc = renderer.new_gc()
+                gc.set_clip_rectangle(bbox)
+                renderer.draw_image(gc, int(round(bbox.x0)), int(round(bbox.y0)), self.rgba)
+                gc.restore()
+                self.stale = False
+
+        _RasterArtist = RasterArtist
+    return _RasterArtist
+
+
+_RasterArtist = None
+
+
+class BasemapLayer:
+    """
+    坐标轴上的一组底图图形元素及其栅格替身
+
+    use_raster(True, dpi)时隐藏原来的图形元素、显示缓存的栅格；use_raster(False)时恢复矢量图形元素
+    """
+
+    def __init__(self, ax, artists, draw_layers, key):
+        """
+        参数:
+            ax: 坐标轴
+            artists: 坐标轴上由draw_layers绘制的图形元素
+            draw_layers: 绘制函数 draw_layers(坐标轴)，用于在单独的图形中重新绘制这些图层
+            key: 图层内容的缓存键（数据集哈希、样式等），与显示范围和像素尺寸一起组成完整的键
+        """
+        self.ax = ax
+        self.artists = list(artists)
+        self.draw_layers = draw_layers
+        self.key = key
+        # 栅格替身在底图创建时就添加到坐标轴（初始隐藏），作为底图的一部分在多次渲染之间保留
+        self.image = _raster_artist_class()()
+        self.image.set_zorder(min(artist.get_zorder() for artist in self.artists))
+        self.image.set_visible(False)
+        ax.add_artist(self.image)
+        _figure_layers.setdefault(ax.figure, []).append(self)
+
+    def _pixel_size(self, dpi):
+        """
+        坐标轴区域在指定分辨率下的像素尺寸
+        """
+        position = self.ax.get_position()
+        width_inches, height_inches = self.ax.figure.get_size_inches()
+        return (max(int(round(position.width * width_inches * dpi)), 1),
+                max(int(round(position.height * height_inches * dpi)), 1))
+
+    def raster(self, dpi):
+        """
+        返回指定分辨率下的底图栅格，缓存中没有时绘制
+        """
+        xlim, ylim = tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim())
+        width, height = self._pixel_size(dpi)
+        key = (self.key, xlim, ylim, width, height, dpi, STYLE_VERSION)
+        rgba = _raster_cache.get(key)
+        if rgba is not None:
+            _raster_cache.move_to_end(key)
+            _stats["hits"] += 1
+            return rgba
+        _stats["misses"] += 1
+        rgba = render_layers_raster(self.draw_layers, xlim, ylim, width, height, dpi)
+        _raster_cache[key] = rgba
+        while len(_raster_cache) > max(DEFAULT_MAX_ENTRIES, 1):
+            _raster_cache.popitem(last=False)
+        logger.debug(f"底图栅格已绘制并缓存: {width}x{height}, {dpi}dpi")
+        return rgba
+
+    def use_raster(self, raster, dpi=None):
+        """
+        切换底图的显示方式
+
+        参数:
+            raster: True时显示缓存的栅格（保存栅格格式时使用），False时显示原来的图形元素
+            dpi: 栅格的分辨率，raster为True时必须指定
+        """
+        self.image.rgba = self.raster(dpi) if raster else None
+        self.image.set_visible(raster)
+        for artist in self.artists:
+            artist.set_visible(not raster)
+
+
+def basemap_layers(fig):
+    """
+    返回图形上的底图图层列表
+    """
+    return _figure_layers.get(fig, [])
+
+
+def basemap_cache_stats():
+    """
+    返回底图栅格缓存统计 {"hits", "misses", "size"}
+    """
+    return {**_stats, "size": len(_raster_cache)}
+
+
+def clear_basemap_cache():
+    """
+    清空底图栅格缓存和统计
+    """
+    _raster_cache.clear()
+    _fingerprints.clear()
+    _stats["hits"] = _stats["misses"] = 0
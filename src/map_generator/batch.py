@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量渲染模块
+
+从JSON作业列表读取多个地图作业（china、range、world、world-range，参数与命令行相同），
+分发给进程池执行。每个工作进程只初始化一次：导入渲染器、配置字体、加载地图数据集，
+之后的作业都复用进程内的数据集注册表、渲染上下文和字体配置，不再为每张地图重复
+解释器启动、matplotlib导入、字体扫描和JSON解析。
+
+每个作业有独立的超时（在工作进程内用SIGALRM中断）和错误隔离，一个作业失败不影响其他作业；
+工作进程异常退出使进程池终止时，未完成的作业重新提交到新的进程池。全部完成后汇总成功数、失败数和吞吐量（张/秒）。
+"""
+
+import json
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from src.data_handler.dataset_registry import dataset_registry
+from src.data_handler.geometry_cache import is_cache_enabled
+from src.map_generator.figure_output import compact_svg_quantization
+
+logger = logging.getLogger(__name__)
+
+# 批量作业支持的命令
+BATCH_COMMANDS = ('china', 'range', 'world', 'world-range')
+
+# 默认的单个作业超时（秒）
+DEFAULT_JOB_TIMEOUT = 600
+
+# 工作进程异常退出后，未完成的作业重新提交到新进程池的次数；之后仍未完成的作业逐个在单独的进程池中执行
+MAX_POOL_RESTARTS = 2
+
+# 作业状态
+JOB_OK = 'ok'
+JOB_ERROR = 'error'
+JOB_TIMEOUT = 'timeout'
+
+# 各命令的默认文件名前缀（与main.py相同）
+_DEFAULT_FILENAMES = {
+    'china': 'china_map',
+    'range': 'china_8000km_range',
+    'world': 'world_map',
+    'world-range': 'world_with_8000km_range',
+}
+
+
+class JobTimeoutError(TimeoutError):
+    """
+    作业超过了允许的运行时间
+    """
+
+
+def load_jobs(jobs_path):
+    """
+    读取作业列表文件
+
+    参数:
+        jobs_path: JSON文件路径，内容为作业列表，或包含jobs列表的对象；
+                   每个作业是一个对象，command为命令名，其余键与命令行参数同名（如radius、filename、formats）
+
+    返回:
+        作业字典列表
+
+    异常:
+        ValueError: 文件格式不正确
+    """
+    with open(jobs_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    jobs = data.get('jobs') if isinstance(data, dict) else data
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"作业列表文件格式不正确（应为作业对象列表，或包含jobs列表的对象）: {jobs_path}")
+    return jobs
+
+
+def merge_job(job, config):
+    """
+    按 全局配置 < 命令配置 < 作业参数 的优先级合并作业参数（与命令行参数的合并方式相同）
+
+    参数:
+        job: 作业字典
+        config: 配置字典（ConfigLoader.config）
+
+    返回:
+        合并后的参数字典
+    """
+    merged = dict(config.get('global', {}))
+    merged.update(config.get(job.get('command'), {}))
+    merged.update({key.replace('-', '_'): value for key, value in job.items() if value is not None})
+    return merged
+
+
+def warm_up(world_paths=()):
+    """
+    导入渲染器，配置字体，加载中国地图数据集和给出的世界地图数据集，之后的渲染复用这些进程内状态
+
+    参数:
+        world_paths: 需要预先加载的世界地图数据文件路径
+    """
+    import src.map_generator as map_generator
+    from src.data_handler.json_loader import load_china_map_data
+    from src.data_handler.world_json_loader import load_world_map_data
+    from src.utils.font_config import ensure_fonts
+
+    start = time.perf_counter()
+    for name in map_generator.__all__:
+        getattr(map_generator, name)
+    ensure_fonts()
+    load_china_map_data()
+    for path in world_paths:
+        load_world_map_data(data_path=path)
+    logger.info(f"进程{os.getpid()}预热完成（{time.perf_counter() - start:.1f}秒）")
+
+
+def _init_worker(cache_enabled, registry_size, svg_quantization, preload_world_paths, log_level):
+    """
+    工作进程初始化：沿用主进程的缓存和SVG输出设置，导入渲染器，配置字体，加载作业需要的地图数据集
+    """
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    import matplotlib
+    matplotlib.use('Agg')
+    from src.data_handler.geometry_cache import set_cache_enabled
+    from src.map_generator.figure_output import set_compact_svg
+
+    set_cache_enabled(cache_enabled)
+    set_compact_svg(svg_quantization is not None, svg_quantization)
+    dataset_registry.resize(registry_size)
+    warm_up(preload_world_paths)
+
+
+def _alarm_handler(signum, frame):
+    raise JobTimeoutError()
+
+
+def run_job(job, config, timeout=None):
+    """
+    执行一个作业（在工作进程中调用）
+
+    参数:
+        job: 作业字典
+        config: 配置字典
+        timeout: 超时（秒），支持SIGALRM的平台上超时后中断作业
+
+    返回:
+        结果字典 {"command", "status", "files", "maps", "seconds", "error"}
+    """
+    command = job.get('command')
+    start = time.perf_counter()
+    result = {"command": command, "status": JOB_OK, "files": [], "maps": 0, "seconds": 0.0, "error": None}
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _alarm_handler)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        files = dispatch_job(command, merge_job(job, config))
+        result["files"] = files
+        # 同一张地图的多种格式只计一张，汇总表不计
+        result["maps"] = len({os.path.splitext(path)[0] for path in files if not path.endswith('.csv')})
+    except JobTimeoutError:
+        result["status"] = JOB_TIMEOUT
+        result["error"] = f"超过{timeout}秒未完成"
+    except Exception as e:
+        logger.exception(f"作业失败: {job}")
+        result["status"] = JOB_ERROR
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def dispatch_job(command, args):
+    """
+    按命令调用渲染函数（不显示地图）
+
+    参数:
+        command: 命令名，见BATCH_COMMANDS
+        args: 合并后的参数字典（键与命令行参数同名，如radius、filename、formats、output_dir）
+
+    返回:
+        生成的文件路径列表
+
+    异常:
+        ValueError: 命令不支持，或半径、输出格式、投影参数不正确
+    """
+    import src.map_generator as map_generator
+    from src.map_generator.figure_output import parse_formats
+
+    if command not in BATCH_COMMANDS:
+        raise ValueError(f"不支持的批量作业命令: {command}（支持: {', '.join(BATCH_COMMANDS)}）")
+    output_dir = args.get('output_dir', 'outputs')
+    prefix = args.get('filename') or _DEFAULT_FILENAMES[command]
+    formats = parse_formats(args.get('formats'))
+
+    if command == 'china':
+        return map_generator.draw_china_map(output_dir=output_dir, filename_prefix=prefix, show_map=False,
+                                            data_path=args.get('data_path'), formats=formats)
+    if command == 'world':
+        return map_generator.draw_world_map(output_dir=output_dir, filename_prefix=prefix, show_map=False,
+                                            data_path=args.get('data_path'), formats=formats)
+
+    radii = map_generator.parse_radii(args.get('radius', 8000))
+    field_path = args.get('distance_field_path')
+    projection = args.get('projection')
+    if command == 'range':
+        if len(radii) > 1:
+            return map_generator.draw_range_sweep(radii, output_dir=output_dir, filename_prefix=prefix,
+                                                  distance_field_path=field_path, formats=formats,
+                                                  projection=projection)
+        return map_generator.draw_8000km_range_map(radius_km=radii[0], output_dir=output_dir, filename_prefix=prefix,
+                                                   show_map=False, distance_field_path=field_path, formats=formats,
+                                                   projection=projection)
+    if len(radii) > 1:
+        return map_generator.draw_world_range_sweep(radii, output_dir=output_dir, filename_prefix=prefix,
+                                                    data_path=args.get('data_path'), distance_field_path=field_path,
+                                                    formats=formats, projection=projection)
+    return map_generator.draw_world_map_with_range(radius_km=radii[0], output_dir=output_dir, filename_prefix=prefix,
+                                                   show_map=False, data_path=args.get('data_path'),
+                                                   distance_field_path=field_path, formats=formats,
+                                                   projection=projection)
+
+
+def _log_result(index, total, result):
+    """
+    记录一个作业的结果
+    """
+    logger.info(f"作业{index + 1}/{total} {result['command']}: {result['status']}"
+                f"（{result['seconds']:.1f}秒）" + (f" {result['error']}" if result['error'] else ''))
+
+
+def _run_pool(jobs, indices, config, timeout, workers, initargs, results):
+    """
+    在一个新的进程池中执行indices列出的作业，结果按作业序号写入results
+
+    返回:
+        进程池因工作进程异常退出（如被系统终止）而终止时，未完成的作业序号列表；否则为空列表
+    """
+    indices = list(indices)
+    broken = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(indices)), initializer=_init_worker,
+                             initargs=initargs) as executor:
+        futures = {executor.submit(run_job, jobs[index], config, jobs[index].get('timeout', timeout)): index
+                   for index in indices}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except BrokenProcessPool:
+                # 进程池终止时所有未完成的作业都会收到BrokenProcessPool，由调用方重新提交
+                broken.append(index)
+                continue
+            _log_result(index, len(jobs), results[index])
+    return sorted(broken)
+
+
+def run_batch(jobs, config, workers=None, timeout=DEFAULT_JOB_TIMEOUT, log_level=logging.INFO):
+    """
+    用进程池执行一批作业
+
+    参数:
+        jobs: 作业字典列表，见load_jobs；作业中的timeout键覆盖默认超时
+        config: 配置字典（ConfigLoader.config）
+        workers: 工作进程数，默认为min(CPU核数, 作业数)
+        timeout: 默认的单个作业超时（秒），为None或0时不限制
+        log_level: 工作进程的日志级别
+
+    返回:
+        (按作业顺序排列的结果字典列表, 汇总字典 {"jobs", "ok", "failed", "maps", "seconds", "maps_per_second"})
+    """
+    start = time.perf_counter()
+    results = [None] * len(jobs)
+    if jobs:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+        # 需要世界地图的作业所用的本地数据文件，工作进程初始化时预先加载
+        default_world_path = config.get('world', {}).get('local_path', 'data/world.json')
+        world_paths = sorted({merge_job(job, config).get('data_path') or default_world_path
+                              for job in jobs if job.get('command') in ('world', 'world-range')})
+        world_paths = [path for path in world_paths if os.path.exists(path)]
+        logger.info(f"开始批量渲染: {len(jobs)}个作业, {workers}个进程")
+        initargs = (is_cache_enabled(), dataset_registry.max_entries, compact_svg_quantization(), world_paths,
+                    log_level)
+        pending = _run_pool(jobs, range(len(jobs)), config, timeout, workers, initargs, results)
+        restarts = 0
+        while pending and restarts < MAX_POOL_RESTARTS:
+            restarts += 1
+            logger.warning(f"工作进程异常退出，重新提交{len(pending)}个未完成的作业（第{restarts}次）")
+            pending = _run_pool(jobs, pending, config, timeout, workers, initargs, results)
+        if pending:
+            # 反复导致进程池终止的作业无法与同批的作业区分，逐个单独执行，只有导致进程退出的作业失败
+            logger.warning(f"工作进程多次异常退出，剩余{len(pending)}个作业逐个在单独的进程中执行")
+            for index in pending:
+                if _run_pool(jobs, [index], config, timeout, 1, initargs, results):
+                    results[index] = {"command": jobs[index].get('command'), "status": JOB_ERROR, "files": [],
+                                      "maps": 0, "seconds": 0.0, "error": "工作进程异常退出"}
+                    _log_result(index, len(jobs), results[index])
+
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for result in results if result['status'] == JOB_OK)
+    maps = sum(result['maps'] for result in results)
+    summary = {"jobs": len(jobs), "ok": ok, "failed": len(jobs) - ok, "maps": maps, "seconds": elapsed,
+               "maps_per_second": maps / elapsed if elapsed > 0 else 0.0}
+    return results, summary
@@ -1,14 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
-from matplotlib.collections import PatchCollection
+import matplotlib
 from src.data_handler.json_loader import load_china_map_data
-from src.utils.font_config import setup_fonts
+from src.utils.font_config import ensure_fonts
+from src.utils.geometry_lod import simplify_for_display
+from src.map_generator.geometry_paths import add_geojson_collection
+from src.map_generator.render_context import render_map
 import logging
 
-# 设置中文字体
-font_set = setup_fonts()
-
 # 中国主要城市数据
 MAJOR_CITIES = [
     {"name": "北京", "lat": 39.9, "lon": 116.4},
@@ -36,65 +34,32 @@ MAJOR_CITIES = [
 # 初始化日志
 logger = logging.getLogger(__name__)
 
-def draw_china_map(output_dir="outputs", filename_prefix="china_map", show_map=True, data_path=None):
+def _build_china_map(fig, china_data, font_set):
     """
-    绘制中国地图，包括省界和主要城市
-    
-    参数:
-        output_dir: 输出文件目录
-        filename_prefix: 输出文件名前缀
-        show_map: 是否显示地图
-        data_path: 地图数据文件路径，默认为None（使用默认路径）
-    
+    在图形上绘制中国地图：省界、主要城市、标题和坐标轴标签
+
     返回:
-        生成的文件路径列表
+        坐标轴
     """
-    # 创建图形和坐标轴
-    plt.figure(figsize=(12, 10), dpi=150)
-    ax = plt.axes()
+    ax = fig.add_subplot()
     
     # 设置地图范围
-    ax.set_xlim(70, 140)
-    ax.set_ylim(15, 55)
+    display_extent = (70, 140, 15, 55)
+    ax.set_xlim(display_extent[0], display_extent[1])
+    ax.set_ylim(display_extent[2], display_extent[3])
     
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 获取中国地图数据
-    china_data = load_china_map_data(data_path=data_path)
-    
-    # 存储所有省份的多边形
-    patches = []
+    # 按输出像素大小和显示范围选择简化级别（PNG以300dpi保存），不绘制亚像素的细节
+    china_data = simplify_for_display(china_data, display_extent, fig.get_size_inches(), dpi=300)
     
     # 颜色列表，用于不同省份
-    colors = plt.cm.tab20(np.linspace(0, 1, 34))  # 假设中国有34个省级行政区
-    
-    # 遍历JSON数据中的每个特征
-    for i, feature in enumerate(china_data['features']):
-        geometry = feature['geometry']
-        
-        # 处理多边形
-        if geometry['type'] == 'Polygon':
-            coordinates = geometry['coordinates']
-            for polygon_coords in coordinates:
-                # 转换坐标格式 (lon, lat) -> (x, y)
-                x, y = zip(*polygon_coords)
-                polygon = Polygon(np.column_stack((x, y)), closed=True)
-                patches.append(polygon)
-        
-        # 处理多重多边形
-        elif geometry['type'] == 'MultiPolygon':
-            coordinates = geometry['coordinates']
-            for multi_coords in coordinates:
-                for polygon_coords in multi_coords:
-                    x, y = zip(*polygon_coords)
-                    polygon = Polygon(np.column_stack((x, y)), closed=True)
-                    patches.append(polygon)
+    colors = matplotlib.colormaps['tab20'](np.linspace(0, 1, 34))  # 假设中国有34个省级行政区
     
-    # 创建多边形集合并添加到图形
-    p = PatchCollection(patches, alpha=0.6)
-    p.set_color(colors[0 % len(colors)])  # 使用统一的颜色
-    ax.add_collection(p)
+    # 所有省份使用统一的颜色，合并为一个复合Path添加到图形
+    p, _ = add_geojson_collection(ax, china_data, merge=True, alpha=0.6)
+    p.set_color(colors[0 % len(colors)])
     
     print(f"正在绘制主要城市... number of cities: {len(MAJOR_CITIES)}")
     # 绘制主要城市
@@ -106,34 +71,45 @@ def draw_china_map(output_dir="outputs", filename_prefix="china_map", show_map=T
     
     # 设置标题和标签
     if font_set:
-        plt.title('中国地图', fontsize=16)
-        plt.xlabel('经度', fontsize=12)
-        plt.ylabel('纬度', fontsize=12)
+        ax.set_title('中国地图', fontsize=16)
+        ax.set_xlabel('经度', fontsize=12)
+        ax.set_ylabel('纬度', fontsize=12)
     else:
-        plt.title('China Map', fontsize=16)
-        plt.xlabel('Longitude', fontsize=12)
-        plt.ylabel('Latitude', fontsize=12)
-    
-    # 调整布局
-    plt.tight_layout()
+        ax.set_title('China Map', fontsize=16)
+        ax.set_xlabel('Longitude', fontsize=12)
+        ax.set_ylabel('Latitude', fontsize=12)
+    return ax
+
+
+def draw_china_map(output_dir="outputs", filename_prefix="china_map", show_map=True, data_path=None, formats=None):
+    """
+    绘制中国地图，包括省界和主要城市
     
-    # 确保输出目录存在
-    import os
-    os.makedirs(output_dir, exist_ok=True)
+    不显示地图时在无界面的渲染上下文中绘制，地图数据未变化时复用已绘制的图形
     
-    # 保存为SVG和PNG文件
-    svg_path = os.path.join(output_dir, f'{filename_prefix}.svg')
-    png_path = os.path.join(output_dir, f'{filename_prefix}.png')
+    参数:
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        show_map: 是否显示地图
+        data_path: 地图数据文件路径，默认为None（使用默认路径）
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
     
-    plt.savefig(svg_path, format='svg', bbox_inches='tight')
-    plt.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
+    返回:
+        生成的文件路径列表
+    """
+    # 设置中文字体
+    font_set = ensure_fonts()
     
-    if show_map:
-        plt.show()
-    else:
-        plt.close()
+    # 获取中国地图数据
+    china_data = load_china_map_data(data_path=data_path)
     
-    return [svg_path, png_path]
+    files, _ = render_map(
+        ('china', data_path), (12, 10), 150,
+        lambda fig: _build_china_map(fig, china_data, font_set),
+        output_dir=output_dir, filename_prefix=filename_prefix, formats=formats,
+        inputs=(china_data,), show_map=show_map
+    )
+    return files
 
 
 def generate_china_map():
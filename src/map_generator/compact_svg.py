@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑SVG输出模块
+
+matplotlib的标准SVG输出把每个顶点按6位小数写成绝对坐标，集合中的每个元素各写一个<path>。
+本模块提供一个SVG渲染器（作为savefig的backend使用，见figure_output.save_figure）：
+
+- 坐标按输出尺寸量化：较长边分为quantization份，小数位数取能表示这一精度的最少位数
+- 路径改用相对坐标命令（第一个点为绝对坐标），量化后重合的顶点被去掉，数字去掉多余的0和分隔符
+- 同一集合中样式相同（填充、描边、裁剪、链接都相同）的元素合并为一个<path>
+- SVGZ使用同一渲染器输出，gzip压缩级别默认为6（matplotlib为9）
+
+合并只改变同一集合内不同样式元素之间的绘制先后，地图中的国家和省份互不重叠，输出的图像不变。
+"""
+
+import codecs
+import gzip
+
+import numpy as np
+from matplotlib import cbook
+from matplotlib.backends.backend_mixed import MixedModeRenderer
+from matplotlib.backends.backend_svg import FigureCanvasSVG, RendererSVG
+from matplotlib.path import Path
+
+# 默认的量化份数：输出较长边上可以区分的坐标数
+DEFAULT_QUANTIZATION = 20000
+
+# SVGZ的gzip压缩级别：9级比6级只小约15%，压缩耗时却是数倍
+DEFAULT_COMPRESSLEVEL = 6
+
+# 作为savefig的backend参数使用的模块名
+BACKEND = 'module://src.map_generator.compact_svg'
+
+# 相对坐标的路径命令字母，前面的空格是多余的
+_COMMANDS = 'mlcqz'
+
+
+def svg_decimals(width, height, quantization=DEFAULT_QUANTIZATION):
+    """
+    按输出尺寸选择坐标的小数位数
+
+    参数:
+        width, height: 输出尺寸（SVG坐标单位，即点）
+        quantization: 较长边上可以区分的坐标数
+
+    返回:
+        0到6之间的小数位数
+    """
+    extent = max(float(width), float(height), 1e-9)
+    return int(np.clip(np.ceil(np.log10(quantization / extent)), 0, 6))
+
+
+def _number(name):
+    """
+    去掉数字末尾的 .0 和整数部分为0时的前导0
+    """
+    if name.endswith('.0'):
+        name = name[:-2]
+    if name.startswith('0.'):
+        return name[1:]
+    if name.startswith('-0.'):
+        return '-' + name[2:]
+    return name
+
+
+def _format_numbers(values, decimals):
+    """
+    把量化后的整数坐标格式化为字符串（按小数位数缩放），返回形状与values相同的object数组
+
+    相对坐标的取值重复很多，只格式化不同的值；整数除以10的幂后最短的repr就是量化精度下的十进制表示。
+    """
+    unique, inverse = np.unique(values, return_inverse=True)
+    if decimals == 0:
+        names = list(map(str, unique.tolist()))
+    else:
+        names = list(map(_number, map(repr, (unique / 10.0 ** decimals).tolist())))
+    return np.array(names, dtype=object)[inverse.reshape(values.shape)]
+
+
+def _join(tokens):
+    """
+    拼接路径数据：命令字母和负号前不需要分隔符
+    """
+    path_data = ' '.join(tokens)
+    for command in _COMMANDS:
+        path_data = path_data.replace(' ' + command, command)
+    return path_data.replace(' -', '-')
+
+
+def format_path(vertices, codes, decimals):
+    """
+    把顶点和命令转换为相对坐标的SVG路径数据
+
+    坐标先在绝对坐标上量化再求差，相对坐标累加后没有误差；量化后与前一个点重合的LINETO被去掉。
+
+    参数:
+        vertices: 形状为(N, 2)的顶点（已变换到SVG坐标）
+        codes: Path命令代码，长度为N
+        decimals: 小数位数
+
+    返回:
+        SVG路径数据字符串，以绝对坐标的M开始
+    """
+    drawn = codes != Path.STOP
+    vertices, codes = vertices[drawn], codes[drawn]
+    if len(codes) == 0:
+        return ''
+    quantized = np.round(vertices * 10.0 ** decimals).astype(np.int64)
+    if np.any((codes == Path.CURVE3) | (codes == Path.CURVE4)):
+        return _format_curved_path(quantized, codes, decimals)
+
+    # 闭合点的坐标为所在子路径的起点，之后的相对坐标从起点算起
+    index = np.arange(len(codes))
+    starts = np.maximum.accumulate(np.where(codes == Path.MOVETO, index, 0))
+    closing = codes == Path.CLOSEPOLY
+    quantized[closing] = quantized[starts[closing]]
+    delta = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    keep = ~((codes == Path.LINETO) & ~delta.any(axis=1))
+    keep[0] = True
+    codes, delta = codes[keep], delta[keep]
+    closing = codes == Path.CLOSEPOLY
+
+    # m之后的坐标对隐含为l；绝对的M和z之后的直线需要显式的l
+    previous = np.concatenate(([Path.STOP], codes[:-1]))
+    explicit_line = (codes == Path.LINETO) & ((previous == Path.CLOSEPOLY) | (np.arange(len(codes)) == 1))
+    moveto = codes == Path.MOVETO
+    moveto[0] = False
+    names = _format_numbers(delta, decimals)
+    names[moveto, 0] = 'm' + names[moveto, 0]
+    names[explicit_line, 0] = 'l' + names[explicit_line, 0]
+    names[0, 0] = 'M' + names[0, 0]
+    # 闭合点只输出z
+    names[closing, 0] = 'z'
+    drawn = np.ones(names.shape, dtype=bool)
+    drawn[closing, 1] = False
+    return _join(names[drawn].tolist())
+
+
+def _format_curved_path(quantized, codes, decimals):
+    """
+    含有贝塞尔曲线的路径（文字轮廓、圆形标记等，顶点很少）逐段转换
+    """
+    tokens = []
+    current = start = np.zeros(2, dtype=np.int64)
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code == Path.CLOSEPOLY:
+            tokens.append('z')
+            current = start
+            i += 1
+            continue
+        count = {Path.CURVE3: 2, Path.CURVE4: 3}.get(code, 1)
+        points = quantized[i:i + count] - current
+        if code == Path.MOVETO:
+            command = 'M' if i == 0 else 'm'
+        else:
+            command = {Path.CURVE3: 'q', Path.CURVE4: 'c'}.get(code, 'l')
+        numbers = _format_numbers(points.ravel(), decimals).tolist()
+        tokens.append(command + numbers[0])
+        tokens.extend(numbers[1:])
+        current = quantized[i + count - 1]
+        if code == Path.MOVETO:
+            start = current
+        i += count
+    return _join(tokens)
+
+
+class CompactRendererSVG(RendererSVG):
+    """
+    输出量化的相对坐标路径、并合并集合中同样式元素的SVG渲染器
+    """
+
+    def __init__(self, width, height, svgwriter, basename=None, image_dpi=72, *, metadata=None,
+                 quantization=DEFAULT_QUANTIZATION):
+        super().__init__(width, height, svgwriter, basename, image_dpi, metadata=metadata)
+        self.decimals = svg_decimals(width, height, quantization)
+
+    def _convert_path(self, path, transform=None, clip=None, simplify=None, sketch=None):
+        clip = (0.0, 0.0, self.width, self.height) if clip else None
+        if simplify is None:
+            simplify = path.should_simplify
+        cleaned = path.cleaned(transform=transform, remove_nans=True, clip=clip, simplify=simplify, curves=True,
+                               sketch=sketch)
+        return format_path(cleaned.vertices, cleaned.codes, self.decimals)
+
+    def draw_path_collection(self, gc, master_transform, paths, all_transforms, offsets, offset_trans, facecolors,
+                             edgecolors, linewidths, linestyles, antialiaseds, urls, offset_position, **kwargs):
+        # 逐个元素转换路径（与RendererSVG.draw_path相同的裁剪和简化规则），按样式分组后每组写一个<path>
+        groups = {}
+        raw_paths = list(self._iter_collection_raw_paths(master_transform, paths, all_transforms))
+        for xo, yo, (path, transform), gc0, rgbFace in self._iter_collection(
+                gc, raw_paths, offsets, offset_trans, facecolors, edgecolors, linewidths, linestyles,
+                antialiaseds, urls, offset_position, **kwargs):
+            if xo != 0 or yo != 0:
+                transform = transform.frozen()
+                transform.translate(xo, yo)
+            clip = rgbFace is None and gc0.get_hatch_path() is None
+            path_data = self._convert_path(path, self._make_flip_transform(transform), clip=clip,
+                                           simplify=path.should_simplify and clip, sketch=gc0.get_sketch_params())
+            if not path_data:
+                continue
+            key = (self._get_style(gc0, rgbFace), tuple(self._get_clip_attrs(gc0).items()), gc0.get_url())
+            groups.setdefault(key, []).append(path_data)
+
+        for (style, clip_attrs, url), parts in groups.items():
+            if url is not None:
+                self.writer.start('a', {'xlink:href': url, 'target': '_blank'})
+            self.writer.element('path', d=''.join(parts), **dict(clip_attrs), style=style)
+            if url is not None:
+                self.writer.end('a')
+
+
+class FigureCanvasCompactSVG(FigureCanvasSVG):
+    """
+    使用CompactRendererSVG的SVG画布，savefig的quantization参数指定量化份数，compresslevel参数指定SVGZ的压缩级别
+    """
+
+    def print_svg(self, filename, *, bbox_inches_restore=None, metadata=None, quantization=DEFAULT_QUANTIZATION,
+                  **kwargs):
+        # print_figure传给非matplotlib后端的其余参数（dpi、facecolor、orientation等）在SVG中不使用
+        with cbook.open_file_cm(filename, "w", encoding="utf-8") as fh:
+            if not cbook.file_requires_unicode(fh):
+                fh = codecs.getwriter('utf-8')(fh)
+            dpi = self.figure.dpi
+            self.figure.dpi = 72
+            width, height = self.figure.get_size_inches()
+            renderer = MixedModeRenderer(
+                self.figure, width, height, dpi,
+                CompactRendererSVG(width * 72, height * 72, fh, image_dpi=dpi, metadata=metadata,
+                                   quantization=quantization),
+                bbox_inches_restore=bbox_inches_restore)
+            self.figure.draw(renderer)
+            renderer.finalize()
+
+    def print_svgz(self, filename, *, compresslevel=DEFAULT_COMPRESSLEVEL, **kwargs):
+        with cbook.open_file_cm(filename, "wb") as fh, \
+                gzip.GzipFile(mode='w', fileobj=fh, compresslevel=compresslevel) as gzipwriter:
+            return self.print_svg(gzipwriter, **kwargs)
+
+
+FigureCanvas = FigureCanvasCompactSVG
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图形输出模块
+
+布局和紧凑边界框（bbox_inches='tight'）只计算一次，再按请求的格式逐一编码：
+savefig收到固定的边界框时不再为每种格式额外绘制一次来测量边界；
+所有栅格格式共用一次Agg绘制（第一种栅格格式由matplotlib编码，其余格式由Pillow转码），
+矢量格式各绘制一次。图形上有底图图层（见basemap_cache）时，栅格格式使用缓存的底图栅格，
+矢量格式绘制原来的矢量图层。开启紧凑SVG输出（--compact-svg）时，SVG和SVGZ由compact_svg中的
+渲染器写出。每种格式的耗时记录到日志。
+"""
+
+import io
+import logging
+import os
+import time
+
+from src.map_generator.basemap_cache import basemap_layers
+
+logger = logging.getLogger(__name__)
+
+# 默认输出格式
+DEFAULT_FORMATS = ('svg', 'png')
+
+# 共用一次Agg绘制的栅格格式，值为Pillow的格式名
+RASTER_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'tif': 'TIFF', 'tiff': 'TIFF', 'webp': 'WEBP'}
+
+# 每种格式各绘制一次的矢量格式
+VECTOR_FORMATS = ('svg', 'svgz', 'pdf', 'eps', 'ps')
+
+# 可以使用紧凑SVG渲染器的格式
+COMPACT_SVG_FORMATS = ('svg', 'svgz')
+
+# 紧凑SVG输出的量化份数，为None时使用matplotlib的标准SVG输出（命令行 --compact-svg 时开启）
+_svg_quantization = None
+
+
+def set_compact_svg(enabled, quantization=None):
+    """
+    打开或关闭紧凑SVG输出
+
+    参数:
+        enabled: 是否使用紧凑SVG渲染器写出SVG和SVGZ
+        quantization: 输出较长边上可以区分的坐标数，默认为compact_svg.DEFAULT_QUANTIZATION
+    """
+    global _svg_quantization
+    if not enabled:
+        _svg_quantization = None
+        return
+    if quantization is None:
+        from src.map_generator.compact_svg import DEFAULT_QUANTIZATION
+        quantization = DEFAULT_QUANTIZATION
+    if quantization <= 0:
+        raise ValueError(f"SVG量化份数必须为正数，实际为: {quantization}")
+    _svg_quantization = int(quantization)
+
+
+def compact_svg_quantization():
+    """
+    返回紧凑SVG输出的量化份数，未开启时返回None
+    """
+    return _svg_quantization
+
+
+def parse_formats(value):
+    """
+    解析输出格式
+
+    参数:
+        value: 逗号分隔的字符串（如 "png,svg"）或格式列表，为None或空时使用默认格式
+
+    返回:
+        去重后的小写格式元组，保持原有顺序
+
+    异常:
+        ValueError: 包含不支持的格式
+    """
+    if not value:
+        return DEFAULT_FORMATS
+    if isinstance(value, str):
+        value = value.split(',')
+    formats = tuple(dict.fromkeys(item.strip().lower().lstrip('.') for item in value if item.strip()))
+    unsupported = [fmt for fmt in formats if fmt not in RASTER_FORMATS and fmt not in VECTOR_FORMATS]
+    if unsupported:
+        supported = ', '.join(list(RASTER_FORMATS) + list(VECTOR_FORMATS))
+        raise ValueError(f"不支持的输出格式: {', '.join(unsupported)}（支持: {supported}）")
+    return formats or DEFAULT_FORMATS
+
+
+def compute_tight_bbox(fig, dpi=None, pad_inches=None):
+    """
+    计算图形的紧凑边界框（英寸），与savefig(bbox_inches='tight')的结果相同
+
+    参数:
+        fig: matplotlib图形
+        dpi: 按该分辨率测量文字尺寸（应与保存栅格格式的分辨率相同），默认为图形的分辨率
+        pad_inches: 边界留白（英寸），默认为rcParams['savefig.pad_inches']
+
+    返回:
+        matplotlib.transforms.Bbox
+    """
+    if pad_inches is None:
+        import matplotlib as mpl
+        pad_inches = mpl.rcParams['savefig.pad_inches']
+    original_dpi = fig.dpi
+    if dpi is not None:
+        fig.dpi = dpi
+    try:
+        # 只计算布局，不生成像素
+        fig.draw_without_rendering()
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    finally:
+        fig.dpi = original_dpi
+    return bbox.padded(pad_inches)
+
+
+def save_figure(fig, output_dir, filename_prefix, formats=None, dpi=300):
+    """
+    把图形保存为多种格式，布局和边界框只计算一次
+
+    参数:
+        fig: matplotlib图形（调用方已完成tight_layout等布局调整）
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        formats: 输出格式，见parse_formats，默认为SVG和PNG
+        dpi: 栅格格式的分辨率
+
+    返回:
+        生成的文件路径列表，顺序与formats相同
+    """
+    formats = parse_formats(formats)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    bbox = compute_tight_bbox(fig, dpi=dpi)
+    logger.info(f"布局和边界框计算耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    layers = basemap_layers(fig)
+    raster_image = None
+    files = []
+    try:
+        for fmt in formats:
+            path = os.path.join(output_dir, f'{filename_prefix}.{fmt}')
+            start = time.perf_counter()
+            if fmt in VECTOR_FORMATS:
+                for layer in layers:
+                    layer.use_raster(False)
+                if fmt in COMPACT_SVG_FORMATS and _svg_quantization is not None:
+                    from src.map_generator.compact_svg import BACKEND
+                    fig.savefig(path, format=fmt, bbox_inches=bbox, backend=BACKEND, quantization=_svg_quantization)
+                else:
+                    fig.savefig(path, format=fmt, bbox_inches=bbox)
+            else:
+                if raster_image is None:
+                    # 第一种栅格格式：一次Agg绘制，保留PNG编码结果供其余栅格格式转码
+                    for layer in layers:
+                        layer.use_raster(True, dpi)
+                    buffer = io.BytesIO()
+                    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches=bbox)
+                    raster_image = buffer.getvalue()
+                _encode_raster(raster_image, path, fmt, dpi)
+            logger.info(f"已保存{fmt.upper()}文件（{(time.perf_counter() - start) * 1000:.0f} ms）: {path}")
+            files.append(path)
+    finally:
+        # 恢复矢量图层，供显示或之后的保存使用
+        for layer in layers:
+            layer.use_raster(False)
+    return files
+
+
+def _encode_raster(png_bytes, path, fmt, dpi):
+    """
+    把已绘制的PNG写入文件，或转码为其他栅格格式
+    """
+    if fmt == 'png':
+        with open(path, 'wb') as f:
+            f.write(png_bytes)
+        return
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        if RASTER_FORMATS[fmt] == 'JPEG':
+            # JPEG不支持透明通道，按白色背景合成
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(path, format=RASTER_FORMATS[fmt], dpi=(dpi, dpi))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+几何到绘图对象的转换模块
+
+把GeoJSON数据集转换为少量复合Path（每个特征一个，或所有特征合并为一个），
+所有环一次性拼接为平坦的顶点和路径码数组，环的方向、闭合点和路径码都向量化处理，
+再按特征切分。与每个环一个Polygon补丁相比，绘图对象和变换的数量从环数降为特征数。
+"""
+
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+
+# 世界地图中代表中国的特征名称（绘制时改用专门的中国地图数据）
+CHINA_NAMES = ('中国', 'China', 'CN')
+
+
+def geometry_polygons(geometry):
+    """
+    返回几何对象的多边形列表（每个多边形为环列表），非多边形几何返回空列表
+    """
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def compound_paths(rings, holes, groups, n_groups):
+    """
+    把多个环一次性转换为按组划分的复合Path
+
+    外环统一为逆时针、洞统一为顺时针，填充时洞保持镂空；首尾重复的闭合点被去掉，
+    每个环以MOVETO开始、以CLOSEPOLY结束。
+
+    参数:
+        rings: 环坐标数组列表，每项形状为(K, 2)，首尾可以重复也可以不重复
+        holes: 每个环是否为洞
+        groups: 每个环所属的组号（非递减）
+        n_groups: 组数
+
+    返回:
+        长度为n_groups的Path列表，没有环的组为空Path
+    """
+    empty = Path(np.empty((0, 2)), np.empty(0, dtype=Path.code_type))
+    if not rings:
+        return [empty] * n_groups
+    lengths = np.fromiter((len(ring) for ring in rings), dtype=np.int64, count=len(rings))
+    flat = np.concatenate(rings)
+    holes = np.asarray(holes, dtype=bool)
+    groups = np.asarray(groups, dtype=np.int64)
+
+    # 去掉首尾重复的闭合点
+    starts = np.cumsum(lengths) - lengths
+    ends = starts + lengths - 1
+    closed = (lengths > 1) & np.all(flat[starts] == flat[ends], axis=1)
+    keep = np.ones(len(flat), dtype=bool)
+    keep[ends[closed]] = False
+    flat = flat[keep]
+    lengths = lengths - closed
+    starts = np.cumsum(lengths) - lengths
+
+    # 鞋带公式计算各环的有向面积，方向不符合约定的环整体反转
+    ring_id = np.repeat(np.arange(len(lengths)), lengths)
+    position = np.arange(len(flat)) - starts[ring_id]
+    following = starts[ring_id] + (position + 1) % lengths[ring_id]
+    terms = flat[:, 0] * flat[following, 1] - flat[following, 0] * flat[:, 1]
+    area = np.add.reduceat(terms, starts)
+    flip = (area < 0) ^ holes
+    reversed_index = starts[ring_id] + lengths[ring_id] - 1 - position
+    flat = flat[np.where(flip[ring_id], reversed_index, np.arange(len(flat)))]
+
+    # 每个环之后插入一个闭合顶点（CLOSEPOLY的坐标不参与绘制，取环的起点）
+    ring_offset = np.arange(len(lengths))
+    close_index = starts + lengths + ring_offset
+    vertices = np.empty((len(flat) + len(lengths), 2), dtype=np.float64)
+    vertices[np.arange(len(flat)) + ring_id] = flat
+    vertices[close_index] = flat[starts]
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    codes[starts + ring_offset] = Path.MOVETO
+    codes[close_index] = Path.CLOSEPOLY
+
+    # 按组切分
+    first_ring = np.searchsorted(groups, np.arange(n_groups), side='left')
+    last_ring = np.searchsorted(groups, np.arange(n_groups), side='right')
+    path_starts = np.append(starts + ring_offset, len(vertices))
+    paths = []
+    for first, last in zip(first_ring, last_ring):
+        if first == last:
+            paths.append(empty)
+            continue
+        begin, end = path_starts[first], path_starts[last]
+        paths.append(Path(vertices[begin:end], codes[begin:end]))
+    return paths
+
+
+def geojson_to_paths(geojson_data, exclude_names=None, merge=False):
+    """
+    把GeoJSON数据集转换为复合Path
+
+    参数:
+        geojson_data: GeoJSON FeatureCollection，或提供同名to_paths方法的投影数据集（见projected_geometry）
+        exclude_names: 要跳过的特征名称（properties中的name，缺少时为 Country_<序号>）
+        merge: 为True时所有特征合并为一个Path（同一样式的特征只需一个绘图对象）
+
+    返回:
+        (Path列表, 名称列表)；merge时两个列表各只有一项，名称为None
+    """
+    to_paths = getattr(geojson_data, 'to_paths', None)
+    if to_paths is not None:
+        return to_paths(exclude_names, merge)
+    exclude_names = set(exclude_names or ())
+    rings, holes, groups, names = [], [], [], []
+    for i, feature in enumerate(geojson_data['features']):
+        name = (feature.get('properties') or {}).get('name', f'Country_{i}')
+        if name in exclude_names:
+            continue
+        group = 0 if merge else len(names)
+        names.append(name)
+        for polygon_coords in geometry_polygons(feature.get('geometry')):
+            for ring_index, ring in enumerate(polygon_coords):
+                ring = np.asarray(ring, dtype=np.float64)
+                if ring.ndim != 2:
+                    ring = ring.reshape(-1, 2)
+                if len(ring) == 0:
+                    continue
+                rings.append(ring[:, :2])
+                holes.append(ring_index > 0)
+                groups.append(group)
+    if merge:
+        return compound_paths(rings, holes, groups, 1), [None]
+    return compound_paths(rings, holes, groups, len(names)), names
+
+
+def rings_to_path(polygons):
+    """
+    把多边形列表（MultiPolygon坐标结构，每个多边形的第一个环为外环）转换为一个复合Path
+    """
+    rings, holes = [], []
+    for polygon in polygons:
+        for ring_index, ring in enumerate(polygon):
+            ring = np.asarray(ring, dtype=np.float64)
+            if len(ring):
+                rings.append(ring[:, :2])
+                holes.append(ring_index > 0)
+    return compound_paths(rings, holes, np.zeros(len(rings), dtype=np.int64), 1)[0]
+
+
+def add_geojson_collection(ax, geojson_data, exclude_names=None, merge=False, **kwargs):
+    """
+    把GeoJSON数据集作为一个PathCollection添加到坐标轴
+
+    参数:
+        ax: matplotlib坐标轴
+        geojson_data: GeoJSON FeatureCollection
+        exclude_names: 要跳过的特征名称
+        merge: 是否把所有特征合并为一个Path
+        **kwargs: 传给PathCollection的样式参数（alpha、zorder等）
+
+    返回:
+        (PathCollection, 名称列表)，每个特征（merge时为整个数据集）对应集合中的一个Path，
+        可以用set_facecolor按特征设置颜色
+    """
+    paths, names = geojson_to_paths(geojson_data, exclude_names=exclude_names, merge=merge)
+    collection = PathCollection(paths, **kwargs)
+    ax.add_collection(collection, autolim=False)
+    return collection, names
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+投影几何模块
+
+投影模式下，地图数据集的所有环一次性加密、投影（见src.utils.projection），结果打包为平坦的坐标数组
+和环偏移数组，按 (数据集哈希, 投影, 简化级别) 缓存在内存中，并以.npz文件缓存到磁盘，
+再次渲染（包括新的进程）时直接读取投影后的坐标，跳过坐标变换。
+
+本模块还提供投影坐标轴的边框、经纬网，以及经纬度点的投影辅助函数。
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.patches import Polygon
+
+from src.data_handler.geometry_cache import is_cache_enabled
+from src.map_generator.basemap_cache import dataset_fingerprint
+from src.map_generator.geometry_paths import compound_paths, geometry_polygons
+from src.utils.geometry_lod import get_lod_geometry, select_lod_tolerance
+from src.utils.projection import DEFAULT_DENSIFY_DEGREES
+
+logger = logging.getLogger(__name__)
+
+# 投影缓存格式版本，格式或投影算法变化时修改，使旧的缓存失效
+PROJECTED_FORMAT_VERSION = 1
+
+# 默认的磁盘缓存目录
+DEFAULT_CACHE_DIR = 'data/projected'
+
+# 内存中缓存的投影数据集 {缓存键: ProjectedDataset}
+_projected_cache = {}
+
+# 缓存统计
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+class ProjectedDataset:
+    """
+    投影后的数据集：所有环的平面坐标拼接为一个数组
+
+    属性:
+        coords: 形状为(N, 2)的平面坐标（公里）
+        ring_offsets: 各环在coords中的起止偏移，长度为环数+1
+        ring_features: 各环所属的特征序号（非递减）
+        ring_holes: 各环是否为洞
+        names: 各特征的名称
+    """
+
+    def __init__(self, coords, ring_offsets, ring_features, ring_holes, names):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.ring_features = ring_features
+        self.ring_holes = ring_holes
+        self.names = list(names)
+
+    def rings(self):
+        """
+        各环坐标的视图列表
+        """
+        return np.split(self.coords, self.ring_offsets[1:-1]) if len(self.ring_features) else []
+
+    def to_paths(self, exclude_names=None, merge=False):
+        """
+        转换为复合Path，参数和返回值与geometry_paths.geojson_to_paths相同
+        """
+        exclude_names = set(exclude_names or ())
+        selected = [i for i, name in enumerate(self.names) if name not in exclude_names]
+        if merge:
+            groups = np.zeros(len(self.names), dtype=np.int64)
+        else:
+            groups = np.full(len(self.names), -1, dtype=np.int64)
+            groups[selected] = np.arange(len(selected))
+        mask = np.isin(self.ring_features, selected)
+        rings = [ring for ring, keep in zip(self.rings(), mask) if keep]
+        ring_groups = groups[self.ring_features[mask]]
+        if merge:
+            return compound_paths(rings, self.ring_holes[mask], ring_groups, 1), [None]
+        return compound_paths(rings, self.ring_holes[mask], ring_groups, len(selected)), \
+            [self.names[i] for i in selected]
+
+    def save(self, path):
+        """
+        保存为.npz文件（先写临时文件再替换，并行进程不会读到不完整的文件）
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(temp_path, coords=self.coords, ring_offsets=self.ring_offsets, ring_features=self.ring_features,
+                 ring_holes=self.ring_holes, names=np.array(json.dumps(self.names, ensure_ascii=False)))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取save保存的.npz文件
+        """
+        with np.load(path) as data:
+            return cls(data['coords'], data['ring_offsets'], data['ring_features'], data['ring_holes'],
+                       json.loads(str(data['names'])))
+
+
+def _collect_rings(geojson_data):
+    """
+    按特征顺序收集所有环，返回 (环列表, 所属特征序号, 是否为洞, 特征名称)
+    """
+    rings, features, holes, names = [], [], [], []
+    for i, feature in enumerate(geojson_data['features']):
+        names.append((feature.get('properties') or {}).get('name', f'Country_{i}'))
+        for polygon_coords in geometry_polygons(feature.get('geometry')):
+            for ring_index, ring in enumerate(polygon_coords):
+                ring = np.asarray(ring, dtype=np.float64)
+                if ring.ndim != 2:
+                    ring = ring.reshape(-1, 2)
+                if len(ring):
+                    rings.append(ring[:, :2])
+                    features.append(i)
+                    holes.append(ring_index > 0)
+    return rings, np.asarray(features, dtype=np.int64), np.asarray(holes, dtype=bool), names
+
+
+def projection_cache_key(geojson_data, projection, tolerance=0.0):
+    """
+    投影数据集的缓存键（十六进制字符串）
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((PROJECTED_FORMAT_VERSION, dataset_fingerprint(geojson_data), projection.key,
+                        round(float(tolerance), 9), DEFAULT_DENSIFY_DEGREES)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def project_dataset(geojson_data, projection, tolerance=0.0, cache_dir=None):
+    """
+    投影地图数据集
+
+    参数:
+        geojson_data: GeoJSON FeatureCollection（经纬度）
+        projection: AzimuthalProjection实例
+        tolerance: 投影前的LOD简化容差（度），0表示不简化
+        cache_dir: 磁盘缓存目录，默认为None（只使用内存缓存）
+
+    返回:
+        ProjectedDataset
+    """
+    key = projection_cache_key(geojson_data, projection, tolerance)
+    projected = _projected_cache.get(key)
+    if projected is not None:
+        _stats["memory_hits"] += 1
+        return projected
+
+    cache_path = os.path.join(cache_dir, f'projected_{key}.npz') if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            projected = ProjectedDataset.load(cache_path)
+            _stats["disk_hits"] += 1
+            logger.debug(f"从磁盘缓存读取投影几何: {cache_path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"投影几何缓存无法读取，重新投影: {cache_path}（{e}）")
+
+    if projected is None:
+        _stats["misses"] += 1
+        source = get_lod_geometry(geojson_data).simplified(tolerance) if tolerance > 0 else geojson_data
+        rings, features, holes, names = _collect_rings(source)
+        projected_rings, kept, projected_holes = projection.project_rings(rings, holes)
+        lengths = np.fromiter((len(ring) for ring in projected_rings), dtype=np.int64, count=len(projected_rings))
+        projected = ProjectedDataset(
+            np.concatenate(projected_rings) if projected_rings else np.empty((0, 2)),
+            np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+            features[kept], projected_holes, names
+        )
+        logger.debug(f"已投影{len(rings)}个环（{projection.name}，保留{len(kept)}个可见的环）")
+        if cache_path:
+            try:
+                projected.save(cache_path)
+            except OSError as e:
+                logger.warning(f"无法写入投影几何缓存: {cache_path}（{e}）")
+
+    if len(_projected_cache) >= 16:
+        _projected_cache.clear()
+    _projected_cache[key] = projected
+    return projected
+
+
+def projection_cache_dir():
+    """
+    返回配置的投影几何磁盘缓存目录，几何缓存关闭（--no-cache）时返回None
+    """
+    if not is_cache_enabled():
+        return None
+    from src.utils.config_loader import get_config_loader
+    return get_config_loader().get('projection', {}).get('cache_dir') or DEFAULT_CACHE_DIR
+
+
+def projected_cache_stats():
+    """
+    返回投影几何缓存的统计 {"memory_hits", "disk_hits", "misses", "size"}
+    """
+    return dict(_stats, size=len(_projected_cache))
+
+
+def clear_projected_cache():
+    """
+    清空内存中的投影几何缓存和统计（不删除磁盘缓存）
+    """
+    _projected_cache.clear()
+    for key in _stats:
+        _stats[key] = 0
+
+
+def projected_lod_tolerance(projection, figsize, dpi=300):
+    """
+    按投影的显示范围和输出像素大小选择简化级别（方位投影中心的比例为1，按中心比例换算）
+    """
+    span = 2 * np.degrees(projection.max_radius / projection.radius)
+    return select_lod_tolerance((0.0, span, 0.0, span), figsize, dpi)
+
+
+def project_points(projection, lons, lats):
+    """
+    投影经纬度点；projection为None时原样返回经纬度
+
+    返回:
+        (x, y)，输入为标量时返回标量，不可见的点为NaN
+    """
+    if projection is None:
+        return lons, lats
+    x, y = projection.forward(lons, lats)
+    if np.ndim(x) == 0:
+        return float(x), float(y)
+    return x, y
+
+
+def setup_projected_axes(ax, projection, extent=None, graticule_step=30.0):
+    """
+    设置投影坐标轴：等比例坐标、隐藏刻度，绘制显示范围的边界圆（浅色海洋背景）和经纬网
+
+    参数:
+        ax: matplotlib坐标轴
+        projection: AzimuthalProjection实例
+        extent: 显示范围 (最小x, 最大x, 最小y, 最大y)（公里），默认为整个边界圆
+        graticule_step: 经纬网间隔（度）
+
+    返回:
+        添加的 (边界补丁, 经纬网线集合)
+    """
+    if extent is None:
+        r = projection.max_radius
+        extent = (-r, r, -r, r)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect('equal')
+    ax.set_xticks([])
+    ax.set_yticks([])
+    frame = Polygon(projection.boundary(), closed=True, facecolor='#eef5fb', edgecolor='0.4', linewidth=0.8,
+                    zorder=0)
+    ax.add_patch(frame)
+    graticule = LineCollection(projection.graticule(graticule_step), colors='0.5', linestyles='--',
+                               linewidths=0.5, alpha=0.5, zorder=0.5)
+    ax.add_collection(graticule, autolim=False)
+    return frame, graticule
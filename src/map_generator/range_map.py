@@ -1,14 +1,19 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import matplotlib.colors as mcolors
 import logging
-from src.data_handler.country_data import get_countries_data
-from src.utils.distance_calculator import great_circle_distance
-from src.utils.font_config import setup_fonts
-
-# 设置中文字体
-font_set = setup_fonts()
+import os
+from src.data_handler.json_loader import load_china_map_data
+from src.utils.border_distance import BorderDistanceEngine
+from src.utils.geodesic_buffer import build_geodesic_buffer
+from src.map_generator.range_overlay import (
+    add_range_buffer, add_range_contour, field_range_bounds, load_range_field, projected_range_bounds
+)
+from src.map_generator.projected_geometry import project_points, setup_projected_axes
+from src.map_generator.range_sweep import classify_countries, write_band_summary
+from src.utils.font_config import ensure_fonts
+from src.map_generator.render_context import render_map
+from src.utils.projection import parse_projection
 
 # 地球半径（公里）
 EARTH_RADIUS = 6371.0
@@ -38,82 +43,96 @@ if not logger.handlers:
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
 
-def draw_8000km_range_map(radius_km=8000, output_dir="outputs", filename_prefix="china_8000km_range", show_map=True):
+def _create_base_axes(fig, projection=None):
     """
-    绘制以中国边界为起点的指定公里范围地图
-    
+    创建底图：坐标轴、网格线和中国主要城市标记，这些元素与半径无关，扫描时只绘制一次
+
+    projection不为None时绘制投影的边界圆和经纬网，城市标记按投影坐标绘制
+    """
+    ax = fig.add_subplot()
+
+    # 添加网格线
+    if projection is None:
+        ax.grid(True, linestyle='--', alpha=0.5)
+    else:
+        setup_projected_axes(ax, projection)
+
+    # 添加中国主要城市标记
+    for lat, lon in china_key_points:
+        x, y = project_points(projection, lon, lat)
+        ax.plot(x, y, 'ro', markersize=6, zorder=3)
+    return ax
+
+
+def _draw_range_layer(ax, radius_km, border_engine, classification, distance_field=None, projection=None):
+    """
+    绘制与半径相关的图层：范围边界、显示范围、国家标注、图例和标题
+
     参数:
+        ax: 底图坐标轴
         radius_km: 范围半径（公里）
-        output_dir: 输出文件目录
-        filename_prefix: 输出文件名前缀
-        show_map: 是否显示地图
-    
+        border_engine: BorderDistanceEngine实例
+        classification: classify_countries的返回值
+        distance_field: 预先计算的距离场，为None时生成测地缓冲区
+        projection: AzimuthalProjection实例，为None时按经纬度绘制
+
     返回:
-        生成的文件路径列表
+        范围内的国家列表 [(国家, 纬度, 经度), ...]
     """
-    logger.info(f"开始绘制{radius_km}公里范围地图")
+    # 设置中文字体
+    font_set = ensure_fonts()
     
-    # 创建图形
-    plt.figure(figsize=(14, 10), dpi=150)
-    ax = plt.axes()
-
-    # 计算中国边界的包围盒
-    china_min_lat = min([p[0] for p in china_key_points]) - 5
-    china_max_lat = max([p[0] for p in china_key_points]) + 5
-    china_min_lon = min([p[1] for p in china_key_points]) - 5
-    china_max_lon = max([p[1] for p in china_key_points]) + 5
-
-    # 计算从中国边界扩展指定公里的范围
-    km_per_degree = 111.0  # 简化计算：1度≈111公里
-    radius_degree = radius_km / km_per_degree
-    
-    # 根据半径动态调整地图显示范围，确保足够大
-    map_margin_degree = max(20, radius_degree * 0.3)  # 额外的边距
-    display_min_lon = china_min_lon - radius_degree - map_margin_degree
-    display_max_lon = china_max_lon + radius_degree + map_margin_degree
-    display_min_lat = china_min_lat - radius_degree - map_margin_degree
-    display_max_lat = china_max_lat + radius_degree + map_margin_degree
-    
-    # 确保经纬度在有效范围内
-    display_min_lon = max(-180, display_min_lon)
-    display_max_lon = min(180, display_max_lon)
-    display_min_lat = max(-85, display_min_lat)  # 不使用-90以避免极坐标问题
-    display_max_lat = min(85, display_max_lat)   # 不使用90以避免极坐标问题
+    # 有预先计算的距离场时，范围直接取距离场的阈值；否则生成从中国边界外扩指定公里的测地缓冲区
+    range_polygons = None
+    if distance_field is None:
+        range_polygons = build_geodesic_buffer(border_engine, radius_km)
+
+    # 根据范围动态调整地图显示范围，并留出额外的边距
+    map_margin_degree = 10
+    if projection is None:
+        if distance_field is not None:
+            range_bounds = field_range_bounds(distance_field, radius_km)
+        else:
+            range_vertices = np.vstack([ring for polygon in range_polygons for ring in polygon])
+            range_bounds = (range_vertices[:, 0].min(), range_vertices[:, 0].max(),
+                            range_vertices[:, 1].min(), range_vertices[:, 1].max())
+        display_min_lon = range_bounds[0] - map_margin_degree
+        display_max_lon = range_bounds[1] + map_margin_degree
+        display_min_lat = range_bounds[2] - map_margin_degree
+        display_max_lat = range_bounds[3] + map_margin_degree
+
+        # 确保经纬度在有效范围内
+        display_min_lon = max(-180, display_min_lon)
+        display_max_lon = min(180, display_max_lon)
+        display_min_lat = max(-85, display_min_lat)  # 不使用-90以避免极坐标问题
+        display_max_lat = min(85, display_max_lat)   # 不使用90以避免极坐标问题
+    else:
+        # 投影模式下显示范围为平面坐标（公里），边距按投影中心的比例换算，不超出投影的边界圆
+        # 范围完全在投影的可见区域之外时（例如正射投影的中心在地球背面）显示整个边界圆
+        range_bounds = projected_range_bounds(projection, radius_km, polygons=range_polygons, field=distance_field)
+        margin = projection.radius * np.radians(map_margin_degree)
+        limit = projection.max_radius
+        if range_bounds is None:
+            range_bounds = (-limit, limit, -limit, limit)
+        display_min_lon = max(-limit, range_bounds[0] - margin)
+        display_max_lon = min(limit, range_bounds[1] + margin)
+        display_min_lat = max(-limit, range_bounds[2] - margin)
+        display_max_lat = min(limit, range_bounds[3] + margin)
     
     # 设置地图范围（经纬度）
     ax.set_xlim(display_min_lon, display_max_lon)
     ax.set_ylim(display_min_lat, display_max_lat)
 
-    # 添加网格线
-    ax.grid(True, linestyle='--', alpha=0.5)
-
-    # 绘制总的范围边界（改进版：考虑地球曲率的矩形近似）
-    range_boundary = [
-        (china_min_lon - radius_degree, china_min_lat - radius_degree),
-        (china_max_lon + radius_degree, china_min_lat - radius_degree),
-        (china_max_lon + radius_degree, china_max_lat + radius_degree), 
-        (china_min_lon - radius_degree, china_max_lat + radius_degree),
-        (china_min_lon - radius_degree, china_min_lat - radius_degree)
-    ]
-
     # 绘制范围边界
-    range_x = [p[0] for p in range_boundary]
-    range_y = [p[1] for p in range_boundary]
-    ax.plot(range_x, range_y, color='orange', linewidth=1.5, linestyle='--', label=f'{radius_km}公里范围')
-
-    # 获取国家数据
-    countries = get_countries_data()
-    logger.debug(f"获取到{len(countries)}个国家数据")
+    if distance_field is not None:
+        add_range_contour(ax, distance_field, radius_km, label=f'{radius_km}公里范围', projection=projection)
+    else:
+        add_range_buffer(ax, range_polygons, label=f'{radius_km}公里范围', projection=projection)
 
-    # 计算并标注在指定公里范围内的国家
+    # 根据预先计算的距离判断各国家是否在范围内
     within_range_countries = []
     beyond_range_countries = []
-
-    for country, (lat, lon) in countries.items():
-        # 计算到中国的最短距离（到中国关键点的最小距离）
-        min_distance = min([great_circle_distance(lat, lon, c_lat, c_lon) for c_lat, c_lon in china_key_points])
-        
-        # 判断是否在范围内
+    for country, lat, lon, min_distance in zip(*classification):
         if min_distance <= radius_km:
             within_range_countries.append((country, lat, lon))
         else:
@@ -123,20 +142,20 @@ def draw_8000km_range_map(radius_km=8000, output_dir="outputs", filename_prefix=
 
     # 标注范围内的国家（绿色）
     for country, lat, lon in within_range_countries:
-        # 只在显示范围内标注
-        if display_min_lon <= lon <= display_max_lon and display_min_lat <= lat <= display_max_lat:
-            ax.plot(lon, lat, 'go', markersize=5)
-            if font_set:
+        x, y = project_points(projection, lon, lat)
+        # 只在显示范围内标注（投影中不可见的点为NaN，比较结果为False）
+        if display_min_lon <= x <= display_max_lon and display_min_lat <= y <= display_max_lat:
+            ax.plot(x, y, 'go', markersize=5)
+            if font_set and projection is None:
                 ax.text(lon + 1, lat + 0.5, country, fontsize=9)
+            elif font_set:
+                ax.annotate(country, (x, y), xytext=(4, 2), textcoords='offset points', fontsize=9)
 
     # 标注范围外的国家（蓝色，仅标注在地图范围内的）
     for country, lat, lon in beyond_range_countries:
-        if display_min_lon <= lon <= display_max_lon and display_min_lat <= lat <= display_max_lat:
-            ax.plot(lon, lat, 'bo', markersize=3, alpha=0.6)
-
-    # 添加中国主要城市标记
-    for lat, lon in china_key_points:
-        ax.plot(lon, lat, 'ro', markersize=6)
+        x, y = project_points(projection, lon, lat)
+        if display_min_lon <= x <= display_max_lon and display_min_lat <= y <= display_max_lat:
+            ax.plot(x, y, 'bo', markersize=3, alpha=0.6)
 
     # 添加图例
     china_patch = mpatches.Patch(color='red', label='中国主要城市')
@@ -145,41 +164,106 @@ def draw_8000km_range_map(radius_km=8000, output_dir="outputs", filename_prefix=
     beyond_patch = mpatches.Patch(color='blue', alpha=0.6, label='范围外国家')
 
     if font_set:
-        plt.legend(handles=[china_patch, range_patch, within_patch, beyond_patch], 
+        ax.legend(handles=[china_patch, range_patch, within_patch, beyond_patch], 
                   loc='lower right', fontsize=10)
-        plt.title(f'以中国边界为起点的{radius_km}公里范围地图', fontsize=16)
-        plt.xlabel('经度', fontsize=12)
-        plt.ylabel('纬度', fontsize=12)
+        ax.set_title(f'以中国边界为起点的{radius_km}公里范围地图' +
+                     (f'（{projection.label}投影）' if projection is not None else ''), fontsize=16)
+        if projection is None:
+            ax.set_xlabel('经度', fontsize=12)
+            ax.set_ylabel('纬度', fontsize=12)
     else:
-        plt.legend(handles=[china_patch, range_patch, within_patch, beyond_patch], 
+        ax.legend(handles=[china_patch, range_patch, within_patch, beyond_patch], 
                   loc='lower right', fontsize=10)
-        plt.title(f'{radius_km}km Range Map Starting from China Border', fontsize=16)
-        plt.xlabel('Longitude', fontsize=12)
-        plt.ylabel('Latitude', fontsize=12)
+        ax.set_title(f'{radius_km}km Range Map Starting from China Border' +
+                     (f' ({projection.name} projection)' if projection is not None else ''), fontsize=16)
+        if projection is None:
+            ax.set_xlabel('Longitude', fontsize=12)
+            ax.set_ylabel('Latitude', fontsize=12)
 
-    # 调整布局
-    plt.tight_layout()
+    return within_range_countries
 
-    # 确保输出目录存在
-    import os
-    os.makedirs(output_dir, exist_ok=True)
 
-    # 保存为SVG和PNG文件
-    svg_path = os.path.join(output_dir, f'{filename_prefix}.svg')
-    png_path = os.path.join(output_dir, f'{filename_prefix}.png')
-
-    plt.savefig(svg_path, format='svg', bbox_inches='tight')
-    plt.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
-    logger.info(f"地图已保存到: {svg_path} 和 {png_path}")
+def draw_8000km_range_map(radius_km=8000, output_dir="outputs", filename_prefix="china_8000km_range", show_map=True,
+                          distance_field_path=None, formats=None, projection=None):
+    """
+    绘制以中国边界为起点的指定公里范围地图
+    
+    参数:
+        radius_km: 范围半径（公里）
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        show_map: 是否显示地图
+        distance_field_path: 预先计算的距离场文件路径，存在且未过期时用它绘制范围
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
+        projection: 投影（如 "aeqd" 或 "aeqd:104,36"，见parse_projection），默认为None（按经纬度绘制）
+    
+    返回:
+        生成的文件路径列表
+    """
+    logger.info(f"开始绘制{radius_km}公里范围地图")
+    projection = parse_projection(projection)
+    
+    # 构建中国边界距离引擎，并一次批量计算所有国家到中国边界的最短距离
+    border_engine = BorderDistanceEngine(load_china_map_data())
+    classification = classify_countries(border_engine)
 
-    if show_map:
-        plt.show()
-    else:
-        plt.close()
+    # 不显示地图时底图缓存在渲染上下文中，只增删叠加层
+    distance_field = load_range_field(distance_field_path)
+    files, within_range_countries = render_map(
+        ('range', projection and projection.key), (14, 10), 150,
+        lambda fig: _create_base_axes(fig, projection),
+        lambda ax: _draw_range_layer(ax, radius_km, border_engine, classification, distance_field, projection),
+        output_dir=output_dir, filename_prefix=filename_prefix, formats=formats, show_map=show_map
+    )
+    logger.info(f"地图已保存到: {', '.join(files)}")
 
     # 输出范围内的国家列表（使用日志而不是print）
     logger.info(f"以中国边界为起点{radius_km}公里范围内的主要国家和地区：")
     for i, (country, _, _) in enumerate(within_range_countries, 1):
         logger.info(f"{i}. {country}")
 
-    return [svg_path, png_path]
\ No newline at end of file
+    return files
+
+
+def draw_range_sweep(radii, output_dir="outputs", filename_prefix="china_range", distance_field_path=None,
+                     formats=None, projection=None):
+    """
+    在一次运行中绘制多个半径的范围地图
+
+    国家距离只计算一次，底图只绘制一次，每个半径只替换范围叠加层；
+    每个半径输出一组文件（文件名带半径后缀），并写出一张距离区间汇总表
+
+    参数:
+        radii: 升序排列的半径列表（公里），可由parse_radii解析得到
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        distance_field_path: 预先计算的距离场文件路径，存在且未过期时用它绘制范围
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
+        projection: 投影（见parse_projection），默认为None（按经纬度绘制）
+
+    返回:
+        生成的文件路径列表（最后一项为汇总表）
+    """
+    logger.info(f"开始绘制{len(radii)}个半径的范围地图: {', '.join(str(r) for r in radii)}公里")
+    projection = parse_projection(projection)
+
+    border_engine = BorderDistanceEngine(load_china_map_data())
+    classification = classify_countries(border_engine)
+    distance_field = load_range_field(distance_field_path)
+
+    # 底图缓存在渲染上下文中，每个半径只增删叠加层
+    files = []
+    for radius_km in radii:
+        radius_files, _ = render_map(
+            ('range', projection and projection.key), (14, 10), 150,
+            lambda fig: _create_base_axes(fig, projection),
+            lambda ax: _draw_range_layer(ax, radius_km, border_engine, classification, distance_field, projection),
+            output_dir=output_dir, filename_prefix=f'{filename_prefix}_{radius_km}km', formats=formats
+        )
+        files.extend(radius_files)
+
+    names, _, _, distances = classification
+    summary_path = os.path.join(output_dir, f'{filename_prefix}_summary.csv')
+    write_band_summary(summary_path, radii, names, distances)
+    files.append(summary_path)
+    return files
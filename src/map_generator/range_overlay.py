@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+范围叠加层模块，负责把测地缓冲区多边形或距离场等值线绘制到地图上
+
+指定投影（见src.utils.projection）时，多边形和距离场格点先投影到平面坐标再绘制；
+缓冲区在180度经线和极点处的拆分线只用于闭合填充区域，不画出边界线。
+"""
+
+import numpy as np
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+
+from src.data_handler.json_loader import get_local_json_path
+from src.map_generator.geometry_paths import compound_paths, rings_to_path
+from src.utils.distance_field import load_distance_field
+
+
+def buffer_polygons_to_path(polygons, projection=None):
+    """
+    将缓冲区多边形（MultiPolygon坐标结构）转换为一个复合Path
+
+    参数:
+        polygons: build_geodesic_buffer返回的多边形列表
+        projection: AzimuthalProjection实例，为None时使用经纬度坐标
+
+    返回:
+        matplotlib.path.Path，外环逆时针、洞顺时针，填充时洞保持镂空
+    """
+    if projection is None:
+        return rings_to_path(polygons)
+    rings, holes = _buffer_rings(polygons)
+    projected, kept, projected_holes = projection.project_rings(rings, holes)
+    return compound_paths(projected, projected_holes, np.zeros(len(kept), dtype=np.int64), 1)[0]
+
+
+def _buffer_rings(polygons):
+    """
+    把多边形列表展开为 (环列表, 是否为洞)
+    """
+    rings, holes = [], []
+    for polygon in polygons:
+        for ring_index, ring in enumerate(polygon):
+            ring = np.asarray(ring, dtype=np.float64)
+            if len(ring):
+                rings.append(ring[:, :2])
+                holes.append(ring_index > 0)
+    return rings, holes
+
+
+def buffer_outline_path(polygons, projection):
+    """
+    投影后的缓冲区边界线：沿180度经线或极点的拆分边不画出，其余边投影为折线，在地平线外断开
+
+    参数:
+        polygons: build_geodesic_buffer返回的多边形列表
+        projection: AzimuthalProjection实例
+
+    返回:
+        matplotlib.path.Path（只有MOVETO和LINETO，不闭合）
+    """
+    pieces = []
+    for ring in _buffer_rings(polygons)[0]:
+        if len(ring) > 1 and np.any(ring[0] != ring[-1]):
+            ring = np.vstack((ring, ring[:1]))
+        # 两端都在180度经线上，或都在极点纬度上的边是拆分时补上的
+        frame_lon = np.abs(ring[:, 0]) >= 180.0
+        frame_lat = np.abs(ring[:, 1]) >= 90.0
+        seam = (frame_lon[:-1] & frame_lon[1:]) | (frame_lat[:-1] & frame_lat[1:])
+        breaks = np.flatnonzero(seam) + 1
+        pieces.extend(piece for piece in np.split(ring, breaks) if len(piece) > 1)
+    projected, _, _ = projection.project_rings(pieces, closed=False)
+    projected = [line for line in projected if len(line) > 1]
+    if not projected:
+        return Path(np.empty((0, 2)))
+    vertices = np.concatenate(projected)
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    codes[np.cumsum([0] + [len(line) for line in projected[:-1]])] = Path.MOVETO
+    return Path(vertices, codes)
+
+
+def add_range_buffer(ax, polygons, label=None, edgecolor='orange', facecolor='orange',
+                     fill_alpha=0.08, linewidth=1.5, linestyle='--', projection=None):
+    """
+    在坐标轴上绘制测地缓冲区：半透明填充加虚线边界
+
+    参数:
+        ax: matplotlib坐标轴
+        polygons: build_geodesic_buffer返回的多边形列表
+        label: 图例标签
+        edgecolor, facecolor: 边界和填充颜色
+        fill_alpha: 填充透明度
+        linewidth, linestyle: 边界线宽和线型
+        projection: AzimuthalProjection实例，为None时按经纬度绘制
+
+    返回:
+        添加的 (填充补丁, 边界补丁)
+    """
+    path = buffer_polygons_to_path(polygons, projection)
+    outline_path = path if projection is None else buffer_outline_path(polygons, projection)
+    fill = PathPatch(path, facecolor=facecolor, edgecolor='none', alpha=fill_alpha)
+    outline = PathPatch(outline_path, facecolor='none', edgecolor=edgecolor, linewidth=linewidth,
+                        linestyle=linestyle, label=label)
+    ax.add_patch(fill)
+    ax.add_patch(outline)
+    return fill, outline
+
+
+def add_range_contour(ax, field, radius_km, label=None, color='orange', fill_alpha=0.08,
+                      linewidth=1.5, linestyle='--', max_cells=1000000, projection=None):
+    """
+    用预先计算的距离场绘制范围：对距离场做阈值填充并画出radius_km等值线，不做任何几何计算
+
+    参数:
+        ax: matplotlib坐标轴
+        field: DistanceField实例
+        radius_km: 范围半径（公里）
+        label: 图例标签
+        color: 边界和填充颜色
+        fill_alpha: 填充透明度
+        linewidth, linestyle: 等值线线宽和线型
+        max_cells: 参与绘图的最大格点数，超过时对距离场抽稀
+        projection: AzimuthalProjection实例，为None时按经纬度绘制
+
+    返回:
+        (填充, 等值线)
+    """
+    step = max(1, int(np.ceil(np.sqrt(field.data.size / max_cells))))
+    lats, lons, data = field.decimated(step)
+    if projection is not None:
+        lons, lats, data = _project_field_grid(lons, lats, data, projection, field.resolution * step)
+    fill = ax.contourf(lons, lats, data, levels=[-1.0, radius_km], colors=[color], alpha=fill_alpha)
+    outline = ax.contour(lons, lats, data, levels=[radius_km], colors=[color],
+                         linewidths=linewidth, linestyles=linestyle)
+    if label:
+        # 等值线不参与自动图例，用一条空线作为图例代理
+        ax.plot([], [], color=color, linewidth=linewidth, linestyle=linestyle, label=label)
+    return fill, outline
+
+
+def _project_field_grid(lons, lats, data, projection, spacing):
+    """
+    把距离场格点投影为曲线网格 (x, y, 掩膜后的距离)
+
+    不可见的格点收到边界圆上并被掩膜；方位投影在原点的对跖点处不连续，
+    对跖点附近一个格距内的格点也被掩膜，不参与填充
+    """
+    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    x, y = projection.forward(lon_grid, lat_grid, clamp=True)
+    hidden = ~projection.visible(lon_grid, lat_grid)
+    antipode_lon = (projection.lon0 + 360.0) % 360.0 - 180.0
+    near_antipode = (np.abs((lon_grid - antipode_lon + 180.0) % 360.0 - 180.0) <= 2 * spacing) & \
+        (np.abs(lat_grid + projection.lat0) <= 2 * spacing)
+    return x, y, np.ma.masked_array(data, hidden | near_antipode)
+
+
+def field_range_bounds(field, radius_km):
+    """
+    计算距离场中距离不超过radius_km的格点的经纬度范围
+
+    返回:
+        (最小经度, 最大经度, 最小纬度, 最大纬度)，没有格点在范围内时返回None
+    """
+    mask = field.within(radius_km)
+    rows = np.flatnonzero(np.any(mask, axis=1))
+    cols = np.flatnonzero(np.any(mask, axis=0))
+    if rows.size == 0:
+        return None
+    half = field.resolution / 2
+    return (field.lons[cols[0]] - half, field.lons[cols[-1]] + half,
+            field.lats[rows[-1]] - half, field.lats[rows[0]] + half)
+
+
+def projected_range_bounds(projection, radius_km, polygons=None, field=None):
+    """
+    计算范围在投影平面上的边界框
+
+    参数:
+        projection: AzimuthalProjection实例
+        radius_km: 范围半径（公里）
+        polygons: build_geodesic_buffer返回的多边形列表
+        field: DistanceField实例（未给出polygons时使用）
+
+    返回:
+        (最小x, 最大x, 最小y, 最大y)（公里），没有可见的范围时返回None
+    """
+    if polygons is not None:
+        rings, _ = _buffer_rings(polygons)
+        projected, _, _ = projection.project_rings(rings)
+        points = np.concatenate(projected) if projected else np.empty((0, 2))
+    else:
+        # 边界框只用于确定显示范围，抽稀后的格点已足够
+        step = max(1, int(np.ceil(np.sqrt(field.data.size / 250000))))
+        lats, lons, data = field.decimated(step)
+        rows, cols = np.nonzero(np.asarray(data) <= radius_km)
+        points = np.column_stack(projection.forward(lons[cols], lats[rows]))
+        points = points[~np.isnan(points[:, 0])]
+    if len(points) == 0:
+        return None
+    return (points[:, 0].min(), points[:, 0].max(), points[:, 1].min(), points[:, 1].max())
+
+
+def load_range_field(distance_field_path):
+    """
+    加载预先计算的距离场，未指定路径、文件不存在或已随中国地图数据过期时返回None
+    """
+    if not distance_field_path:
+        return None
+    return load_distance_field(distance_field_path, source_path=get_local_json_path())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多半径扫描模块
+
+一次进程内绘制多个半径：国家到中国边界的距离只计算一次，底图只绘制一次，
+每个半径只增删范围叠加层，最后写出一张国家所在距离区间的汇总表。
+"""
+
+import csv
+import logging
+import math
+import os
+
+import numpy as np
+
+from src.data_handler.country_data import get_countries_data
+
+logger = logging.getLogger(__name__)
+
+
+def parse_radii(spec):
+    """
+    解析半径参数
+
+    支持单个数值（8000）、逗号分隔的列表（2000,4000,6000,8000）
+    以及 起点:终点:步长 形式的区间（2000:8000:2000，包含终点）
+
+    参数:
+        spec: 半径参数，字符串或数值
+
+    返回:
+        去重并升序排列的半径列表（公里）
+
+    异常:
+        ValueError: 参数格式不正确或半径不为有限的正数
+    """
+    if isinstance(spec, (int, float)):
+        radii = [spec]
+    else:
+        radii = []
+        for part in str(spec).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if ':' in part:
+                fields = part.split(':')
+                if len(fields) != 3:
+                    raise ValueError(f"半径区间格式应为 起点:终点:步长，实际为: {part}")
+                start, stop, step = (float(field) for field in fields)
+                if not all(math.isfinite(value) for value in (start, stop, step)):
+                    raise ValueError(f"半径区间必须为有限数值: {part}")
+                if step <= 0:
+                    raise ValueError(f"半径区间的步长必须为正数: {part}")
+                radii.extend(np.arange(start, stop + step / 2, step).tolist())
+            else:
+                radii.append(float(part))
+
+    if not radii:
+        raise ValueError(f"未指定半径: {spec!r}")
+    if not all(math.isfinite(r) for r in radii):
+        raise ValueError(f"半径必须为有限数值: {spec!r}")
+    radii = sorted(set(int(r) if float(r).is_integer() else float(r) for r in radii))
+    if radii[0] <= 0:
+        raise ValueError(f"半径必须为正数: {spec!r}")
+    return radii
+
+
+def classify_countries(engine):
+    """
+    一次批量计算所有国家到中国边界的最短距离（中国境内的点距离为0）
+
+    参数:
+        engine: BorderDistanceEngine实例
+
+    返回:
+        (国家名称列表, 纬度数组, 经度数组, 距离数组)
+    """
+    countries = get_countries_data()
+    names = list(countries.keys())
+    lats = np.array([countries[name][0] for name in names], dtype=np.float64)
+    lons = np.array([countries[name][1] for name in names], dtype=np.float64)
+    return names, lats, lons, engine.distance_to_region(lats, lons)
+
+
+def band_labels(radii):
+    """
+    生成各距离区间的名称，最后一项为超出最大半径的区间
+    """
+    labels = []
+    lower = 0
+    for radius in radii:
+        labels.append(f'{lower}-{radius}公里')
+        lower = radius
+    labels.append(f'>{radii[-1]}公里')
+    return labels
+
+
+def write_band_summary(path, radii, names, distances):
+    """
+    写出国家所在距离区间的汇总表（CSV）
+
+    每行一个国家，按距离升序排列，列出距离、所在区间以及是否在每个半径范围内
+
+    参数:
+        path: 输出文件路径
+        radii: 升序排列的半径列表
+        names: 国家名称列表
+        distances: 各国家到中国边界的距离数组（公里）
+
+    返回:
+        {区间名称: 国家名称列表}
+    """
+    labels = band_labels(radii)
+    band_index = np.searchsorted(np.asarray(radii, dtype=np.float64), distances, side='left')
+    bands = {label: [] for label in labels}
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # 使用带BOM的UTF-8，方便在Excel中直接打开
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['国家', '距离(公里)', '所在区间'] + [f'{radius}公里内' for radius in radii])
+        for i in np.argsort(distances, kind='stable'):
+            label = labels[band_index[i]]
+            bands[label].append(names[i])
+            writer.writerow([names[i], f'{distances[i]:.1f}', label]
+                            + ['是' if distances[i] <= radius else '否' for radius in radii])
+
+    for label, members in bands.items():
+        logger.info(f"{label}: {len(members)}个国家和地区")
+    logger.info(f"距离区间汇总表已保存到: {path}")
+    return bands
+
+
+def snapshot_artists(ax):
+    """
+    记录坐标轴上当前已有的图形元素，用于之后移除每个半径的叠加层
+    """
+    return set(ax.get_children())
+
+
+def remove_artists_since(ax, snapshot):
+    """
+    移除snapshot之后添加到坐标轴上的图形元素（标题和坐标轴本身的固定元素除外）
+    """
+    for artist in ax.get_children():
+        if artist not in snapshot:
+            artist.remove()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无界面渲染上下文模块
+
+不显示地图时，图形直接用面向对象的Figure和FigureCanvasAgg创建，不经过pyplot的图形管理器，
+也不需要任何GUI后端；图形不再被引用时即被回收，同一进程中生成大量地图不会累积未关闭的图形。
+
+渲染上下文缓存静态的底图（图形、坐标轴、网格和底图图层），
+每次渲染只添加叠加层、保存文件，再移除叠加层，底图在多次渲染之间复用。
+上下文同时记录每次渲染后的进程内存，用于确认连续渲染时内存保持平稳。
+"""
+
+import logging
+import os
+from collections import OrderedDict
+
+from src.map_generator.figure_output import save_figure
+from src.map_generator.range_sweep import snapshot_artists, remove_artists_since
+
+logger = logging.getLogger(__name__)
+
+# 默认最多缓存的底图数量
+DEFAULT_MAX_BASES = 4
+
+
+def create_figure(figsize, dpi=100, interactive=False):
+    """
+    创建图形
+
+    参数:
+        figsize: 图形尺寸（英寸）
+        dpi: 图形分辨率
+        interactive: 为True时通过pyplot创建（可以调用show_figure显示），
+                     否则创建不经过pyplot的Agg图形
+
+    返回:
+        matplotlib.figure.Figure
+    """
+    if interactive:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize, dpi=dpi)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def show_figure(fig):
+    """
+    显示通过pyplot创建的图形，窗口关闭后释放图形
+    """
+    import matplotlib.pyplot as plt
+    plt.show()
+    plt.close(fig)
+
+
+def current_rss_kb():
+    """
+    返回当前进程的常驻内存（KB），无法获取时返回None
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # 非Linux平台只能取得峰值内存（macOS单位为字节）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if os.uname().sysname == 'Darwin' else peak
+    except (ImportError, AttributeError):
+        return None
+
+
+class RenderContext:
+    """
+    无界面渲染上下文，缓存底图并在多次渲染之间复用
+
+    底图按调用方给出的键缓存（LRU），inputs中的数据对象（如数据集注册表返回的只读数据集）
+    与缓存时不是同一个对象时重新绘制底图。
+    """
+
+    def __init__(self, max_bases=DEFAULT_MAX_BASES):
+        """
+        参数:
+            max_bases: 最多缓存的底图数量
+        """
+        self.max_bases = max_bases
+        self._bases = OrderedDict()
+        self.renders = 0
+        self.base_builds = 0
+        self.baseline_rss_kb = None
+        self.last_rss_kb = None
+        self.peak_rss_kb = None
+
+    def _base(self, key, figsize, dpi, build_base, inputs):
+        """
+        返回缓存的底图 (图形, 坐标轴, 底图元素快照)，不存在或输入已变化时重新绘制
+        """
+        entry = self._bases.get(key)
+        if entry is not None and len(entry[3]) == len(inputs) and \
+                all(cached is current for cached, current in zip(entry[3], inputs)):
+            self._bases.move_to_end(key)
+            return entry[:3]
+
+        fig = create_figure(figsize, dpi)
+        ax = build_base(fig)
+        entry = (fig, ax, snapshot_artists(ax), tuple(inputs))
+        self._bases[key] = entry
+        self._bases.move_to_end(key)
+        self.base_builds += 1
+        while len(self._bases) > max(self.max_bases, 1):
+            self._bases.popitem(last=False)
+        logger.debug(f"底图已绘制并缓存: {key}")
+        return entry[:3]
+
+    def render(self, key, figsize, dpi, build_base, draw_overlay=None, output_dir="outputs",
+               filename_prefix="map", formats=None, inputs=(), output_dpi=300):
+        """
+        在缓存的底图上绘制叠加层并保存，保存后移除叠加层
+
+        参数:
+            key: 底图缓存键
+            figsize: 图形尺寸（英寸）
+            dpi: 图形分辨率
+            build_base: 绘制底图的函数 build_base(图形)，返回坐标轴
+            draw_overlay: 绘制叠加层的函数 draw_overlay(坐标轴)，为None时只保存底图
+            output_dir: 输出文件目录
+            filename_prefix: 输出文件名前缀
+            formats: 输出格式，见figure_output.parse_formats
+            inputs: 底图依赖的数据对象，对象变化时重新绘制底图
+            output_dpi: 栅格格式的输出分辨率
+
+        返回:
+            (生成的文件路径列表, draw_overlay的返回值)
+        """
+        fig, ax, snapshot = self._base(key, figsize, dpi, build_base, inputs)
+        try:
+            result = draw_overlay(ax) if draw_overlay is not None else None
+            fig.tight_layout()
+            files = save_figure(fig, output_dir, filename_prefix, formats=formats, dpi=output_dpi)
+        finally:
+            remove_artists_since(ax, snapshot)
+        self._record_memory()
+        return files, result
+
+    def _record_memory(self):
+        """
+        记录本次渲染后的进程内存
+        """
+        self.renders += 1
+        rss = current_rss_kb()
+        if rss is None:
+            return
+        if self.baseline_rss_kb is None:
+            self.baseline_rss_kb = rss
+        self.last_rss_kb = rss
+        self.peak_rss_kb = max(self.peak_rss_kb or 0, rss)
+        logger.debug(f"第{self.renders}次渲染后内存 {rss} KB（比第一次渲染后增加 {rss - self.baseline_rss_kb} KB）")
+
+    def stats(self):
+        """
+        返回渲染统计 {"renders", "base_builds", "bases", "baseline_rss_kb", "last_rss_kb", "peak_rss_kb", "rss_growth_kb"}
+
+        rss_growth_kb为最近一次渲染后相对第一次渲染后的内存增长
+        """
+        growth = None
+        if self.baseline_rss_kb is not None:
+            growth = self.last_rss_kb - self.baseline_rss_kb
+        return {"renders": self.renders, "base_builds": self.base_builds, "bases": len(self._bases),
+                "baseline_rss_kb": self.baseline_rss_kb, "last_rss_kb": self.last_rss_kb,
+                "peak_rss_kb": self.peak_rss_kb, "rss_growth_kb": growth}
+
+    def clear(self):
+        """
+        释放所有缓存的底图
+        """
+        self._bases.clear()
+
+
+# 进程内共享的渲染上下文
+render_context = RenderContext()
+
+
+def render_map(key, figsize, dpi, build_base, draw_overlay=None, output_dir="outputs", filename_prefix="map",
+               formats=None, inputs=(), show_map=False, context=None):
+    """
+    渲染一张地图
+
+    show_map为True时通过pyplot创建图形，保存后显示；否则在无界面的渲染上下文中渲染，复用缓存的底图
+
+    参数:
+        show_map: 是否显示地图
+        context: 渲染上下文，默认为进程内共享的上下文
+        其余参数同RenderContext.render
+
+    返回:
+        (生成的文件路径列表, draw_overlay的返回值)
+    """
+    if not show_map:
+        return (context or render_context).render(key, figsize, dpi, build_base, draw_overlay, output_dir,
+                                                   filename_prefix, formats=formats, inputs=inputs)
+    fig = create_figure(figsize, dpi, interactive=True)
+    ax = build_base(fig)
+    result = draw_overlay(ax) if draw_overlay is not None else None
+    fig.tight_layout()
+    files = save_figure(fig, output_dir, filename_prefix, formats=formats)
+    show_figure(fig)
+    return files, result
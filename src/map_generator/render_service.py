@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地渲染服务模块
+
+长期运行的本地HTTP服务：启动时导入渲染器、配置字体、加载数据集，之后的请求复用进程内的
+数据集注册表、字体配置和渲染上下文中缓存的底图，不再为每张地图启动一次main.py。
+
+- GET /render/<命令>?radius=5000&format=png 渲染一张地图并返回文件内容
+  （命令为china、range、world、world-range；radius和projection只用于range和world-range）
+- GET /metrics 返回请求数、缓存命中情况和延迟分位数（JSON）
+
+参数相同的请求正在渲染时，后到的请求等待同一次渲染的结果，不重复渲染；
+渲染结果按 参数+数据集哈希 缓存在按字节数限制容量的LRU中，数据文件变化后自然失效。
+matplotlib不是线程安全的，渲染串行执行，缓存命中的请求不等待正在进行的渲染。
+"""
+
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from src.map_generator.batch import BATCH_COMMANDS, dispatch_job, warm_up
+
+logger = logging.getLogger(__name__)
+
+# 默认监听地址和端口
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 默认的渲染结果缓存容量（MB）
+DEFAULT_CACHE_MB = 256
+
+# 每类请求保留的最近延迟样本数
+LATENCY_WINDOW = 1024
+
+# 报告的延迟分位数
+LATENCY_PERCENTILES = (50, 90, 99)
+
+# 使用半径参数的命令
+_RADIUS_COMMANDS = ('range', 'world-range')
+
+
+class RenderCache:
+    """
+    渲染结果的LRU缓存，按缓存内容的总字节数限制容量
+    """
+
+    def __init__(self, max_bytes):
+        """
+        参数:
+            max_bytes: 最多缓存的字节数，超过容量时淘汰最久未使用的结果
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        返回缓存的结果，不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        """
+        缓存结果 (文件内容, Content-Type, Content-Encoding)，单个结果超过容量时不缓存
+        """
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous[0])
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted[0])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RenderService:
+    """
+    渲染请求的处理逻辑：缓存查找、合并相同的进行中请求、串行渲染和延迟统计
+    """
+
+    def __init__(self, cache_bytes=DEFAULT_CACHE_MB * 1024 * 1024, world_data_path=None, distance_field_path=None):
+        """
+        参数:
+            cache_bytes: 渲染结果缓存的容量（字节）
+            world_data_path: 世界地图数据文件路径，默认为配置的本地路径
+            distance_field_path: 预先计算的距离场文件路径，存在且未过期时用它绘制范围
+        """
+        from src.utils.config_loader import get_config_loader
+
+        self.cache = RenderCache(cache_bytes)
+        self.world_data_path = world_data_path or \
+            get_config_loader().get('world', {}).get('local_path', 'data/world.json')
+        self.distance_field_path = distance_field_path
+        self._in_flight = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._latencies = {outcome: deque(maxlen=LATENCY_WINDOW) for outcome in ('hit', 'coalesced', 'render')}
+        self.counters = {"requests": 0, "hits": 0, "coalesced": 0, "renders": 0, "errors": 0}
+        self.started = time.time()
+
+    def warm_up(self):
+        """
+        预先加载渲染器、字体和数据集
+        """
+        warm_up([self.world_data_path] if os.path.exists(self.world_data_path) else [])
+
+    def parse_request(self, command, query):
+        """
+        规范化请求参数
+
+        参数:
+            command: 命令名
+            query: 查询参数字典（parse_qs的结果）
+
+        返回:
+            (命令, 半径或None, 投影或None（规范化的 名称:经度,纬度）, 格式)
+
+        异常:
+            ValueError: 命令、半径、投影或格式不正确
+        """
+        from src.map_generator.figure_output import parse_formats
+        from src.map_generator.range_sweep import parse_radii
+        from src.utils.projection import parse_projection
+
+        if command not in BATCH_COMMANDS:
+            raise ValueError(f"不支持的命令: {command}（支持: {', '.join(BATCH_COMMANDS)}）")
+        formats = parse_formats(query.get('format', ['png'])[-1])
+        if len(formats) != 1:
+            raise ValueError("每个请求只能指定一种输出格式")
+        radius = projection = None
+        if command in _RADIUS_COMMANDS:
+            radii = parse_radii(query.get('radius', ['8000'])[-1])
+            if len(radii) != 1:
+                raise ValueError("每个请求只能指定一个半径")
+            radius = radii[0]
+            parsed = parse_projection(query.get('projection', [None])[-1])
+            if parsed is not None:
+                projection = f'{parsed.name}:{parsed.lon0:g},{parsed.lat0:g}'
+        return command, radius, projection, formats[0]
+
+    def dataset_hash(self, command):
+        """
+        返回命令所用数据集的内容哈希，数据文件变化（修改时间或大小）后重新计算
+        """
+        from src.data_handler.json_loader import get_local_json_path
+
+        sources = [('china', get_local_json_path())]
+        if command in ('world', 'world-range'):
+            sources.append(('world', self.world_data_path))
+        return ':'.join(self._file_fingerprint(kind, path) for kind, path in sources)
+
+    def _file_fingerprint(self, kind, path):
+        """
+        返回数据文件的内容哈希，按文件签名缓存；文件不存在时（使用下载或内置数据）返回'missing'
+        """
+        from src.data_handler.json_loader import load_china_map_data
+        from src.data_handler.world_json_loader import load_world_map_data
+        from src.map_generator.basemap_cache import dataset_fingerprint
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 'missing'
+        signature = (kind, path, stat.st_mtime_ns, stat.st_size)
+        fingerprint = self._fingerprints.get(signature)
+        if fingerprint is None:
+            # 加载数据集与渲染使用同一个进程内注册表，和渲染一样串行执行
+            with self._render_lock:
+                data = load_china_map_data(path) if kind == 'china' else load_world_map_data(data_path=path)
+                fingerprint = dataset_fingerprint(data)
+            if len(self._fingerprints) >= 16:
+                self._fingerprints.clear()
+            self._fingerprints[signature] = fingerprint
+        return fingerprint
+
+    def render(self, command, query):
+        """
+        处理一个渲染请求
+
+        参数:
+            command: 命令名
+            query: 查询参数字典（parse_qs的结果）
+
+        返回:
+            (文件内容, Content-Type, Content-Encoding（没有时为None）, 来源 'hit'、'coalesced'或'render')
+
+        异常:
+            ValueError: 请求参数不正确
+            Exception: 渲染失败（合并的请求收到同一个异常）
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.counters["requests"] += 1
+        try:
+            request = self.parse_request(command, query)
+            key = request + (self.dataset_hash(command),)
+            entry = self.cache.get(key)
+            outcome = 'hit'
+            if entry is None:
+                with self._lock:
+                    future = self._in_flight.get(key)
+                    # 查缓存之后、加锁之前刚完成的渲染已经写入缓存
+                    entry = self.cache.get(key) if future is None else None
+                    leader = future is None and entry is None
+                    if leader:
+                        future = self._in_flight[key] = Future()
+                if leader:
+                    outcome = 'render'
+                    try:
+                        entry = self._render(*request)
+                        self.cache.put(key, entry)
+                        future.set_result(entry)
+                    except BaseException as e:
+                        future.set_exception(e)
+                        raise
+                    finally:
+                        with self._lock:
+                            del self._in_flight[key]
+                elif future is not None:
+                    outcome = 'coalesced'
+                    entry = future.result()
+        except Exception:
+            with self._lock:
+                self.counters["errors"] += 1
+            raise
+        with self._lock:
+            self.counters[{'hit': 'hits', 'coalesced': 'coalesced', 'render': 'renders'}[outcome]] += 1
+            self._latencies[outcome].append(time.perf_counter() - start)
+        return entry + (outcome,)
+
+    def _render(self, command, radius, projection, fmt):
+        """
+        渲染一张地图，返回 (文件内容, Content-Type, Content-Encoding)
+
+        svgz的内容类型为image/svg+xml、编码为gzip，客户端按Content-Encoding解压后得到SVG
+        """
+        with self._render_lock, tempfile.TemporaryDirectory() as output_dir:
+            args = {"output_dir": output_dir, "filename": "map", "formats": fmt, "radius": radius,
+                    "data_path": self.world_data_path if command in ('world', 'world-range') else None,
+                    "distance_field_path": self.distance_field_path, "projection": projection}
+            start = time.perf_counter()
+            path, = dispatch_job(command, args)
+            with open(path, 'rb') as f:
+                content = f.read()
+        logger.info(f"已渲染 {command} radius={radius} projection={projection} {fmt}（{(time.perf_counter() - start) * 1000:.0f} ms，"
+                    f"{len(content)} 字节）")
+        content_type, content_encoding = mimetypes.guess_type(path)
+        return content, content_type or 'application/octet-stream', content_encoding
+
+    def metrics(self):
+        """
+        返回服务统计：请求计数、缓存状态、各类请求的延迟分位数（毫秒）和渲染上下文统计
+        """
+        from src.map_generator.render_context import render_context
+
+        with self._lock:
+            counters = dict(self.counters)
+            samples = {outcome: list(values) for outcome, values in self._latencies.items()}
+            in_flight = len(self._in_flight)
+        samples['all'] = [value for values in samples.values() for value in values]
+        latency = {}
+        for outcome, values in samples.items():
+            summary = {"count": len(values)}
+            if values:
+                milliseconds = np.asarray(values) * 1000
+                for q, value in zip(LATENCY_PERCENTILES, np.percentile(milliseconds, LATENCY_PERCENTILES)):
+                    summary[f"p{q}"] = round(float(value), 2)
+                summary["max"] = round(float(milliseconds.max()), 2)
+            latency[outcome] = summary
+        return {
+            **counters,
+            "in_flight": in_flight,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "cache": {"entries": len(self.cache), "bytes": self.cache.bytes, "max_bytes": self.cache.max_bytes},
+            "latency_ms": latency,
+            "render_context": render_context.stats(),
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP请求处理：把/render和/metrics请求转给RenderService
+    """
+
+    server_version = 'china-8k-render'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        service = self.server.service
+        if parts == ['metrics']:
+            self._send(200, json.dumps(service.metrics(), ensure_ascii=False).encode('utf-8'), 'application/json')
+        elif len(parts) == 2 and parts[0] == 'render':
+            try:
+                content, content_type, content_encoding, outcome = service.render(parts[1], parse_qs(url.query))
+            except ValueError as e:
+                self._send_error(400, str(e))
+            except Exception as e:
+                logger.exception(f"渲染失败: {self.path}")
+                self._send_error(500, f"{type(e).__name__}: {e}")
+            else:
+                headers = {'X-Render-Cache': outcome}
+                if content_encoding:
+                    headers['Content-Encoding'] = content_encoding
+                self._send(200, content, content_type, headers)
+        else:
+            self._send_error(404, f"未知路径: {url.path}（可用: /render/<命令>, /metrics）")
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_mb=DEFAULT_CACHE_MB, world_data_path=None,
+                  distance_field_path=None):
+    """
+    创建渲染服务（不启动）
+
+    参数:
+        host: 监听地址
+        port: 监听端口，为0时由系统分配
+        cache_mb: 渲染结果缓存的容量（MB）
+        world_data_path: 世界地图数据文件路径，默认为配置的本地路径
+        distance_field_path: 预先计算的距离场文件路径
+
+    返回:
+        ThreadingHTTPServer，service属性为RenderService
+    """
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.service = RenderService(int(cache_mb * 1024 * 1024), world_data_path=world_data_path,
+                                   distance_field_path=distance_field_path)
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_mb=DEFAULT_CACHE_MB, world_data_path=None,
+          distance_field_path=None):
+    """
+    预热后启动渲染服务，直到进程被中断
+
+    参数同create_server
+    """
+    server = create_server(host, port, cache_mb, world_data_path, distance_field_path)
+    server.service.warm_up()
+    logger.info(f"渲染服务已启动: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+XYZ瓦片金字塔模块
+
+把世界、中国和范围图层渲染为Web墨卡托投影的XYZ瓦片金字塔（如z0–z7），供网页地图查看器使用，
+代替单张7500x3000的大图。
+
+- 每个缩放级别按像素大小选择LOD简化级别，几何投影到Web墨卡托后为所有环建立
+  瓦片到环的CSR空间索引，每个瓦片只裁剪与它相交的环
+- 瓦片由进程池并行渲染，每个工作进程在内存中持有数据集和一张可复用的瓦片图形
+- 没有任何几何的瓦片（海洋）不渲染、不写出
+- 每个瓦片记录裁剪后几何和样式的哈希，重新运行时只渲染内容变化的瓦片，并删除不再有内容的瓦片
+- 输出为MBTiles（SQLite）文件，或 {z}/{x}/{y}.png 目录
+"""
+
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from src.map_generator.geometry_paths import CHINA_NAMES, compound_paths, geometry_polygons
+from src.utils.geometry_lod import DEFAULT_LOD_TOLERANCES, DEFAULT_PIXEL_TOLERANCE, get_lod_geometry
+
+logger = logging.getLogger(__name__)
+
+# 瓦片像素尺寸
+TILE_SIZE = 256
+
+# 默认缩放级别范围
+DEFAULT_MIN_ZOOM = 0
+DEFAULT_MAX_ZOOM = 7
+
+# Web墨卡托的纬度上限和投影平面的半宽（米）
+MAX_LATITUDE = 85.0511287798066
+WEB_MERCATOR_HALF = 20037508.342789244
+
+# 可用的图层，按绘制顺序排列
+TILE_LAYERS = ('world', 'china', 'range')
+
+# 瓦片样式版本，图层的颜色、线宽等样式变化时修改，使已有瓦片全部重新渲染
+STYLE_VERSION = 1
+
+# 每个进程池任务渲染的瓦片数
+DEFAULT_TILES_PER_TASK = 32
+
+# 裁剪范围比瓦片向外扩展的像素数，裁剪产生的边界线落在瓦片之外
+_CLIP_MARGIN_PIXELS = 4
+
+# 图层样式（每项对应一个PathCollection）；world图层的填充色按国家循环使用tab20
+_LAYER_STYLES = {
+    'world': [{'edgecolors': 'k', 'linewidths': 0.5, 'alpha': 0.7}],
+    'china': [{'facecolors': [(0.85, 0.16, 0.16, 0.9)], 'edgecolors': 'k', 'linewidths': 0.8, 'alpha': 0.9}],
+    'range': [{'facecolors': 'orange', 'edgecolors': 'none', 'alpha': 0.08},
+              {'facecolors': 'none', 'edgecolors': 'orange', 'linewidths': 1.5, 'linestyles': '--'}],
+}
+
+# 工作进程中的数据源、各缩放级别的瓦片场景和瓦片渲染器
+_worker_sources = None
+_worker_tile_size = TILE_SIZE
+_worker_scenes = {}
+_worker_renderer = None
+
+
+def parse_layers(value):
+    """
+    解析图层列表
+
+    参数:
+        value: 逗号分隔的字符串（如 "world,range"）或图层列表，为None或空时使用全部图层
+
+    返回:
+        按绘制顺序排列的图层元组
+
+    异常:
+        ValueError: 包含未知的图层
+    """
+    if not value:
+        return TILE_LAYERS
+    if isinstance(value, str):
+        value = value.split(',')
+    layers = {item.strip().lower() for item in value if item.strip()}
+    unknown = sorted(layers - set(TILE_LAYERS))
+    if unknown:
+        raise ValueError(f"未知的瓦片图层: {', '.join(unknown)}（可用: {', '.join(TILE_LAYERS)}）")
+    return tuple(layer for layer in TILE_LAYERS if layer in layers) or TILE_LAYERS
+
+
+def lonlat_to_mercator(coords):
+    """
+    把经纬度坐标投影到Web墨卡托平面（米），纬度截断到±MAX_LATITUDE
+
+    参数:
+        coords: 形状为(N, 2)的(经度, 纬度)数组
+
+    返回:
+        形状为(N, 2)的(x, y)数组
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lons = np.clip(coords[:, 0], -180.0, 180.0)
+    lats = np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE)
+    x = lons * (WEB_MERCATOR_HALF / 180.0)
+    y = np.log(np.tan(np.pi / 4 + np.radians(lats) / 2)) * (WEB_MERCATOR_HALF / np.pi)
+    return np.column_stack((x, y))
+
+
+def tile_bounds(zoom, x, y):
+    """
+    返回XYZ瓦片在Web墨卡托平面上的范围 (xmin, ymin, xmax, ymax)，y=0为最北一行
+    """
+    size = 2 * WEB_MERCATOR_HALF / (1 << zoom)
+    xmin = -WEB_MERCATOR_HALF + x * size
+    ymax = WEB_MERCATOR_HALF - y * size
+    return (xmin, ymax - size, xmin + size, ymax)
+
+
+def clip_ring(ring, bounds):
+    """
+    用矩形裁剪多边形环（向量化的Sutherland-Hodgman）
+
+    参数:
+        ring: 形状为(K, 2)的环，首尾不重复
+        bounds: 裁剪矩形 (xmin, ymin, xmax, ymax)
+
+    返回:
+        裁剪后的环，完全在矩形外时为空数组；凹多边形可能留下沿矩形边的退化边，面积不变
+    """
+    xmin, ymin, xmax, ymax = bounds
+    for axis, limit, keep_above in ((0, xmin, True), (0, xmax, False), (1, ymin, True), (1, ymax, False)):
+        if len(ring) < 3:
+            return ring[:0]
+        values = ring[:, axis]
+        inside = values >= limit if keep_above else values <= limit
+        if inside.all():
+            continue
+        if not inside.any():
+            return ring[:0]
+        # 每条边 i -> i+1：起点在内侧时保留起点，穿过裁剪线时插入交点
+        # 只有穿过裁剪线的边求交点，这些边两端在裁剪线两侧，分母不为0
+        following = np.roll(ring, -1, axis=0)
+        crossing = inside != np.roll(inside, -1)
+        start, end = ring[crossing], following[crossing]
+        t = (limit - start[:, axis]) / (end[:, axis] - start[:, axis])
+        intersections = np.empty_like(ring)
+        intersections[crossing] = start + t[:, None] * (end - start)
+        intersections[:, axis] = limit
+        points = np.stack((ring, intersections), axis=1).reshape(-1, 2)
+        ring = points[np.stack((inside, crossing), axis=1).ravel()]
+    return ring
+
+
+def _ring_area(ring):
+    """
+    鞋带公式计算环的面积（绝对值）
+    """
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _zoom_tolerance(zoom, tile_size):
+    """
+    缩放级别对应的LOD简化容差（度）
+
+    墨卡托投影中纬度φ处每像素的经度跨度是赤道处的cosφ倍，按60度纬度（一半）换算，
+    使60度以内的简化偏差不超过DEFAULT_PIXEL_TOLERANCE个像素
+    """
+    degrees_per_pixel = 360.0 / (tile_size * (1 << zoom))
+    limit = degrees_per_pixel * DEFAULT_PIXEL_TOLERANCE * 0.5
+    candidates = [level for level in DEFAULT_LOD_TOLERANCES if level <= limit]
+    return max(candidates) if candidates else 0.0
+
+
+class TileScene:
+    """
+    一个缩放级别上全部图层的Web墨卡托几何和瓦片空间索引
+
+    所有图层的环按图层、特征顺序拼接；每个环的外接矩形（外扩裁剪边距）覆盖的瓦片与环号配对后
+    按瓦片编号排序，以CSR形式存储（瓦片编号数组 + 偏移数组 + 环号数组）。
+    """
+
+    def __init__(self, sources, zoom, tile_size=TILE_SIZE):
+        """
+        参数:
+            sources: 图层数据 {图层: 数据}，world和china为GeoJSON FeatureCollection，
+                     range为build_geodesic_buffer返回的多边形列表
+            zoom: 缩放级别
+            tile_size: 瓦片像素尺寸
+        """
+        self.zoom = zoom
+        self.tile_size = tile_size
+        self.n_tiles = 1 << zoom
+        self.layers = [layer for layer in TILE_LAYERS if layer in sources]
+        tolerance = _zoom_tolerance(zoom, tile_size)
+
+        rings, holes, layer_ids, features = [], [], [], []
+        for layer_id, layer in enumerate(self.layers):
+            for feature_id, polygons in enumerate(_layer_polygons(layer, sources[layer], tolerance)):
+                for polygon in polygons:
+                    for ring_index, ring in enumerate(polygon):
+                        ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                        if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                            ring = ring[:-1]
+                        if len(ring) < 3:
+                            continue
+                        rings.append(lonlat_to_mercator(ring))
+                        holes.append(ring_index > 0)
+                        layer_ids.append(layer_id)
+                        features.append(feature_id)
+        self.rings = rings
+        self.holes = np.asarray(holes, dtype=bool)
+        self.layer_ids = np.asarray(layer_ids, dtype=np.int64)
+        self.features = np.asarray(features, dtype=np.int64)
+        self._build_index()
+
+    def _build_index(self):
+        """
+        建立瓦片到环的CSR索引
+        """
+        n = self.n_tiles
+        if not self.rings:
+            self.tile_ids = np.empty(0, dtype=np.int64)
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._ring_ids = np.empty(0, dtype=np.int64)
+            return
+        margin = _CLIP_MARGIN_PIXELS * 2 * WEB_MERCATOR_HALF / (n * self.tile_size)
+        lows = np.array([ring.min(axis=0) for ring in self.rings]) - margin
+        highs = np.array([ring.max(axis=0) for ring in self.rings]) + margin
+        scale = n / (2 * WEB_MERCATOR_HALF)
+        x0 = np.clip(np.floor((lows[:, 0] + WEB_MERCATOR_HALF) * scale), 0, n - 1).astype(np.int64)
+        x1 = np.clip(np.floor((highs[:, 0] + WEB_MERCATOR_HALF) * scale), 0, n - 1).astype(np.int64)
+        y0 = np.clip(np.floor((WEB_MERCATOR_HALF - highs[:, 1]) * scale), 0, n - 1).astype(np.int64)
+        y1 = np.clip(np.floor((WEB_MERCATOR_HALF - lows[:, 1]) * scale), 0, n - 1).astype(np.int64)
+
+        # 把每个环展开为它覆盖的全部瓦片
+        widths = x1 - x0 + 1
+        counts = widths * (y1 - y0 + 1)
+        ring_of = np.repeat(np.arange(len(self.rings)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        tiles = (y0[ring_of] + local // widths[ring_of]) * n + x0[ring_of] + local % widths[ring_of]
+
+        order = np.argsort(tiles, kind='stable')
+        self.tile_ids, starts = np.unique(tiles[order], return_index=True)
+        self._offsets = np.append(starts, len(tiles)).astype(np.int64)
+        self._ring_ids = ring_of[order]
+
+    def tiles(self):
+        """
+        返回有候选几何的瓦片坐标列表 [(x, y), ...]
+        """
+        return [(int(tile % self.n_tiles), int(tile // self.n_tiles)) for tile in self.tile_ids]
+
+    def clip_tile(self, x, y):
+        """
+        裁剪与瓦片相交的环
+
+        返回:
+            列表，每项为 (图层号, 特征号, 是否为洞, 裁剪后的环)，按图层和特征排序；
+            瓦片内没有任何几何时为空列表
+        """
+        position = np.searchsorted(self.tile_ids, y * self.n_tiles + x)
+        if position >= len(self.tile_ids) or self.tile_ids[position] != y * self.n_tiles + x:
+            return []
+        xmin, ymin, xmax, ymax = tile_bounds(self.zoom, x, y)
+        margin = _CLIP_MARGIN_PIXELS * (xmax - xmin) / self.tile_size
+        bounds = (xmin - margin, ymin - margin, xmax + margin, ymax + margin)
+        # 面积小于百分之一像素的裁剪结果（环在瓦片外，只剩沿裁剪线的退化边）视为空
+        min_area = ((xmax - xmin) / self.tile_size) ** 2 * 0.01
+        clipped = []
+        for ring_id in self._ring_ids[self._offsets[position]:self._offsets[position + 1]]:
+            ring = clip_ring(self.rings[ring_id], bounds)
+            if len(ring) >= 3 and _ring_area(ring) > min_area:
+                clipped.append((int(self.layer_ids[ring_id]), int(self.features[ring_id]),
+                                bool(self.holes[ring_id]), ring))
+        return clipped
+
+
+def _layer_polygons(layer, data, tolerance):
+    """
+    返回图层按特征划分的多边形列表（每个特征为MultiPolygon坐标结构）
+
+    world图层跳过中国（由china图层绘制），china图层合并为一个特征，range图层为一个特征
+    """
+    if layer == 'range':
+        return [data]
+    if tolerance > 0:
+        data = get_lod_geometry(data).simplified(tolerance)
+    features = []
+    for i, feature in enumerate(data['features']):
+        name = (feature.get('properties') or {}).get('name', f'Country_{i}')
+        if layer == 'world' and name in CHINA_NAMES:
+            continue
+        features.append(geometry_polygons(feature.get('geometry')))
+    if layer == 'china':
+        return [[polygon for polygons in features for polygon in polygons]]
+    return features
+
+
+def tile_content_hash(scene, clipped):
+    """
+    瓦片内容的哈希：样式版本、瓦片尺寸和裁剪后的全部几何，内容不变时重新运行跳过该瓦片
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{STYLE_VERSION}|{scene.tile_size}'.encode('utf-8'))
+    for layer_id, feature_id, hole, ring in clipped:
+        digest.update(f'|{scene.layers[layer_id]}:{feature_id}:{int(hole)}:'.encode('utf-8'))
+        digest.update(np.ascontiguousarray(ring, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class TileRenderer:
+    """
+    在一张可复用的透明图形上渲染瓦片，每个瓦片只增删图层的PathCollection
+    """
+
+    def __init__(self, tile_size=TILE_SIZE):
+        import matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.tile_size = tile_size
+        self.figure = Figure(figsize=(tile_size / 100, tile_size / 100), dpi=100, facecolor='none')
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_axes((0, 0, 1, 1))
+        self.ax.set_axis_off()
+        self.world_colors = matplotlib.colormaps['tab20'](np.linspace(0, 1, 20))
+
+    def render(self, scene, x, y, clipped):
+        """
+        渲染瓦片
+
+        参数:
+            scene: TileScene
+            x, y: 瓦片坐标
+            clipped: scene.clip_tile(x, y)的结果
+
+        返回:
+            PNG字节串，渲染结果完全透明时返回None
+        """
+        from matplotlib.collections import PathCollection
+        from PIL import Image
+
+        xmin, ymin, xmax, ymax = tile_bounds(scene.zoom, x, y)
+        self.ax.set_xlim(xmin, xmax)
+        self.ax.set_ylim(ymin, ymax)
+        artists = []
+        try:
+            for layer_id, layer in enumerate(scene.layers):
+                items = [item for item in clipped if item[0] == layer_id]
+                if not items:
+                    continue
+                feature_ids, groups = np.unique([item[1] for item in items], return_inverse=True)
+                paths = compound_paths([item[3] for item in items], [item[2] for item in items],
+                                       groups, len(feature_ids))
+                for style in _LAYER_STYLES[layer]:
+                    if layer == 'world':
+                        style = dict(style, facecolors=self.world_colors[feature_ids % len(self.world_colors)])
+                    collection = PathCollection(paths, **style)
+                    self.ax.add_collection(collection, autolim=False)
+                    artists.append(collection)
+            self.canvas.draw()
+            rgba = np.asarray(self.canvas.buffer_rgba())
+            if not rgba[..., 3].any():
+                return None
+            buffer = io.BytesIO()
+            Image.fromarray(rgba).save(buffer, format='PNG')
+            return buffer.getvalue()
+        finally:
+            for artist in artists:
+                artist.remove()
+
+
+def _init_worker(sources, tile_size):
+    """
+    工作进程初始化：保存数据源，瓦片场景和渲染器在首次使用时创建
+    """
+    global _worker_sources, _worker_tile_size, _worker_scenes, _worker_renderer
+    _worker_sources = sources
+    _worker_tile_size = tile_size
+    _worker_scenes = {}
+    _worker_renderer = None
+
+
+def _render_tiles(task):
+    """
+    渲染一组瓦片
+
+    参数:
+        task: (缩放级别, [(x, y, 上次的内容哈希), ...])
+
+    返回:
+        列表，每项为 (缩放级别, x, y, 内容哈希, PNG字节串)；
+        空瓦片的哈希为None，内容与上次相同的瓦片PNG为None（不重新渲染）
+    """
+    global _worker_renderer
+    zoom, tiles = task
+    scene = _worker_scenes.get(zoom)
+    if scene is None:
+        scene = _worker_scenes[zoom] = TileScene(_worker_sources, zoom, _worker_tile_size)
+    if _worker_renderer is None:
+        _worker_renderer = TileRenderer(_worker_tile_size)
+
+    results = []
+    for x, y, previous_hash in tiles:
+        clipped = scene.clip_tile(x, y)
+        if not clipped:
+            results.append((zoom, x, y, None, None))
+            continue
+        digest = tile_content_hash(scene, clipped)
+        if digest == previous_hash:
+            results.append((zoom, x, y, digest, None))
+            continue
+        data = _worker_renderer.render(scene, x, y, clipped)
+        results.append((zoom, x, y, digest if data is not None else None, data))
+    return results
+
+
+class MBTilesStore:
+    """
+    MBTiles（SQLite）瓦片存储，tiles表的行号按MBTiles规范使用TMS方向（y=0为最南一行）；
+    另有tile_hashes表记录每个瓦片的内容哈希，用于增量更新
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT);
+            CREATE UNIQUE INDEX IF NOT EXISTS metadata_name ON metadata (name);
+            CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,
+                                              tile_data BLOB);
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+            CREATE TABLE IF NOT EXISTS tile_hashes (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,
+                                                    hash TEXT);
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_hash_index ON tile_hashes (zoom_level, tile_column, tile_row);
+        ''')
+
+    def hashes(self):
+        """
+        返回已有瓦片的内容哈希 {(z, x, y): 哈希}
+        """
+        rows = self.connection.execute('SELECT zoom_level, tile_column, tile_row, hash FROM tile_hashes')
+        return {(z, x, (1 << z) - 1 - row): digest for z, x, row, digest in rows}
+
+    def write(self, zoom, x, y, data, digest):
+        row = (1 << zoom) - 1 - y
+        self.connection.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                                (zoom, x, row, sqlite3.Binary(data)))
+        self.connection.execute('INSERT OR REPLACE INTO tile_hashes VALUES (?, ?, ?, ?)', (zoom, x, row, digest))
+
+    def delete(self, zoom, x, y):
+        row = (1 << zoom) - 1 - y
+        for table in ('tiles', 'tile_hashes'):
+            self.connection.execute(f'DELETE FROM {table} WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                                    (zoom, x, row))
+
+    def set_metadata(self, metadata):
+        self.connection.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                                    [(name, str(value)) for name, value in metadata.items()])
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class DirectoryTileStore:
+    """
+    {z}/{x}/{y}.png 目录瓦片存储，内容哈希和元数据分别保存在目录下的tile_hashes.json和metadata.json
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._hashes_path = os.path.join(path, 'tile_hashes.json')
+        self._hashes = {}
+        if os.path.exists(self._hashes_path):
+            try:
+                with open(self._hashes_path, 'r', encoding='utf-8') as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取瓦片哈希失败，全部瓦片将重新渲染: {e}")
+
+    def _tile_path(self, zoom, x, y):
+        return os.path.join(self.path, str(zoom), str(x), f'{y}.png')
+
+    def hashes(self):
+        result = {}
+        for key, digest in self._hashes.items():
+            zoom, x, y = (int(part) for part in key.split('/'))
+            # 瓦片文件被手动删除时重新渲染
+            if os.path.exists(self._tile_path(zoom, x, y)):
+                result[(zoom, x, y)] = digest
+        return result
+
+    def write(self, zoom, x, y, data, digest):
+        path = self._tile_path(zoom, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._hashes[f'{zoom}/{x}/{y}'] = digest
+
+    def delete(self, zoom, x, y):
+        path = self._tile_path(zoom, x, y)
+        if os.path.exists(path):
+            os.remove(path)
+        self._hashes.pop(f'{zoom}/{x}/{y}', None)
+
+    def set_metadata(self, metadata):
+        with open(os.path.join(self.path, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    def close(self):
+        tmp_path = self._hashes_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._hashes, f, sort_keys=True)
+        os.replace(tmp_path, self._hashes_path)
+
+
+def open_tile_store(output_path):
+    """
+    按输出路径打开瓦片存储：.mbtiles后缀为MBTiles文件，否则为目录
+    """
+    if output_path.lower().endswith('.mbtiles'):
+        return MBTilesStore(output_path)
+    return DirectoryTileStore(output_path)
+
+
+def render_tile_pyramid(sources, output_path, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM,
+                        tile_size=TILE_SIZE, workers=None, force=False, tiles_per_task=DEFAULT_TILES_PER_TASK,
+                        description=None):
+    """
+    渲染瓦片金字塔并写入瓦片存储
+
+    参数:
+        sources: 图层数据 {图层: 数据}，见TileScene
+        output_path: 输出路径，.mbtiles后缀为MBTiles文件，否则为目录
+        min_zoom, max_zoom: 缩放级别范围（包含两端）
+        tile_size: 瓦片像素尺寸
+        workers: 并行进程数，默认为CPU核数
+        force: 为True时忽略已有瓦片的内容哈希，全部重新渲染
+        tiles_per_task: 每个进程池任务渲染的瓦片数
+        description: 写入元数据的说明
+
+    返回:
+        统计字典 {"rendered", "unchanged", "empty", "deleted"}
+    """
+    if min_zoom < 0 or max_zoom < min_zoom:
+        raise ValueError(f"无效的缩放级别范围: {min_zoom}-{max_zoom}")
+    workers = workers or os.cpu_count() or 1
+    store = open_tile_store(output_path)
+    stats = {"rendered": 0, "unchanged": 0, "empty": 0, "deleted": 0}
+    start_time = time.perf_counter()
+    try:
+        previous = {} if force else store.hashes()
+        # 主进程只建立索引、列出有候选几何的瓦片，裁剪和渲染都在工作进程中进行
+        tasks = []
+        for zoom in range(min_zoom, max_zoom + 1):
+            tiles = [(x, y, previous.get((zoom, x, y))) for x, y in TileScene(sources, zoom, tile_size).tiles()]
+            logger.info(f"缩放级别{zoom}: {len(tiles)}/{4 ** zoom}个瓦片有候选几何")
+            tasks.extend((zoom, tiles[i:i + tiles_per_task]) for i in range(0, len(tiles), tiles_per_task))
+        logger.info(f"开始渲染瓦片: 缩放级别{min_zoom}-{max_zoom}, {len(tasks)}个任务, {workers}个进程")
+
+        if workers == 1:
+            _init_worker(sources, tile_size)
+            results = map(_render_tiles, tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(sources, tile_size))
+            results = pool.imap_unordered(_render_tiles, tasks)
+        kept = set()
+        try:
+            for batch in results:
+                for zoom, x, y, digest, data in batch:
+                    if digest is None:
+                        stats["empty"] += 1
+                        continue
+                    kept.add((zoom, x, y))
+                    if data is None:
+                        stats["unchanged"] += 1
+                    else:
+                        store.write(zoom, x, y, data, digest)
+                        stats["rendered"] += 1
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # 删除本次缩放级别范围内不再有内容的旧瓦片
+        for zoom, x, y in previous:
+            if min_zoom <= zoom <= max_zoom and (zoom, x, y) not in kept:
+                store.delete(zoom, x, y)
+                stats["deleted"] += 1
+
+        store.set_metadata({
+            "name": os.path.splitext(os.path.basename(os.path.normpath(output_path)))[0],
+            "format": "png",
+            "type": "overlay",
+            "version": STYLE_VERSION,
+            "description": description or "",
+            "minzoom": min_zoom,
+            "maxzoom": max_zoom,
+            "bounds": f"-180,{-MAX_LATITUDE:.6f},180,{MAX_LATITUDE:.6f}",
+            "layers": ",".join(layer for layer in TILE_LAYERS if layer in sources),
+        })
+    finally:
+        store.close()
+
+    logger.info(f"瓦片已保存到: {output_path}（渲染{stats['rendered']}个, 未变化{stats['unchanged']}个, "
+                f"空{stats['empty']}个, 删除{stats['deleted']}个, 耗时{time.perf_counter() - start_time:.1f}秒）")
+    return stats
+
+
+def generate_tiles(output_path, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM, radius_km=8000,
+                   layers=None, data_path=None, workers=None, tile_size=TILE_SIZE, force=False):
+    """
+    加载地图数据并生成世界、中国和范围图层的XYZ瓦片金字塔
+
+    参数:
+        output_path: 输出路径，.mbtiles后缀为MBTiles文件，否则为目录
+        min_zoom, max_zoom: 缩放级别范围（包含两端）
+        radius_km: 范围图层的半径（公里）
+        layers: 图层列表，见parse_layers，默认为全部图层
+        data_path: 世界地图数据文件路径，默认为None（使用默认路径）
+        workers: 并行进程数，默认为CPU核数
+        tile_size: 瓦片像素尺寸
+        force: 为True时全部重新渲染
+
+    返回:
+        统计字典，见render_tile_pyramid
+    """
+    from src.data_handler.json_loader import load_china_map_data
+    from src.data_handler.world_json_loader import load_world_map_data
+    from src.utils.border_distance import BorderDistanceEngine
+    from src.utils.geodesic_buffer import build_geodesic_buffer
+
+    layers = parse_layers(layers)
+    sources = {}
+    china_data = load_china_map_data() if 'china' in layers or 'range' in layers else None
+    if 'world' in layers:
+        sources['world'] = load_world_map_data(data_path=data_path)
+    if 'china' in layers:
+        sources['china'] = china_data
+    if 'range' in layers:
+        sources['range'] = build_geodesic_buffer(BorderDistanceEngine(china_data), radius_km)
+    return render_tile_pyramid(sources, output_path, min_zoom=min_zoom, max_zoom=max_zoom, tile_size=tile_size,
+                               workers=workers, force=force,
+                               description=f"{', '.join(layers)}; range {radius_km} km")
@@ -1,17 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
-from matplotlib.collections import PatchCollection
+import matplotlib
 from src.data_handler.world_json_loader import load_world_map_data
 from src.data_handler.json_loader import load_china_map_data
-from src.utils.font_config import setup_fonts
-
-# 设置中文字体
-font_set = setup_fonts()
+from src.utils.font_config import ensure_fonts
+from src.utils.geometry_lod import simplify_for_display
+from src.map_generator.geometry_paths import add_geojson_collection, CHINA_NAMES
+from src.map_generator.render_context import render_map
 
 # 世界主要城市数据
 WORLD_MAJOR_CITIES = [
@@ -25,22 +22,14 @@ WORLD_MAJOR_CITIES = [
     {"name": "悉尼", "lat": -33.8, "lon": 151.2, "country": "澳大利亚"}
 ]
 
-def draw_world_map(output_dir="outputs", filename_prefix="world_map", show_map=True, data_path=None):
+def _build_world_map(fig, world_data, china_data, font_set):
     """
-    绘制世界地图，包括各国边界和主要城市，中国部分基于china json文件
-    
-    参数:
-        output_dir: 输出文件目录
-        filename_prefix: 输出文件名前缀
-        show_map: 是否显示地图
-        data_path: 地图数据文件路径，默认为None（使用默认路径）
-    
+    在图形上绘制世界地图：各国边界、中国、主要城市、标题和坐标轴标签
+
     返回:
-        生成的文件路径列表
+        坐标轴
     """
-    # 创建图形和坐标轴，增加宽度使地图更宽广
-    plt.figure(figsize=(25, 10), dpi=150)  # 增加宽度从18到25
-    ax = plt.axes()
+    ax = fig.add_subplot()
     
     # 使用标准全球范围，但通过图形比例让中国在视觉上居中
     ax.set_xlim(-180, 180)  # 完整经度范围
@@ -60,90 +49,28 @@ def draw_world_map(output_dir="outputs", filename_prefix="world_map", show_map=T
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 获取世界地图数据
-    world_data = load_world_map_data(data_path=data_path)
-    
-    # 获取中国地图数据
-    china_data = load_china_map_data()
-    
-    # 存储所有国家的多边形（不包括中国）
-    patches = []
-    country_names = []
+    # 按输出像素大小和显示范围选择简化级别（PNG以300dpi保存），不绘制亚像素的细节
+    display_extent = (center_lon - span_lon/2, center_lon + span_lon/2, center_lat - span_lat/2, center_lat + span_lat/2)
+    world_data = simplify_for_display(world_data, display_extent, fig.get_size_inches(), dpi=300)
+    china_data = simplify_for_display(china_data, display_extent, fig.get_size_inches(), dpi=300)
     
     # 颜色列表，用于不同国家
-    colors = plt.cm.tab20(np.linspace(0, 1, 20))
+    colors = matplotlib.colormaps['tab20'](np.linspace(0, 1, 20))
     
-    # 遍历JSON数据中的每个特征（不包括中国）
-    for i, feature in enumerate(world_data['features']):
-        geometry = feature['geometry']
-        properties = feature.get('properties', {})
-        
-        # 获取国家名称
-        country_name = properties.get('name', f'Country_{i}')
-        # 跳过中国，因为我们将使用专门的中国地图数据
-        if country_name in ['中国', 'China', 'CN']:
-            continue
-        
-        country_names.append(country_name)
-        
-        # 处理多边形
-        if geometry['type'] == 'Polygon':
-            coordinates = geometry['coordinates']
-            for polygon_coords in coordinates:
-                # 转换坐标格式 (lon, lat) -> (x, y)
-                x, y = zip(*polygon_coords)
-                polygon = Polygon(np.column_stack((x, y)), closed=True)
-                patches.append(polygon)
-        
-        # 处理多重多边形
-        elif geometry['type'] == 'MultiPolygon':
-            coordinates = geometry['coordinates']
-            for multi_coords in coordinates:
-                for polygon_coords in multi_coords:
-                    x, y = zip(*polygon_coords)
-                    polygon = Polygon(np.column_stack((x, y)), closed=True)
-                    patches.append(polygon)
-    
-    # 创建多边形集合并添加到图形（其他国家）
-    p = PatchCollection(patches, alpha=0.7)
+    # 每个国家一个复合Path（跳过中国，因为我们将使用专门的中国地图数据）
+    p, country_names = add_geojson_collection(ax, world_data, exclude_names=CHINA_NAMES, alpha=0.7)
     # 使用循环颜色，确保不同国家有不同颜色
-    p.set_color([colors[i % len(colors)] for i in range(len(patches))])
+    p.set_color([colors[i % len(colors)] for i in range(len(country_names))])
     # 设置边界线颜色和宽度，确保边界清晰可见
-    p.set_edgecolor('k')  # 黑色边界
-    p.set_linewidth(0.5)  # 边界线宽度
-    ax.add_collection(p)
+    p.set_edgecolor('k')
+    p.set_linewidth(0.5)
     
     # 现在绘制中国地图数据，使其显示在其他国家之上
-    china_patches = []
-    # 遍历中国地图数据中的每个特征
-    for feature in china_data['features']:
-        geometry = feature['geometry']
-        
-        # 处理多边形
-        if geometry['type'] == 'Polygon':
-            coordinates = geometry['coordinates']
-            for polygon_coords in coordinates:
-                # 转换坐标格式 (lon, lat) -> (x, y)
-                x, y = zip(*polygon_coords)
-                polygon = Polygon(np.column_stack((x, y)), closed=True)
-                china_patches.append(polygon)
-        
-        # 处理多重多边形
-        elif geometry['type'] == 'MultiPolygon':
-            coordinates = geometry['coordinates']
-            for multi_coords in coordinates:
-                for polygon_coords in multi_coords:
-                    x, y = zip(*polygon_coords)
-                    polygon = Polygon(np.column_stack((x, y)), closed=True)
-                    china_patches.append(polygon)
-    
-    # 创建中国多边形集合并添加到图形
-    china_p = PatchCollection(china_patches, alpha=0.9)
-    # 使用特殊颜色表示中国，确保清晰可见
+    # 中国使用统一的颜色，所有省份合并为一个复合Path
+    china_p, _ = add_geojson_collection(ax, china_data, merge=True, alpha=0.9)
     china_p.set_color([0.85, 0.16, 0.16, 0.9])  # 红色系
-    china_p.set_edgecolor('k')  # 黑色边界
+    china_p.set_edgecolor('k')
     china_p.set_linewidth(0.8)  # 稍宽的边界线
-    ax.add_collection(china_p)
     
     # 绘制主要城市
     for city in WORLD_MAJOR_CITIES:
@@ -154,30 +81,44 @@ def draw_world_map(output_dir="outputs", filename_prefix="world_map", show_map=T
     
     # 设置标题和标签
     if font_set:
-        plt.title('世界地图', fontsize=16)
-        plt.xlabel('经度', fontsize=12)
-        plt.ylabel('纬度', fontsize=12)
+        ax.set_title('世界地图', fontsize=16)
+        ax.set_xlabel('经度', fontsize=12)
+        ax.set_ylabel('纬度', fontsize=12)
     else:
-        plt.title('World Map', fontsize=16)
-        plt.xlabel('Longitude', fontsize=12)
-        plt.ylabel('Latitude', fontsize=12)
-    
-    # 调整布局
-    plt.tight_layout()
+        ax.set_title('World Map', fontsize=16)
+        ax.set_xlabel('Longitude', fontsize=12)
+        ax.set_ylabel('Latitude', fontsize=12)
+    return ax
+
+
+def draw_world_map(output_dir="outputs", filename_prefix="world_map", show_map=True, data_path=None, formats=None):
+    """
+    绘制世界地图，包括各国边界和主要城市，中国部分基于china json文件
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    不显示地图时在无界面的渲染上下文中绘制，地图数据未变化时复用已绘制的图形
     
-    # 保存为SVG和PNG文件
-    svg_path = os.path.join(output_dir, f'{filename_prefix}.svg')
-    png_path = os.path.join(output_dir, f'{filename_prefix}.png')
+    参数:
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        show_map: 是否显示地图
+        data_path: 地图数据文件路径，默认为None（使用默认路径）
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
     
-    plt.savefig(svg_path, format='svg', bbox_inches='tight')
-    plt.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
+    返回:
+        生成的文件路径列表
+    """
+    # 设置中文字体
+    font_set = ensure_fonts()
     
-    if show_map:
-        plt.show()
-    else:
-        plt.close()
+    # 获取世界地图和中国地图数据
+    world_data = load_world_map_data(data_path=data_path)
+    china_data = load_china_map_data()
     
-    return [svg_path, png_path]
\ No newline at end of file
+    # 创建图形和坐标轴，增加宽度使地图更宽广（增加宽度从18到25）
+    files, _ = render_map(
+        ('world', data_path), (25, 10), 150,
+        lambda fig: _build_world_map(fig, world_data, china_data, font_set),
+        output_dir=output_dir, filename_prefix=filename_prefix, formats=formats,
+        inputs=(world_data, china_data), show_map=show_map
+    )
+    return files
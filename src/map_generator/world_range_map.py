@@ -3,16 +3,22 @@
 
 import os
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon, Circle
-from matplotlib.collections import PatchCollection
+import matplotlib
 from src.data_handler.world_json_loader import load_world_map_data
 from src.data_handler.json_loader import load_china_map_data
-from src.utils.distance_calculator import great_circle_distance
-from src.utils.font_config import setup_fonts
-
-# 设置中文字体
-font_set = setup_fonts()
+from src.utils.border_distance import BorderDistanceEngine
+from src.utils.geodesic_buffer import build_geodesic_buffer
+from src.map_generator.range_overlay import add_range_buffer, add_range_contour, load_range_field
+from src.map_generator.range_sweep import classify_countries, write_band_summary
+from src.utils.font_config import ensure_fonts
+from src.utils.geometry_lod import simplify_for_display
+from src.map_generator.geometry_paths import add_geojson_collection, CHINA_NAMES
+from src.map_generator.render_context import render_map
+from src.map_generator.basemap_cache import BasemapLayer, dataset_fingerprint
+from src.map_generator.projected_geometry import (
+    project_dataset, project_points, projected_lod_tolerance, projection_cache_dir, setup_projected_axes
+)
+from src.utils.projection import parse_projection
 
 # 地球半径（公里）
 EARTH_RADIUS = 6371.0
@@ -43,23 +49,83 @@ WORLD_MAJOR_CITIES = [
     {"name": "悉尼", "lat": -33.8, "lon": 151.2, "country": "澳大利亚"}
 ]
 
-def draw_world_map_with_range(radius_km=8000, output_dir="outputs", filename_prefix="world_with_8000km_range", show_map=True, data_path=None):
+# 图形尺寸，增加宽度使地图更宽广
+FIGURE_SIZE = (25, 10)  # 增加宽度从18到25
+
+# 投影模式的图形尺寸（显示范围为圆形）
+PROJECTED_FIGURE_SIZE = (16, 14)
+
+
+def _draw_country_layers(ax, world_data, china_data):
     """
-    绘制世界地图，并在上面叠加显示以中国边界为起点的8000公里范围
+    绘制世界各国和中国的多边形图层
     
     参数:
-        radius_km: 范围半径（公里）
-        output_dir: 输出文件目录
-        filename_prefix: 输出文件名前缀
-        show_map: 是否显示地图
-        data_path: 地图数据文件路径，默认为None（使用默认路径）
+        ax: 坐标轴
+        world_data: 已按显示范围简化的世界地图数据
+        china_data: 已按显示范围简化的中国地图数据
     
     返回:
-        生成的文件路径列表
+        添加的图形元素列表
     """
-    # 创建图形和坐标轴，增加宽度使地图更宽广
-    plt.figure(figsize=(25, 10), dpi=150)  # 增加宽度从18到25
-    ax = plt.axes()
+    # 颜色列表，用于不同国家
+    colors = matplotlib.colormaps['tab20'](np.linspace(0, 1, 20))
+    
+    # 每个国家一个复合Path（跳过中国，因为我们将使用专门的中国地图数据）
+    p, country_names = add_geojson_collection(ax, world_data, exclude_names=CHINA_NAMES, alpha=0.7)
+    # 使用循环颜色，确保不同国家有不同颜色
+    p.set_color([colors[i % len(colors)] for i in range(len(country_names))])
+    # 设置边界线颜色和宽度
+    p.set_edgecolor('k')
+    p.set_linewidth(0.5)
+    
+    # 现在绘制中国地图数据，使其显示在其他国家之上
+    # 中国使用统一的颜色，所有省份合并为一个复合Path
+    china_p, _ = add_geojson_collection(ax, china_data, merge=True, alpha=0.9)
+    china_p.set_color([0.85, 0.16, 0.16, 0.9])  # 红色系
+    china_p.set_edgecolor('k')
+    china_p.set_linewidth(0.8)  # 稍宽的边界线
+    return [p, china_p]
+
+
+def _create_projected_layers(fig, ax, world_data, china_data, projection):
+    """
+    投影模式的底图：绘制边界圆和经纬网，世界各国和中国按投影坐标绘制
+
+    投影后的坐标按数据集哈希、投影和简化级别缓存在内存和磁盘中，再次渲染时跳过坐标变换
+    """
+    setup_projected_axes(ax, projection)
+    tolerance = projected_lod_tolerance(projection, fig.get_size_inches())
+    cache_dir = projection_cache_dir()
+    world_projected = project_dataset(world_data, projection, tolerance, cache_dir)
+    china_projected = project_dataset(china_data, projection, tolerance, cache_dir)
+    layers = _draw_country_layers(ax, world_projected, china_projected)
+    BasemapLayer(ax, layers, lambda layer_ax: _draw_country_layers(layer_ax, world_projected, china_projected),
+                 key=('world-range', dataset_fingerprint(world_data), dataset_fingerprint(china_data),
+                      projection.key, tuple(fig.get_size_inches())))
+
+
+def _create_base_axes(fig, world_data, china_data, projection=None):
+    """
+    创建底图：世界各国、中国、主要城市等与半径无关的图层，扫描时只绘制一次
+    
+    参数:
+        fig: 图形
+        world_data: 世界地图数据
+        china_data: 中国地图数据
+        projection: AzimuthalProjection实例，为None时按经纬度绘制
+    
+    返回:
+        坐标轴
+    """
+    # 设置中文字体
+    font_set = ensure_fonts()
+    
+    ax = fig.add_subplot()
+    if projection is not None:
+        _create_projected_layers(fig, ax, world_data, china_data, projection)
+        _draw_cities(ax, font_set, projection)
+        return ax
     
     # 使用标准全球范围，但通过图形比例让中国在视觉上居中
     ax.set_xlim(-180, 180)  # 完整经度范围
@@ -79,162 +145,161 @@ def draw_world_map_with_range(radius_km=8000, output_dir="outputs", filename_pre
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 获取世界地图数据
-    world_data = load_world_map_data(data_path=data_path)
+    # 获取世界地图数据，并按输出像素大小和显示范围选择简化级别（PNG以300dpi保存），不绘制亚像素的细节
+    display_extent = (center_lon - span_lon/2, center_lon + span_lon/2, center_lat - span_lat/2, center_lat + span_lat/2)
+    world_display = simplify_for_display(world_data, display_extent, fig.get_size_inches(), dpi=300)
+    # 中国地图数据使用与世界地图相同的简化级别
+    china_display = simplify_for_display(china_data, display_extent, fig.get_size_inches(), dpi=300)
+    layers = _draw_country_layers(ax, world_display, china_display)
     
-    # 获取中国地图数据
-    china_data = load_china_map_data()
+    # 国家图层与半径无关：保存栅格格式时使用按数据集哈希缓存的底图栅格，不再逐个绘制多边形
+    BasemapLayer(ax, layers, lambda layer_ax: _draw_country_layers(layer_ax, world_display, china_display),
+                 key=('world-range', dataset_fingerprint(world_data), dataset_fingerprint(china_data),
+                      display_extent, tuple(fig.get_size_inches())))
     
-    # 存储所有国家的多边形（不包括中国）
-    patches = []
-    country_names = []
-    
-    # 颜色列表，用于不同国家
-    colors = plt.cm.tab20(np.linspace(0, 1, 20))
-    
-    # 遍历JSON数据中的每个特征（不包括中国）
-    for i, feature in enumerate(world_data['features']):
-        geometry = feature['geometry']
-        properties = feature.get('properties', {})
-        
-        # 获取国家名称
-        country_name = properties.get('name', f'Country_{i}')
-        # 跳过中国，因为我们将使用专门的中国地图数据
-        if country_name in ['中国', 'China', 'CN']:
-            continue
-        
-        country_names.append(country_name)
-        
-        # 处理多边形
-        if geometry['type'] == 'Polygon':
-            coordinates = geometry['coordinates']
-            for polygon_coords in coordinates:
-                # 转换坐标格式 (lon, lat) -> (x, y)
-                x, y = zip(*polygon_coords)
-                polygon = Polygon(np.column_stack((x, y)), closed=True)
-                patches.append(polygon)
-        
-        # 处理多重多边形
-        elif geometry['type'] == 'MultiPolygon':
-            coordinates = geometry['coordinates']
-            for multi_coords in coordinates:
-                for polygon_coords in multi_coords:
-                    x, y = zip(*polygon_coords)
-                    polygon = Polygon(np.column_stack((x, y)), closed=True)
-                    patches.append(polygon)
-    
-    # 创建多边形集合并添加到图形（其他国家）
-    p = PatchCollection(patches, alpha=0.7)
-    # 使用循环颜色，确保不同国家有不同颜色
-    p.set_color([colors[i % len(colors)] for i in range(len(patches))])
-    # 设置边界线颜色和宽度
-    p.set_edgecolor('k')
-    p.set_linewidth(0.5)
-    ax.add_collection(p)
-    
-    # 现在绘制中国地图数据，使其显示在其他国家之上
-    china_patches = []
-    # 遍历中国地图数据中的每个特征
-    for feature in china_data['features']:
-        geometry = feature['geometry']
-        
-        # 处理多边形
-        if geometry['type'] == 'Polygon':
-            coordinates = geometry['coordinates']
-            for polygon_coords in coordinates:
-                # 转换坐标格式 (lon, lat) -> (x, y)
-                x, y = zip(*polygon_coords)
-                polygon = Polygon(np.column_stack((x, y)), closed=True)
-                china_patches.append(polygon)
-        
-        # 处理多重多边形
-        elif geometry['type'] == 'MultiPolygon':
-            coordinates = geometry['coordinates']
-            for multi_coords in coordinates:
-                for polygon_coords in multi_coords:
-                    x, y = zip(*polygon_coords)
-                    polygon = Polygon(np.column_stack((x, y)), closed=True)
-                    china_patches.append(polygon)
-    
-    # 创建中国多边形集合并添加到图形
-    china_p = PatchCollection(china_patches, alpha=0.9)
-    # 使用特殊颜色表示中国
-    china_p.set_color([0.85, 0.16, 0.16, 0.9])  # 红色系
-    china_p.set_edgecolor('k')
-    china_p.set_linewidth(0.8)
-    ax.add_collection(china_p)
-    
-    # 绘制8000公里范围
-    # 计算中国边界的包围盒
-    china_min_lat = min([p[0] for p in china_key_points]) - 5
-    china_max_lat = max([p[0] for p in china_key_points]) + 5
-    china_min_lon = min([p[1] for p in china_key_points]) - 5
-    china_max_lon = max([p[1] for p in china_key_points]) + 5
-    
-    # 计算从中国边界扩展指定公里的范围
-    km_per_degree = 111.0  # 简化计算：1度≈111公里
-    radius_degree = radius_km / km_per_degree
-    
-    # 绘制总的范围边界
-    range_boundary = [
-        (china_min_lon - radius_degree, china_min_lat - radius_degree),
-        (china_max_lon + radius_degree, china_min_lat - radius_degree),
-        (china_max_lon + radius_degree, china_max_lat + radius_degree), 
-        (china_min_lon - radius_degree, china_max_lat + radius_degree),
-        (china_min_lon - radius_degree, china_min_lat - radius_degree)
-    ]
-    
-    # 绘制范围边界
-    range_x = [p[0] for p in range_boundary]
-    range_y = [p[1] for p in range_boundary]
-    ax.plot(range_x, range_y, color='orange', linewidth=2, linestyle='--', label=f'{radius_km}公里范围')
-    
-    # 在中国主要城市位置绘制范围圆（用于可视化）
-    for lat, lon in china_key_points:
-        circle = Circle((lon, lat), radius_degree, fill=False, edgecolor='orange', 
-                       linestyle='--', linewidth=0.5, alpha=0.5)
-        ax.add_patch(circle)
+    _draw_cities(ax, font_set)
     
+    return ax
+
+
+def _draw_cities(ax, font_set, projection=None):
+    """
+    绘制世界主要城市和中国主要城市标记（投影模式下按投影坐标绘制，标签按屏幕偏移放置）
+    """
     # 绘制主要城市
     for city in WORLD_MAJOR_CITIES:
-        ax.plot(city['lon'], city['lat'], 'ro', markersize=6)
-        if font_set:
+        x, y = project_points(projection, city['lon'], city['lat'])
+        ax.plot(x, y, 'ro', markersize=6)
+        if font_set and projection is None:
             ax.text(city['lon'] + 2, city['lat'] + 1, f"{city['name']}({city['country']})", 
                    fontsize=8, bbox=dict(facecolor='white', alpha=0.7))
+        elif font_set and not np.isnan(x):
+            ax.annotate(f"{city['name']}({city['country']})", (x, y), xytext=(6, 3), textcoords='offset points',
+                        fontsize=8, bbox=dict(facecolor='white', alpha=0.7))
     
     # 添加中国主要城市标记
     for lat, lon in china_key_points:
-        ax.plot(lon, lat, 'go', markersize=8, label='中国主要城市')
+        ax.plot(*project_points(projection, lon, lat), 'go', markersize=8, label='中国主要城市')
+
+
+def _draw_range_layer(ax, radius_km, border_engine, distance_field=None, projection=None):
+    """
+    绘制与半径相关的图层：范围边界、标题和图例
+    
+    参数:
+        ax: 底图坐标轴
+        radius_km: 范围半径（公里）
+        border_engine: BorderDistanceEngine实例
+        distance_field: 预先计算的距离场，为None时生成测地缓冲区
+        projection: AzimuthalProjection实例，为None时按经纬度绘制
+    """
+    # 设置中文字体
+    font_set = ensure_fonts()
     
-    # 设置标题和标签
+    # 绘制从中国边界外扩指定公里的范围（真实的距离包络，而不是经纬度空间中的矩形和圆）
+    # 有预先计算的距离场时直接取等值线，否则生成测地缓冲区
+    if distance_field is not None:
+        add_range_contour(ax, distance_field, radius_km, label=f'{radius_km}公里范围', linewidth=2,
+                          projection=projection)
+    else:
+        range_polygons = build_geodesic_buffer(border_engine, radius_km)
+        add_range_buffer(ax, range_polygons, label=f'{radius_km}公里范围', linewidth=2, projection=projection)
+    
+    # 设置标题和标签（投影模式的坐标不是经纬度，不显示坐标轴标签）
     if font_set:
-        plt.title(f'世界地图与中国边界{radius_km}公里范围', fontsize=16)
-        plt.xlabel('经度', fontsize=12)
-        plt.ylabel('纬度', fontsize=12)
+        ax.set_title(f'世界地图与中国边界{radius_km}公里范围' +
+                     (f'（{projection.label}投影）' if projection is not None else ''), fontsize=16)
+        if projection is None:
+            ax.set_xlabel('经度', fontsize=12)
+            ax.set_ylabel('纬度', fontsize=12)
     else:
-        plt.title(f'World Map with {radius_km}km Range from China Border', fontsize=16)
-        plt.xlabel('Longitude', fontsize=12)
-        plt.ylabel('Latitude', fontsize=12)
+        ax.set_title(f'World Map with {radius_km}km Range from China Border' +
+                     (f' ({projection.name} projection)' if projection is not None else ''), fontsize=16)
+        if projection is None:
+            ax.set_xlabel('Longitude', fontsize=12)
+            ax.set_ylabel('Latitude', fontsize=12)
     
     # 添加图例
     ax.legend(loc='lower right', fontsize=10)
+
+
+def draw_world_map_with_range(radius_km=8000, output_dir="outputs", filename_prefix="world_with_8000km_range", show_map=True, data_path=None,
+                              distance_field_path=None, formats=None, projection=None):
+    """
+    绘制世界地图，并在上面叠加显示以中国边界为起点的8000公里范围
+    
+    参数:
+        radius_km: 范围半径（公里）
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        show_map: 是否显示地图
+        data_path: 地图数据文件路径，默认为None（使用默认路径）
+        distance_field_path: 预先计算的距离场文件路径，存在且未过期时用它绘制范围
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
+        projection: 投影（如 "aeqd" 或 "aeqd:104,36"，见parse_projection），默认为None（按经纬度绘制）
+    
+    返回:
+        生成的文件路径列表
+    """
+    projection = parse_projection(projection)
+    china_data = load_china_map_data()
+    world_data = load_world_map_data(data_path=data_path)
+    border_engine = BorderDistanceEngine(china_data)
+    distance_field = load_range_field(distance_field_path)
+    figure_size = FIGURE_SIZE if projection is None else PROJECTED_FIGURE_SIZE
     
-    # 调整布局
-    plt.tight_layout()
+    # 不显示地图时底图缓存在渲染上下文中，只增删叠加层
+    files, _ = render_map(
+        ('world-range', data_path, projection and projection.key), figure_size, 150,
+        lambda fig: _create_base_axes(fig, world_data, china_data, projection),
+        lambda ax: _draw_range_layer(ax, radius_km, border_engine, distance_field, projection),
+        output_dir=output_dir, filename_prefix=filename_prefix, formats=formats,
+        inputs=(world_data, china_data), show_map=show_map
+    )
+    return files
+
+
+def draw_world_range_sweep(radii, output_dir="outputs", filename_prefix="world_with_range", data_path=None,
+                           distance_field_path=None, formats=None, projection=None):
+    """
+    在一次运行中绘制多个半径的世界范围地图
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    世界底图只绘制一次，每个半径只替换范围叠加层；每个半径输出一组文件（文件名带半径后缀），
+    并写出一张国家所在距离区间的汇总表
     
-    # 保存为SVG和PNG文件
-    svg_path = os.path.join(output_dir, f'{filename_prefix}.svg')
-    png_path = os.path.join(output_dir, f'{filename_prefix}.png')
+    参数:
+        radii: 升序排列的半径列表（公里），可由parse_radii解析得到
+        output_dir: 输出文件目录
+        filename_prefix: 输出文件名前缀
+        data_path: 世界地图数据文件路径，默认为None（使用默认路径）
+        distance_field_path: 预先计算的距离场文件路径，存在且未过期时用它绘制范围
+        formats: 输出格式（如 "png,svg"），默认为SVG和PNG
+        projection: 投影（见parse_projection），默认为None（按经纬度绘制）
     
-    plt.savefig(svg_path, format='svg', bbox_inches='tight')
-    plt.savefig(png_path, format='png', dpi=300, bbox_inches='tight')
+    返回:
+        生成的文件路径列表（最后一项为汇总表）
+    """
+    projection = parse_projection(projection)
+    china_data = load_china_map_data()
+    world_data = load_world_map_data(data_path=data_path)
+    border_engine = BorderDistanceEngine(china_data)
+    distance_field = load_range_field(distance_field_path)
+    figure_size = FIGURE_SIZE if projection is None else PROJECTED_FIGURE_SIZE
     
-    if show_map:
-        plt.show()
-    else:
-        plt.close()
+    # 底图缓存在渲染上下文中，每个半径只增删叠加层
+    files = []
+    for radius_km in radii:
+        radius_files, _ = render_map(
+            ('world-range', data_path, projection and projection.key), figure_size, 150,
+            lambda fig: _create_base_axes(fig, world_data, china_data, projection),
+            lambda ax: _draw_range_layer(ax, radius_km, border_engine, distance_field, projection),
+            output_dir=output_dir, filename_prefix=f'{filename_prefix}_{radius_km}km', formats=formats,
+            inputs=(world_data, china_data)
+        )
+        files.extend(radius_files)
     
-    return [svg_path, png_path]
\ No newline at end of file
+    names, _, _, distances = classify_countries(border_engine)
+    summary_path = os.path.join(output_dir, f'{filename_prefix}_summary.csv')
+    write_band_summary(summary_path, radii, names, distances)
+    files.append(summary_path)
+    return files
@@ -1,9 +1,38 @@
 # 工具模块
 """
 工具模块提供各种实用功能，包括字体配置、距离计算等。
+
+导出的名称按需导入（PEP 562），例如只使用配置加载器时不会加载字体配置所依赖的matplotlib。
 """
 
-from .font_config import setup_fonts
-from .distance_calculator import great_circle_distance
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'setup_fonts': 'font_config',
+    'great_circle_distance': 'distance_calculator',
+    'great_circle_distance_matrix': 'distance_calculator',
+    'min_great_circle_distance': 'distance_calculator',
+    'vincenty_distance': 'distance_calculator',
+    'vincenty_inverse': 'distance_calculator',
+    'vincenty_distance_matrix': 'distance_calculator',
+    'min_vincenty_distance': 'distance_calculator',
+    'BorderDistanceEngine': 'border_distance',
+    'LODGeometry': 'geometry_lod',
+    'select_lod_tolerance': 'geometry_lod',
+    'simplify_for_display': 'geometry_lod',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['setup_fonts', 'great_circle_distance']
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+边界距离计算模块
+
+基于地图数据中真实的边界多边形，计算查询点到国界的最短球面距离（到线段而不只是顶点）。
+相邻省份共享的内部边界在构建时被剔除，只保留国家外轮廓。
+"""
+
+import hashlib
+import logging
+
+import numpy as np
+
+from src.utils.distance_calculator import EARTH_RADIUS
+
+logger = logging.getLogger(__name__)
+
+# 每个边界块包含的线段数，块的外接球冠用于剪枝
+DEFAULT_BLOCK_SIZE = 32
+
+# 每批处理的查询点数
+DEFAULT_QUERY_CHUNK = 8192
+
+# 点在多边形内判断时使用的纬度分带宽度（度）
+_LAT_BAND_DEGREES = 0.5
+
+
+def iter_geojson_rings(geojson_data):
+    """
+    遍历GeoJSON数据中所有多边形的环
+
+    参数:
+        geojson_data: GeoJSON格式的地图数据（FeatureCollection）
+
+    返回:
+        (特征索引, 环坐标数组) 的生成器，环坐标数组形状为(K, 2)，列为(经度, 纬度)
+    """
+    for feature_index, feature in enumerate(geojson_data['features']):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        for polygon_coords in polygons:
+            for ring in polygon_coords:
+                ring = np.asarray(ring, dtype=np.float64)
+                if ring.ndim == 2 and len(ring) >= 2:
+                    yield feature_index, ring[:, :2]
+
+
+def _to_unit_vectors(lons, lats):
+    """
+    将经纬度（度）转换为三维单位向量，返回形状为(N, 3)的数组
+    """
+    lon = np.radians(lons)
+    lat = np.radians(lats)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _angle_between(u, v):
+    """
+    计算两组单位向量之间的夹角（弧度），在小角度时保持精度
+    """
+    cross = np.linalg.norm(np.cross(u, v), axis=-1)
+    dot = np.einsum('...i,...i->...', u, v)
+    return np.arctan2(cross, dot)
+
+
+def _block_min_angle(p, block_vectors):
+    """
+    计算一组点到一个块内所有大圆弧线段的最短夹角（弧度）
+
+    参数:
+        p: 查询点单位向量，形状为(M, 3)
+        block_vectors: 块内线段的向量，形状为(3, 5K)，依次为起点a、终点b、大圆单位法向量n
+                       （退化线段为零向量）以及预先计算的 n×a 和 b×n
+
+    返回:
+        numpy.ndarray: 长度为M的最短夹角数组
+    """
+    dots = p @ block_vectors
+    pa, pb, pn, pta, ptb = np.split(dots, 5, axis=1)
+    # 点到线段两端点的距离，取点积较大的端点
+    angle = np.arccos(np.minimum(np.maximum(pa, pb), 1.0))
+    # 点在大圆上的投影落在线段内时，距离为点到大圆的夹角
+    inside = (pta >= 0) & (ptb >= 0)
+    to_circle = np.arcsin(np.minimum(np.abs(pn), 1.0))
+    np.minimum(angle, to_circle, out=angle, where=inside)
+    return angle.min(axis=1)
+
+
+class BorderDistanceEngine:
+    """
+    边界距离计算引擎
+
+    构建时从地图数据中提取所有环的线段，剔除被偶数个环共享的内部边界，
+    再把剩余线段按顺序分块，并为每块计算外接球冠（中心和角半径）。
+    查询时先用球冠给出每块的距离下界和上界，只对可能包含最近线段的块做精确计算。
+    """
+
+    def __init__(self, geojson_data, block_size=DEFAULT_BLOCK_SIZE, radius=EARTH_RADIUS):
+        """
+        初始化边界距离计算引擎
+
+        参数:
+            geojson_data: GeoJSON格式的地图数据
+            block_size: 每个剪枝块包含的线段数
+            radius: 地球半径（公里）
+        """
+        self.radius = radius
+        self.block_size = block_size
+
+        starts, ends = self._extract_boundary_segments(geojson_data)
+        if len(starts) == 0:
+            raise ValueError("地图数据中没有可用的边界线段")
+        self.segment_starts = starts
+        self.segment_ends = ends
+        self._boundary_hash = None
+
+        self._a = _to_unit_vectors(starts[:, 0], starts[:, 1])
+        self._b = _to_unit_vectors(ends[:, 0], ends[:, 1])
+        normal = np.cross(self._a, self._b)
+        norm = np.linalg.norm(normal, axis=1)
+        self._n = np.where(norm[:, np.newaxis] > 0, normal / np.where(norm > 0, norm, 1.0)[:, np.newaxis], 0.0)
+        ta = np.cross(self._n, self._a)
+        tb = np.cross(self._b, self._n)
+
+        self._build_blocks()
+        # 每块的线段向量按(3, 5K)排列，查询时一次矩阵乘法得到全部点积
+        self._block_vectors = [
+            np.concatenate([v[start:end] for v in (self._a, self._b, self._n, ta, tb)]).T.copy()
+            for start, end in zip(self._block_starts, self._block_ends)
+        ]
+        self._build_lat_bands()
+        logger.debug(f"边界距离引擎已构建: {len(starts)}条边界线段, {len(self._block_starts)}个剪枝块")
+
+    @staticmethod
+    def _extract_boundary_segments(geojson_data):
+        """
+        提取外轮廓线段：同一条线段被偶数个环共享时视为内部边界并剔除
+
+        返回:
+            (起点数组, 终点数组)，形状均为(S, 2)，列为(经度, 纬度)
+        """
+        rings = [ring for _, ring in iter_geojson_rings(geojson_data)]
+        if not rings:
+            return np.empty((0, 2)), np.empty((0, 2))
+        starts = np.concatenate([ring[:-1] for ring in rings])
+        ends = np.concatenate([ring[1:] for ring in rings])
+
+        # 无向线段的规范表示：端点按字典序排列
+        swap = (starts[:, 0] > ends[:, 0]) | ((starts[:, 0] == ends[:, 0]) & (starts[:, 1] > ends[:, 1]))
+        lo = np.where(swap[:, np.newaxis], ends, starts)
+        hi = np.where(swap[:, np.newaxis], starts, ends)
+        keys = np.ascontiguousarray(np.column_stack((lo, hi))).view(np.dtype((np.void, 32))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+        # 保留出现奇数次的线段，并去掉零长度线段
+        keep = (counts[inverse] % 2 == 1) & np.any(starts != ends, axis=1)
+        # 同一条外轮廓线段只保留第一次出现
+        first = np.zeros(len(keys), dtype=bool)
+        _, first_index = np.unique(inverse, return_index=True)
+        first[first_index] = True
+        keep &= first
+        return starts[keep], ends[keep]
+
+    def _build_blocks(self):
+        """
+        将线段按顺序分块，计算每块的外接球冠
+        """
+        n_segments = len(self._a)
+        self._block_starts = np.arange(0, n_segments, self.block_size)
+        self._block_ends = np.minimum(self._block_starts + self.block_size, n_segments)
+
+        centers = np.add.reduceat(self._a + self._b, self._block_starts, axis=0)
+        centers /= np.linalg.norm(centers, axis=1)[:, np.newaxis]
+        block_of_segment = np.repeat(np.arange(len(self._block_starts)),
+                                     self._block_ends - self._block_starts)
+        seg_centers = centers[block_of_segment]
+        # 半径小于90度的球冠是凸的，包含两个端点即包含整条大圆弧
+        seg_radius = np.maximum(_angle_between(seg_centers, self._a), _angle_between(seg_centers, self._b))
+        self._block_centers = centers
+        self._block_radius = np.maximum.reduceat(seg_radius, self._block_starts)
+
+    def _build_lat_bands(self):
+        """
+        按纬度分带索引线段，用于射线法判断点是否在边界内
+        """
+        lat_lo = np.minimum(self.segment_starts[:, 1], self.segment_ends[:, 1])
+        lat_hi = np.maximum(self.segment_starts[:, 1], self.segment_ends[:, 1])
+        self._band_origin = np.floor(lat_lo.min() / _LAT_BAND_DEGREES) * _LAT_BAND_DEGREES
+        first = np.floor((lat_lo - self._band_origin) / _LAT_BAND_DEGREES).astype(np.intp)
+        last = np.floor((lat_hi - self._band_origin) / _LAT_BAND_DEGREES).astype(np.intp)
+        n_bands = int(last.max()) + 1
+
+        counts = last - first + 1
+        segment_ids = np.repeat(np.arange(len(first)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        band_ids = np.repeat(first, counts) + offsets
+        order = np.argsort(band_ids, kind='stable')
+        self._band_segments = segment_ids[order]
+        self._band_offsets = np.concatenate(([0], np.cumsum(np.bincount(band_ids, minlength=n_bands))))
+        self._bbox = (self.segment_starts[:, 0].min(), self.segment_starts[:, 1].min(),
+                      self.segment_starts[:, 0].max(), self.segment_starts[:, 1].max())
+
+    @property
+    def boundary_hash(self):
+        """
+        边界线段的哈希值，可作为派生结果（缓冲区、距离场等）的缓存键
+        """
+        if self._boundary_hash is None:
+            digest = hashlib.sha1()
+            digest.update(np.ascontiguousarray(self.segment_starts).tobytes())
+            digest.update(np.ascontiguousarray(self.segment_ends).tobytes())
+            self._boundary_hash = digest.hexdigest()
+        return self._boundary_hash
+
+    def _update_blocks(self, p, best, query_index, block_index):
+        """
+        对(查询点, 块)配对按块分组做精确计算，并用结果更新best
+        """
+        if query_index.size == 0:
+            return
+        order = np.argsort(block_index, kind='stable')
+        query_index = query_index[order]
+        block_index = block_index[order]
+        bounds = np.flatnonzero(np.r_[True, block_index[1:] != block_index[:-1], True])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            qi = query_index[start:end]
+            best[qi] = np.minimum(best[qi], _block_min_angle(p[qi], self._block_vectors[block_index[start]]))
+
+    def _min_angle_chunk(self, p):
+        """
+        计算一批查询点到边界的最短夹角（弧度）
+        """
+        n_query = len(p)
+        center_angle = np.arccos(np.clip(p @ self._block_centers.T, -1.0, 1.0))
+        lower = np.maximum(center_angle - self._block_radius, 0.0)
+
+        # 第一遍：用下界最小的块给出精确的上界
+        nearest_block = np.argmin(lower, axis=1)
+        best = np.full(n_query, np.inf)
+        self._update_blocks(p, best, np.arange(n_query), nearest_block)
+
+        # 第二遍：只计算下界不超过当前上界的其余块
+        candidate = lower <= best[:, np.newaxis]
+        candidate[np.arange(n_query), nearest_block] = False
+        query_index, block_index = np.nonzero(candidate)
+        self._update_blocks(p, best, query_index, block_index)
+        return best
+
+    def distance_to_border(self, lats, lons, chunk_size=DEFAULT_QUERY_CHUNK):
+        """
+        计算查询点到边界的最短球面距离
+
+        参数:
+            lats, lons: 查询点的纬度和经度（度），标量或数组
+            chunk_size: 每批处理的查询点数
+
+        返回:
+            numpy.ndarray: 与输入形状相同的距离数组（公里）
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        shape = np.broadcast(lats, lons).shape
+        lats, lons = [np.broadcast_to(v, shape).ravel() for v in (lats, lons)]
+
+        p = _to_unit_vectors(lons, lats)
+        angles = np.empty(len(p))
+        for start in range(0, len(p), chunk_size):
+            angles[start:start + chunk_size] = self._min_angle_chunk(p[start:start + chunk_size])
+        return (angles * self.radius).reshape(shape)
+
+    def contains(self, lats, lons):
+        """
+        判断查询点是否位于边界内（经纬度平面上的射线法）
+
+        参数:
+            lats, lons: 查询点的纬度和经度（度），标量或数组
+
+        返回:
+            numpy.ndarray: 与输入形状相同的布尔数组
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        shape = np.broadcast(lats, lons).shape
+        lats, lons = [np.broadcast_to(v, shape).ravel() for v in (lats, lons)]
+        inside = np.zeros(len(lats), dtype=bool)
+
+        min_lon, min_lat, max_lon, max_lat = self._bbox
+        in_bbox = (lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)
+        query_index = np.flatnonzero(in_bbox)
+        if query_index.size == 0:
+            return inside.reshape(shape)
+
+        bands = np.floor((lats[query_index] - self._band_origin) / _LAT_BAND_DEGREES).astype(np.intp)
+        bands = np.clip(bands, 0, len(self._band_offsets) - 2)
+        x0, y0 = self.segment_starts[:, 0], self.segment_starts[:, 1]
+        x1, y1 = self.segment_ends[:, 0], self.segment_ends[:, 1]
+        for band in np.unique(bands):
+            qi = query_index[bands == band]
+            seg = self._band_segments[self._band_offsets[band]:self._band_offsets[band + 1]]
+            if seg.size == 0:
+                continue
+            py = lats[qi][:, np.newaxis]
+            px = lons[qi][:, np.newaxis]
+            sy0, sy1 = y0[seg], y1[seg]
+            crosses = (sy0 > py) != (sy1 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_cross = x0[seg] + (py - sy0) * (x1[seg] - x0[seg]) / (sy1 - sy0)
+            crossings = np.count_nonzero(crosses & (px < x_cross), axis=1)
+            inside[qi] = crossings % 2 == 1
+        return inside.reshape(shape)
+
+    def distance_to_region(self, lats, lons, chunk_size=DEFAULT_QUERY_CHUNK):
+        """
+        计算查询点到边界所围区域的最短距离，区域内的点距离为0
+
+        参数:
+            lats, lons: 查询点的纬度和经度（度），标量或数组
+            chunk_size: 每批处理的查询点数
+
+        返回:
+            numpy.ndarray: 与输入形状相同的距离数组（公里）
+        """
+        distance = self.distance_to_border(lats, lons, chunk_size=chunk_size)
+        distance[self.contains(lats, lons)] = 0.0
+        return distance
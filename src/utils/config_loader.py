@@ -56,7 +56,13 @@ class ConfigLoader:
                 "output_dir": "outputs",
                 "show_map": True,
                 "data_dir": "data",
-                "log_level": "info"
+                "log_level": "info",
+                "distance_field_path": "data/china_distance_field.npy",
+                "geometry_cache": True,
+                "dataset_registry_size": 8,
+                "formats": ["svg", "png"],
+                "compact_svg": False,
+                "svg_quantization": 20000
             },
             "china": {
                 "filename": "china_map",
@@ -64,10 +70,16 @@ class ConfigLoader:
             },
             "range": {
                 "radius": 8000,
-                "filename": "china_8000km_range"
+                "filename": "china_8000km_range",
+                "projection": None
+            },
+            "distance-field": {
+                "resolution": 0.1,
+                "workers": None
             },
             "download": {
-                "china_data_path": "data/china.json"
+                "china_data_path": "data/china.json",
+                "china_data_checksum": None
             },
             "world": {
                 "filename": "world_map",
@@ -76,7 +88,32 @@ class ConfigLoader:
                     "primary": "https://raw.githubusercontent.com/datasets/geo-countries/master/data/countries.geojson",
                     "alternative": "https://cdn.jsdelivr.net/npm/world-atlas@2/countries-110m.json"
                 },
-                "local_path": "data/world.json"
+                "local_path": "data/world.json",
+                "json_checksums": {
+                    "primary": None,
+                    "alternative": None
+                },
+                "download_deadline": 60
+            },
+            "tiles": {
+                "output_path": "outputs/tiles.mbtiles",
+                "min_zoom": 0,
+                "max_zoom": 7,
+                "radius": 8000,
+                "layers": ["world", "china", "range"],
+                "workers": None
+            },
+            "batch": {
+                "workers": None,
+                "timeout": 600
+            },
+            "serve": {
+                "host": "127.0.0.1",
+                "port": 8765,
+                "cache_mb": 256
+            },
+            "projection": {
+                "cache_dir": "data/projected"
             }
         }
     
@@ -151,5 +188,22 @@ class ConfigLoader:
             return False
 
 
-# 创建一个全局配置加载器实例
-config_loader = ConfigLoader()
\ No newline at end of file
+# 全局配置加载器实例，首次使用时才创建（读取配置文件）
+_config_loader = None
+
+
+def get_config_loader():
+    """
+    返回全局配置加载器实例（首次调用时加载默认配置文件）
+    """
+    global _config_loader
+    if _config_loader is None:
+        _config_loader = ConfigLoader()
+    return _config_loader
+
+
+def __getattr__(name):
+    # 兼容旧的模块属性 config_loader（PEP 562），访问时才创建实例
+    if name == 'config_loader':
+        return get_config_loader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
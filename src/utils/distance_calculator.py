@@ -3,6 +3,11 @@ import numpy as np
 # 地球半径（公里）
 EARTH_RADIUS = 6371.0
 
+# WGS84椭球参数（公里）
+WGS84_A = 6378.137  # 赤道半径
+WGS84_B = 6356.7523142  # 极半径
+WGS84_F = (WGS84_A - WGS84_B) / WGS84_A  # 扁率
+
 
 def great_circle_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
     """
@@ -27,29 +32,29 @@ def great_circle_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
     
     return c * radius  # 距离（公里）
 
-def vincenty_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
+def _vincenty_scalar(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
     """
-    计算地球表面两点之间的距离（Vincenty公式，更精确但计算量更大）
+    单个点对的Vincenty距离（标量循环，最多迭代20次，未收敛时回退到哈维正弦公式）
     
     参数:
         lat1, lon1: 第一个点的纬度和经度（度）
         lat2, lon2: 第二个点的纬度和经度（度）
-        radius: 地球半径（默认6371公里）
+        radius: 回退到哈维正弦公式时使用的地球半径（默认6371公里）
     
     返回:
         float: 两点之间的距离（公里）
     """
     # 将经纬度转换为弧度
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    phi1, lambda1, phi2, lambda2 = map(np.radians, [lat1, lon1, lat2, lon2])
     
     # Vincenty公式
-    a = 6378.137  # 赤道半径（公里）
-    b = 6356.7523142  # 极半径（公里）
-    f = (a - b) / a  # 扁率
+    a = WGS84_A
+    b = WGS84_B
+    f = WGS84_F
     
-    L = lon2 - lon1
-    U1 = np.arctan((1 - f) * np.tan(lat1))
-    U2 = np.arctan((1 - f) * np.tan(lat2))
+    L = lambda2 - lambda1
+    U1 = np.arctan((1 - f) * np.tan(phi1))
+    U2 = np.arctan((1 - f) * np.tan(phi2))
     
     sinU1 = np.sin(U1)
     cosU1 = np.cos(U1)
@@ -67,7 +72,7 @@ def vincenty_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
                           (cosU1 * sinU2 - sinU1 * cosU2 * cosLambda) ** 2)
         
         if sinSigma == 0:
-            return 0  # 两点重合
+            return 0.0  # 两点重合
         
         cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLambda
         sigma = np.arctan2(sinSigma, cosSigma)
@@ -88,8 +93,8 @@ def vincenty_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
     
     # 计算最终距离
     if iter_limit == 0:
-        # 迭代未收敛，回退到哈维正弦公式
-        return great_circle_distance(lat1, lon1, lat2, lon2, radius)
+        # 迭代未收敛，回退到哈维正弦公式（使用原始的角度坐标）
+        return float(great_circle_distance(lat1, lon1, lat2, lon2, radius))
     
     uSq = cosSqAlpha * (a ** 2 - b ** 2) / (b ** 2)
     A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
@@ -97,4 +102,317 @@ def vincenty_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
     deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) - 
                               B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
     
-    return b * A * (sigma - deltaSigma)
\ No newline at end of file
+    return float(b * A * (sigma - deltaSigma))
+
+def vincenty_distance(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
+    """
+    计算地球表面两点之间的距离（Vincenty公式，更精确但计算量更大）
+
+    标量输入使用标量循环，数组输入使用数组版vincenty_inverse；最多迭代20次，未收敛时回退到哈维正弦公式
+    
+    参数:
+        lat1, lon1: 第一个点的纬度和经度（度），标量或数组
+        lat2, lon2: 第二个点的纬度和经度（度），标量或数组
+        radius: 回退到哈维正弦公式时使用的地球半径（默认6371公里）
+    
+    返回:
+        float: 两点之间的距离（公里）；输入为数组时返回按numpy规则广播后的距离数组
+    """
+    if all(np.ndim(value) == 0 for value in (lat1, lon1, lat2, lon2)):
+        return _vincenty_scalar(lat1, lon1, lat2, lon2, radius)
+    return vincenty_inverse(lat1, lon1, lat2, lon2, max_iter=20, radius=radius)
+
+# 分块计算时单个中间矩阵允许的最大元素数（约32MB的float64）
+DEFAULT_MAX_CHUNK_ELEMENTS = 4 * 1024 * 1024
+
+
+def _as_coordinate_arrays(lats, lons):
+    """
+    将纬度、经度转换为一维float64数组（弧度）
+
+    参数:
+        lats, lons: 纬度和经度（度），标量或数组
+
+    返回:
+        (lat_rad, lon_rad) 一维数组
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64)).ravel()
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64)).ravel()
+    if lats.shape != lons.shape:
+        raise ValueError(f"纬度和经度数组长度不一致: {lats.shape} != {lons.shape}")
+    return np.radians(lats), np.radians(lons)
+
+
+def _chunk_rows(n_rows, n_cols, chunk_size=None):
+    """
+    根据内存上限计算每块的行数，并生成分块的切片
+
+    参数:
+        n_rows: 总行数
+        n_cols: 列数
+        chunk_size: 每块行数，默认根据DEFAULT_MAX_CHUNK_ELEMENTS自动计算
+
+    返回:
+        切片对象的生成器
+    """
+    if chunk_size is None:
+        chunk_size = max(1, DEFAULT_MAX_CHUNK_ELEMENTS // max(1, n_cols))
+    for start in range(0, n_rows, chunk_size):
+        yield slice(start, min(start + chunk_size, n_rows))
+
+
+def _haversine_block(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """
+    计算一块点对之间的中心角（弧度），lat1/lon1为列向量，lat2/lon2为行向量
+    """
+    dlat = lat2[np.newaxis, :] - lat1[:, np.newaxis]
+    dlon = lon2[np.newaxis, :] - lon1[:, np.newaxis]
+    a = np.sin(dlat / 2) ** 2 + cos_lat1[:, np.newaxis] * cos_lat2[np.newaxis, :] * np.sin(dlon / 2) ** 2
+    # 浮点误差可能使a略微超出[0, 1]
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2 * np.arcsin(np.sqrt(a))
+
+
+def great_circle_distance_matrix(lats1, lons1, lats2, lons2, radius=EARTH_RADIUS, chunk_size=None):
+    """
+    批量计算两组点之间的大圆距离矩阵（Haversine公式）
+
+    按行分块计算，每块的中间数组大小受DEFAULT_MAX_CHUNK_ELEMENTS限制
+
+    参数:
+        lats1, lons1: 第一组点的纬度和经度数组（度），长度为N
+        lats2, lons2: 第二组点的纬度和经度数组（度），长度为M
+        radius: 地球半径（默认6371公里）
+        chunk_size: 每块计算的行数，默认自动计算
+
+    返回:
+        numpy.ndarray: 形状为(N, M)的距离矩阵（公里）
+    """
+    lat1, lon1 = _as_coordinate_arrays(lats1, lons1)
+    lat2, lon2 = _as_coordinate_arrays(lats2, lons2)
+    cos_lat1 = np.cos(lat1)
+    cos_lat2 = np.cos(lat2)
+
+    result = np.empty((lat1.size, lat2.size), dtype=np.float64)
+    for rows in _chunk_rows(lat1.size, lat2.size, chunk_size):
+        result[rows] = _haversine_block(lat1[rows], lon1[rows], cos_lat1[rows],
+                                        lat2, lon2, cos_lat2)
+    result *= radius
+    return result
+
+
+def min_great_circle_distance(lats1, lons1, lats2, lons2, radius=EARTH_RADIUS, chunk_size=None,
+                              return_index=False):
+    """
+    计算第一组中每个点到第二组点的最小大圆距离（按行求最小值）
+
+    与先计算完整距离矩阵再求最小值等价，但分块计算并立即归约，内存占用与N×M无关
+
+    参数:
+        lats1, lons1: 查询点的纬度和经度数组（度），长度为N
+        lats2, lons2: 参考点的纬度和经度数组（度），长度为M
+        radius: 地球半径（默认6371公里）
+        chunk_size: 每块计算的行数，默认自动计算
+        return_index: 是否同时返回最近参考点的索引
+
+    返回:
+        numpy.ndarray: 长度为N的最小距离数组（公里）
+        如果return_index为True，返回 (最小距离数组, 最近参考点索引数组)
+    """
+    lat1, lon1 = _as_coordinate_arrays(lats1, lons1)
+    lat2, lon2 = _as_coordinate_arrays(lats2, lons2)
+    if lat2.size == 0:
+        raise ValueError("参考点数组不能为空")
+    cos_lat1 = np.cos(lat1)
+    cos_lat2 = np.cos(lat2)
+
+    min_dist = np.empty(lat1.size, dtype=np.float64)
+    min_index = np.empty(lat1.size, dtype=np.intp)
+    for rows in _chunk_rows(lat1.size, lat2.size, chunk_size):
+        block = _haversine_block(lat1[rows], lon1[rows], cos_lat1[rows],
+                                 lat2, lon2, cos_lat2)
+        index = np.argmin(block, axis=1)
+        min_index[rows] = index
+        min_dist[rows] = block[np.arange(block.shape[0]), index]
+    min_dist *= radius
+
+    if return_index:
+        return min_dist, min_index
+    return min_dist
+
+
+def vincenty_inverse(lat1, lon1, lat2, lon2, tol=1e-12, max_iter=200, return_status=False, radius=EARTH_RADIUS):
+    """
+    数组版Vincenty反解，计算椭球面上点对之间的距离
+
+    输入按numpy规则广播，所有元素同时迭代；每次迭代后已收敛的元素被移出活动集合，
+    只对仍未收敛的元素继续计算。迭代次数用尽仍未收敛的元素（通常是接近对跖点的点对）
+    单独回退到哈维正弦公式
+
+    参数:
+        lat1, lon1: 第一个点的纬度和经度（度），标量或数组
+        lat2, lon2: 第二个点的纬度和经度（度），标量或数组
+        tol: lambda收敛阈值（弧度）
+        max_iter: 最大迭代次数
+        return_status: 是否同时返回回退掩码
+        radius: 回退到哈维正弦公式时使用的地球半径（默认6371公里）
+
+    返回:
+        numpy.ndarray: 距离数组（公里），形状为输入广播后的形状
+        如果return_status为True，返回 (距离数组, 回退掩码)，回退掩码为True的元素
+        未收敛并使用了哈维正弦公式的结果
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64)
+                                                   for v in (lat1, lon1, lat2, lon2)])
+    shape = lat1.shape
+    lat1, lon1, lat2, lon2 = [np.radians(v).ravel() for v in (lat1, lon1, lat2, lon2)]
+    a, b, f = WGS84_A, WGS84_B, WGS84_F
+
+    L = lon2 - lon1
+    U1 = np.arctan((1 - f) * np.tan(lat1))
+    U2 = np.arctan((1 - f) * np.tan(lat2))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    n = L.size
+    lambda_ = L.copy()
+    sinSigma = np.zeros(n)
+    cosSigma = np.ones(n)
+    sigma = np.zeros(n)
+    cosSqAlpha = np.ones(n)
+    cos2SigmaM = np.zeros(n)
+
+    # 活动集合：仍在迭代的元素索引
+    active = np.arange(n)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        lam = lambda_[active]
+        sU1, cU1, sU2, cU2 = sinU1[active], cosU1[active], sinU2[active], cosU2[active]
+        sinLambda = np.sin(lam)
+        cosLambda = np.cos(lam)
+        sS = np.sqrt((cU2 * sinLambda) ** 2 + (cU1 * sU2 - sU1 * cU2 * cosLambda) ** 2)
+        cS = sU1 * sU2 + cU1 * cU2 * cosLambda
+        sg = np.arctan2(sS, cS)
+
+        # 两点重合时sinSigma为0，距离为0，直接视为已收敛
+        coincident = sS == 0
+        safe_sS = np.where(coincident, 1.0, sS)
+        sinAlpha = cU1 * cU2 * sinLambda / safe_sS
+        cSqA = 1 - sinAlpha ** 2
+        # 赤道上的线cosSqAlpha为0
+        safe_cSqA = np.where(cSqA == 0, 1.0, cSqA)
+        c2SM = np.where(cSqA == 0, 0.0, cS - 2 * sU1 * sU2 / safe_cSqA)
+
+        C = f / 16 * cSqA * (4 + f * (4 - 3 * cSqA))
+        new_lam = L[active] + (1 - C) * f * sinAlpha * (
+            sg + C * sS * (c2SM + C * cS * (-1 + 2 * c2SM ** 2)))
+
+        sinSigma[active] = sS
+        cosSigma[active] = cS
+        sigma[active] = sg
+        cosSqAlpha[active] = cSqA
+        cos2SigmaM[active] = c2SM
+        lambda_[active] = new_lam
+
+        done = coincident | (np.abs(new_lam - lam) <= tol)
+        active = active[~done]
+
+    uSq = cosSqAlpha * (a ** 2 - b ** 2) / (b ** 2)
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+    deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) -
+                                 B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+    distance = b * A * (sigma - deltaSigma)
+
+    # 未收敛的元素单独回退到哈维正弦公式
+    fallback = np.zeros(n, dtype=bool)
+    if active.size:
+        fallback[active] = True
+        distance[active] = great_circle_distance(*map(np.degrees, [lat1[active], lon1[active],
+                                                                   lat2[active], lon2[active]]), radius)
+
+    distance = distance.reshape(shape)
+    if return_status:
+        return distance, fallback.reshape(shape)
+    return distance
+
+
+def vincenty_distance_matrix(lats1, lons1, lats2, lons2, chunk_size=None):
+    """
+    批量计算两组点之间的Vincenty距离矩阵，按行分块计算
+
+    参数:
+        lats1, lons1: 第一组点的纬度和经度数组（度），长度为N
+        lats2, lons2: 第二组点的纬度和经度数组（度），长度为M
+        chunk_size: 每块计算的行数，默认自动计算
+
+    返回:
+        numpy.ndarray: 形状为(N, M)的距离矩阵（公里）
+    """
+    lat1, lon1 = map(np.degrees, _as_coordinate_arrays(lats1, lons1))
+    lat2, lon2 = map(np.degrees, _as_coordinate_arrays(lats2, lons2))
+    result = np.empty((lat1.size, lat2.size), dtype=np.float64)
+    for rows in _chunk_rows(lat1.size, lat2.size, chunk_size):
+        result[rows] = vincenty_inverse(lat1[rows, np.newaxis], lon1[rows, np.newaxis],
+                                        lat2[np.newaxis, :], lon2[np.newaxis, :])
+    return result
+
+
+def min_vincenty_distance(lats1, lons1, lats2, lons2, chunk_size=None, return_index=False):
+    """
+    计算第一组中每个点到第二组点的最小Vincenty距离（按行求最小值），分块归约
+
+    参数:
+        lats1, lons1: 查询点的纬度和经度数组（度），长度为N
+        lats2, lons2: 参考点的纬度和经度数组（度），长度为M
+        chunk_size: 每块计算的行数，默认自动计算
+        return_index: 是否同时返回最近参考点的索引
+
+    返回:
+        numpy.ndarray: 长度为N的最小距离数组（公里）
+        如果return_index为True，返回 (最小距离数组, 最近参考点索引数组)
+    """
+    lat1, lon1 = map(np.degrees, _as_coordinate_arrays(lats1, lons1))
+    lat2, lon2 = map(np.degrees, _as_coordinate_arrays(lats2, lons2))
+    if lat2.size == 0:
+        raise ValueError("参考点数组不能为空")
+
+    min_dist = np.empty(lat1.size, dtype=np.float64)
+    min_index = np.empty(lat1.size, dtype=np.intp)
+    for rows in _chunk_rows(lat1.size, lat2.size, chunk_size):
+        block = vincenty_inverse(lat1[rows, np.newaxis], lon1[rows, np.newaxis],
+                                 lat2[np.newaxis, :], lon2[np.newaxis, :])
+        index = np.argmin(block, axis=1)
+        min_index[rows] = index
+        min_dist[rows] = block[np.arange(block.shape[0]), index]
+
+    if return_index:
+        return min_dist, min_index
+    return min_dist
+
+
+def destination_point(lats, lons, bearings, distances, radius=EARTH_RADIUS):
+    """
+    球面正解：从起点沿给定方位角走给定距离后到达的点（向量化，参数按numpy规则广播）
+
+    参数:
+        lats, lons: 起点的纬度和经度（度）
+        bearings: 方位角（度，正北为0，顺时针）
+        distances: 距离（公里）
+        radius: 地球半径（默认6371公里）
+
+    返回:
+        (纬度数组, 经度数组)，经度归一化到[-180, 180)
+    """
+    lat1 = np.radians(lats)
+    lon1 = np.radians(lons)
+    theta = np.radians(bearings)
+    delta = np.asarray(distances, dtype=np.float64) / radius
+
+    sin_lat2 = np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(theta)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(lat1),
+                             np.cos(delta) - np.sin(lat1) * sin_lat2)
+    lon2 = (np.degrees(lon2) + 180.0) % 360.0 - 180.0
+    return np.degrees(lat2), lon2
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+距离场栅格模块
+
+一次性计算全球经纬网格上每个格点到中国边界的最短距离（境内为0），
+保存为可内存映射的.npy文件，并在旁边写一个很小的.json元数据文件。
+之后任意半径的范围都只是对距离场做阈值或等值线，不需要任何几何计算。
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 默认分辨率（度）
+DEFAULT_RESOLUTION = 0.1
+
+# 每个任务计算的网格行数
+DEFAULT_CHUNK_ROWS = 16
+
+# 元数据格式版本，格式变化时旧文件自动失效
+FIELD_FORMAT_VERSION = 1
+
+# 工作进程中的边界距离引擎和输出文件路径
+_worker_engine = None
+_worker_output_path = None
+
+
+def metadata_path_for(field_path):
+    """
+    返回距离场文件对应的元数据文件路径
+    """
+    return os.path.splitext(field_path)[0] + '.json'
+
+
+def _grid_axes(resolution):
+    """
+    计算网格中心点的纬度（从北到南）和经度（从西到东）
+    """
+    n_rows = int(round(180.0 / resolution))
+    n_cols = int(round(360.0 / resolution))
+    lats = 90.0 - (np.arange(n_rows) + 0.5) * resolution
+    lons = -180.0 + (np.arange(n_cols) + 0.5) * resolution
+    return lats, lons
+
+
+def _source_signature(source_path):
+    """
+    数据源文件的签名（绝对路径、大小和修改时间），用于判断距离场是否过期
+    """
+    stat = os.stat(source_path)
+    return {"path": os.path.abspath(source_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _init_worker(engine, output_path):
+    """
+    工作进程初始化：保存边界距离引擎和输出路径
+    """
+    global _worker_engine, _worker_output_path
+    _worker_engine = engine
+    _worker_output_path = output_path
+
+
+def _compute_rows(task):
+    """
+    计算一块网格行的距离并直接写入内存映射文件
+
+    参数:
+        task: (起始行, 结束行, 分辨率)
+
+    返回:
+        计算的网格行数
+    """
+    row_start, row_end, resolution = task
+    lats, lons = _grid_axes(resolution)
+    grid_lats, grid_lons = np.meshgrid(lats[row_start:row_end], lons, indexing='ij')
+    distances = _worker_engine.distance_to_region(grid_lats, grid_lons)
+
+    field = np.load(_worker_output_path, mmap_mode='r+')
+    field[row_start:row_end] = distances.astype(field.dtype)
+    field.flush()
+    del field
+    return row_end - row_start
+
+
+def build_distance_field(engine, output_path, source_path=None, resolution=DEFAULT_RESOLUTION,
+                         workers=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    构建全球距离场并保存为内存映射的.npy文件
+
+    网格按行分块，由进程池并行计算，每个工作进程直接写入同一个内存映射文件；
+    全部完成后才把临时文件重命名为正式文件并写入元数据
+
+    参数:
+        engine: BorderDistanceEngine实例
+        output_path: 输出的.npy文件路径
+        source_path: 构建引擎所用的地图数据文件路径，记录在元数据中用于判断是否过期
+        resolution: 网格分辨率（度）
+        workers: 并行进程数，默认为CPU核数
+        chunk_rows: 每个任务计算的网格行数
+
+    返回:
+        元数据字典
+    """
+    lats, lons = _grid_axes(resolution)
+    shape = (lats.size, lons.size)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"开始构建距离场: 分辨率{resolution}度, 网格{shape[0]}x{shape[1]}, {workers}个进程")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = output_path + '.tmp.npy'
+    field = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+    del field
+
+    tasks = [(start, min(start + chunk_rows, shape[0]), resolution) for start in range(0, shape[0], chunk_rows)]
+    start_time = time.perf_counter()
+    done_rows = 0
+    if workers == 1:
+        _init_worker(engine, tmp_path)
+        results = map(_compute_rows, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(engine, tmp_path))
+        results = pool.imap_unordered(_compute_rows, tasks)
+    try:
+        for rows in results:
+            done_rows += rows
+            logger.debug(f"距离场进度: {done_rows}/{shape[0]}行")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    metadata = {
+        "version": FIELD_FORMAT_VERSION,
+        "resolution": resolution,
+        "shape": list(shape),
+        "dtype": "float32",
+        "units": "km",
+        "lat_range": [90.0, -90.0],
+        "lon_range": [-180.0, 180.0],
+        "boundary_hash": engine.boundary_hash,
+        "source": _source_signature(source_path) if source_path else None,
+    }
+    os.replace(tmp_path, output_path)
+    with open(metadata_path_for(output_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"距离场已保存到: {output_path}（耗时{time.perf_counter() - start_time:.1f}秒）")
+    return metadata
+
+
+class DistanceField:
+    """
+    只读的距离场，数据通过内存映射零拷贝读取
+    """
+
+    def __init__(self, data, metadata):
+        """
+        参数:
+            data: 形状为(行, 列)的距离数组（公里），第0行为最北
+            metadata: 元数据字典
+        """
+        self.data = data
+        self.metadata = metadata
+        self.resolution = metadata['resolution']
+        self.lats, self.lons = _grid_axes(self.resolution)
+
+    @property
+    def extent(self):
+        """
+        imshow使用的范围 (西, 东, 南, 北)
+        """
+        return (-180.0, 180.0, -90.0, 90.0)
+
+    def sample(self, lats, lons):
+        """
+        取查询点所在格点的距离（最近邻）
+
+        参数:
+            lats, lons: 查询点的纬度和经度（度）
+
+        返回:
+            numpy.ndarray: 距离数组（公里）
+        """
+        rows = np.clip(((90.0 - np.asarray(lats)) / self.resolution).astype(np.intp), 0, self.data.shape[0] - 1)
+        cols = np.clip(((np.asarray(lons) + 180.0) % 360.0 / self.resolution).astype(np.intp),
+                       0, self.data.shape[1] - 1)
+        return np.asarray(self.data[rows, cols], dtype=np.float64)
+
+    def within(self, radius_km):
+        """
+        返回距离不超过radius_km的格点掩码
+        """
+        return self.data <= radius_km
+
+    def decimated(self, step):
+        """
+        返回每隔step个格点取一个的视图（仍然零拷贝），用于低分辨率绘图
+
+        返回:
+            (纬度数组, 经度数组, 距离数组视图)
+        """
+        return self.lats[::step], self.lons[::step], self.data[::step, ::step]
+
+
+def load_distance_field(field_path, source_path=None):
+    """
+    以内存映射方式加载距离场
+
+    参数:
+        field_path: 距离场.npy文件路径
+        source_path: 地图数据文件路径，指定时检查距离场是否由该文件的当前版本构建
+
+    返回:
+        DistanceField实例；文件不存在、格式不符或已过期时返回None
+    """
+    meta_path = metadata_path_for(field_path)
+    if not (os.path.exists(field_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        if metadata.get('version') != FIELD_FORMAT_VERSION:
+            logger.info(f"距离场格式版本不符，忽略: {field_path}")
+            return None
+        if source_path and metadata.get('source') != _source_signature(source_path):
+            logger.info(f"距离场已过期（数据源已变化）: {field_path}")
+            return None
+        data = np.load(field_path, mmap_mode='r')
+        if list(data.shape) != metadata['shape']:
+            logger.warning(f"距离场形状与元数据不符: {field_path}")
+            return None
+        return DistanceField(data, metadata)
+    except Exception as e:
+        logger.warning(f"加载距离场失败: {e}")
+        return None
@@ -1,43 +1,185 @@
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-import os
+"""
+字体配置模块
+
+中文字体的查找结果（选中的字体及其文件路径、系统中所有中文字体候选）保存在缓存文件中，
+以字体目录（及其下一级子目录）的修改时间和matplotlib版本作为签名；
+签名不变时直接使用缓存的结果，不再遍历字体列表，安装或删除字体后自动重新查找。
+同一进程中的所有渲染器共享 ensure_fonts() 的结果。
+"""
+
+import json
 import logging
+import os
+import sys
+
+import matplotlib
 
-# 初始化日志配置
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-def setup_fonts():
-    # 中文字体优先级列表（macOS适用）
-    font_priority = [
-        'PingFang SC',    # macOS系统字体
-        'Arial Unicode MS',  # Office附带字体
-        'Songti SC',      # macOS简体中文
-        'Heiti SC',       # 黑体简体
-        'STHeiti',        # 华文黑体
-        'Hiragino Sans GB' # 冬青黑体
-    ]
-    
-    # 自动选择第一个可用的中文字体
-    for font in font_priority:
-        if any(f.name == font for f in fm.fontManager.ttflist):
-            plt.rcParams['font.sans-serif'] = [font, 'Arial']
-            plt.rcParams['axes.unicode_minus'] = False
-            logger.info(f"已自动选择中英文字体：{font}")
-            return True
+# 中文字体优先级列表（依次为macOS、Office、Linux和Windows常见的中文字体）
+FONT_PRIORITY = [
+    'PingFang SC',    # macOS系统字体
+    'Arial Unicode MS',  # Office附带字体
+    'Songti SC',      # macOS简体中文
+    'Heiti SC',       # 黑体简体
+    'STHeiti',        # 华文黑体
+    'Hiragino Sans GB',  # 冬青黑体
+    'Noto Sans CJK SC',  # Linux常见的思源黑体
+    'WenQuanYi Micro Hei',  # 文泉驿微米黑
+    'Microsoft YaHei',  # Windows微软雅黑
+    'SimHei',         # Windows黑体
+]
+
+# 中文字体名称通常包含这些关键词
+CHINESE_FONT_KEYWORDS = ['sim', 'hei', 'song', 'kai', 'microsoft', 'yahei',
+                         'heiti', 'pingfang', 'wenquanyi', 'noto', 'cjk']
+
+# 中文字体之后的回退字体（DejaVu Sans随matplotlib一起安装）
+FALLBACK_FONTS = ['Arial', 'DejaVu Sans']
+
+# 字体缓存文件路径，默认位于matplotlib的缓存目录中
+FONT_CACHE_PATH = os.path.join(matplotlib.get_cachedir(), 'china8k_fonts.json')
+
+# ensure_fonts的结果，None表示尚未配置
+_fonts_result = None
+
+
+def default_font_dirs():
+    """
+    返回matplotlib查找系统字体的目录和matplotlib自带字体的目录
+    """
+    from matplotlib import font_manager as fm
+    dirs = list(fm.X11FontDirectories) + list(fm.OSXFontDirectories) + list(fm.MSUserFontDirectories)
+    if sys.platform == 'win32':
+        dirs.append(fm.win32FontDirectory())
+    dirs.append(os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf'))
+    return dirs
+
+
+def font_dirs_signature(font_dirs=None):
+    """
+    字体目录签名：各目录及其下一级子目录的修改时间（只读取目录信息，不打开字体文件）
+
+    参数:
+        font_dirs: 字体目录列表，默认为default_font_dirs()
+
+    返回:
+        可以保存为JSON的签名字典
+    """
+    signature = {}
+    for directory in font_dirs if font_dirs is not None else default_font_dirs():
+        directory = os.path.expanduser(directory)
+        try:
+            signature[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        signature[entry.path] = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+    return {"matplotlib": matplotlib.__version__, "dirs": signature}
+
+
+def _scan_fonts():
+    """
+    遍历matplotlib的字体列表，返回 (选中的中文字体, 中文字体候选列表)
+
+    返回:
+        选中的字体为 {"name", "path"} 或None；候选列表为按名称排序的 {"name", "path"} 列表
+    """
+    from matplotlib import font_manager as fm
+    candidates = {}
+    for font in fm.fontManager.ttflist:
+        if font.name in FONT_PRIORITY or any(keyword in font.name.lower() for keyword in CHINESE_FONT_KEYWORDS):
+            candidates.setdefault(font.name, font.fname)
+    chosen = next((name for name in FONT_PRIORITY if name in candidates), None)
+    if chosen is None and candidates:
+        chosen = sorted(candidates)[0]
+    candidate_list = [{"name": name, "path": candidates[name]} for name in sorted(candidates)]
+    return ({"name": chosen, "path": candidates[chosen]} if chosen else None), candidate_list
+
+
+def resolve_fonts(cache_path=None, font_dirs=None, refresh=False):
+    """
+    查找中文字体，优先使用缓存
+
+    参数:
+        cache_path: 缓存文件路径，默认为FONT_CACHE_PATH
+        font_dirs: 用于计算签名的字体目录，默认为default_font_dirs()
+        refresh: 是否忽略缓存重新查找
+
+    返回:
+        {"font": {"name", "path"}或None, "candidates": [{"name", "path"}, ...], "signature": 签名}
+    """
+    cache_path = cache_path or FONT_CACHE_PATH
+    signature = font_dirs_signature(font_dirs)
+    if not refresh:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            font = cached.get('font')
+            if cached.get('signature') == signature and (font is None or os.path.exists(font['path'])):
+                logger.debug(f"使用字体缓存: {cache_path}")
+                return cached
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    font, candidates = _scan_fonts()
+    result = {"font": font, "candidates": candidates, "signature": signature}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"无法写入字体缓存 {cache_path}: {e}")
+    return result
+
+
+def setup_fonts(cache_path=None):
+    """
+    配置matplotlib使用中文字体
+
+    参数:
+        cache_path: 字体缓存文件路径，默认为FONT_CACHE_PATH
+
+    返回:
+        是否找到了中文字体
+    """
+    font = resolve_fonts(cache_path)['font']
+    if font:
+        matplotlib.rcParams['font.sans-serif'] = [font['name']] + FALLBACK_FONTS
+        matplotlib.rcParams['axes.unicode_minus'] = False
+        logger.info(f"已自动选择中英文字体：{font['name']}")
+        return True
     
     # 回退方案
-    plt.rcParams['font.sans-serif'] = ['Arial']
+    matplotlib.rcParams['font.sans-serif'] = list(FALLBACK_FONTS)
     logger.warning("未找到中文字体，中文可能显示异常")
+    return False
+
+
+def ensure_fonts():
+    """
+    配置中文字体（每个进程只配置一次），供渲染器在绘图时调用，导入渲染器模块时不再扫描字体
+
+    返回:
+        是否找到了中文字体
+    """
+    global _fonts_result
+    if _fonts_result is None:
+        _fonts_result = setup_fonts()
+    return _fonts_result
 
 
 # 额外的工具函数：测试特定字体是否可用
 def is_font_available(font_name):
-    """检查指定字体是否可用"""
+    """检查指定字体是否可用（按字体名称在缓存的中文字体候选中查找，或按文件名在系统字体中查找）"""
     try:
+        if any(c['name'].lower() == font_name.lower() for c in resolve_fonts()['candidates']):
+            return True
+        from matplotlib import font_manager as fm
         available_fonts = [f.lower() for f in fm.findSystemFonts(fontpaths=None, fontext='ttf')]
         return font_name.lower() in available_fonts
     except Exception as e:
@@ -47,23 +189,9 @@ def is_font_available(font_name):
 
 # 额外的工具函数：获取系统中可用的中文字体列表
 def get_available_chinese_fonts():
-    """获取系统中可用的中文字体列表"""
+    """获取系统中可用的中文字体列表（来自字体缓存）"""
     try:
-        # 中文字体通常包含这些关键词
-        chinese_keywords = ['sim', 'hei', 'song', 'kai', 'microsoft', 'yahei', 
-                           'heiti', 'pingfang', 'wenquanyi', 'noto', 'cjk']
-        
-        available_fonts = []
-        for font_path in fm.findSystemFonts(fontpaths=None, fontext='ttf'):
-            try:
-                font_name = fm.FontProperties(fname=font_path).get_name()
-                if any(keyword in font_name.lower() for keyword in chinese_keywords):
-                    available_fonts.append(font_name)
-            except Exception as e:
-                logger.debug(f"处理字体路径 {font_path} 时出错: {e}")
-                continue
-        
-        return list(set(available_fonts))  # 去重
+        return [candidate['name'] for candidate in resolve_fonts()['candidates']]
     except Exception as e:
         logger.error(f"获取中文字体列表时出错: {e}")
         return []
@@ -71,6 +199,11 @@ def get_available_chinese_fonts():
 
 # 如果直接运行此脚本，则执行字体配置测试
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    import matplotlib.pyplot as plt
     setup_fonts()
     
     # 显示系统可用的中文字体
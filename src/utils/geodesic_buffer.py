@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测地缓冲区模块
+
+生成边界外扩N公里的真实包络多边形：从区域内部的原点向各个方位角发射大圆射线，
+向量化地采样射线上的目的点并计算它们到区域的距离，取每条射线上最外侧仍在范围内的位置，
+所有射线的结果连接起来就是各点缓冲圆的并集的外轮廓。结果在180度经线处拆分，
+可以直接在经纬度坐标系中绘制。
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from src.utils.distance_calculator import EARTH_RADIUS, destination_point
+
+logger = logging.getLogger(__name__)
+
+# 默认的包络容差（公里），决定射线数量和二分精度
+DEFAULT_TOLERANCE_KM = 50.0
+
+# 射线数量的上下限
+_MIN_BEARINGS = 72
+_MAX_BEARINGS = 2048
+
+# 每条射线上的粗采样点数
+_COARSE_SAMPLES = 24
+
+# 内存中缓存的缓冲区结果数量上限（serve命令接受任意半径，超过时淘汰最久未使用的结果）
+MAX_BUFFER_CACHE_ENTRIES = 32
+
+# 内存中缓存的缓冲区结果，键为 (边界哈希, 半径, 容差)，按最近使用排序
+_buffer_cache = OrderedDict()
+
+
+def buffer_cache_key(boundary_hash, radius_km, tolerance_km):
+    """
+    生成缓冲区缓存键
+
+    参数:
+        boundary_hash: 边界的哈希值（BorderDistanceEngine.boundary_hash）
+        radius_km: 缓冲半径（公里）
+        tolerance_km: 容差（公里）
+
+    返回:
+        元组形式的缓存键
+    """
+    return (boundary_hash, round(float(radius_km), 6), round(float(tolerance_km), 6))
+
+
+def _region_origin(engine):
+    """
+    选择射线原点：边界顶点的球面平均位置，要求位于区域内
+    """
+    starts = np.radians(engine.segment_starts)
+    cos_lat = np.cos(starts[:, 1])
+    mean = np.array([np.mean(cos_lat * np.cos(starts[:, 0])),
+                     np.mean(cos_lat * np.sin(starts[:, 0])),
+                     np.mean(np.sin(starts[:, 1]))])
+    mean /= np.linalg.norm(mean)
+    lat = float(np.degrees(np.arcsin(mean[2])))
+    lon = float(np.degrees(np.arctan2(mean[1], mean[0])))
+    if not engine.contains(lat, lon):
+        raise ValueError("边界顶点的平均位置不在区域内，请显式指定origin参数")
+    return lat, lon
+
+
+def _envelope_distances(engine, origin, bearings, radius_km, tolerance_km):
+    """
+    计算每条射线上最外侧仍在缓冲范围内的位置到原点的距离
+
+    返回:
+        (射线距离数组, 是否整条射线都在范围内的掩码)
+    """
+    max_distance = np.pi * engine.radius
+    origin_lat, origin_lon = origin
+
+    # 粗采样：所有射线上的采样点一次性计算
+    samples = np.linspace(0.0, max_distance, _COARSE_SAMPLES + 1)
+    lats, lons = destination_point(origin_lat, origin_lon, bearings[:, np.newaxis], samples[np.newaxis, :])
+    within = engine.distance_to_region(lats, lons) <= radius_km
+
+    # 每条射线上最后一个在范围内的采样点
+    last_inside = samples.size - 1 - np.argmax(within[:, ::-1], axis=1)
+    full = last_inside == samples.size - 1
+    lo = samples[last_inside]
+    hi = samples[np.minimum(last_inside + 1, samples.size - 1)]
+
+    # 二分：所有射线同时迭代到精度满足容差
+    active = ~full
+    while np.any(active) and np.max(hi[active] - lo[active]) > tolerance_km / 4:
+        mid = (lo + hi) / 2
+        idx = np.flatnonzero(active)
+        lats, lons = destination_point(origin_lat, origin_lon, bearings[idx], mid[idx])
+        inside = engine.distance_to_region(lats, lons) <= radius_km
+        lo[idx[inside]] = mid[idx[inside]]
+        hi[idx[~inside]] = mid[idx[~inside]]
+
+    distances = np.where(full, max_distance, lo)
+    return distances, full
+
+
+def _clip_half_plane(ring, keep_left, x0):
+    """
+    用竖直线 x = x0 裁剪多边形（Sutherland-Hodgman），keep_left为True时保留 x <= x0 的部分
+    """
+    if len(ring) == 0:
+        return ring
+    sign = 1.0 if keep_left else -1.0
+    inside = sign * (x0 - ring[:, 0]) >= 0
+    output = []
+    n = len(ring)
+    for i in range(n):
+        current, previous = ring[i], ring[i - 1]
+        if inside[i] != inside[i - 1]:
+            t = (x0 - previous[0]) / (current[0] - previous[0])
+            output.append([x0, previous[1] + t * (current[1] - previous[1])])
+        if inside[i]:
+            output.append(current)
+    return np.array(output, dtype=np.float64).reshape(-1, 2)
+
+
+def split_ring_at_antimeridian(lats, lons, pole_inside=None):
+    """
+    将经纬度闭合环拆分为不跨越180度经线的多边形
+
+    参数:
+        lats, lons: 环的纬度和经度数组（度），按顺序排列
+        pole_inside: 环绕极点一周时，区域包含的极点纬度（90或-90）
+
+    返回:
+        环列表，每项为形状(K, 2)的(经度, 纬度)数组
+    """
+    lons = np.degrees(np.unwrap(np.radians(lons)))
+    ring = np.column_stack((lons, lats))
+    winding = lons[-1] - lons[0] + (((lons[0] - lons[-1]) + 180.0) % 360.0 - 180.0)
+
+    if abs(winding) > 180.0:
+        # 环绕极点：把环平移到[-180, 180)后，沿180度经线和极点闭合
+        if pole_inside is None:
+            raise ValueError("环绕极点的环需要指定pole_inside")
+        shifted = (lons + 180.0) % 360.0 - 180.0
+        start = int(np.argmin(shifted)) if winding > 0 else int(np.argmax(shifted))
+        ring = np.roll(np.column_stack((shifted, lats)), -start, axis=0)
+        # 环内经度已按方向单调，首尾分别补到两侧的180度经线和极点
+        first_lon, last_lon = (-180.0, 180.0) if winding > 0 else (180.0, -180.0)
+        polygon = np.vstack(([first_lon, ring[0, 1]], ring, [last_lon, ring[-1, 1]],
+                             [last_lon, pole_inside], [first_lon, pole_inside]))
+        return [polygon]
+
+    # 未环绕极点：平移到以区间中心为准，再按需要在±180处裁剪
+    offset = 360.0 * np.round(np.mean([lons.min(), lons.max()]) / 360.0)
+    ring[:, 0] -= offset
+    parts = []
+    for x0, shift in ((180.0, -360.0), (-180.0, 360.0)):
+        if (ring[:, 0] > 180.0 if x0 > 0 else ring[:, 0] < -180.0).any():
+            outside = _clip_half_plane(ring, keep_left=x0 < 0, x0=x0)
+            if len(outside) >= 3:
+                outside[:, 0] += shift
+                parts.append(outside)
+            ring = _clip_half_plane(ring, keep_left=x0 > 0, x0=x0)
+    if len(ring) >= 3:
+        parts.insert(0, ring)
+    return parts
+
+
+def _globe_ring():
+    """
+    覆盖整个经纬度平面的矩形环
+    """
+    return np.array([[-180.0, -90.0], [180.0, -90.0], [180.0, 90.0], [-180.0, 90.0], [-180.0, -90.0]])
+
+
+def _save_polygons(cache_path, polygons):
+    """
+    将多边形列表保存为.npz文件，数组名为 p{多边形序号}_r{环序号}
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    np.savez(cache_path, **{f'p{i}_r{j}': ring for i, polygon in enumerate(polygons)
+                            for j, ring in enumerate(polygon)})
+
+
+def _load_polygons(cache_path):
+    """
+    从.npz文件加载_save_polygons保存的多边形列表
+    """
+    polygons = {}
+    with np.load(cache_path) as data:
+        for name in data.files:
+            i, j = (int(part[1:]) for part in name.split('_'))
+            polygons.setdefault(i, {})[j] = data[name]
+    return [[rings[j] for j in sorted(rings)] for _, rings in sorted(polygons.items())]
+
+
+def _remember_buffer(key, polygons):
+    """
+    把缓冲区结果放入内存缓存，超过MAX_BUFFER_CACHE_ENTRIES时淘汰最久未使用的结果
+    """
+    _buffer_cache[key] = polygons
+    _buffer_cache.move_to_end(key)
+    while len(_buffer_cache) > MAX_BUFFER_CACHE_ENTRIES:
+        _buffer_cache.popitem(last=False)
+
+
+def build_geodesic_buffer(engine, radius_km, tolerance_km=DEFAULT_TOLERANCE_KM, origin=None, cache_dir=None):
+    """
+    生成边界外扩radius_km公里的测地缓冲区多边形
+
+    结果按 (边界哈希, 半径, 容差) 缓存在内存中；指定cache_dir时同时缓存到磁盘
+
+    参数:
+        engine: BorderDistanceEngine实例
+        radius_km: 缓冲半径（公里）
+        tolerance_km: 包络容差（公里），越小射线越多、二分越精细
+        origin: 射线原点 (纬度, 经度)，需位于区域内，默认为边界顶点的球面平均位置
+        cache_dir: 磁盘缓存目录，默认为None（只使用内存缓存）
+
+    返回:
+        多边形列表，与GeoJSON的MultiPolygon坐标结构相同：每个多边形是环的列表，
+        第一个环为外环，其余为洞，每个环为形状(K, 2)的(经度, 纬度)数组，已在180度经线处拆分
+    """
+    key = buffer_cache_key(engine.boundary_hash, radius_km, tolerance_km)
+    if key in _buffer_cache:
+        _buffer_cache.move_to_end(key)
+        return _buffer_cache[key]
+
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, f'buffer_{digest}.npz')
+        if os.path.exists(cache_path):
+            polygons = _load_polygons(cache_path)
+            _remember_buffer(key, polygons)
+            return polygons
+
+    if origin is None:
+        origin = _region_origin(engine)
+
+    circumference = 2 * np.pi * EARTH_RADIUS
+    n_bearings = int(np.clip(np.ceil(circumference / tolerance_km), _MIN_BEARINGS, _MAX_BEARINGS))
+    bearings = np.arange(n_bearings) * (360.0 / n_bearings)
+    distances, full = _envelope_distances(engine, origin, bearings, radius_km, tolerance_km)
+
+    if np.all(full):
+        logger.info(f"{radius_km}公里缓冲区覆盖整个地球")
+        polygons = [[_globe_ring()]]
+    else:
+        lats, lons = destination_point(origin[0], origin[1], bearings, distances)
+        poles_inside = [pole for pole in (90.0, -90.0) if engine.distance_to_region(pole, 0.0) <= radius_km]
+        if len(poles_inside) == 2:
+            # 两个极点都在范围内：包络环围住的是范围外的区域，作为全球矩形的洞
+            holes = split_ring_at_antimeridian(lats, lons)
+            polygons = [[_globe_ring()] + holes]
+        else:
+            pole_inside = poles_inside[0] if poles_inside else None
+            polygons = [[ring] for ring in split_ring_at_antimeridian(lats, lons, pole_inside=pole_inside)]
+        logger.debug(f"{radius_km}公里缓冲区: {n_bearings}条射线, {len(polygons)}个多边形")
+
+    _remember_buffer(key, polygons)
+    if cache_path:
+        _save_polygons(cache_path, polygons)
+    return polygons
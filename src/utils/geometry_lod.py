@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多级细节（LOD）几何简化模块
+
+先按拓扑把所有环拆分为弧段：在多个环交汇的结点处切开，相邻省份或国家共享的边界
+只保留一条规范方向的弧段。再对全部弧段一次性向量化地计算Douglas-Peucker重要度
+（每个顶点在多大的容差下仍会被保留），任意容差的简化结果只是对重要度取阈值，
+共享边界在两侧得到完全相同的简化结果，不会出现缝隙或重叠。
+
+渲染器根据输出的像素大小和显示范围换算出每像素对应的经纬度，自动选择合适的级别。
+"""
+
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 预设的简化级别（容差，单位为度），0表示不简化
+DEFAULT_LOD_TOLERANCES = (0.0, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2)
+
+# 允许的最大偏差（像素）
+DEFAULT_PIXEL_TOLERANCE = 0.5
+
+# 内存中最多保留的LOD几何数量
+MAX_LOD_CACHE_ENTRIES = 8
+
+# 已构建的LOD几何，键为数据集哈希（dataset_fingerprint），按最近使用排序
+_lod_cache = OrderedDict()
+
+
+def _iter_polygons(geometry):
+    """
+    返回几何对象的多边形列表（每个多边形为环列表），非多边形几何返回空列表
+    """
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _canonical_arc(arc):
+    """
+    返回弧段的规范方向（起点不大于终点；闭合弧段比较第二个点和倒数第二个点）及是否反转
+    """
+    first, last = tuple(arc[0]), tuple(arc[-1])
+    if first == last and len(arc) > 2:
+        reverse = tuple(arc[-2]) < tuple(arc[1])
+    else:
+        reverse = last < first
+    return (arc[::-1] if reverse else arc), reverse
+
+
+def _segment_distances(points, starts, ends):
+    """
+    计算各点到对应线段的平面距离（度）
+    """
+    segment = ends - starts
+    length_sq = np.einsum('ij,ij->i', segment, segment)
+    t = np.einsum('ij,ij->i', points - starts, segment) / np.where(length_sq > 0, length_sq, 1.0)
+    t = np.clip(np.where(length_sq > 0, t, 0.0), 0.0, 1.0)
+    offset = points - (starts + t[:, np.newaxis] * segment)
+    return np.hypot(offset[:, 0], offset[:, 1])
+
+
+def douglas_peucker_importance(coords, arc_offsets):
+    """
+    对拼接在一起的多条弧段同时计算Douglas-Peucker重要度
+
+    所有弧段按层同步递归：每一层对全部待分割区间的内部点一次性计算到弦的距离，
+    每个区间取距离最大的点分割。顶点的重要度取分割距离与父区间重要度的较小值，
+    因此重要度单调，按任意容差取阈值都得到合法的简化结果。
+
+    参数:
+        coords: 形状为(N, 2)的坐标数组，各弧段首尾相接地拼接
+        arc_offsets: 各弧段在coords中的起止偏移，长度为弧段数+1
+
+    返回:
+        长度为N的重要度数组，弧段端点为无穷大
+    """
+    importance = np.zeros(len(coords), dtype=np.float64)
+    starts = np.asarray(arc_offsets[:-1], dtype=np.int64)
+    ends = np.asarray(arc_offsets[1:], dtype=np.int64) - 1
+    importance[starts] = np.inf
+    importance[ends] = np.inf
+    parents = np.full(len(starts), np.inf)
+
+    while True:
+        active = ends - starts >= 2
+        starts, ends, parents = starts[active], ends[active], parents[active]
+        if starts.size == 0:
+            return importance
+
+        # 展开所有区间的内部点
+        counts = ends - starts - 1
+        range_id = np.repeat(np.arange(starts.size), counts)
+        first = np.cumsum(counts) - counts
+        index = starts[range_id] + 1 + (np.arange(counts.sum()) - first[range_id])
+        distances = _segment_distances(coords[index], coords[starts[range_id]], coords[ends[range_id]])
+
+        # 每个区间内距离最大的点：按 (区间, 距离) 排序后取每组最后一个
+        order = np.lexsort((distances, range_id))
+        best = order[first + counts - 1]
+        split = index[best]
+        value = np.minimum(distances[best], parents)
+        importance[split] = value
+
+        starts, ends, parents = (np.concatenate((starts, split)), np.concatenate((split, ends)),
+                                 np.concatenate((value, value)))
+
+
+class LODGeometry:
+    """
+    拓扑一致的多级细节几何
+
+    构建时完成拓扑拆分和重要度计算，simplified(tolerance)按容差取阈值并缓存每个级别的结果
+    """
+
+    def __init__(self, geojson_data):
+        """
+        参数:
+            geojson_data: GeoJSON FeatureCollection（多边形以外的几何保持原样）
+        """
+        self.source = geojson_data
+        self._features = list(geojson_data['features'])
+        self._levels = {}
+
+        # 收集所有环（去掉闭合点），记录每个环所属的特征和多边形
+        rings = []
+        self._structure = []
+        for feature in self._features:
+            polygons = []
+            for polygon_coords in _iter_polygons(feature.get('geometry')):
+                ring_ids = []
+                for ring in polygon_coords:
+                    ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                        ring = ring[:-1]
+                    ring_ids.append(len(rings))
+                    rings.append(ring)
+                polygons.append(ring_ids)
+            self._structure.append(polygons)
+
+        self._build_arcs(rings)
+        self.importance = douglas_peucker_importance(self.arc_coords, self.arc_offsets)
+        logger.debug(f"LOD几何: {len(rings)}个环, {len(self.arc_offsets) - 1}条弧段, {len(self.arc_coords)}个顶点")
+
+    def _build_arcs(self, rings):
+        """
+        在结点处把环拆分为弧段，共享的弧段只保留一份规范方向的副本
+        """
+        self._rings = rings
+        self._ring_arcs = []
+        if not rings:
+            self.arc_offsets = np.zeros(1, dtype=np.int64)
+            self.arc_coords = np.empty((0, 2))
+            return
+
+        lengths = np.array([len(ring) for ring in rings], dtype=np.int64)
+        points = np.concatenate(rings)
+        _, vertex_id = np.unique(points, axis=0, return_inverse=True)
+        vertex_id = vertex_id.reshape(-1)
+
+        # 每个顶点在各环中的前后邻点；不同邻点超过2个的顶点是结点
+        ring_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        position = np.arange(len(points)) - ring_start
+        ring_length = np.repeat(lengths, lengths)
+        next_index = ring_start + (position + 1) % np.maximum(ring_length, 1)
+        prev_index = ring_start + (position - 1) % np.maximum(ring_length, 1)
+        pairs = np.unique(np.column_stack((np.concatenate((vertex_id, vertex_id)),
+                                           np.concatenate((vertex_id[next_index], vertex_id[prev_index])))), axis=0)
+        is_junction = (np.bincount(pairs[:, 0]) > 2)[vertex_id]
+
+        arc_index = {}
+        arcs = []
+        offset = 0
+        for ring in rings:
+            junction = is_junction[offset:offset + len(ring)]
+            offset += len(ring)
+            if len(ring) < 3:
+                self._ring_arcs.append(None)
+                continue
+            locked = np.flatnonzero(junction)
+            if locked.size == 0:
+                # 没有结点的环（岛屿或飞地）：从字典序最小的顶点切开，保证共享该环的两侧切点一致
+                locked = np.array([np.lexsort((ring[:, 1], ring[:, 0]))[0]])
+            rotated = np.roll(ring, -locked[0], axis=0)
+            rotated = np.vstack((rotated, rotated[:1]))
+            cuts = np.append(locked - locked[0], len(ring))
+
+            ring_arcs = []
+            for start, end in zip(cuts[:-1], cuts[1:]):
+                arc, reverse = _canonical_arc(rotated[start:end + 1])
+                key = arc.tobytes()
+                if key not in arc_index:
+                    arc_index[key] = len(arcs)
+                    arcs.append(arc)
+                ring_arcs.append((arc_index[key], reverse))
+            self._ring_arcs.append(ring_arcs)
+
+        self.arc_offsets = np.concatenate(([0], np.cumsum([len(arc) for arc in arcs]))).astype(np.int64)
+        self.arc_coords = np.concatenate(arcs) if arcs else np.empty((0, 2))
+
+    def _simplified_ring(self, ring_id, kept_arcs):
+        """
+        用简化后的弧段重新拼接环，点数不足以构成多边形时返回None
+        """
+        ring_arcs = self._ring_arcs[ring_id]
+        if ring_arcs is None:
+            ring = self._rings[ring_id]
+            return np.vstack((ring, ring[:1])) if len(ring) else None
+        pieces = []
+        for k, (arc_id, reverse) in enumerate(ring_arcs):
+            arc = kept_arcs[arc_id][::-1] if reverse else kept_arcs[arc_id]
+            pieces.append(arc if k == 0 else arc[1:])
+        ring = np.concatenate(pieces)
+        return ring if len(ring) >= 4 else None
+
+    def simplified(self, tolerance):
+        """
+        返回按容差简化后的FeatureCollection（结果按容差缓存）
+
+        参数:
+            tolerance: 容差（度），重要度低于容差的顶点被移除
+
+        返回:
+            与原数据结构相同的GeoJSON字典；坍缩为不足3个顶点的环被移除，外环被移除时整个多边形被移除
+        """
+        if tolerance <= 0:
+            return self.source
+        if tolerance in self._levels:
+            return self._levels[tolerance]
+
+        keep = self.importance >= tolerance
+        kept_arcs = [self.arc_coords[start:end][keep[start:end]]
+                     for start, end in zip(self.arc_offsets[:-1], self.arc_offsets[1:])]
+
+        features = []
+        for feature, polygons in zip(self._features, self._structure):
+            geometry = feature.get('geometry')
+            if not polygons:
+                features.append(feature)
+                continue
+            simplified_polygons = []
+            for ring_ids in polygons:
+                rings = [self._simplified_ring(ring_id, kept_arcs) for ring_id in ring_ids]
+                if rings and rings[0] is not None:
+                    simplified_polygons.append([ring for ring in rings if ring is not None])
+            if geometry['type'] == 'Polygon':
+                coordinates = simplified_polygons[0] if simplified_polygons else []
+            else:
+                coordinates = simplified_polygons
+            new_feature = dict(feature)
+            new_feature['geometry'] = {"type": geometry['type'], "coordinates": coordinates}
+            features.append(new_feature)
+
+        data = {key: value for key, value in self.source.items() if key != 'features'}
+        data['features'] = features
+        self._levels[tolerance] = data
+        n_vertices = int(keep.sum())
+        logger.debug(f"LOD级别{tolerance}度: 保留{n_vertices}/{len(keep)}个弧段顶点")
+        return data
+
+
+def get_lod_geometry(geojson_data):
+    """
+    获取地图数据的LOD几何（同一份数据只构建一次，超过MAX_LOD_CACHE_ENTRIES时淘汰最久未使用的结果）
+    """
+    from src.map_generator.basemap_cache import dataset_fingerprint
+
+    key = dataset_fingerprint(geojson_data)
+    if key in _lod_cache:
+        _lod_cache.move_to_end(key)
+        return _lod_cache[key]
+    lod = _lod_cache[key] = LODGeometry(geojson_data)
+    while len(_lod_cache) > MAX_LOD_CACHE_ENTRIES:
+        _lod_cache.popitem(last=False)
+    return lod
+
+
+def select_lod_tolerance(extent, figsize, dpi, levels=DEFAULT_LOD_TOLERANCES,
+                         pixel_tolerance=DEFAULT_PIXEL_TOLERANCE):
+    """
+    根据显示范围和输出像素大小选择简化级别
+
+    参数:
+        extent: 显示范围 (最小经度, 最大经度, 最小纬度, 最大纬度)
+        figsize: 图形尺寸（英寸）(宽, 高)
+        dpi: 输出分辨率（取所有输出格式中最高的）
+        levels: 可选的容差级别（度）
+        pixel_tolerance: 允许的最大偏差（像素）
+
+    返回:
+        不超过 pixel_tolerance 个像素所对应经纬度的最大级别容差
+    """
+    degrees_per_pixel = max((extent[1] - extent[0]) / (figsize[0] * dpi),
+                            (extent[3] - extent[2]) / (figsize[1] * dpi))
+    limit = degrees_per_pixel * pixel_tolerance
+    candidates = [level for level in levels if level <= limit]
+    return max(candidates) if candidates else 0.0
+
+
+def simplify_for_display(geojson_data, extent, figsize, dpi=300, pixel_tolerance=DEFAULT_PIXEL_TOLERANCE):
+    """
+    返回适合在指定范围和像素大小下绘制的简化地图数据
+
+    参数:
+        geojson_data: GeoJSON FeatureCollection
+        extent: 显示范围 (最小经度, 最大经度, 最小纬度, 最大纬度)
+        figsize: 图形尺寸（英寸）(宽, 高)
+        dpi: 输出分辨率
+        pixel_tolerance: 允许的最大偏差（像素）
+
+    返回:
+        简化后的GeoJSON字典，不需要简化时返回原数据
+    """
+    tolerance = select_lod_tolerance(extent, figsize, dpi, pixel_tolerance=pixel_tolerance)
+    if tolerance <= 0:
+        return geojson_data
+    logger.debug(f"显示范围{extent}、{figsize[0]}x{figsize[1]}英寸@{dpi}dpi，使用LOD容差{tolerance}度")
+    return get_lod_geometry(geojson_data).simplified(tolerance)
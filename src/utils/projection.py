@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+地图投影模块
+
+球面方位投影的向量化正算：以给定原点为中心，点的位置由它到原点的球面角距离c和方位角决定，
+各投影只是把c换算为平面半径的方式不同。坐标单位为公里，球半径与距离计算相同（6371公里），
+因此方位等距投影中到原点的距离就是平面上到中心的距离，距离环是真正的圆。
+
+- aeqd: 方位等距，r = R·c，可以显示整个地球
+- laea: 兰伯特方位等积，r = 2R·sin(c/2)，可以显示整个地球
+- ortho: 正射（从太空看到的半球），r = R·sin(c)，只显示c ≤ 90度的半球
+- stere: 球面立体（保角），r = 2R·tan(c/2)，只显示c ≤ 120度的范围
+
+超出显示范围的点沿方位角收到边界圆上，多边形被地平线切开的部分沿边界圆闭合。
+包含原点对跖点的环投影后内外颠倒，用边界圆减去投影的环表示。
+"""
+
+import numpy as np
+
+from src.utils.distance_calculator import EARTH_RADIUS
+
+# 默认的投影原点（中国地理中心附近，经度, 纬度）
+DEFAULT_ORIGIN = (104.0, 36.0)
+
+# 支持的投影：名称 -> (说明, 最大角距离（度）)
+PROJECTIONS = {
+    'aeqd': ('方位等距', 180.0),
+    'laea': ('兰伯特方位等积', 180.0),
+    'ortho': ('正射', 90.0),
+    'stere': ('球面立体', 120.0),
+}
+
+# 投影前按经纬度加密边，使长边投影后成为曲线（度）
+DEFAULT_DENSIFY_DEGREES = 1.0
+
+
+def parse_projection(spec):
+    """
+    解析投影参数
+
+    参数:
+        spec: 投影名称（如 "aeqd"），或 名称:经度,纬度 形式指定原点（如 "aeqd:104,36"）；
+              为None或空字符串时返回None（不投影，按经纬度绘制）
+
+    返回:
+        AzimuthalProjection实例或None
+
+    异常:
+        ValueError: 投影名称或原点格式不正确
+    """
+    if spec is None or isinstance(spec, AzimuthalProjection):
+        return spec
+    spec = str(spec).strip().lower()
+    if not spec:
+        return None
+    name, _, origin = spec.partition(':')
+    if name not in PROJECTIONS:
+        raise ValueError(f"不支持的投影: {name}（支持: {', '.join(PROJECTIONS)}）")
+    if not origin:
+        return AzimuthalProjection(name)
+    try:
+        lon, lat = (float(value) for value in origin.split(','))
+    except ValueError:
+        raise ValueError(f"投影原点格式应为 经度,纬度，实际为: {origin}") from None
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError(f"投影原点超出经纬度范围: {origin}")
+    return AzimuthalProjection(name, lon, lat)
+
+
+class AzimuthalProjection:
+    """
+    球面方位投影（坐标单位为公里）
+    """
+
+    def __init__(self, name, lon0=DEFAULT_ORIGIN[0], lat0=DEFAULT_ORIGIN[1], radius=EARTH_RADIUS):
+        """
+        参数:
+            name: 投影名称，见PROJECTIONS
+            lon0, lat0: 投影原点的经度和纬度（度）
+            radius: 球半径（公里）
+        """
+        if name not in PROJECTIONS:
+            raise ValueError(f"不支持的投影: {name}（支持: {', '.join(PROJECTIONS)}）")
+        self.name = name
+        self.lon0 = float(lon0)
+        self.lat0 = float(lat0)
+        self.radius = float(radius)
+        self.max_angle = np.radians(PROJECTIONS[name][1])
+        self._sin_lat0 = np.sin(np.radians(self.lat0))
+        self._cos_lat0 = np.cos(np.radians(self.lat0))
+
+    @property
+    def key(self):
+        """
+        投影的缓存键
+        """
+        return (self.name, round(self.lon0, 6), round(self.lat0, 6), round(self.radius, 6))
+
+    @property
+    def label(self):
+        """
+        投影说明（用于标题）
+        """
+        return PROJECTIONS[self.name][0]
+
+    def __repr__(self):
+        return f"AzimuthalProjection({self.name!r}, {self.lon0}, {self.lat0})"
+
+    def _radial(self, c):
+        """
+        角距离c对应的平面半径
+        """
+        if self.name == 'aeqd':
+            return self.radius * c
+        if self.name == 'laea':
+            return 2 * self.radius * np.sin(c / 2)
+        if self.name == 'ortho':
+            return self.radius * np.sin(c)
+        return 2 * self.radius * np.tan(c / 2)
+
+    @property
+    def max_radius(self):
+        """
+        显示范围边界圆的平面半径（公里）
+        """
+        return float(self._radial(self.max_angle))
+
+    def forward(self, lons, lats, clamp=False):
+        """
+        把经纬度投影为平面坐标
+
+        参数:
+            lons, lats: 经度和纬度（度），按numpy规则广播
+            clamp: 为False时超出显示范围的点为NaN；为True时沿方位角收到边界圆上
+
+        返回:
+            (x数组, y数组)，单位为公里，原点在投影中心，y轴指向北
+        """
+        lam = np.radians(np.asarray(lons, dtype=np.float64)) - np.radians(self.lon0)
+        phi = np.radians(np.asarray(lats, dtype=np.float64))
+        cos_phi = np.cos(phi)
+        # 方向分量：东向和北向（未归一化，长度为sin(c)）
+        east = cos_phi * np.sin(lam)
+        north = self._cos_lat0 * np.sin(phi) - self._sin_lat0 * cos_phi * np.cos(lam)
+        cos_c = self._sin_lat0 * np.sin(phi) + self._cos_lat0 * cos_phi * np.cos(lam)
+        c = np.arccos(np.clip(cos_c, -1.0, 1.0))
+        outside = c > self.max_angle + 1e-12
+        r = self._radial(np.minimum(c, self.max_angle))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            length = np.hypot(east, north)
+            scale = np.where(length > 1e-15, r / length, 0.0)
+        x = east * scale
+        y = north * scale
+        if not clamp:
+            x = np.where(outside, np.nan, x)
+            y = np.where(outside, np.nan, y)
+        return x, y
+
+    def visible(self, lons, lats):
+        """
+        返回点是否在显示范围内的布尔数组
+        """
+        x, _ = self.forward(lons, lats)
+        return ~np.isnan(x)
+
+    def boundary(self, n=361):
+        """
+        返回显示范围的边界圆（闭合环，形状为(n, 2)）
+        """
+        theta = np.linspace(0, 2 * np.pi, n)
+        return np.column_stack((np.sin(theta), np.cos(theta))) * self.max_radius
+
+    def project_rings(self, rings, holes=None, densify_degrees=DEFAULT_DENSIFY_DEGREES, closed=True):
+        """
+        投影一组经纬度环
+
+        先把长边按经纬度加密，再一次性投影所有顶点；超出显示范围的顶点沿方位角收到边界圆上，
+        被地平线切开的多边形因此沿边界圆闭合。完全不可见的环被丢弃。
+        只由180度经线和极点组成的环（覆盖整个经纬度平面的矩形）替换为显示范围的边界圆。
+        包含原点对跖点的环在平面上围住的是它的外部，因此输出为边界圆加上洞标记取反的原环。
+
+        参数:
+            rings: 环坐标数组列表，每项形状为(K, 2)的(经度, 纬度)
+            holes: 每个环是否为洞，默认全部为外环
+            densify_degrees: 加密的最大边长（度），为0时不加密
+            closed: 为True时按闭合环处理（首尾不重复的环补上闭合边后一起加密）；
+                    为False时按折线处理，不可见的顶点为NaN（绘制时线在此断开），不做边框环替换和内外颠倒
+
+        返回:
+            (投影后的环列表, 每个输出环在输入中的序号数组, 每个输出环是否为洞的数组)
+        """
+        if not rings:
+            return [], np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+        holes = np.zeros(len(rings), dtype=bool) if holes is None else np.asarray(holes, dtype=bool)
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings]
+        if closed:
+            rings = [np.vstack((ring, ring[:1])) if len(ring) > 1 and np.any(ring[0] != ring[-1]) else ring
+                     for ring in rings]
+        lengths = np.fromiter((len(ring) for ring in rings), dtype=np.int64, count=len(rings))
+        flat = np.concatenate(rings)
+        ring_id = np.repeat(np.arange(len(rings)), lengths)
+
+        # 只由经纬度平面边框组成的环
+        on_frame = (np.abs(flat[:, 0]) >= 180.0) | (np.abs(flat[:, 1]) >= 90.0)
+        frame_ring = np.logical_and.reduceat(on_frame, np.cumsum(lengths) - lengths) & (lengths > 0) & closed
+        inverted = np.zeros(len(rings), dtype=bool)
+        if closed:
+            antipode_lon = (self.lon0 + 360.0) % 360.0 - 180.0
+            inverted = rings_contain_point(flat, ring_id, len(rings), antipode_lon, -self.lat0) & ~frame_ring
+
+        if densify_degrees and densify_degrees > 0:
+            flat, ring_id = densify(flat, ring_id, densify_degrees)
+            lengths = np.bincount(ring_id, minlength=len(rings))
+
+        x, y = self.forward(flat[:, 0], flat[:, 1], clamp=closed)
+        visible = self.visible(flat[:, 0], flat[:, 1])
+        starts = np.cumsum(lengths) - lengths
+        nonempty = lengths > 0
+        any_visible = np.zeros(len(rings), dtype=bool)
+        any_visible[nonempty] = np.logical_or.reduceat(visible, starts[nonempty])
+
+        projected = np.column_stack((x, y))
+        boundary = self.boundary()
+        output, kept, output_holes = [], [], []
+        for index in np.flatnonzero((any_visible | frame_ring) & nonempty):
+            if frame_ring[index] or inverted[index]:
+                output.append(boundary)
+                kept.append(index)
+                output_holes.append(holes[index])
+            if not frame_ring[index]:
+                output.append(projected[starts[index]:starts[index] + lengths[index]])
+                kept.append(index)
+                output_holes.append(holes[index] ^ inverted[index])
+        return output, np.asarray(kept, dtype=np.int64), np.asarray(output_holes, dtype=bool)
+
+    def graticule(self, step=30.0, resolution=1.0):
+        """
+        经纬网线
+
+        参数:
+            step: 经线和纬线的间隔（度）
+            resolution: 线上采样点的间隔（度）
+
+        返回:
+            平面坐标线段列表，每项形状为(K, 2)，不可见部分为NaN
+        """
+        lines = []
+        samples = np.arange(-90.0, 90.0 + resolution / 2, resolution)
+        for lon in np.arange(-180.0, 180.0, step):
+            lines.append(np.column_stack(self.forward(np.full_like(samples, lon), samples)))
+        samples = np.arange(-180.0, 180.0 + resolution / 2, resolution)
+        for lat in np.arange(-90.0 + step, 90.0, step):
+            lines.append(np.column_stack(self.forward(samples, np.full_like(samples, lat))))
+        return lines
+
+
+def rings_contain_point(coords, ring_id, n_rings, lon, lat):
+    """
+    按经纬度平面上的射线法判断各闭合环是否包含给定点（向量化）
+
+    参数:
+        coords: 所有环拼接后的坐标数组，形状为(N, 2)，每个环首尾重复
+        ring_id: 每个顶点所属的环序号（非递减）
+        n_rings: 环数
+        lon, lat: 点的经度和纬度
+
+    返回:
+        长度为n_rings的布尔数组
+    """
+    same_ring = ring_id[1:] == ring_id[:-1]
+    x0, y0 = coords[:-1, 0], coords[:-1, 1]
+    x1, y1 = coords[1:, 0], coords[1:, 1]
+    straddles = same_ring & ((y0 > lat) != (y1 > lat))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        crossing_x = x0 + (lat - y0) * (x1 - x0) / (y1 - y0)
+    crossings = straddles & (lon < crossing_x)
+    return np.bincount(ring_id[:-1][crossings], minlength=n_rings) % 2 == 1
+
+
+def densify(coords, ring_id, max_degrees):
+    """
+    按经纬度线性插值加密长边（向量化）
+
+    参数:
+        coords: 所有环拼接后的坐标数组，形状为(N, 2)
+        ring_id: 每个顶点所属的环序号（非递减）
+        max_degrees: 最大边长（度）
+
+    返回:
+        (加密后的坐标数组, 加密后每个顶点所属的环序号)
+    """
+    if len(coords) < 2:
+        return coords, ring_id
+    # 每条边的起点为当前顶点、终点为同一环的下一个顶点；环的最后一个顶点不向后插值
+    same_ring = ring_id[1:] == ring_id[:-1]
+    delta = np.diff(coords, axis=0)
+    span = np.max(np.abs(delta), axis=1)
+    pieces = np.ones(len(coords), dtype=np.int64)
+    pieces[:-1] = np.where(same_ring, np.maximum(1, np.ceil(span / max_degrees)).astype(np.int64), 1)
+    if pieces.max() == 1:
+        return coords, ring_id
+    source = np.repeat(np.arange(len(coords)), pieces)
+    fraction = (np.arange(len(source)) - np.repeat(np.cumsum(pieces) - pieces, pieces)) / pieces[source]
+    step = np.zeros_like(coords)
+    step[:-1] = np.where(same_ring[:, None], delta, 0.0)
+    return coords[source] + fraction[:, None] * step[source], ring_id[source]
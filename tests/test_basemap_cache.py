@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image
+from src.map_generator.basemap_cache import (
+    BasemapLayer, basemap_cache_stats, clear_basemap_cache, dataset_fingerprint
+)
+from src.map_generator.figure_output import save_figure
+from src.map_generator.geometry_paths import add_geojson_collection
+from src.map_generator.render_context import create_figure
+
+
+class TestBasemapCache(unittest.TestCase):
+
+    def setUp(self):
+        clear_basemap_cache()
+        self.output_dir = tempfile.mkdtemp()
+        self.data = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"name": "A"},
+             "geometry": {"type": "Polygon", "coordinates": [[[1, 1], [1, 6], [6, 6], [6, 1], [1, 1]]]}},
+            {"type": "Feature", "properties": {"name": "B"},
+             "geometry": {"type": "Polygon", "coordinates": [[[5, 5], [9, 5], [7, 9], [5, 5]]]}},
+        ]}
+
+    def tearDown(self):
+        clear_basemap_cache()
+        shutil.rmtree(self.output_dir)
+
+    def _draw_layers(self, ax):
+        collection, _ = add_geojson_collection(ax, self.data, alpha=0.7, edgecolor='k')
+        collection.set_facecolor(['tab:blue', 'tab:red'])
+        return [collection]
+
+    def _figure(self, cached):
+        fig = create_figure((3, 2), dpi=100)
+        ax = fig.add_subplot()
+        ax.set_xlim(0, 10)
+        ax.set_ylim(0, 10)
+        layers = self._draw_layers(ax)
+        if cached:
+            BasemapLayer(ax, layers, self._draw_layers, key=('test', dataset_fingerprint(self.data)))
+        fig.tight_layout()
+        return fig, ax, layers
+
+    def _png(self, fig, prefix):
+        path, = save_figure(fig, self.output_dir, prefix, formats='png', dpi=100)
+        return np.asarray(Image.open(path)).astype(int)
+
+    def test_fingerprint(self):
+        """内容相同的数据集哈希相同，坐标变化时哈希改变"""
+        self.assertEqual(dataset_fingerprint(self.data), dataset_fingerprint(copy.deepcopy(self.data)))
+        other = copy.deepcopy(self.data)
+        other['features'][1]['geometry']['coordinates'][0][1] = [9, 5.5]
+        self.assertNotEqual(dataset_fingerprint(self.data), dataset_fingerprint(other))
+
+    def test_raster_matches_vector(self):
+        """使用底图栅格保存的PNG与直接绘制多边形的结果一致（栅格按整像素放置，只有抗锯齿边缘略有差别）"""
+        vector = self._png(self._figure(False)[0], 'vector')
+        raster = self._png(self._figure(True)[0], 'raster')
+        self.assertEqual(vector.shape, raster.shape)
+        difference = np.abs(vector - raster).max(axis=-1)
+        self.assertLess(difference.mean(), 2)
+        self.assertLess((difference > 64).mean(), 0.01)
+
+    def test_cache_hit_with_new_overlay(self):
+        """更换叠加层后再次保存时复用缓存的栅格"""
+        fig, ax, _ = self._figure(True)
+        self._png(fig, 'first')
+        ax.plot([0, 10], [0, 10], color='orange')
+        self._png(fig, 'second')
+        stats = basemap_cache_stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['size']), (1, 1, 1))
+
+    def test_vector_formats_keep_paths(self):
+        """矢量格式仍然输出多边形，保存后恢复矢量图层的可见性"""
+        fig, _, layers = self._figure(True)
+        svg_path, png_path = save_figure(fig, self.output_dir, 'both', formats='svg,png', dpi=100)
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            svg = f.read()
+        self.assertNotIn('<image', svg)
+        self.assertTrue(os.path.exists(png_path))
+        self.assertTrue(all(layer.get_visible() for layer in layers))
+
+
+if __name__ == '__main__':
+    unittest.main()
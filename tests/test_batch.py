@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from src.map_generator import batch
+from src.map_generator.batch import JOB_ERROR, JOB_OK, JOB_TIMEOUT, load_jobs, merge_job, run_batch, run_job
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.config = {"global": {"output_dir": self.output_dir, "formats": "svg,png"},
+                       "range": {"radius": 8000, "formats": "png"}}
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_load_jobs(self):
+        """作业文件可以是列表，也可以是包含jobs列表的对象"""
+        path = os.path.join(self.output_dir, 'jobs.json')
+        for content in ([{"command": "china"}], {"jobs": [{"command": "china"}]}):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(content, f)
+            self.assertEqual(load_jobs(path), [{"command": "china"}])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"command": "china"}, f)
+        with self.assertRaises(ValueError):
+            load_jobs(path)
+
+    def test_merge_job(self):
+        """作业参数优先于命令配置，命令配置优先于全局配置"""
+        merged = merge_job({"command": "range", "radius": 5000, "filename": None, "output-dir": "x"}, self.config)
+        self.assertEqual(merged['radius'], 5000)
+        self.assertEqual(merged['formats'], 'png')
+        self.assertEqual(merged['output_dir'], 'x')
+        self.assertNotIn('filename', merged)
+
+    def test_error_isolation(self):
+        """作业出错时返回错误结果而不抛出异常"""
+        result = run_job({"command": "bogus"}, self.config)
+        self.assertEqual(result['status'], JOB_ERROR)
+        self.assertIn('bogus', result['error'])
+        self.assertEqual(result['maps'], 0)
+
+    def test_timeout(self):
+        """超时的作业被中断"""
+        with mock.patch.object(batch, 'dispatch_job', side_effect=lambda command, args: time.sleep(5)):
+            start = time.perf_counter()
+            result = run_job({"command": "china"}, self.config, timeout=0.2)
+        self.assertEqual(result['status'], JOB_TIMEOUT)
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_run_batch(self):
+        """进程池按作业顺序返回结果，失败的作业不影响其他作业"""
+        jobs = [{"command": "range", "radius": 3000, "filename": "r3000"}, {"command": "bogus"}]
+        results, summary = run_batch(jobs, self.config, workers=2, timeout=120)
+        self.assertEqual([result['status'] for result in results], [JOB_OK, JOB_ERROR])
+        self.assertEqual(results[0]['files'], [os.path.join(self.output_dir, 'r3000.png')])
+        self.assertTrue(os.path.exists(results[0]['files'][0]))
+        self.assertEqual((summary['jobs'], summary['ok'], summary['failed'], summary['maps']), (2, 1, 1, 1))
+        self.assertGreater(summary['maps_per_second'], 0)
+
+    def test_worker_crash(self):
+        """工作进程异常退出时其他作业重新提交并完成，只有导致退出的作业失败"""
+        def dispatch(command, args):
+            if command == 'world':
+                os._exit(1)
+            time.sleep(0.2)
+            return [os.path.join(self.output_dir, f"{command}.png")]
+
+        jobs = [{"command": "china"}, {"command": "world"}, {"command": "china"}, {"command": "range"}]
+        with mock.patch.object(batch, 'dispatch_job', side_effect=dispatch):
+            results, summary = run_batch(jobs, self.config, workers=2, timeout=120)
+        self.assertEqual([result['status'] for result in results], [JOB_OK, JOB_ERROR, JOB_OK, JOB_OK])
+        self.assertIn('异常退出', results[1]['error'])
+        self.assertEqual((summary['ok'], summary['failed']), (3, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
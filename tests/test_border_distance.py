@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from unittest import mock
+import numpy as np
+from src.utils.border_distance import BorderDistanceEngine
+from src.utils.distance_calculator import great_circle_distance
+from src.utils.distance_field import build_distance_field, load_distance_field
+from src.utils import geodesic_buffer
+from src.utils.geodesic_buffer import build_geodesic_buffer
+
+
+def _square_feature(min_lon, min_lat, max_lon, max_lat):
+    """构造一个矩形多边形特征"""
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat],
+                             [min_lon, max_lat], [min_lon, min_lat]]]
+        },
+        "properties": {}
+    }
+
+
+class TestBorderDistance(unittest.TestCase):
+
+    def setUp(self):
+        """两个共享一条边的矩形，共享边是内部边界"""
+        self.data = {
+            "type": "FeatureCollection",
+            "features": [_square_feature(100, 20, 110, 30), _square_feature(110, 20, 120, 30)]
+        }
+        self.engine = BorderDistanceEngine(self.data, block_size=2)
+
+    def test_internal_border_removed(self):
+        """测试共享边被剔除，只保留外轮廓"""
+        self.assertEqual(len(self.engine.segment_starts), 6)
+        # 共享边上的点到外轮廓的距离等于到南北边的距离
+        distance = self.engine.distance_to_border(25, 110)
+        self.assertAlmostEqual(distance, great_circle_distance(25, 110, 30, 110), delta=60)
+
+    def test_distance_to_segment_interior(self):
+        """测试到线段中部的距离，而不是到顶点的距离"""
+        distance = self.engine.distance_to_border(15, 110)
+        self.assertAlmostEqual(distance, great_circle_distance(15, 110, 20, 110), delta=1)
+
+    def test_contains_and_region_distance(self):
+        """测试区域内的点距离为0"""
+        inside = self.engine.contains([25, 25, 35], [105, 115, 105])
+        np.testing.assert_array_equal(inside, [True, True, False])
+        distances = self.engine.distance_to_region([25, 35], [105, 105])
+        self.assertEqual(distances[0], 0.0)
+        self.assertGreater(distances[1], 0.0)
+
+    def test_pruning_matches_brute_force(self):
+        """测试剪枝结果与逐线段计算一致"""
+        rng = np.random.default_rng(0)
+        lats = np.degrees(np.arcsin(rng.uniform(-1, 1, 500)))
+        lons = rng.uniform(-180, 180, 500)
+        engine = BorderDistanceEngine(self.data, block_size=64)
+        np.testing.assert_allclose(self.engine.distance_to_border(lats, lons),
+                                   engine.distance_to_border(lats, lons), rtol=1e-9)
+
+
+    def test_geodesic_buffer_envelope(self):
+        """测试缓冲区外环上的点到区域的距离约等于缓冲半径"""
+        polygons = build_geodesic_buffer(self.engine, 1000, tolerance_km=20)
+        self.assertEqual(len(polygons), 1)
+        ring = polygons[0][0]
+        distances = self.engine.distance_to_region(ring[:, 1], ring[:, 0])
+        np.testing.assert_allclose(distances, 1000, atol=20)
+        self.assertIs(build_geodesic_buffer(self.engine, 1000, tolerance_km=20), polygons)
+
+    def test_geodesic_buffer_cache_bounded(self):
+        """测试缓冲区内存缓存按最近使用淘汰，数量不超过上限"""
+        with mock.patch.object(geodesic_buffer, 'MAX_BUFFER_CACHE_ENTRIES', 2), \
+                mock.patch.object(geodesic_buffer, '_buffer_cache', OrderedDict()):
+            first = build_geodesic_buffer(self.engine, 100, tolerance_km=200)
+            build_geodesic_buffer(self.engine, 200, tolerance_km=200)
+            self.assertIs(build_geodesic_buffer(self.engine, 100, tolerance_km=200), first)
+            build_geodesic_buffer(self.engine, 300, tolerance_km=200)
+            keys = [geodesic_buffer.buffer_cache_key(self.engine.boundary_hash, radius, 200) for radius in (100, 300)]
+            self.assertEqual(list(geodesic_buffer._buffer_cache), keys)
+            self.assertIs(build_geodesic_buffer(self.engine, 100, tolerance_km=200), first)
+
+    def test_geodesic_buffer_crossing_antimeridian(self):
+        """测试跨越180度经线和包含极点的缓冲区"""
+        polygons = build_geodesic_buffer(self.engine, 8000)
+        rings = [ring for polygon in polygons for ring in polygon]
+        for ring in rings:
+            self.assertTrue(np.all(np.abs(ring[:, 0]) <= 180.0))
+        self.assertAlmostEqual(max(ring[:, 1].max() for ring in rings), 90.0)
+
+    def test_distance_field(self):
+        """测试距离场的构建、内存映射加载和阈值查询"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            field_path = os.path.join(tmp_dir, 'field.npy')
+            build_distance_field(self.engine, field_path, resolution=5.0, workers=1)
+            field = load_distance_field(field_path)
+            self.assertIsInstance(field.data, np.memmap)
+            self.assertEqual(field.data.shape, (36, 72))
+            # 格点中心上的值与引擎直接计算的结果一致
+            np.testing.assert_allclose(field.sample([27.5, 42.5], [112.5, 112.5]),
+                                       self.engine.distance_to_region([27.5, 42.5], [112.5, 112.5]), rtol=1e-5)
+            self.assertEqual(field.sample(27.5, 112.5), 0.0)
+            self.assertTrue(field.within(0).any())
+            self.assertLess(field.within(1000).sum(), field.within(3000).sum())
+            del field
+            # 文件不存在时返回None
+            self.assertIsNone(load_distance_field(os.path.join(tmp_dir, 'missing.npy')))
+
+
+if __name__ == '__main__':
+    unittest.main()
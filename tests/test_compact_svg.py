@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+from src.map_generator.compact_svg import format_path, svg_decimals
+from src.map_generator.figure_output import compact_svg_quantization, save_figure, set_compact_svg
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+
+
+def _parse_path(path_data):
+    """
+    把只含M、m、l、z的路径数据还原为绝对坐标的子路径列表
+    """
+    tokens = re.findall(r'[MmLlZz]|-?(?:\d+\.?\d*|\.\d+)', path_data)
+    subpaths, current, start, command, i = [], np.zeros(2), np.zeros(2), None, 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in 'MmLlZz':
+            command = token
+            i += 1
+            if token in 'Zz':
+                current = start.copy()
+            continue
+        point = np.array([float(tokens[i]), float(tokens[i + 1])])
+        i += 2
+        current = point if command == 'M' else current + point
+        if command in 'Mm':
+            start = current.copy()
+            subpaths.append([current])
+            command = 'l'
+        else:
+            subpaths[-1].append(current)
+    return [np.array(points) for points in subpaths]
+
+
+class TestCompactSvg(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        set_compact_svg(False)
+        plt.close('all')
+        shutil.rmtree(self.output_dir)
+
+    def test_decimals_follow_output_size(self):
+        self.assertEqual(svg_decimals(1800, 720, 20000), 2)
+        self.assertEqual(svg_decimals(1800, 720, 1000), 0)
+        self.assertEqual(svg_decimals(10, 5, 10 ** 9), 6)
+
+    def test_relative_path_round_trip(self):
+        """相对坐标还原后与原顶点的差不超过量化精度，重合的顶点被去掉"""
+        rng = np.random.default_rng(0)
+        ring = rng.uniform(-50, 500, (200, 2))
+        ring = np.repeat(ring, 2, axis=0)
+        vertices = np.vstack((ring, ring[:1], ring[:50] + 3.3333, [[0, 0]]))
+        codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+        codes[[0, 401]] = Path.MOVETO
+        codes[400] = Path.CLOSEPOLY
+        codes[-1] = Path.STOP
+        path_data = format_path(vertices, codes, 2)
+        self.assertTrue(path_data.startswith('M'))
+        self.assertNotIn(' -', path_data)
+        first, second = _parse_path(path_data)
+        self.assertEqual(len(first), 200)
+        np.testing.assert_allclose(first, ring[::2], atol=0.005 + 1e-9)
+        np.testing.assert_allclose(second, ring[:50:2] + 3.3333, atol=0.005 + 1e-9)
+
+    def test_curves(self):
+        """含有曲线的路径使用相对的c命令"""
+        circle = Path.circle((100, 100), 10)
+        path_data = format_path(circle.vertices, circle.codes, 1)
+        self.assertTrue(path_data.startswith('M100 90'))
+        self.assertEqual(path_data.count('c'), 8)
+        self.assertTrue(path_data.endswith('z'))
+
+    def test_save_compact_svg(self):
+        """紧凑SVG比标准SVG小，集合中同样式的元素合并为一个路径，SVGZ为gzip压缩"""
+        fig, ax = plt.subplots(figsize=(4, 3))
+        squares = [Path(np.array([[x, 0], [x, 1], [x + 0.9, 1], [x + 0.9, 0], [x, 0]]), closed=True)
+                   for x in np.linspace(0, 9, 10)]
+        for square in squares:
+            square.vertices[:, 1] += np.sin(np.arange(len(square.vertices)))
+        ax.add_collection(PathCollection(squares, facecolors=['tab:red', 'tab:blue'] * 5, edgecolors='k',
+                                         gid='squares'))
+        ax.plot(np.linspace(0, 10, 2000), np.sin(np.linspace(0, 50, 2000)))
+        ax.set_xlim(0, 10)
+        ax.set_ylim(-2, 3)
+
+        standard, = save_figure(fig, self.output_dir, 'standard', formats='svg')
+        set_compact_svg(True)
+        self.assertIsNotNone(compact_svg_quantization())
+        compact, compressed = save_figure(fig, self.output_dir, 'compact', formats='svg,svgz')
+        self.assertLess(os.path.getsize(compact), os.path.getsize(standard))
+
+        root = ET.parse(compact).getroot()
+        group = next(g for g in root.iter(f'{SVG_NS}g') if g.get('id') == 'squares')
+        self.assertEqual(len(list(group.iter(f'{SVG_NS}path'))), 2)
+        with gzip.open(compressed, 'rb') as f:
+            compressed_root = ET.fromstring(f.read())
+        self.assertEqual(len(list(compressed_root.iter(f'{SVG_NS}path'))), len(list(root.iter(f'{SVG_NS}path'))))
+
+    def test_invalid_quantization(self):
+        with self.assertRaises(ValueError):
+            set_compact_svg(True, 0)
+        set_compact_svg(False)
+        self.assertIsNone(compact_svg_quantization())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.data_handler.dataset_registry import DatasetRegistry, freeze, dataset_registry
+from src.data_handler.geometry_cache import PackedFeatureCollection, load_geojson
+from src.data_handler.json_loader import load_china_map_data
+
+
+def _collection(name, size=5):
+    """构造只有一个正方形省份的FeatureCollection"""
+    ring = [[100, 30], [100 + size, 30], [100 + size, 30 + size], [100, 30 + size], [100, 30]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": name}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+class TestDatasetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def _loader(self, path):
+        self.calls.append(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_hits_and_invalidation(self):
+        """测试命中计数，以及文件大小或修改时间变化后重新加载"""
+        registry = DatasetRegistry()
+        path = self._write('a.json', _collection('甲'))
+        first = registry.load(path, self._loader)
+        self.assertIs(registry.load(path, self._loader), first)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual((registry.hits, registry.misses), (1, 1))
+
+        self._write('a.json', _collection('乙乙'))
+        second = registry.load(path, self._loader)
+        self.assertEqual(second['features'][0]['properties']['name'], '乙乙')
+        self.assertEqual(len(self.calls), 2)
+
+        # 大小不变但修改时间变化
+        self._write('a.json', _collection('丙丙'))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(registry.load(path, self._loader)['features'][0]['properties']['name'], '丙丙')
+        self.assertEqual(registry.stats()['misses'], 3)
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最近最少使用的数据集"""
+        registry = DatasetRegistry(max_entries=2)
+        paths = [self._write(f'{i}.json', _collection(str(i))) for i in range(3)]
+        registry.load(paths[0], self._loader)
+        registry.load(paths[1], self._loader)
+        registry.load(paths[0], self._loader)
+        registry.load(paths[2], self._loader)
+        self.assertEqual(registry.stats()['evictions'], 1)
+        registry.load(paths[0], self._loader)
+        registry.load(paths[1], self._loader)
+        self.assertEqual(self.calls, [paths[0], paths[1], paths[2], paths[1]])
+        registry.resize(1)
+        self.assertEqual(registry.stats()['size'], 1)
+
+    def test_read_only(self):
+        """测试返回的数据集不能被修改"""
+        data = DatasetRegistry().load(self._write('a.json', _collection('甲')), load_geojson)
+        feature = data['features'][0]
+        with self.assertRaises(TypeError):
+            feature['properties']['name'] = '乙'
+        with self.assertRaises(TypeError):
+            data['features'] = []
+        with self.assertRaises(AttributeError):
+            data['features'].append(feature)
+        ring = feature['geometry']['coordinates'][0]
+        with self.assertRaises(ValueError):
+            ring[0, 0] = 0
+        self.assertEqual(ring.shape, (5, 2))
+
+    def test_packed_collection_kept(self):
+        """测试打包的特征集合原样返回，打包数组只读"""
+        data = DatasetRegistry().load(self._write('a.json', _collection('甲')), load_geojson)
+        self.assertIsInstance(data, PackedFeatureCollection)
+        self.assertEqual(data.coords.shape, (5, 2))
+        self.assertFalse(data.coords.flags.writeable)
+        self.assertTrue(np.shares_memory(data['features'][0]['geometry']['coordinates'][0], data.coords))
+
+    def test_freeze_mixed_coordinates(self):
+        """测试维度不一致的坐标序列和numpy数组的只读转换"""
+        frozen = freeze({"coordinates": [[1, 2], [3, 4, 5]], "array": np.zeros(3)})
+        self.assertEqual(frozen['coordinates'], ((1, 2), (3, 4, 5)))
+        self.assertFalse(frozen['array'].flags.writeable)
+
+    def test_china_loader_shared(self):
+        """测试中国地图数据在进程内只解析一次"""
+        path = self._write('china.json', _collection('北京'))
+        before = dataset_registry.stats()
+        first = load_china_map_data(data_path=path)
+        self.assertIs(load_china_map_data(data_path=path), first)
+        after = dataset_registry.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
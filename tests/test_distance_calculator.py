@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy as np
+from src.utils.distance_calculator import (
+    great_circle_distance, great_circle_distance_matrix, min_great_circle_distance,
+    vincenty_distance, vincenty_inverse, min_vincenty_distance, _vincenty_scalar
+)
+from src.data_handler.country_data import get_countries_within_range
+
+
+class TestDistanceCalculator(unittest.TestCase):
+
+    def setUp(self):
+        """生成随机测试坐标"""
+        rng = np.random.default_rng(42)
+        self.lats1 = rng.uniform(-90, 90, 200)
+        self.lons1 = rng.uniform(-180, 180, 200)
+        self.lats2 = rng.uniform(-90, 90, 50)
+        self.lons2 = rng.uniform(-180, 180, 50)
+
+    def test_matrix_matches_scalar(self):
+        """测试距离矩阵与逐对计算结果一致"""
+        matrix = great_circle_distance_matrix(self.lats1, self.lons1, self.lats2, self.lons2, chunk_size=7)
+        self.assertEqual(matrix.shape, (200, 50))
+        for i in range(0, 200, 37):
+            for j in range(0, 50, 11):
+                expected = great_circle_distance(self.lats1[i], self.lons1[i], self.lats2[j], self.lons2[j])
+                self.assertAlmostEqual(matrix[i, j], expected, places=6)
+
+    def test_min_matches_matrix(self):
+        """测试分块按行最小值与完整矩阵归约结果一致"""
+        matrix = great_circle_distance_matrix(self.lats1, self.lons1, self.lats2, self.lons2)
+        min_dist, min_index = min_great_circle_distance(self.lats1, self.lons1, self.lats2, self.lons2,
+                                                        chunk_size=13, return_index=True)
+        np.testing.assert_allclose(min_dist, matrix.min(axis=1))
+        np.testing.assert_array_equal(min_index, matrix.argmin(axis=1))
+
+    def test_known_distance(self):
+        """测试北京到上海的距离（约1070公里）"""
+        distance = great_circle_distance_matrix([39.9], [116.4], [31.2], [121.4])[0, 0]
+        self.assertAlmostEqual(distance, 1067, delta=10)
+
+
+    def test_vincenty_array_matches_scalar(self):
+        """测试数组版Vincenty与标量版结果一致"""
+        distances, fallback = vincenty_inverse(self.lats1[:50], self.lons1[:50], self.lats2, self.lons2,
+                                               max_iter=20, return_status=True)
+        for i in range(50):
+            if fallback[i]:
+                continue
+            expected = _vincenty_scalar(self.lats1[i], self.lons1[i], self.lats2[i], self.lons2[i])
+            self.assertAlmostEqual(distances[i], expected, places=6)
+
+    def test_vincenty_distance_scalar_and_array(self):
+        """测试vincenty_distance标量输入返回float，数组输入返回逐元素结果"""
+        distance = vincenty_distance(0.0, 0.0, 0.0, 90.0)
+        self.assertIsInstance(distance, float)
+        self.assertAlmostEqual(distance, 10018.754, delta=0.01)
+        distances = vincenty_distance(self.lats1[:50], self.lons1[:50], self.lats2, self.lons2)
+        self.assertEqual(distances.shape, (50,))
+        for i in range(0, 50, 7):
+            self.assertAlmostEqual(distances[i], vincenty_distance(self.lats1[i], self.lons1[i],
+                                                                   self.lats2[i], self.lons2[i]), places=6)
+        within = get_countries_within_range(35, 105, 3000, vincenty_distance)
+        self.assertIn('中国', within)
+        self.assertTrue(all(d <= 3000 for d in within.values()))
+
+    def test_vincenty_special_cases(self):
+        """测试重合点和接近对跖点的处理"""
+        distances, fallback = vincenty_inverse([10.0, 0.0, 0.0], [20.0, 0.0, 0.0],
+                                               [10.0, 0.0, 0.5], [20.0, 90.0, 179.7],
+                                               return_status=True)
+        self.assertEqual(distances[0], 0.0)
+        self.assertAlmostEqual(distances[1], 10018.754, delta=0.01)
+        self.assertFalse(fallback[0])
+        self.assertFalse(fallback[1])
+        self.assertTrue(fallback[2])
+        self.assertGreater(distances[2], 19000)
+
+    def test_min_vincenty(self):
+        """测试按行最小Vincenty距离与逐行计算一致"""
+        min_dist, min_index = min_vincenty_distance(self.lats1, self.lons1, self.lats2, self.lons2,
+                                                    chunk_size=17, return_index=True)
+        full = vincenty_inverse(self.lats1[:, None], self.lons1[:, None], self.lats2[None, :], self.lons2[None, :])
+        np.testing.assert_allclose(min_dist, full.min(axis=1))
+        np.testing.assert_array_equal(min_index, full.argmin(axis=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.data_handler.downloader import (
+    download_file, read_download_metadata, DOWNLOADED, NOT_MODIFIED
+)
+from src.data_handler.mirror_race import race_mirrors
+from src.data_handler.world_json_loader import _is_valid_map_file
+from src.data_handler import json_loader
+
+LAST_MODIFIED = 'Mon, 05 Oct 2026 08:00:00 GMT'
+
+
+def _collection(name):
+    """构造只有一个区域（省份或国家）的GeoJSON文本"""
+    return json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": name},
+         "geometry": {"type": "Polygon", "coordinates": [[[100, 30], [105, 30], [105, 35], [100, 30]]]}}
+    ]}, ensure_ascii=False).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """按ETag和Last-Modified处理条件请求的静态数据服务"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body = server.body
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag or \
+                (self.headers.get('If-Modified-Since') == LAST_MODIFIED and 'If-None-Match' not in self.headers):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.body = _collection('北京')
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/china.json"
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'data', 'china.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_conditional_download(self):
+        """测试首次下载保存元数据，再次下载时发送条件请求并返回304"""
+        self.assertEqual(download_file(self.url, self.path, chunk_size=16), DOWNLOADED)
+        self.assertEqual(self._read(), self.server.body)
+        metadata = read_download_metadata(self.path)
+        self.assertEqual(metadata['sha256'], hashlib.sha256(self.server.body).hexdigest())
+        self.assertEqual(metadata['last_modified'], LAST_MODIFIED)
+
+        mtime = os.stat(self.path).st_mtime_ns
+        validated = []
+        status = download_file(self.url, self.path, validate=lambda p: validated.append(p) or True)
+        self.assertEqual(status, NOT_MODIFIED)
+        self.assertEqual(self.server.requests[-1]['If-None-Match'], metadata['etag'])
+        self.assertEqual(self.server.requests[-1]['If-Modified-Since'], LAST_MODIFIED)
+        self.assertEqual(validated, [])
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+        # 服务器数据变化后重新下载；不发送条件请求时总是下载
+        self.server.body = _collection('上海')
+        self.assertEqual(download_file(self.url, self.path), DOWNLOADED)
+        self.assertEqual(self._read(), self.server.body)
+        self.assertEqual(download_file(self.url, self.path, conditional=False), DOWNLOADED)
+        self.assertNotIn('If-None-Match', self.server.requests[-1])
+
+    def test_local_file_changed(self):
+        """测试本地文件与元数据不一致时不发送条件请求"""
+        download_file(self.url, self.path)
+        with open(self.path, 'ab') as f:
+            f.write(b' ')
+        self.assertEqual(download_file(self.url, self.path), DOWNLOADED)
+        self.assertEqual(self._read(), self.server.body)
+
+    def test_checksum(self):
+        """测试校验和不匹配时原有文件保持不变且不留下临时文件"""
+        download_file(self.url, self.path)
+        original = self._read()
+        self.server.body = _collection('上海')
+        with self.assertRaises(ValueError):
+            download_file(self.url, self.path, checksum='sha256:' + '0' * 64)
+        self.assertEqual(self._read(), original)
+        self.assertFalse(os.path.exists(self.path + '.part'))
+
+        digest = hashlib.md5(self.server.body).hexdigest()
+        self.assertEqual(download_file(self.url, self.path, checksum=f'md5:{digest.upper()}'), DOWNLOADED)
+        self.assertEqual(self._read(), self.server.body)
+
+    def test_update_china_map_data(self):
+        """测试中国地图数据更新：数据未改变时一次往返，--force时无条件下载"""
+        with unittest.mock.patch.object(json_loader, 'CHINA_JSON_URL', self.url):
+            self.assertEqual(json_loader.update_china_map_data(self.path), DOWNLOADED)
+            self.assertEqual(json_loader.update_china_map_data(self.path), NOT_MODIFIED)
+            self.assertEqual(json_loader.update_china_map_data(self.path, force=True), DOWNLOADED)
+            self.server.body = b'{"type": "Topology", "objects": {}}'
+            with self.assertRaises(ValueError):
+                json_loader.update_china_map_data(self.path)
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(json.loads(self._read())['features'][0]['properties']['name'], '北京')
+
+    def test_world_download_keeps_file_on_failure(self):
+        """测试世界地图下载的数据无效时原有文件保持不变，也不提前创建备份"""
+        download_file(self.url, self.path)
+        original = self._read()
+        self.server.body = b'{"type": "FeatureCollection", "features": [{'
+        self.assertIsNone(race_mirrors([self.url], self.path, validate=_is_valid_map_file, backup=True))
+        self.assertEqual(self._read(), original)
+        self.assertFalse(os.path.exists(self.path + '.bak'))
+        self.assertFalse(os.path.exists(self.path + '.mirror0'))
+
+        self.server.body = _collection('上海')
+        self.assertEqual(race_mirrors([self.url], self.path, validate=_is_valid_map_file, backup=True), self.url)
+        self.assertEqual(self._read(), self.server.body)
+        with open(self.path + '.bak', 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from PIL import Image
+from src.map_generator.figure_output import parse_formats, save_figure, DEFAULT_FORMATS
+
+
+class TestFigureOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.fig = plt.figure(figsize=(4, 3))
+        ax = plt.axes()
+        ax.plot([0, 1, 2], [0, 1, 0], label='line')
+        ax.set_title('title')
+        ax.legend(loc='lower right')
+        plt.tight_layout()
+
+    def tearDown(self):
+        plt.close(self.fig)
+        shutil.rmtree(self.output_dir)
+
+    def test_parse_formats(self):
+        self.assertEqual(parse_formats(None), DEFAULT_FORMATS)
+        self.assertEqual(parse_formats('PNG, svg,png'), ('png', 'svg'))
+        self.assertEqual(parse_formats(['.jpg']), ('jpg',))
+        with self.assertRaises(ValueError):
+            parse_formats('png,bmp2')
+
+    def test_matches_tight_savefig(self):
+        """单次计算的边界框与savefig(bbox_inches='tight')输出的图像尺寸相同"""
+        files = save_figure(self.fig, self.output_dir, 'map', formats='png,svg,jpg', dpi=150)
+        self.assertEqual([os.path.basename(f) for f in files], ['map.png', 'map.svg', 'map.jpg'])
+        reference = os.path.join(self.output_dir, 'reference.png')
+        self.fig.savefig(reference, dpi=150, bbox_inches='tight')
+        with Image.open(reference) as expected, Image.open(files[0]) as actual, Image.open(files[2]) as jpg:
+            self.assertEqual(actual.size, expected.size)
+            self.assertEqual(jpg.size, expected.size)
+            self.assertEqual(jpg.mode, 'RGB')
+        with open(files[1], 'r', encoding='utf-8') as f:
+            self.assertIn('<svg', f.read())
+
+    def test_png_only(self):
+        files = save_figure(self.fig, self.output_dir, 'map', formats=['png'], dpi=50)
+        self.assertEqual(files, [os.path.join(self.output_dir, 'map.png')])
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['map.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.utils import font_config
+
+
+class TestFontConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.font_dir = os.path.join(self.temp_dir, 'fonts')
+        os.makedirs(os.path.join(self.font_dir, 'truetype'))
+        self.font_path = os.path.join(self.font_dir, 'truetype', 'NotoSansCJK.ttc')
+        open(self.font_path, 'wb').close()
+        self.cache_path = os.path.join(self.temp_dir, 'cache', 'fonts.json')
+        self.scan_result = ({"name": "Noto Sans CJK SC", "path": self.font_path},
+                            [{"name": "Noto Sans CJK SC", "path": self.font_path}])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _resolve(self):
+        return font_config.resolve_fonts(self.cache_path, font_dirs=[self.font_dir])
+
+    def test_warm_cache_skips_scan(self):
+        """测试缓存有效时不再遍历字体列表"""
+        with mock.patch.object(font_config, '_scan_fonts', return_value=self.scan_result) as scan:
+            first = self._resolve()
+            second = self._resolve()
+        self.assertEqual(scan.call_count, 1)
+        self.assertEqual(second, first)
+        self.assertEqual(second['font']['name'], 'Noto Sans CJK SC')
+
+    def test_invalidation(self):
+        """测试安装字体（子目录变化）或选中的字体文件被删除后重新查找"""
+        with mock.patch.object(font_config, '_scan_fonts', return_value=self.scan_result) as scan:
+            self._resolve()
+            subdir = os.path.join(self.font_dir, 'truetype')
+            stat = os.stat(subdir)
+            open(os.path.join(subdir, 'wqy-microhei.ttc'), 'wb').close()
+            os.utime(subdir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self._resolve()
+            self.assertEqual(scan.call_count, 2)
+
+            self._resolve()
+            os.remove(self.font_path)
+            self._resolve()
+            self.assertEqual(scan.call_count, 3)
+
+            font_config.resolve_fonts(self.cache_path, font_dirs=[self.font_dir], refresh=True)
+            self.assertEqual(scan.call_count, 4)
+
+    def test_scan_fonts(self):
+        """测试按优先级选择中文字体，没有优先字体时选择任一中文字体"""
+        fonts = [mock.Mock(fname='/fonts/dejavu.ttf'), mock.Mock(fname='/fonts/wqy.ttc'),
+                 mock.Mock(fname='/fonts/simhei.ttf')]
+        for font, name in zip(fonts, ['DejaVu Sans', 'WenQuanYi Zen Hei', 'SimHei']):
+            font.name = name
+        with mock.patch('matplotlib.font_manager.fontManager', mock.Mock(ttflist=fonts)):
+            chosen, candidates = font_config._scan_fonts()
+            self.assertEqual(chosen, {"name": "SimHei", "path": "/fonts/simhei.ttf"})
+            self.assertEqual([c['name'] for c in candidates], ['SimHei', 'WenQuanYi Zen Hei'])
+            fonts.pop()
+            self.assertEqual(font_config._scan_fonts()[0]['name'], 'WenQuanYi Zen Hei')
+
+    def test_ensure_fonts_shared(self):
+        """测试所有渲染器共享同一次字体配置"""
+        with mock.patch.object(font_config, '_fonts_result', None), \
+                mock.patch.object(font_config, 'setup_fonts', return_value=True) as setup:
+            self.assertTrue(font_config.ensure_fonts())
+            self.assertTrue(font_config.ensure_fonts())
+        self.assertEqual(setup.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import socket
+import threading
+import unittest
+from src.data_handler.geojson_stream import geometry_bounds, iter_geojson_features
+
+
+def _square(name, min_lon, min_lat, size=5):
+    """构造一个正方形国家特征"""
+    ring = [[min_lon, min_lat], [min_lon + size, min_lat], [min_lon + size, min_lat + size],
+            [min_lon, min_lat + size], [min_lon, min_lat]]
+    return {"type": "Feature", "properties": {"name": name},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+class TestGeoJSONStream(unittest.TestCase):
+
+    def setUp(self):
+        """顶层字段在features之前和之后都有，名称包含多字节字符"""
+        self.features = [_square('中国', 100, 30), _square('日本', 135, 35), _square('巴西', -50, -15)]
+        document = {"type": "FeatureCollection", "name": "世界", "crs": {"type": "name", "properties": {}},
+                    "features": self.features, "bbox": [-180, -90, 180, 90]}
+        self.payload = json.dumps(document, ensure_ascii=False, indent=1).encode('utf-8')
+
+    def test_small_chunks(self):
+        """测试分块边界落在任意位置（包括多字节字符和数值中间）时结果不变"""
+        for chunk_size in (1, 3, 7, 64):
+            features = list(iter_geojson_features(io.BytesIO(self.payload), chunk_size=chunk_size))
+            self.assertEqual(features, self.features)
+
+    def test_filters(self):
+        """测试范围框和名称过滤"""
+        asia = list(iter_geojson_features(io.BytesIO(self.payload), bbox=(90, 0, 150, 60)))
+        self.assertEqual([f['properties']['name'] for f in asia], ['中国', '日本'])
+        named = list(iter_geojson_features(io.BytesIO(self.payload), names=['巴西', '美国']))
+        self.assertEqual([f['properties']['name'] for f in named], ['巴西'])
+        both = list(iter_geojson_features(io.BytesIO(self.payload), bbox=(90, 0, 150, 60), names={'巴西'}))
+        self.assertEqual(both, [])
+
+    def test_socket_source(self):
+        """测试从套接字流式读取"""
+        reader, writer = socket.socketpair()
+
+        def send():
+            with writer:
+                for start in range(0, len(self.payload), 10):
+                    writer.sendall(self.payload[start:start + 10])
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        with reader, reader.makefile('rb') as stream:
+            names = [f['properties']['name'] for f in iter_geojson_features(stream, chunk_size=16)]
+        thread.join()
+        self.assertEqual(names, ['中国', '日本', '巴西'])
+
+    def test_invalid_documents(self):
+        """测试缺少features数组或格式错误时抛出异常"""
+        with self.assertRaises(ValueError):
+            list(iter_geojson_features(io.BytesIO(b'{"type": "Topology", "objects": {}}')))
+        with self.assertRaises(ValueError):
+            list(iter_geojson_features(io.BytesIO(b'{"features": [{"type": "Feature"} {}]}')))
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_geojson_features(io.BytesIO(b'{"features": [{"type": "Feat')))
+
+    def test_geometry_bounds(self):
+        """测试多重多边形的范围框"""
+        geometry = {"type": "MultiPolygon", "coordinates": [self.features[0]['geometry']['coordinates'],
+                                                            self.features[2]['geometry']['coordinates']]}
+        self.assertEqual(geometry_bounds(geometry), (-50, -15, 105, 35))
+        self.assertIsNone(geometry_bounds(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
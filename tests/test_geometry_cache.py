@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.data_handler.geometry_cache import (
+    PackedFeatureCollection, cache_path_for, load_geojson, read_geometry_cache
+)
+
+
+def _sample_collection():
+    """构造一个包含Polygon（带洞）、MultiPolygon和空几何的FeatureCollection"""
+    return {
+        "type": "FeatureCollection",
+        "name": "sample",
+        "features": [
+            {
+                "type": "Feature",
+                "id": 1,
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+                                    [[2, 2], [4, 2], [4, 4], [2, 2]]]
+                },
+                "properties": {"name": "甲", "adcode": 100}
+            },
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [[[[20, 20], [30, 20], [30, 30], [20, 20]]],
+                                    [[[40, 40], [50, 40], [50, 50], [40, 40]]]]
+                },
+                "properties": {"name": "乙"}
+            },
+            {"type": "Feature", "geometry": None, "properties": {"name": "丙"}}
+        ]
+    }
+
+
+class TestGeometryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_path = os.path.join(self.tmp_dir.name, 'sample.json')
+        self.data = _sample_collection()
+        with open(self.source_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_same_geojson(self, packed, data):
+        """逐个特征比较打包结果与原始GeoJSON"""
+        self.assertEqual(packed['type'], data['type'])
+        self.assertEqual(packed['name'], data['name'])
+        self.assertEqual(len(packed['features']), len(data['features']))
+        for feature, expected in zip(packed['features'], data['features']):
+            self.assertEqual(feature['properties'], expected['properties'])
+            self.assertEqual(feature.get('id'), expected.get('id'))
+            if expected['geometry'] is None:
+                self.assertIsNone(feature['geometry'])
+                continue
+            self.assertEqual(feature['geometry']['type'], expected['geometry']['type'])
+            # 统一成多边形列表后逐环比较
+            actual_polygons, expected_polygons = feature['geometry']['coordinates'], expected['geometry']['coordinates']
+            if expected['geometry']['type'] == 'Polygon':
+                actual_polygons, expected_polygons = [actual_polygons], [expected_polygons]
+            for actual_rings, expected_rings in zip(actual_polygons, expected_polygons):
+                self.assertEqual(len(actual_rings), len(expected_rings))
+                for ring, expected_ring in zip(actual_rings, expected_rings):
+                    np.testing.assert_array_equal(ring, expected_ring)
+
+    def test_cold_and_warm_load(self):
+        """测试首次加载写入缓存，再次加载内存映射读取，结果与原始数据一致"""
+        cold = load_geojson(self.source_path)
+        self.assertIsInstance(cold, PackedFeatureCollection)
+        self.assertTrue(os.path.exists(cache_path_for(self.source_path)))
+        # 进程专用的临时文件已替换为正式缓存，不留下临时文件
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         sorted(['sample.json', os.path.basename(cache_path_for(self.source_path))]))
+        self.assert_same_geojson(cold, self.data)
+
+        warm = load_geojson(self.source_path)
+        self.assertIsInstance(warm.coords.base, np.memmap)
+        self.assertFalse(warm.coords.flags.writeable)
+        self.assert_same_geojson(warm, self.data)
+        np.testing.assert_array_equal(warm.ring_offsets, [0, 5, 9, 13, 17])
+        np.testing.assert_array_equal(warm.geometry_offsets, [0, 1, 3, 3])
+
+    def test_cache_invalidation(self):
+        """测试源文件内容变化后缓存失效，仅修改时间变化时通过哈希继续使用缓存"""
+        load_geojson(self.source_path)
+        cache_path = cache_path_for(self.source_path)
+
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(read_geometry_cache(cache_path, self.source_path))
+
+        self.data['features'][0]['properties']['name'] = '丁'
+        with open(self.source_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        self.assertIsNone(read_geometry_cache(cache_path, self.source_path))
+        self.assertEqual(load_geojson(self.source_path)['features'][0]['properties']['name'], '丁')
+
+    def test_no_cache(self):
+        """测试关闭缓存时直接返回解析的JSON，不写缓存文件"""
+        data = load_geojson(self.source_path, use_cache=False)
+        self.assertEqual(data, self.data)
+        self.assertFalse(os.path.exists(cache_path_for(self.source_path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import unittest
+from collections import OrderedDict
+from unittest import mock
+import numpy as np
+from src.utils import geometry_lod
+from src.utils.geometry_lod import (
+    LODGeometry, douglas_peucker_importance, get_lod_geometry, select_lod_tolerance, simplify_for_display
+)
+
+
+def _wiggly_border(n=200, amplitude=0.01):
+    """从(10, 0)到(10, 10)的锯齿状共享边界"""
+    lat = np.linspace(0, 10, n)
+    lon = 10 + amplitude * np.sin(lat * 40) + np.where(np.arange(n) % 2, amplitude, 0)
+    lon[0] = lon[-1] = 10
+    return np.column_stack((lon, lat))
+
+
+def _feature(name, ring):
+    """构造多边形特征，环首尾闭合"""
+    ring = np.vstack((ring, ring[:1])).tolist()
+    return {"type": "Feature", "properties": {"name": name}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+class TestGeometryLOD(unittest.TestCase):
+
+    def setUp(self):
+        """两个共享锯齿边界的省份，另有一个远离的小岛"""
+        border = _wiggly_border()
+        west = np.vstack(([[0, 0]], border, [[0, 10]]))
+        east = np.vstack(([[20, 0]], [[20, 10]], border[::-1]))
+        island = np.array([[30, 0], [30.001, 0], [30.001, 0.001]])
+        self.data = {"type": "FeatureCollection",
+                     "features": [_feature('西', west), _feature('东', east), _feature('岛', island)]}
+
+    def _shared_vertices(self, feature):
+        """环中位于共享边界附近（经度在9.9到10.1之间）的顶点集合"""
+        ring = np.asarray(feature['geometry']['coordinates'][0])
+        border = ring[(ring[:, 0] > 9.9) & (ring[:, 0] < 10.1)]
+        return {tuple(point) for point in border}
+
+    def test_shared_border_consistent(self):
+        """测试共享边界在两侧的简化结果完全相同"""
+        lod = LODGeometry(self.data)
+        for tolerance in (0.005, 0.02, 1.0):
+            west, east, island = lod.simplified(tolerance)['features']
+            self.assertEqual(self._shared_vertices(west), self._shared_vertices(east))
+            # 结点（共享边界的两个端点）始终保留
+            self.assertIn((10.0, 0.0), self._shared_vertices(west))
+            self.assertIn((10.0, 10.0), self._shared_vertices(west))
+        # 容差足够大时锯齿被完全移除，小岛坍缩后被移除
+        self.assertEqual(len(self._shared_vertices(west)), 2)
+        self.assertEqual(island['geometry']['coordinates'], [])
+        self.assertEqual(island['properties'], {'name': '岛'})
+
+    def test_zero_tolerance(self):
+        """测试容差为0时返回原数据，同一级别的结果被缓存"""
+        lod = LODGeometry(self.data)
+        self.assertIs(lod.simplified(0), self.data)
+        self.assertIs(lod.simplified(0.02), lod.simplified(0.02))
+
+    def test_lod_cache_bounded(self):
+        """测试LOD缓存按数据内容命中，按最近使用淘汰，数量不超过上限"""
+        other = copy.deepcopy(self.data)
+        other['features'] = other['features'][:2]
+        third = copy.deepcopy(self.data)
+        third['features'] = third['features'][1:]
+        with mock.patch.object(geometry_lod, 'MAX_LOD_CACHE_ENTRIES', 2), \
+                mock.patch.object(geometry_lod, '_lod_cache', OrderedDict()):
+            first = get_lod_geometry(self.data)
+            self.assertIs(get_lod_geometry(copy.deepcopy(self.data)), first)
+            second = get_lod_geometry(other)
+            self.assertIs(get_lod_geometry(self.data), first)
+            get_lod_geometry(third)
+            self.assertEqual(len(geometry_lod._lod_cache), 2)
+            self.assertIs(get_lod_geometry(self.data), first)
+            self.assertIsNot(get_lod_geometry(other), second)
+
+    def test_importance_monotonic(self):
+        """测试重要度随递归深度单调不增，端点为无穷大"""
+        line = np.column_stack((np.arange(50.0), np.sin(np.arange(50.0)) * np.linspace(2, 0, 50)))
+        importance = douglas_peucker_importance(line, [0, 30, 50])
+        self.assertTrue(np.isinf(importance[[0, 29, 30, 49]]).all())
+        self.assertTrue(np.isfinite(importance[1:29]).all())
+        for threshold in (0.1, 0.5, 1.0):
+            kept = np.flatnonzero(importance[:30] >= threshold)
+            # 保留的点构成的折线与原折线的偏差不超过阈值
+            for start, end in zip(kept[:-1], kept[1:]):
+                if end - start < 2:
+                    continue
+                chord = line[end] - line[start]
+                offsets = line[start + 1:end] - line[start]
+                distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / np.hypot(*chord)
+                self.assertTrue((distances < threshold + 1e-9).all())
+
+    def test_select_lod_tolerance(self):
+        """测试按显示范围和像素大小选择级别"""
+        self.assertEqual(select_lod_tolerance((70, 140, 15, 55), (12, 10), 300), 0.005)
+        self.assertEqual(select_lod_tolerance((-76, 284, -49, 121), (25, 10), 300), 0.02)
+        self.assertEqual(select_lod_tolerance((100, 101, 30, 31), (12, 10), 300), 0.0)
+        self.assertIs(simplify_for_display(self.data, (100, 101, 30, 31), (12, 10)), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
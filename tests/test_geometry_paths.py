@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.path import Path
+from src.map_generator.geometry_paths import (
+    compound_paths, geojson_to_paths, rings_to_path, add_geojson_collection
+)
+
+
+def _signed_area(vertices):
+    x, y = vertices[:, 0], vertices[:, 1]
+    return 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+
+
+def _rings(path):
+    """按MOVETO拆分复合Path，返回各环的顶点（不含CLOSEPOLY）"""
+    starts = np.flatnonzero(path.codes == Path.MOVETO)
+    ends = np.flatnonzero(path.codes == Path.CLOSEPOLY)
+    return [path.vertices[start:end] for start, end in zip(starts, ends)]
+
+
+class TestGeometryPaths(unittest.TestCase):
+
+    def setUp(self):
+        square = [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]]   # 顺时针，首尾闭合
+        hole = [[2, 2], [4, 2], [4, 4], [2, 4]]                 # 逆时针，首尾不闭合
+        island = [[20, 0], [22, 0], [21, 2], [20, 0]]
+        self.data = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"name": "A"},
+             "geometry": {"type": "Polygon", "coordinates": [square, hole]}},
+            {"type": "Feature", "properties": {"name": "China"},
+             "geometry": {"type": "Polygon", "coordinates": [island]}},
+            {"type": "Feature", "properties": {},
+             "geometry": {"type": "MultiPolygon", "coordinates": [[island], [square]]}},
+        ]}
+
+    def test_orientation_and_closing(self):
+        """外环逆时针、洞顺时针，重复的闭合点被去掉，每个环以CLOSEPOLY结束"""
+        path = rings_to_path([self.data['features'][0]['geometry']['coordinates']])
+        outer, hole = _rings(path)
+        self.assertEqual(len(outer), 4)
+        self.assertEqual(len(hole), 4)
+        self.assertGreater(_signed_area(outer), 0)
+        self.assertLess(_signed_area(hole), 0)
+        self.assertEqual(len(path.vertices), 10)
+        self.assertTrue(path.contains_point((1, 1)))
+
+    def test_one_path_per_feature(self):
+        paths, names = geojson_to_paths(self.data, exclude_names=['China'])
+        self.assertEqual(names, ['A', 'Country_2'])
+        self.assertEqual([len(_rings(path)) for path in paths], [2, 2])
+        self.assertTrue(paths[1].contains_point((21, 0.5)))
+
+    def test_merge(self):
+        paths, names = geojson_to_paths(self.data, merge=True)
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(names, [None])
+        self.assertEqual(len(_rings(paths[0])), 5)
+
+    def test_empty_groups(self):
+        ring = np.array([[0, 0], [1, 0], [0, 1]], dtype=float)
+        paths = compound_paths([ring], [False], [1], 3)
+        self.assertEqual([len(path.vertices) for path in paths], [0, 4, 0])
+
+    def test_add_collection(self):
+        fig = plt.figure()
+        ax = plt.axes()
+        try:
+            collection, names = add_geojson_collection(ax, self.data, alpha=0.5)
+            self.assertEqual(len(collection.get_paths()), len(names))
+            self.assertIn(collection, ax.collections)
+            fig.canvas.draw()
+        finally:
+            plt.close(fig)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入main模块的累计耗时预算（微秒），numpy约占其中一半
+IMPORT_BUDGET_US = 500000
+
+
+def _import_times(*args):
+    """
+    用 -X importtime 运行Python，返回 {模块名: 累计导入耗时（微秒）}
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT_DIR,
+                            capture_output=True, text=True, timeout=120)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_main_import_budget(self):
+        """测试导入main不加载matplotlib，且累计导入耗时在预算内"""
+        times = _import_times('-c', 'import main')
+        self.assertIn('main', times)
+        self.assertEqual([name for name in times if name.startswith('matplotlib')], [])
+        self.assertLess(times['main'], IMPORT_BUDGET_US)
+
+    def test_generate_config_without_matplotlib(self):
+        """测试不绘图的命令不加载matplotlib"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = os.path.join(temp_dir, 'config.json')
+            times = _import_times('main.py', '--config', config_path, '--generate-config')
+            self.assertTrue(os.path.exists(config_path))
+        self.assertEqual([name for name in times if name.startswith('matplotlib')], [])
+
+    def test_lazy_exports(self):
+        """测试按需导入的名称可以正常访问"""
+        import src.map_generator as map_generator
+        import src.utils as utils
+        self.assertTrue(callable(map_generator.draw_china_map))
+        self.assertIn('draw_world_range_sweep', dir(map_generator))
+        self.assertTrue(callable(utils.BorderDistanceEngine))
+        with self.assertRaises(AttributeError):
+            map_generator.draw_mars_map
+
+
+if __name__ == '__main__':
+    unittest.main()
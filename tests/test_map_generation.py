@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import csv
 import unittest
 import os
-from src.map_generator import draw_china_map, draw_8000km_range_map
+from src.map_generator import draw_china_map, draw_8000km_range_map, draw_range_sweep, parse_radii
 
 class TestMapGeneration(unittest.TestCase):
     
@@ -51,5 +52,36 @@ class TestMapGeneration(unittest.TestCase):
         except Exception as e:
             self.fail(f"范围地图生成失败: {e}")
 
+    def test_range_map_far_side_projection(self):
+        """投影中心在地球背面、范围不可见时显示整个边界圆"""
+        files = draw_8000km_range_map(radius_km=500, output_dir=self.test_output_dir,
+                                      filename_prefix="test_range_map_far_side", show_map=False,
+                                      projection='ortho:-76,-30', formats='png')
+        self.assertEqual(len(files), 1)
+        self.assertTrue(os.path.exists(files[0]))
+
+    def test_parse_radii(self):
+        """测试半径参数解析"""
+        self.assertEqual(parse_radii(8000), [8000])
+        self.assertEqual(parse_radii('6000,2000,4000'), [2000, 4000, 6000])
+        self.assertEqual(parse_radii('2000:8000:2000'), [2000, 4000, 6000, 8000])
+        self.assertEqual(parse_radii('1000,2000:3000:1000'), [1000, 2000, 3000])
+        for spec in ('', '2000:8000', '-100', '1000:2000:0', 'nan', 'inf', '1000,nan', '0:inf:1000', float('nan')):
+            with self.assertRaises(ValueError):
+                parse_radii(spec)
+
+    def test_range_sweep(self):
+        """测试多半径扫描：每个半径一组文件，外加区间汇总表"""
+        files = draw_range_sweep([2000, 4000], output_dir=self.test_output_dir,
+                                 filename_prefix="test_range_sweep")
+        self.assertEqual(len(files), 5)
+        for file_path in files:
+            self.assertTrue(os.path.exists(file_path), f"文件未生成: {file_path}")
+        with open(files[-1], encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][-2:], ['2000公里内', '4000公里内'])
+        self.assertIn(['中国', '0.0', '0-2000公里', '是', '是'], rows)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
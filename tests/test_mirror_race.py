@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.data_handler.mirror_race import MirrorStats, race_mirrors
+from src.data_handler.world_json_loader import _is_valid_map_file
+from tests.test_downloader import _collection
+
+
+class _MirrorHandler(BaseHTTPRequestHandler):
+    """
+    镜像替身：server.delay 为响应前的等待时间，server.status 为状态码，
+    server.chunk_delay 为逐块发送时每块之间的等待时间
+    """
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.delay)
+        self.send_response(server.status)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        try:
+            for start in range(0, len(server.body), 64):
+                self.wfile.write(server.body[start:start + 64])
+                self.wfile.flush()
+                time.sleep(server.chunk_delay)
+        except OSError:
+            pass  # 客户端取消下载后关闭了连接
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestMirrorRace(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'world.json')
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def _mirror(self, name, delay=0.0, status=200, body=None, chunk_delay=0.0):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _MirrorHandler)
+        server.block_on_close = False
+        server.delay, server.status, server.chunk_delay = delay, status, chunk_delay
+        server.body = body if body is not None else _collection(name)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/{name}.json"
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_fastest_valid_mirror_wins(self):
+        """测试最快的有效镜像胜出，慢镜像被取消且不留下暂存文件"""
+        _, slow_url = self._mirror('slow', chunk_delay=0.2)
+        fast, fast_url = self._mirror('fast', delay=0.1)
+        stats = MirrorStats()
+        start = time.monotonic()
+        winner = race_mirrors([slow_url, fast_url], self.path, validate=_is_valid_map_file, stats=stats)
+        self.assertEqual(winner, fast_url)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(self._read(), fast.body)
+        # 慢镜像发送完毕后发现已被取消，删除自己的暂存文件
+        time.sleep(1.2)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['world.json', 'world.json.meta.json'])
+        self.assertEqual(stats.mirrors[fast_url]['successes'], 1)
+
+    def test_errors_and_invalid_content(self):
+        """测试出错和内容无效的镜像被跳过，并记录在统计中"""
+        _, error_url = self._mirror('error', status=500)
+        _, invalid_url = self._mirror('invalid', body=b'{"features": [')
+        good, good_url = self._mirror('good', delay=0.3)
+        winner = race_mirrors([error_url, invalid_url, good_url], self.path, validate=_is_valid_map_file)
+        self.assertEqual(winner, good_url)
+        self.assertEqual(self._read(), good.body)
+
+        # 统计保存在目标文件旁，下次按健康状况排序
+        stats = MirrorStats(self.path + '.mirrors.json')
+        self.assertEqual(stats.mirrors[error_url]['failures'], 1)
+        self.assertIn('500', stats.mirrors[error_url]['last_error'])
+        self.assertEqual(stats.mirrors[invalid_url]['failures'], 1)
+        self.assertEqual(stats.order([error_url, invalid_url, good_url])[0], good_url)
+
+    def test_checksum_mismatch(self):
+        """测试校验和不匹配的镜像不会胜出"""
+        _, bad_url = self._mirror('bad')
+        good, good_url = self._mirror('good', delay=0.2)
+        winner = race_mirrors([bad_url, good_url], self.path, checksums={bad_url: '0' * 64})
+        self.assertEqual(winner, good_url)
+
+    def test_deadline(self):
+        """测试所有镜像都超过总截止时间时返回None，原有文件保持不变"""
+        with open(self.path, 'wb') as f:
+            f.write(b'old')
+        _, slow_url = self._mirror('slow', delay=1.5)
+        _, error_url = self._mirror('error', status=404)
+        start = time.monotonic()
+        self.assertIsNone(race_mirrors([slow_url, error_url], self.path, deadline=0.5, stats=MirrorStats()))
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(self._read(), b'old')
+
+    def test_stats_order(self):
+        """测试镜像排序：失败率低的在前，其次延迟低的在前，没有记录的保持原顺序"""
+        stats = MirrorStats()
+        stats.record_success('a', 2.0)
+        stats.record_success('b', 0.5)
+        stats.record_failure('c', 'timeout')
+        stats.record_success('c', 0.1)
+        self.assertEqual(stats.order(['c', 'a', 'x', 'b', 'y']), ['b', 'a', 'x', 'y', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
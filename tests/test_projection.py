@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from matplotlib.path import Path
+from src.utils.distance_calculator import destination_point, great_circle_distance_matrix
+from src.utils.projection import AzimuthalProjection, densify, parse_projection
+from src.map_generator.geometry_paths import geojson_to_paths
+from src.map_generator.projected_geometry import (
+    clear_projected_cache, project_dataset, project_points, projected_cache_stats
+)
+from src.map_generator.range_overlay import buffer_outline_path, buffer_polygons_to_path
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lons = rng.uniform(-180, 180, 500)
+        self.lats = rng.uniform(-89, 89, 500)
+
+    def test_aeqd_preserves_distance_from_center(self):
+        """方位等距投影中到中心的平面距离等于大圆距离"""
+        projection = AzimuthalProjection('aeqd', 104, 36)
+        x, y = projection.forward(self.lons, self.lats)
+        expected = great_circle_distance_matrix([36.0], [104.0], self.lats, self.lons)[0]
+        np.testing.assert_allclose(np.hypot(x, y), expected, rtol=1e-9, atol=1e-6)
+
+    def test_geodesic_circle_is_circle(self):
+        """到中心等距的点在各方位投影中都落在同一个圆上"""
+        bearings = np.arange(0, 360, 5.0)
+        lats, lons = destination_point(np.full_like(bearings, 36.0), np.full_like(bearings, 104.0),
+                                       bearings, np.full_like(bearings, 3000.0))
+        for name in ('aeqd', 'laea', 'ortho', 'stere'):
+            x, y = AzimuthalProjection(name, 104, 36).forward(lons, lats)
+            radius = np.hypot(x, y)
+            np.testing.assert_allclose(radius, radius[0], rtol=1e-9, err_msg=name)
+
+    def test_parse_projection(self):
+        self.assertIsNone(parse_projection(None))
+        self.assertIsNone(parse_projection(' '))
+        projection = parse_projection('ORTHO:116.4,39.9')
+        self.assertEqual((projection.name, projection.lon0, projection.lat0), ('ortho', 116.4, 39.9))
+        self.assertIs(parse_projection(projection), projection)
+        for spec in ('mercator', 'aeqd:104', 'aeqd:a,b', 'aeqd:200,0'):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_projection(spec)
+
+    def test_ortho_visibility_and_clamp(self):
+        """正射投影中背面的点不可见，clamp时收到边界圆上"""
+        projection = AzimuthalProjection('ortho', 0, 0)
+        self.assertEqual(projection.visible([10, 120], [0, 0]).tolist(), [True, False])
+        x, y = projection.forward(120, 0, clamp=True)
+        self.assertAlmostEqual(float(np.hypot(x, y)), projection.max_radius)
+        self.assertGreater(float(x), 0)
+        self.assertTrue(np.isnan(project_points(projection, 120, 0)[0]))
+
+    def test_densify(self):
+        """长边按最大边长插值，不跨越环之间"""
+        coords = np.array([[0, 0], [10, 0], [10, 1], [50, 50], [50, 51]], dtype=float)
+        ring_id = np.array([0, 0, 0, 1, 1])
+        dense, dense_id = densify(coords, ring_id, 2.0)
+        self.assertEqual(np.bincount(dense_id).tolist(), [7, 2])
+        self.assertLessEqual(np.abs(np.diff(dense[dense_id == 0], axis=0)).max(), 2.0)
+        np.testing.assert_array_equal(dense[dense_id == 1], coords[3:])
+
+    def test_ring_around_antipode_is_inverted(self):
+        """包含对跖点的环投影后表示为边界圆减去投影的环"""
+        projection = AzimuthalProjection('aeqd', 10, 0)
+        around_antipode = np.array([[-175, -10], [-175, 10], [-165, 10], [-165, -10]], dtype=float)
+        nearby = np.array([[10, -10], [10, 10], [20, 10], [20, -10]], dtype=float)
+        rings, kept, holes = projection.project_rings([around_antipode, nearby])
+        self.assertEqual(kept.tolist(), [0, 0, 1])
+        self.assertEqual(holes.tolist(), [False, True, False])
+        np.testing.assert_allclose(np.hypot(*rings[0].T), projection.max_radius)
+
+    def test_buffer_outline_skips_seam(self):
+        """投影后的缓冲区填充沿闭合边加密，边界线不画拆分出的180度经线"""
+        projection = AzimuthalProjection('aeqd', 104, 36)
+        polygons = [[[[-180, 40], [-180, 90], [180, 90], [180, 40], [100, 30], [-100, 30]]]]
+        fill = buffer_polygons_to_path(polygons, projection)
+        # 闭合边（-180度经线）加密后整个环都在中心北方，中心以北的极点方向被填充
+        self.assertTrue(fill.contains_point(project_points(projection, 104, 60)))
+        self.assertFalse(fill.contains_point(project_points(projection, 104, 0)))
+
+        outline = buffer_outline_path(polygons, projection)
+        seam = np.column_stack(projection.forward(np.full(10, 180.0), np.linspace(41, 89, 10)))
+        vertices = outline.vertices[~np.isnan(outline.vertices[:, 0])]
+        distances = np.min(np.hypot(*(vertices[:, None, :] - seam[None, :, :]).transpose(2, 0, 1)), axis=0)
+        self.assertGreater(distances.min(), 50)
+        self.assertEqual(outline.codes[0], Path.MOVETO)
+
+
+class TestProjectedDataset(unittest.TestCase):
+
+    def setUp(self):
+        clear_projected_cache()
+        self.cache_dir = tempfile.mkdtemp()
+        self.data = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"name": "A"},
+             "geometry": {"type": "Polygon", "coordinates": [[[100, 30], [110, 30], [110, 40], [100, 40], [100, 30]],
+                                                             [[104, 34], [106, 34], [106, 36], [104, 34]]]}},
+            {"type": "Feature", "properties": {"name": "B"},
+             "geometry": {"type": "Polygon", "coordinates": [[[-60, 30], [-50, 30], [-50, 40], [-60, 30]]]}},
+        ]}
+        self.projection = AzimuthalProjection('ortho', 104, 36)
+
+    def tearDown(self):
+        clear_projected_cache()
+        shutil.rmtree(self.cache_dir)
+
+    def test_disk_cache_round_trip(self):
+        """投影结果写入磁盘缓存，清空内存缓存后从磁盘读取相同的坐标"""
+        projected = project_dataset(self.data, self.projection, cache_dir=self.cache_dir)
+        self.assertIs(project_dataset(self.data, self.projection, cache_dir=self.cache_dir), projected)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        clear_projected_cache()
+        loaded = project_dataset(self.data, self.projection, cache_dir=self.cache_dir)
+        self.assertEqual(projected_cache_stats()["disk_hits"], 1)
+        np.testing.assert_array_equal(loaded.coords, projected.coords)
+        np.testing.assert_array_equal(loaded.ring_holes, projected.ring_holes)
+        self.assertEqual(loaded.names, ['A', 'B'])
+
+        project_dataset(self.data, AzimuthalProjection('aeqd', 104, 36), cache_dir=self.cache_dir)
+        self.assertEqual(projected_cache_stats()["misses"], 1)
+
+    def test_to_paths(self):
+        """投影数据集可以直接交给geojson_to_paths；背面的特征没有环"""
+        projected = project_dataset(self.data, self.projection)
+        paths, names = geojson_to_paths(projected, exclude_names={'A'})
+        self.assertEqual(names, ['B'])
+        self.assertEqual(len(paths[0].vertices), 0)
+        paths, names = geojson_to_paths(projected)
+        self.assertEqual(names, ['A', 'B'])
+        self.assertEqual(int(np.sum(paths[0].codes == Path.MOVETO)), 2)
+        self.assertTrue(paths[0].contains_point(project_points(self.projection, 102, 32)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import weakref
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from src.map_generator.render_context import RenderContext, create_figure
+
+
+class TestRenderContext(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.context = RenderContext(max_bases=2)
+        self.builds = 0
+
+    def tearDown(self):
+        self.context.clear()
+        shutil.rmtree(self.output_dir)
+
+    def _build(self, fig):
+        self.builds += 1
+        ax = fig.add_subplot()
+        ax.grid(True)
+        ax.plot([0, 1], [0, 1], 'ro')
+        ax.set_title('base')
+        return ax
+
+    def _overlay(self, i):
+        def draw(ax):
+            ax.plot([0, i % 7], [1, 0], label=f'r{i}')
+            ax.text(0.5, 0.5, str(i))
+            ax.legend(loc='lower right')
+            return i
+        return draw
+
+    def _render(self, i, inputs=()):
+        return self.context.render('base', (2, 1.5), 100, self._build, self._overlay(i),
+                                   output_dir=self.output_dir, filename_prefix=f'map{i}', formats='png',
+                                   inputs=inputs, output_dpi=72)
+
+    def test_headless_figure(self):
+        """无界面图形使用Agg画布，不注册到pyplot"""
+        import matplotlib.pyplot as plt
+        before = plt.get_fignums()
+        fig = create_figure((2, 2))
+        self.assertIsInstance(fig.canvas, FigureCanvasAgg)
+        self.assertEqual(plt.get_fignums(), before)
+
+    def test_base_reused_and_overlay_removed(self):
+        files, result = self._render(1)
+        self.assertEqual(result, 1)
+        self.assertEqual(files, [os.path.join(self.output_dir, 'map1.png')])
+        fig, ax, snapshot = self.context._base('base', (2, 1.5), 100, self._build, ())
+        children = len(ax.get_children())
+        for i in range(2, 5):
+            self._render(i)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(len(ax.get_children()), children)
+        self.assertIsNone(ax.get_legend())
+        self.assertEqual(self.context.stats()['renders'], 4)
+
+    def test_rebuild_when_inputs_change(self):
+        data = {'a': 1}
+        self._render(1, inputs=(data,))
+        self._render(2, inputs=(data,))
+        self.assertEqual(self.builds, 1)
+        self._render(3, inputs=({'a': 1},))
+        self.assertEqual(self.builds, 2)
+
+    def test_overlays_released(self):
+        """渲染完成后叠加层的图形元素不再被引用，连续渲染不会累积对象"""
+        import gc
+        references = []
+
+        def draw(ax):
+            artists = ax.plot([0, 1], [1, 0], label='r') + [ax.text(0.5, 0.5, 'x'), ax.legend()]
+            references.extend(weakref.ref(artist) for artist in artists)
+
+        for i in range(3):
+            self.context.render('base', (2, 1.5), 100, self._build, draw, output_dir=self.output_dir,
+                                filename_prefix='map', formats='png', output_dpi=72)
+        gc.collect()
+        self.assertEqual(len(references), 9)
+        self.assertEqual([ref for ref in references if ref() is not None], [])
+        stats = self.context.stats()
+        self.assertEqual((stats['renders'], stats['base_builds'], stats['bases']), (3, 1, 1))
+        if stats['last_rss_kb'] is not None:
+            self.assertGreaterEqual(stats['peak_rss_kb'], stats['last_rss_kb'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from src.map_generator import render_service
+from src.map_generator.render_service import RenderCache, create_server
+
+
+class TestRenderService(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        # 用很快的假渲染代替真实渲染，记录调用次数
+        patcher = mock.patch.object(render_service, 'dispatch_job', side_effect=self._fake_dispatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = create_server(port=0, cache_mb=1)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def _fake_dispatch(self, command, args):
+        self.calls.append((command, args['radius'], args['formats']))
+        time.sleep(0.3)
+        path = os.path.join(args['output_dir'], f"{args['filename']}.{args['formats']}")
+        with open(path, 'wb') as f:
+            f.write(f"{command}-{args['radius']}".encode('utf-8'))
+        return [path]
+
+    def _get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path) as response:
+                return response.status, response.headers.get('X-Render-Cache'), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, None, e.read()
+
+    def test_cache_evicts_by_bytes(self):
+        """超过容量时淘汰最久未使用的结果，超过容量的单个结果不缓存"""
+        cache = RenderCache(10)
+        cache.put('a', (b'aaaa', 'image/png', None))
+        cache.put('b', (b'bbbb', 'image/png', None))
+        cache.get('a')
+        cache.put('c', (b'cccc', 'image/png', None))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('d', (b'd' * 11, 'image/png', None))
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual((len(cache), cache.bytes), (2, 8))
+
+    def test_coalesces_identical_requests(self):
+        """相同参数的并发请求只渲染一次"""
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(self._get, ['/render/range?radius=5000'] * 4))
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(status == 200 and body == b'range-5000' for status, _, body in results))
+        self.assertEqual(sorted(outcome for _, outcome, _ in results), ['coalesced'] * 3 + ['render'])
+
+    def test_cache_hit_and_metrics(self):
+        """再次请求时返回缓存结果，/metrics报告计数和延迟分位数"""
+        self.assertEqual(self._get('/render/range?radius=5000')[1], 'render')
+        self.assertEqual(self._get('/render/range?radius=5000.0')[1], 'hit')
+        self.assertEqual(self._get('/render/range?radius=6000')[1], 'render')
+        self.assertEqual(len(self.calls), 2)
+
+        status, _, body = self._get('/metrics')
+        metrics = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertEqual((metrics['requests'], metrics['hits'], metrics['renders']), (3, 1, 2))
+        self.assertEqual(metrics['cache']['entries'], 2)
+        self.assertEqual(metrics['latency_ms']['all']['count'], 3)
+        self.assertGreaterEqual(metrics['latency_ms']['render']['p50'], 300)
+
+    def test_svgz_content_encoding(self):
+        """svgz以SVG内容类型和gzip内容编码返回"""
+        with urllib.request.urlopen(self.base_url + '/render/china?format=svgz') as response:
+            self.assertEqual(response.headers.get('Content-Type'), 'image/svg+xml')
+            self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        with urllib.request.urlopen(self.base_url + '/render/china?format=png') as response:
+            self.assertEqual(response.headers.get('Content-Type'), 'image/png')
+            self.assertIsNone(response.headers.get('Content-Encoding'))
+
+    def test_bad_requests(self):
+        """参数错误返回400，未知路径返回404"""
+        self.assertEqual(self._get('/render/ocean')[0], 400)
+        self.assertEqual(self._get('/render/range?radius=1000,2000')[0], 400)
+        self.assertEqual(self._get('/render/range?radius=nan')[0], 400)
+        self.assertEqual(self._get('/render/china?format=bmp')[0], 400)
+        self.assertEqual(self._get('/tiles')[0], 404)
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.data_handler.spatial_index import SphericalGridIndex
+from src.data_handler.country_data import COUNTRIES_DATA, get_countries_within_range
+from src.utils.distance_calculator import great_circle_distance, great_circle_distance_matrix
+
+
+class TestSphericalGridIndex(unittest.TestCase):
+
+    def setUp(self):
+        """在球面上均匀生成随机点"""
+        rng = np.random.default_rng(7)
+        self.lats = np.degrees(np.arcsin(rng.uniform(-1, 1, 5000)))
+        self.lons = rng.uniform(-180, 180, 5000)
+        self.index = SphericalGridIndex(self.lats, self.lons)
+        # 包含极点附近和180度经线附近的查询点
+        self.query_lats = np.array([89.9, -89.5, 0.0, 10.0, 60.0, 35.0])
+        self.query_lons = np.array([0.0, 179.0, 179.9, -179.99, 170.0, 105.0])
+        self.matrix = great_circle_distance_matrix(self.query_lats, self.query_lons, self.lats, self.lons)
+
+    def test_radius_matches_brute_force(self):
+        """测试半径查询与暴力计算结果一致"""
+        for radius in (100, 1500, 20000):
+            results = self.index.query_radius_batch(self.query_lats, self.query_lons, radius)
+            for row, (indices, distances) in zip(self.matrix, results):
+                self.assertEqual(set(indices), set(np.flatnonzero(row <= radius)))
+                self.assertTrue(np.all(np.diff(distances) >= 0))
+
+    def test_knn_matches_brute_force(self):
+        """测试k近邻查询与暴力计算结果一致"""
+        indices, distances = self.index.query_knn_batch(self.query_lats, self.query_lons, k=8)
+        np.testing.assert_allclose(distances, np.sort(self.matrix, axis=1)[:, :8])
+
+    def test_batch_matches_single_queries(self):
+        """测试向量化的批量查询（含分块）与逐个查询的结果完全相同"""
+        rng = np.random.default_rng(3)
+        lats = np.concatenate((self.query_lats, np.degrees(np.arcsin(rng.uniform(-1, 1, 300)))))
+        lons = np.concatenate((self.query_lons, rng.uniform(-180, 180, 300)))
+        radii = rng.uniform(0, 3000, lats.size)
+        with mock.patch('src.data_handler.spatial_index._BATCH_CHUNK_QUERIES', 64):
+            results = self.index.query_radius_batch(lats, lons, radii)
+            knn_indices, knn_distances = self.index.query_knn_batch(lats, lons, k=5)
+        for i, (indices, distances) in enumerate(results):
+            expected_indices, expected_distances = self.index.query_radius(lats[i], lons[i], radii[i])
+            np.testing.assert_array_equal(indices, expected_indices)
+            np.testing.assert_array_equal(distances, expected_distances)
+            expected_indices, expected_distances = self.index.query_knn(lats[i], lons[i], 5)
+            np.testing.assert_array_equal(knn_indices[i], expected_indices)
+            np.testing.assert_array_equal(knn_distances[i], expected_distances)
+
+    def test_save_and_load(self):
+        """测试索引序列化后查询结果不变"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'index.npz')
+            self.index.save(path)
+            loaded = SphericalGridIndex.load(path)
+            np.testing.assert_array_equal(loaded.query_radius(35, 105, 2000)[0],
+                                          self.index.query_radius(35, 105, 2000)[0])
+
+    def test_countries_within_range(self):
+        """测试基于索引的国家范围查询与距离函数逐一计算一致"""
+        expected = get_countries_within_range(35, 105, 3000, distance_func=great_circle_distance)
+        result = get_countries_within_range(35, 105, 3000)
+        self.assertEqual(set(result), set(expected))
+        index = SphericalGridIndex.from_points(COUNTRIES_DATA)
+        self.assertEqual(index.names[index.query_knn(35, 105, 1)[0][0]], '中国')
+
+    def test_countries_within_range_scalar_func(self):
+        """测试只接受标量的距离函数仍可使用（逐个国家调用）"""
+        def scalar_distance(lat1, lon1, lat2, lon2):
+            return float(great_circle_distance(float(lat1), float(lon1), float(lat2), float(lon2)))
+
+        def math_distance(lat1, lon1, lat2, lon2):
+            return math.hypot(lat2 - lat1, lon2 - lon1) * 111.0
+
+        expected = get_countries_within_range(35, 105, 3000, distance_func=great_circle_distance)
+        result = get_countries_within_range(35, 105, 3000, distance_func=scalar_distance)
+        self.assertEqual(result.keys(), expected.keys())
+        for name, distance in result.items():
+            self.assertAlmostEqual(distance, expected[name], places=6)
+        self.assertIn('中国', get_countries_within_range(35, 105, 1000, distance_func=math_distance))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import warnings
+import numpy as np
+from src.map_generator.tile_pyramid import (
+    TileScene, clip_ring, lonlat_to_mercator, parse_layers, render_tile_pyramid, tile_bounds,
+    WEB_MERCATOR_HALF
+)
+
+
+def _square(lon, lat, size):
+    return [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+
+
+class TestTilePyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        # 两个小国家和一块中国区域，其余瓦片都是海洋
+        self.sources = {
+            'world': {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {"name": "A"},
+                 "geometry": {"type": "Polygon", "coordinates": [_square(10, 10, 20)]}},
+                {"type": "Feature", "properties": {"name": "B"},
+                 "geometry": {"type": "Polygon", "coordinates": [_square(100, -40, 10)]}},
+            ]},
+            'china': {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {"name": "P"},
+                 "geometry": {"type": "Polygon", "coordinates": [_square(100, 30, 10)]}},
+            ]},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_projection_and_bounds(self):
+        """Web墨卡托投影和瓦片范围"""
+        xy = lonlat_to_mercator([[180, 0], [0, 90], [-180, -90]])
+        np.testing.assert_allclose(xy[:, 0], [WEB_MERCATOR_HALF, 0, -WEB_MERCATOR_HALF])
+        np.testing.assert_allclose(xy[1:, 1], [WEB_MERCATOR_HALF, -WEB_MERCATOR_HALF])
+        self.assertEqual(tile_bounds(0, 0, 0), (-WEB_MERCATOR_HALF, -WEB_MERCATOR_HALF,
+                                                WEB_MERCATOR_HALF, WEB_MERCATOR_HALF))
+        self.assertEqual(tile_bounds(1, 1, 0), (0, 0, WEB_MERCATOR_HALF, WEB_MERCATOR_HALF))
+
+    def test_clip_ring(self):
+        """裁剪后的环面积正确，完全在矩形外的环为空；与坐标轴平行的边不产生警告"""
+        ring = np.array([[0, 0], [4, 0], [4, 4], [0, 4]], dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            clipped = clip_ring(ring, (2, -1, 10, 3))
+        x, y = clipped[:, 0], clipped[:, 1]
+        self.assertAlmostEqual(0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)), 6.0)
+        self.assertEqual(len(clip_ring(ring, (5, 5, 6, 6))), 0)
+
+    def test_index_skips_ocean(self):
+        """空间索引只列出与几何相交的瓦片"""
+        scene = TileScene(self.sources, 3)
+        tiles = scene.tiles()
+        self.assertIn((4, 3), tiles)            # 国家A
+        self.assertNotIn((0, 0), tiles)
+        self.assertEqual(scene.clip_tile(0, 0), [])
+        self.assertLess(len(tiles), 10)
+
+    def test_parse_layers(self):
+        self.assertEqual(parse_layers('range, world'), ('world', 'range'))
+        self.assertEqual(parse_layers(None), ('world', 'china', 'range'))
+        with self.assertRaises(ValueError):
+            parse_layers('world,ocean')
+
+    def test_mbtiles_incremental(self):
+        """重新运行时只渲染内容变化的瓦片，删除不再有内容的瓦片"""
+        path = os.path.join(self.output_dir, 'tiles.mbtiles')
+        first = render_tile_pyramid(self.sources, path, 0, 3, workers=1)
+        self.assertGreater(first['rendered'], 0)
+        with sqlite3.connect(path) as connection:
+            count, = connection.execute('SELECT COUNT(*) FROM tiles').fetchone()
+            metadata = dict(connection.execute('SELECT name, value FROM metadata'))
+        self.assertEqual(count, first['rendered'])
+        self.assertEqual(metadata['format'], 'png')
+        self.assertEqual(metadata['maxzoom'], '3')
+
+        second = render_tile_pyramid(self.sources, path, 0, 3, workers=1)
+        self.assertEqual((second['rendered'], second['unchanged']), (0, first['rendered']))
+
+        # 移走国家B：只有它所在的瓦片重新渲染或删除
+        changed = copy.deepcopy(self.sources)
+        changed['world']['features'][1]['geometry']['coordinates'] = [_square(150, -40, 10)]
+        third = render_tile_pyramid(changed, path, 0, 3, workers=1)
+        self.assertGreater(third['rendered'], 0)
+        self.assertGreater(third['deleted'], 0)
+        self.assertGreater(third['unchanged'], 0)
+        with sqlite3.connect(path) as connection:
+            count, = connection.execute('SELECT COUNT(*) FROM tiles').fetchone()
+        self.assertEqual(count, third['rendered'] + third['unchanged'])
+
+    def test_directory_with_pool(self):
+        """进程池渲染的目录瓦片与单进程结果相同"""
+        serial = os.path.join(self.output_dir, 'serial')
+        parallel = os.path.join(self.output_dir, 'parallel')
+        render_tile_pyramid(self.sources, serial, 0, 2, workers=1)
+        stats = render_tile_pyramid(self.sources, parallel, 0, 2, workers=2, tiles_per_task=2)
+        files = sorted(os.path.relpath(os.path.join(root, name), parallel)
+                       for root, _, names in os.walk(parallel) for name in names if name.endswith('.png'))
+        self.assertEqual(len(files), stats['rendered'])
+        self.assertIn(os.path.join('0', '0', '0.png'), files)
+        for name in files:
+            with open(os.path.join(serial, name), 'rb') as a, open(os.path.join(parallel, name), 'rb') as b:
+                self.assertEqual(a.read(), b.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
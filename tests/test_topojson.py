@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy as np
+from src.data_handler.topojson import decode_arcs, topology_to_geojson
+from src.data_handler.world_json_loader import transform_alt_data_format
+
+# 两个共享一条边的量化矩形和一个点：
+# 共享边为第0条弧段，甲正向使用，乙通过 ~0（即-1）反向使用
+FIXTURE_TOPOLOGY = {
+    "type": "Topology",
+    "transform": {"scale": [0.5, 0.25], "translate": [100, 20]},
+    "objects": {
+        "countries": {
+            "type": "GeometryCollection",
+            "geometries": [
+                {"type": "Polygon", "id": "001", "arcs": [[0, 1]], "properties": {"name": "甲"}},
+                {"type": "MultiPolygon", "id": "002", "arcs": [[[2, -1]]], "properties": {"name": "乙"}},
+                {"type": "Point", "coordinates": [2, 2], "properties": {"name": "首都"}},
+                {"type": None, "properties": {}}
+            ]
+        }
+    },
+    "arcs": [
+        [[4, 0], [0, 4]],
+        [[4, 4], [-4, 0], [0, -4], [4, 0]],
+        [[4, 0], [4, 0], [0, 4], [-4, 0]]
+    ]
+}
+
+
+def _lonlat(points):
+    """量化坐标转换为经纬度"""
+    return np.asarray(points, dtype=np.float64) * [0.5, 0.25] + [100, 20]
+
+
+class TestTopoJSON(unittest.TestCase):
+
+    def test_decode_arcs(self):
+        """测试差分解码和坐标变换"""
+        arcs = decode_arcs(FIXTURE_TOPOLOGY)
+        np.testing.assert_allclose(arcs[0], _lonlat([[4, 0], [4, 4]]))
+        np.testing.assert_allclose(arcs[1], _lonlat([[4, 4], [0, 4], [0, 0], [4, 0]]))
+        np.testing.assert_allclose(arcs[2], _lonlat([[4, 0], [8, 0], [8, 4], [4, 4]]))
+        # 所有弧段是同一个数组的视图
+        self.assertIs(arcs[0].base, arcs[2].base)
+
+    def test_topology_to_geojson(self):
+        """测试多边形、反向共享弧段、点和空几何的转换"""
+        features = topology_to_geojson(FIXTURE_TOPOLOGY)['features']
+        self.assertEqual([f['properties'].get('name') for f in features], ['甲', '乙', '首都', None])
+        self.assertEqual(features[0]['id'], '001')
+
+        ring_a = features[0]['geometry']['coordinates'][0]
+        np.testing.assert_allclose(ring_a, _lonlat([[4, 0], [4, 4], [0, 4], [0, 0], [4, 0]]))
+        ring_b = features[1]['geometry']['coordinates'][0][0]
+        np.testing.assert_allclose(ring_b, _lonlat([[4, 0], [8, 0], [8, 4], [4, 4], [4, 0]]))
+
+        self.assertEqual(features[2]['geometry'], {"type": "Point", "coordinates": [101.0, 20.5]})
+        self.assertIsNone(features[3]['geometry'])
+
+    def test_untransformed_topology(self):
+        """测试没有transform时弧段为绝对坐标"""
+        topology = {"type": "Topology", "arcs": [[[100.0, 20.0], [110.0, 20.0], [110.0, 30.0], [100.0, 20.0]]],
+                    "objects": {"land": {"type": "Polygon", "arcs": [[0]]}}}
+        ring = topology_to_geojson(topology)['features'][0]['geometry']['coordinates'][0]
+        np.testing.assert_array_equal(ring, topology['arcs'][0])
+
+    def test_transform_alt_data_format(self):
+        """测试世界地图备用数据源的转换"""
+        data = transform_alt_data_format(FIXTURE_TOPOLOGY)
+        self.assertEqual(len(data['features']), 4)
+        self.assertEqual(data['features'][3]['properties']['name'], 'Country_3')
+
+
+if __name__ == '__main__':
+    unittest.main()